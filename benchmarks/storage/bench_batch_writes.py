@@ -0,0 +1,88 @@
+"""
+Batch Write Benchmark
+=====================
+
+Compares per-key LocalFirstStorage.write against write_many for each
+persistent backend.
+
+Usage:
+    python benchmarks/storage/bench_batch_writes.py --records 20000
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+from cosmic_os.storage import LocalFirstStorage, StorageBackend
+
+
+def knowledge_entry(i: int) -> dict:
+    """A small, representative knowledge entry"""
+    return {
+        "author": f"node-{i % 17}",
+        "scope": "federation",
+        "created": 1_700_000_000 + i,
+        "body": f"entry {i} " * 8
+    }
+
+
+async def run_per_key(backend: StorageBackend, records: int, encrypt: bool) -> float:
+    """Write records one coroutine call at a time; returns seconds"""
+    storage = LocalFirstStorage(Path(tempfile.mkdtemp()), backend=backend)
+    start = time.perf_counter()
+    for i in range(records):
+        await storage.write(f"node/bench/entries/{i:08d}", knowledge_entry(i), encrypt=encrypt)
+    elapsed = time.perf_counter() - start
+    await storage.close()
+    return elapsed
+
+
+async def run_batched(
+    backend: StorageBackend,
+    records: int,
+    encrypt: bool,
+    batch_size: int
+) -> float:
+    """Write records through write_many; returns seconds"""
+    storage = LocalFirstStorage(Path(tempfile.mkdtemp()), backend=backend)
+    items = ((f"node/bench/entries/{i:08d}", knowledge_entry(i)) for i in range(records))
+    start = time.perf_counter()
+    await storage.write_many(items, encrypt=encrypt, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    await storage.close()
+    return elapsed
+
+
+async def main(args: argparse.Namespace) -> None:
+    results = []
+    for backend in (StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB):
+        per_key = await run_per_key(backend, args.records, not args.no_encrypt)
+        batched = await run_batched(backend, args.records, not args.no_encrypt, args.batch_size)
+        results.append({
+            "backend": backend.value,
+            "records": args.records,
+            "per_key_writes_per_sec": round(args.records / per_key),
+            "batched_writes_per_sec": round(args.records / batched),
+            "speedup": round(per_key / batched, 2)
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for row in results:
+        print(
+            f"{row['backend']:>10}: per-key {row['per_key_writes_per_sec']:>8}/s  "
+            f"batched {row['batched_writes_per_sec']:>8}/s  ({row['speedup']}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--no-encrypt", action="store_true")
+    parser.add_argument("--json", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+"""
+Compression Benchmark
+=====================
+
+Measures bytes on disk, write throughput and read latency for each
+compression codec on representative knowledge-entry payloads.
+
+Usage:
+    python benchmarks/storage/bench_compression.py --records 5000
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+
+from cosmic_os.storage import LocalFirstStorage, StorageBackend
+
+
+WORDS = (
+    "constitutional sovereignty consent federation node bloom knowledge "
+    "entry peer local first sync harmony organic trust ledger proposal"
+).split()
+
+
+def knowledge_entry(i: int, rng: random.Random) -> dict:
+    """A knowledge entry with prose, tags and a small embedding"""
+    return {
+        "id": f"entry-{i:08d}",
+        "author": f"node-{i % 17}",
+        "scope": "federation",
+        "created": 1_700_000_000 + i,
+        "tags": rng.sample(WORDS, 4),
+        "body": " ".join(rng.choice(WORDS) for _ in range(rng.randint(60, 400))),
+        "embedding": [round(rng.uniform(-1, 1), 6) for _ in range(32)]
+    }
+
+
+def disk_bytes(path: Path) -> int:
+    """Total size of every file under path"""
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+async def run(backend: StorageBackend, codec, records: int, reads: int) -> dict:
+    """Write then randomly read records with one codec"""
+    path = Path(tempfile.mkdtemp())
+    storage = LocalFirstStorage(path, backend=backend, compression=codec)
+    rng = random.Random(42)
+    items = [(f"node/bench/entries/{i:08d}", knowledge_entry(i, rng)) for i in range(records)]
+    logical = sum(len(json.dumps(data, separators=(",", ":"))) for _, data in items)
+
+    start = time.perf_counter()
+    await storage.write_many(items)
+    write_seconds = time.perf_counter() - start
+    await storage.close()
+
+    # Reopen so reads come from disk rather than warm in-process state
+    storage = LocalFirstStorage(path, backend=backend)
+    latencies = []
+    for _ in range(reads):
+        key = items[rng.randrange(records)][0]
+        start = time.perf_counter()
+        await storage.read(key)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    stats = await storage.get_storage_stats()
+    await storage.close()
+
+    latencies.sort()
+    return {
+        "backend": backend.value,
+        "codec": codec or "none",
+        "records": records,
+        "logical_bytes": logical,
+        "stored_bytes": stats["total_size_bytes"],
+        "disk_bytes": disk_bytes(path),
+        "ratio": round(stats["total_size_bytes"] / logical, 3),
+        "writes_per_sec": round(records / write_seconds),
+        "read_p50_us": round(statistics.median(latencies), 1),
+        "read_p99_us": round(latencies[int(len(latencies) * 0.99) - 1], 1)
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    results = []
+    for backend in (StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB):
+        for codec in (None, "zlib", "lzma"):
+            results.append(await run(backend, codec, args.records, args.reads))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for row in results:
+        print(
+            f"{row['backend']:>10} {row['codec']:>5}: stored {row['stored_bytes']:>10} B "
+            f"(x{row['ratio']})  disk {row['disk_bytes']:>10} B  "
+            f"{row['writes_per_sec']:>7} writes/s  "
+            f"read p50 {row['read_p50_us']:>7} us  p99 {row['read_p99_us']:>7} us"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--records", type=int, default=5_000)
+    parser.add_argument("--reads", type=int, default=2_000)
+    parser.add_argument("--json", action="store_true")
+    asyncio.run(main(parser.parse_args()))
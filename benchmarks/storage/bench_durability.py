@@ -0,0 +1,98 @@
+"""
+Durability Benchmark
+====================
+
+Measures per-write latency (p50/p99) and throughput of each durability
+mode, with a single writer and with many concurrent writers sharing
+group commits.
+
+Usage:
+    python benchmarks/storage/bench_durability.py --writes 2000 --concurrency 32
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+
+from cosmic_os.storage import Durability, LocalFirstStorage, StorageBackend
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[max(0, int(len(sorted_values) * fraction) - 1)]
+
+
+async def run(
+    backend: StorageBackend,
+    durability: Durability,
+    writes: int,
+    concurrency: int,
+    group_commit_ms: float
+) -> dict:
+    """Issue writes from concurrent tasks and time each one"""
+    storage = LocalFirstStorage(
+        Path(tempfile.mkdtemp()),
+        backend=backend,
+        durability=durability,
+        group_commit_ms=group_commit_ms
+    )
+    record = {"kind": "governance-record", "body": "x" * 512}
+    latencies = []
+
+    async def writer(worker: int) -> None:
+        for i in range(worker, writes, concurrency):
+            start = time.perf_counter()
+            await storage.write(key=f"bench/{i:08d}", data=record)
+            latencies.append((time.perf_counter() - start) * 1e6)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(worker) for worker in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    syncs = storage.engine.stats().get("syncs", 0)
+    await storage.close()
+
+    latencies.sort()
+    return {
+        "backend": backend.value,
+        "durability": durability.value,
+        "concurrency": concurrency,
+        "writes": writes,
+        "writes_per_sec": round(writes / elapsed),
+        "p50_us": round(statistics.median(latencies), 1),
+        "p99_us": round(percentile(latencies, 0.99), 1),
+        "syncs": syncs
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    results = []
+    for backend in (StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB):
+        for durability in Durability:
+            for concurrency in (1, args.concurrency):
+                results.append(await run(
+                    backend, durability, args.writes, concurrency, args.group_commit_ms
+                ))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for row in results:
+        print(
+            f"{row['backend']:>10} {row['durability']:>8} x{row['concurrency']:<3}: "
+            f"{row['writes_per_sec']:>7} writes/s  "
+            f"p50 {row['p50_us']:>9} us  p99 {row['p99_us']:>9} us  "
+            f"{row['syncs']:>6} syncs"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--writes", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--group-commit-ms", type=float, default=5.0)
+    parser.add_argument("--json", action="store_true")
+    asyncio.run(main(parser.parse_args()))
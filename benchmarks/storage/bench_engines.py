@@ -0,0 +1,206 @@
+"""
+Storage Engine Benchmark
+========================
+
+Measures write and read throughput, latency percentiles, peak memory and
+disk amplification of each backend across value sizes and concurrency
+levels. Every case runs in a fresh interpreter, so its memory high-water
+mark is its own and no case inherits another's warm state.
+
+Usage:
+    python benchmarks/storage/bench_engines.py --records 5000 --output engines.json
+"""
+
+from datetime import datetime
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from cosmic_os.storage import LocalFirstStorage, StorageBackend
+
+
+BACKENDS = (StorageBackend.MEMORY, StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB)
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[max(0, int(len(sorted_values) * fraction) - 1)]
+
+
+def disk_bytes(path: Path) -> int:
+    """Total size of every file under path"""
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def peak_rss_bytes() -> int:
+    """High-water mark of this process's resident memory"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+
+
+def latency_summary(prefix: str, latencies: list, elapsed: float) -> dict:
+    """Throughput and latency percentiles of one phase"""
+    latencies.sort()
+    return {
+        f"{prefix}_ops_per_sec": round(len(latencies) / elapsed),
+        f"{prefix}_p50_us": round(statistics.median(latencies), 1),
+        f"{prefix}_p95_us": round(percentile(latencies, 0.95), 1),
+        f"{prefix}_p99_us": round(percentile(latencies, 0.99), 1)
+    }
+
+
+async def timed(operations: list, concurrency: int) -> tuple:
+    """Await operation factories from concurrent tasks; returns (latencies in us, seconds)"""
+    latencies = []
+
+    async def worker(offset: int) -> None:
+        for i in range(offset, len(operations), concurrency):
+            start = time.perf_counter()
+            await operations[i]()
+            latencies.append((time.perf_counter() - start) * 1e6)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+async def run_case(case: dict) -> dict:
+    """Write then randomly read one backend at one value size and concurrency"""
+    backend = StorageBackend(case["backend"])
+    records, value_size, concurrency = case["records"], case["value_size"], case["concurrency"]
+    path = Path(tempfile.mkdtemp())
+    rng = random.Random(42)
+    keys = [f"bench/{i:08d}" for i in range(records)]
+    baseline_rss = peak_rss_bytes()
+
+    storage = LocalFirstStorage(path, backend=backend)
+    # Incompressible values, so amplification reflects the engine alone; each
+    # is sliced from a shared pool at write time so they never sit in memory twice
+    pool = rng.randbytes(2 * value_size)
+    writes = [
+        (lambda key=key, i=i % value_size: storage.write(
+            key, pool[i:i + value_size], encrypt=case["encrypt"]
+        ))
+        for i, key in enumerate(keys)
+    ]
+    write_latencies, write_seconds = await timed(writes, concurrency)
+
+    if backend != StorageBackend.MEMORY:
+        await storage.close()
+        stored_on_disk = disk_bytes(path)
+        # Reopen so reads come from disk rather than warm in-process state
+        storage = LocalFirstStorage(path, backend=backend)
+    else:
+        stored_on_disk = 0
+
+    reads = [
+        (lambda key=keys[rng.randrange(records)]: storage.read(key))
+        for _ in range(case["reads"])
+    ]
+    read_latencies, read_seconds = await timed(reads, concurrency)
+    await storage.close()
+
+    logical = records * value_size
+    peak = peak_rss_bytes()
+    return {
+        "backend": backend.value,
+        "value_size": value_size,
+        "concurrency": concurrency,
+        "records": records,
+        "encrypt": case["encrypt"],
+        **latency_summary("write", write_latencies, write_seconds),
+        **latency_summary("read", read_latencies, read_seconds),
+        "peak_rss_bytes": peak,
+        "memory_amplification": round((peak - baseline_rss) / logical, 3),
+        "logical_bytes": logical,
+        "disk_bytes": stored_on_disk,
+        "disk_amplification": round(stored_on_disk / logical, 3) if stored_on_disk else None
+    }
+
+
+def run_isolated(case: dict) -> dict:
+    """Run one case in a child interpreter and parse its JSON result"""
+    completed = subprocess.run(
+        [sys.executable, __file__, "--case", json.dumps(case)],
+        check=True,
+        capture_output=True,
+        text=True
+    )
+    return json.loads(completed.stdout)
+
+
+def main(args: argparse.Namespace) -> None:
+    if args.case:
+        print(json.dumps(asyncio.run(run_case(json.loads(args.case)))))
+        return
+
+    started_at = datetime.utcnow()
+    results = []
+    for backend in args.backends:
+        for value_size in args.value_sizes:
+            for concurrency in args.concurrency:
+                results.append(run_isolated({
+                    "backend": backend,
+                    "records": args.records,
+                    "reads": args.reads,
+                    "value_size": value_size,
+                    "concurrency": concurrency,
+                    "encrypt": not args.no_encrypt
+                }))
+
+    report = {
+        "benchmark": "storage_engines",
+        "started_at": started_at.isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "records": args.records,
+            "reads": args.reads,
+            "encrypt": not args.no_encrypt
+        },
+        "results": results
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for row in results:
+        amplification = row["disk_amplification"]
+        print(
+            f"{row['backend']:>10} {row['value_size']:>7} B x{row['concurrency']:<3}: "
+            f"write {row['write_ops_per_sec']:>7}/s p99 {row['write_p99_us']:>9} us  "
+            f"read {row['read_ops_per_sec']:>7}/s p99 {row['read_p99_us']:>9} us  "
+            f"mem x{row['memory_amplification']:<6} "
+            f"disk x{amplification if amplification is not None else '-'}"
+        )
+
+
+def csv_of(kind):
+    """argparse type for comma-separated lists"""
+    return lambda text: [kind(item) for item in text.split(",") if item]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--records", type=int, default=5_000)
+    parser.add_argument("--reads", type=int, default=5_000)
+    parser.add_argument(
+        "--backends", type=csv_of(str), default=[backend.value for backend in BACKENDS]
+    )
+    parser.add_argument("--value-sizes", type=csv_of(int), default=[128, 4096, 65536])
+    parser.add_argument("--concurrency", type=csv_of(int), default=[1, 16])
+    parser.add_argument("--no-encrypt", action="store_true")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    main(parser.parse_args())
@@ -0,0 +1,247 @@
+"""
+Crash Recovery Harness
+======================
+
+Kills a writer process with SIGKILL in the middle of a batch, reopens
+the store it leaves behind and checks that recovery is correct: every
+acknowledged write is present, no key holds a value that was never
+written or was already superseded by an acknowledged write, the counters
+agree with the keys actually stored, and the store accepts new writes.
+LOCAL_DB batches are transactions, so there a batch must also survive
+entirely or not at all.
+
+Usage:
+    python benchmarks/storage/crash_recovery.py --trials 20 --output crash.json
+"""
+
+from datetime import datetime
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from cosmic_os.storage import LocalFirstStorage, StorageBackend
+
+
+BACKENDS = (StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB, StorageBackend.TIERED)
+ATOMIC_BATCHES = (StorageBackend.LOCAL_DB,)
+
+
+def batch_keys(batch: int, batch_size: int, keyspace: int) -> list:
+    """Keys written by a batch; consecutive batches overlap by half"""
+    start = batch * (batch_size // 2)
+    return sorted({f"crash/{(start + j) % keyspace:06d}" for j in range(batch_size)})
+
+
+def batch_value(batch: int, key: str, value_size: int) -> dict:
+    """The value a batch writes to a key"""
+    return {"batch": batch, "key": key, "pad": "x" * value_size}
+
+
+async def write_until_killed(args: argparse.Namespace) -> None:
+    """Writer process body: announce each batch, write it, acknowledge it"""
+    storage = LocalFirstStorage(
+        Path(args.writer), backend=StorageBackend(args.backend), durability=args.durability
+    )
+    batch = 0
+    while True:
+        keys = batch_keys(batch, args.batch_size, args.keyspace)
+        print(f"start {batch}", flush=True)
+        await storage.write_many(
+            ((key, batch_value(batch, key, args.value_size)) for key in keys),
+            batch_size=len(keys)
+        )
+        print(f"done {batch}", flush=True)
+        batch += 1
+
+
+async def verify(path: Path, backend: StorageBackend, started: int, acknowledged: int, args) -> dict:
+    """Reopen a crashed store and check it against what the writer reported"""
+    errors = []
+    start = time.perf_counter()
+    storage = LocalFirstStorage(path, backend=backend)
+    recovery_ms = (time.perf_counter() - start) * 1000
+
+    writers = {}  # key -> batches that wrote it, ascending
+    for batch in range(started + 1):
+        for key in batch_keys(batch, args.batch_size, args.keyspace):
+            writers.setdefault(key, []).append(batch)
+
+    stored = await storage.list_keys()
+    values = await storage.read_many(stored)
+    for key in stored:
+        if key not in writers:
+            errors.append(f"{key}: never written")
+    in_flight_seen = 0
+    for key, batches in writers.items():
+        floor = max((b for b in batches if b <= acknowledged), default=None)
+        value = values.get(key)
+        if value is None:
+            if floor is not None:
+                errors.append(f"{key}: lost acknowledged batch {floor}")
+            continue
+        if value.get("key") != key or value.get("batch") not in batches:
+            errors.append(f"{key}: holds a value that was never written to it")
+        elif floor is not None and value["batch"] < floor:
+            errors.append(f"{key}: batch {value['batch']} resurfaced over acknowledged {floor}")
+        if value.get("batch") == started and started > acknowledged:
+            in_flight_seen += 1
+
+    in_flight_keys = len(batch_keys(started, args.batch_size, args.keyspace))
+    partial_batch = 0 < in_flight_seen < in_flight_keys
+    if partial_batch and backend in ATOMIC_BATCHES:
+        errors.append(f"batch {started} recovered {in_flight_seen} of {in_flight_keys} keys")
+
+    stats = await storage.get_storage_stats()
+    if stats["total_items"] != len(stored):
+        errors.append(f"counters report {stats['total_items']} items, {len(stored)} stored")
+
+    probe = {"after": "crash"}
+    await storage.write("probe/after-crash", probe)
+    if await storage.read("probe/after-crash") != probe:
+        errors.append("store does not accept writes after recovery")
+    await storage.close()
+
+    return {
+        "recovery_ms": round(recovery_ms, 2),
+        "keys_stored": len(stored),
+        "in_flight_keys_recovered": in_flight_seen,
+        "partial_batch": partial_batch,
+        "errors": errors[:20],
+        "passed": not errors
+    }
+
+
+def run_trial(backend: StorageBackend, trial: int, args: argparse.Namespace) -> dict:
+    """Start a writer, kill it mid-batch and verify what it left behind"""
+    rng = random.Random(args.seed + trial)
+    path = Path(tempfile.mkdtemp())
+    kill_at = rng.randint(args.min_batches, args.max_batches)
+    writer = subprocess.Popen(
+        [
+            sys.executable, __file__, "--writer", str(path),
+            "--backend", backend.value, "--durability", args.durability,
+            "--batch-size", str(args.batch_size), "--keyspace", str(args.keyspace),
+            "--value-size", str(args.value_size)
+        ],
+        stdout=subprocess.PIPE,
+        text=True
+    )
+
+    started = acknowledged = -1
+
+    def consume(line: str) -> None:
+        nonlocal started, acknowledged
+        event, _, batch = line.partition(" ")
+        if event == "start":
+            started = int(batch)
+        elif event == "done":
+            acknowledged = int(batch)
+
+    for line in writer.stdout:
+        consume(line.strip())
+        if started >= kill_at:
+            # Land somewhere inside the batch that just started
+            time.sleep(rng.uniform(0, args.kill_window_ms) / 1000)
+            break
+    os.kill(writer.pid, signal.SIGKILL)
+    writer.wait()
+    for line in writer.stdout.read().splitlines():
+        consume(line.strip())
+
+    result = asyncio.run(verify(path, backend, started, acknowledged, args))
+    return {
+        "backend": backend.value,
+        "trial": trial,
+        "durability": args.durability,
+        "batches_started": started + 1,
+        "batches_acknowledged": acknowledged + 1,
+        **result
+    }
+
+
+def main(args: argparse.Namespace) -> int:
+    if args.writer:
+        asyncio.run(write_until_killed(args))
+        return 0
+
+    started_at = datetime.utcnow()
+    trials = [
+        run_trial(StorageBackend(backend), trial, args)
+        for backend in args.backends
+        for trial in range(args.trials)
+    ]
+    summary = {
+        backend: {
+            "trials": sum(1 for t in trials if t["backend"] == backend),
+            "passed": sum(1 for t in trials if t["backend"] == backend and t["passed"]),
+            "partial_batches": sum(
+                1 for t in trials if t["backend"] == backend and t["partial_batch"]
+            ),
+            "max_recovery_ms": max(
+                (t["recovery_ms"] for t in trials if t["backend"] == backend), default=0
+            )
+        }
+        for backend in args.backends
+    }
+    report = {
+        "benchmark": "crash_recovery",
+        "started_at": started_at.isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "trials": args.trials,
+            "durability": args.durability,
+            "batch_size": args.batch_size,
+            "keyspace": args.keyspace,
+            "value_size": args.value_size,
+            "seed": args.seed
+        },
+        "summary": summary,
+        "trials": trials
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for backend, row in summary.items():
+            print(
+                f"{backend:>10}: {row['passed']}/{row['trials']} recovered correctly  "
+                f"{row['partial_batches']} partial batches  "
+                f"recovery <= {row['max_recovery_ms']} ms"
+            )
+        for trial in trials:
+            for error in trial["errors"]:
+                print(f"  {trial['backend']} trial {trial['trial']}: {error}")
+    return 0 if all(trial["passed"] for trial in trials) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--trials", type=int, default=10)
+    parser.add_argument(
+        "--backends", type=lambda text: text.split(","),
+        default=[backend.value for backend in BACKENDS]
+    )
+    parser.add_argument("--durability", default="buffered", choices=["sync", "group", "buffered"])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--keyspace", type=int, default=20_000)
+    parser.add_argument("--value-size", type=int, default=256)
+    parser.add_argument("--min-batches", type=int, default=2)
+    parser.add_argument("--max-batches", type=int, default=40)
+    parser.add_argument("--kill-window-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--writer", help=argparse.SUPPRESS)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    sys.exit(main(parser.parse_args()))
@@ -6,7 +6,13 @@ Implements the constitutional validation and enforcement mechanisms
 defined in Article II (Digital Bill of Rights).
 """
 
-from .validator import ConstitutionalValidator
+from .validator import ConstitutionalValidator, ConstitutionalViolationError, ViolationType
 from .rights import DigitalRight, Article
 
-__all__ = ["ConstitutionalValidator", "DigitalRight", "Article"]
+__all__ = [
+    "ConstitutionalValidator",
+    "ConstitutionalViolationError",
+    "ViolationType",
+    "DigitalRight",
+    "Article"
+]
@@ -20,6 +20,22 @@ class ViolationType(Enum):
     ACCOUNTABILITY_FAILURE = "accountability_failure"
 
 
+class ConstitutionalViolationError(Exception):
+    """Raised when an operation would violate a constitutional right"""
+
+    def __init__(self, violation_type: ViolationType, details: str):
+        """
+        Initialize the error
+
+        Args:
+            violation_type: Right that would be violated
+            details: Human-readable explanation
+        """
+        self.violation_type = violation_type
+        self.details = details
+        super().__init__(f"Constitutional Violation: {violation_type.value} - {details}")
+
+
 @dataclass
 class ValidationResult:
     """Result of constitutional validation"""
@@ -10,12 +10,17 @@ from .zero_knowledge import (
     ZeroKnowledgeEncryption,
     EncryptionAlgorithm,
     KeyDerivationFunction,
-    EncryptedData
+    EncryptedData,
+    WrappedKey
 )
+from .key_derivation import DerivedKeyCache, shutdown_kdf_executor
 
 __all__ = [
     "ZeroKnowledgeEncryption",
     "EncryptionAlgorithm",
     "KeyDerivationFunction",
-    "EncryptedData"
+    "EncryptedData",
+    "WrappedKey",
+    "DerivedKeyCache",
+    "shutdown_kdf_executor"
 ]
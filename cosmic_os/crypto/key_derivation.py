@@ -0,0 +1,204 @@
+"""
+Passphrase Key Derivation
+=========================
+
+PBKDF2, scrypt and Argon2id derivation of 256-bit keys from user
+passphrases, a shared process pool that keeps the deliberately slow KDFs
+off the event loop, and a short-lived cache of keys already derived in
+this session.
+
+Everything here runs CLIENT-SIDE. Passphrases and derived keys are only
+ever handed to worker processes of this same client, never serialized to
+disk or sent anywhere else.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Mapping, Optional, Tuple
+import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+
+try:
+    from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
+except ImportError:  # cryptography < 44; ARGON2 is then unavailable
+    Argon2id = None
+
+
+KEY_SIZE = 32
+
+DEFAULT_KDF_PARAMS: Dict[str, Dict[str, int]] = {
+    "pbkdf2": {"iterations": 600_000},
+    "scrypt": {"n": 2 ** 17, "r": 8, "p": 1},
+    "argon2": {"time_cost": 3, "memory_cost": 64 * 1024, "parallelism": 4}
+}
+
+
+def derive(kdf: str, passphrase: bytes, salt: bytes, params: Mapping[str, int]) -> bytes:
+    """
+    Derive a 256-bit key; module level so process pool workers can run it
+
+    Args:
+        kdf: KeyDerivationFunction value ("pbkdf2", "scrypt" or "argon2")
+        passphrase: UTF-8 encoded passphrase
+        salt: Random salt
+        params: Cost parameters for the KDF (see DEFAULT_KDF_PARAMS)
+
+    Returns:
+        Derived key
+
+    Raises:
+        ValueError: If the KDF is unknown
+        RuntimeError: If ARGON2 is requested but unsupported by cryptography
+    """
+    if kdf == "pbkdf2":
+        return hashlib.pbkdf2_hmac(
+            "sha256", passphrase, salt, params["iterations"], dklen=KEY_SIZE
+        )
+    elif kdf == "scrypt":
+        n, r, p = params["n"], params["r"], params["p"]
+        return hashlib.scrypt(
+            passphrase, salt=salt, n=n, r=r, p=p,
+            maxmem=129 * n * r * p + (1 << 20), dklen=KEY_SIZE
+        )
+    elif kdf == "argon2":
+        if Argon2id is None:
+            raise RuntimeError("Argon2 key derivation requires cryptography >= 44")
+        return Argon2id(
+            salt=salt,
+            length=KEY_SIZE,
+            iterations=params["time_cost"],
+            lanes=params["parallelism"],
+            memory_cost=params["memory_cost"]
+        ).derive(passphrase)
+    else:
+        raise ValueError(f"Unknown key derivation function: {kdf}")
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def kdf_executor() -> ProcessPoolExecutor:
+    """
+    Shared process pool for key derivation, created on first use
+
+    Workers are spawned rather than forked, so they never inherit the
+    locks or key material of a threaded parent. The pool is sized to the
+    CPU count, capped at 4 because scrypt and Argon2 are memory-hard.
+
+    Returns:
+        The pool
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=min(4, os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def shutdown_kdf_executor() -> None:
+    """Stop the shared key derivation pool; the next derivation restarts it"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+class DerivedKeyCache:
+    """
+    Time-limited, in-memory cache of keys derived from passphrases
+
+    Entries are keyed by the KDF, salt and cost parameters plus a keyed
+    hash of the passphrase, so a wrong passphrase never hits the cached
+    key of the right one and the passphrase itself is never held. Each
+    entry expires ttl seconds after it was derived; wipe() zeroes and
+    drops them all, e.g. when the node locks.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        """
+        Initialize the cache
+
+        Args:
+            ttl: Seconds a derived key stays cached (0 disables caching)
+        """
+        self.ttl = ttl
+        self._secret = secrets.token_bytes(32)
+        self._entries: Dict[Tuple, Tuple[bytearray, float]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(time.monotonic())
+            return len(self._entries)
+
+    def cache_key(
+        self,
+        kdf: str,
+        passphrase: bytes,
+        salt: bytes,
+        params: Mapping[str, Any]
+    ) -> Tuple:
+        """
+        Build the lookup key for a derivation
+
+        Args:
+            kdf: KeyDerivationFunction value
+            passphrase: UTF-8 encoded passphrase
+            salt: Salt
+            params: Cost parameters
+
+        Returns:
+            Hashable cache key
+        """
+        tag = hmac.new(self._secret, passphrase, hashlib.sha256).digest()
+        return (kdf, bytes(salt), tuple(sorted(params.items())), tag)
+
+    def get(self, cache_key: Tuple) -> Optional[bytes]:
+        """
+        Look up a derived key
+
+        Args:
+            cache_key: Key from cache_key()
+
+        Returns:
+            The derived key, or None if absent or expired
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._entries.get(cache_key)
+            return bytes(entry[0]) if entry else None
+
+    def put(self, cache_key: Tuple, key: bytes) -> None:
+        """
+        Cache a derived key
+
+        Args:
+            cache_key: Key from cache_key()
+            key: Derived key
+        """
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[cache_key] = (bytearray(key), time.monotonic() + self.ttl)
+
+    def wipe(self) -> None:
+        """Zero and drop every cached key"""
+        with self._lock:
+            for key, _ in self._entries.values():
+                key[:] = bytes(len(key))
+            self._entries.clear()
+
+    def _expire(self, now: float) -> None:
+        """Zero and drop entries past their deadline; caller holds _lock"""
+        for cache_key in [k for k, (_, deadline) in self._entries.items() if deadline <= now]:
+            key, _ = self._entries.pop(cache_key)
+            key[:] = bytes(len(key))
@@ -0,0 +1,325 @@
+"""
+Streaming Encryption
+====================
+
+Chunked AEAD for payloads too large to hold in memory, such as exports.
+
+A stream is a header followed by fixed-size chunks, each sealed on its
+own. The header carries the algorithm, chunk size and a random salt; the
+salt and the caller's key derive a key used by this stream only, so chunk
+nonces can simply be derived from the chunk index. The index and a final
+flag are bound into both the nonce and the associated data of every
+chunk, so chunks cannot be reordered, dropped, duplicated or the stream
+cut short at a chunk boundary without decryption failing. Chunks depend
+on nothing but their index, so they can be sealed and opened in parallel.
+
+Layout:
+    header = magic(4) || algorithm(1) || chunk_size(4) || salt(16)
+    chunk i = AEAD(stream_key, nonce=i(11) || final(1),
+                   aad=header || i(8) || final(1) || associated_data)
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Callable, Iterable, Iterator, Optional, Tuple
+import secrets
+import struct
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+
+STREAM_MAGIC = b"CZS1"
+HEADER = struct.Struct(">4sBI16s")
+TAG_SIZE = 16
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+
+_ALGORITHMS = {"aes-256-gcm": (1, AESGCM), "chacha20-poly1305": (2, ChaCha20Poly1305)}
+_ALGORITHM_CODES = {code: cipher for code, cipher in _ALGORITHMS.values()}
+
+
+def _stream_cipher(cipher: Callable, key: bytes, header: bytes):
+    """AEAD bound to a key derived for one stream"""
+    if len(key) != 32:
+        raise ValueError("Encryption key must be 256 bits")
+    stream_key = HKDF(
+        algorithm=hashes.SHA256(), length=32, salt=header, info=b"cosmic-os/stream/v1"
+    ).derive(key)
+    return cipher(stream_key)
+
+
+class StreamSealer:
+    """Seals the chunks of one stream"""
+
+    def __init__(
+        self,
+        algorithm: str,
+        key: bytes,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        associated_data: Optional[bytes] = None
+    ):
+        """
+        Start a stream
+
+        Args:
+            algorithm: EncryptionAlgorithm value
+            key: 256-bit encryption key
+            chunk_size: Plaintext bytes per chunk
+            associated_data: Authenticated with every chunk, not stored
+
+        Raises:
+            ValueError: If the algorithm or chunk size is unsupported
+        """
+        if algorithm not in _ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f"Chunk size must be between 1 and {MAX_CHUNK_SIZE} bytes")
+        code, cipher = _ALGORITHMS[algorithm]
+        self.chunk_size = chunk_size
+        self.header = HEADER.pack(STREAM_MAGIC, code, chunk_size, secrets.token_bytes(16))
+        self._associated_data = associated_data or b""
+        self._cipher = _stream_cipher(cipher, key, self.header)
+
+    def seal(self, index: int, chunk: bytes, final: bool) -> bytes:
+        """Seal the chunk at an index; exactly the last chunk is final"""
+        return self._cipher.encrypt(
+            _nonce(index, final), chunk, _aad(self.header, index, final, self._associated_data)
+        )
+
+
+class StreamOpener:
+    """Opens the chunks of one stream"""
+
+    def __init__(self, key: bytes, header: bytes, associated_data: Optional[bytes] = None):
+        """
+        Resume a stream from its header
+
+        Args:
+            key: 256-bit encryption key
+            header: The first HEADER.size bytes of the stream
+            associated_data: Must match what the stream was sealed with
+
+        Raises:
+            ValueError: If the header is not a stream header
+        """
+        if len(header) != HEADER.size:
+            raise ValueError("Decryption failed: stream is truncated")
+        magic, code, chunk_size, _ = HEADER.unpack(header)
+        if magic != STREAM_MAGIC or code not in _ALGORITHM_CODES or not 0 < chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError("Decryption failed: not an encrypted stream")
+        self.chunk_size = chunk_size
+        self.header = header
+        self._associated_data = associated_data or b""
+        self._cipher = _stream_cipher(_ALGORITHM_CODES[code], key, header)
+
+    def open(self, index: int, sealed: bytes, final: bool) -> bytes:
+        """
+        Open the chunk at an index
+
+        Raises:
+            ValueError: If the chunk was altered, moved or the stream cut short
+        """
+        try:
+            return self._cipher.decrypt(
+                _nonce(index, final), sealed, _aad(self.header, index, final, self._associated_data)
+            )
+        except InvalidTag as e:
+            raise ValueError(
+                f"Decryption failed: chunk {index} is corrupted, out of order or truncated"
+            ) from e
+
+
+def _nonce(index: int, final: bool) -> bytes:
+    return index.to_bytes(11, "big") + (b"\x01" if final else b"\x00")
+
+
+def _aad(header: bytes, index: int, final: bool, associated_data: bytes) -> bytes:
+    return header + index.to_bytes(8, "big") + (b"\x01" if final else b"\x00") + associated_data
+
+
+def _read_exact(source: BinaryIO, size: int) -> bytes:
+    """Read size bytes, fewer only at end of input"""
+    data = source.read(size)
+    if len(data) == size or not data:
+        return data
+    parts = [data]
+    remaining = size - len(data)
+    while remaining:
+        more = source.read(remaining)
+        if not more:
+            break
+        parts.append(more)
+        remaining -= len(more)
+    return b"".join(parts)
+
+
+def _blocks(source: BinaryIO, size: int, allow_empty: bool) -> Iterator[Tuple[int, bytes, bool]]:
+    """(index, block, final) of a source, reading one block ahead to spot the last"""
+    current = _read_exact(source, size)
+    index = 0
+    while True:
+        following = _read_exact(source, size) if len(current) == size else b""
+        final = not following
+        if current or allow_empty:
+            yield index, current, final
+        if final:
+            return
+        current = following
+        index += 1
+
+
+def _ordered(fn: Callable, items: Iterable[Tuple], workers: int) -> Iterator:
+    """fn over items in order, on up to workers threads with a bounded window"""
+    if workers <= 1:
+        for item in items:
+            yield fn(*item)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, *item))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def encrypt_stream(
+    source: BinaryIO,
+    sink: BinaryIO,
+    algorithm: str,
+    key: bytes,
+    associated_data: Optional[bytes] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1
+) -> int:
+    """
+    Encrypt a readable binary file into a writable one
+
+    Args:
+        source: Plaintext input
+        sink: Ciphertext output
+        algorithm: EncryptionAlgorithm value
+        key: 256-bit encryption key
+        associated_data: Authenticated with every chunk, not stored
+        chunk_size: Plaintext bytes per chunk
+        workers: Threads sealing chunks concurrently
+
+    Returns:
+        Plaintext bytes encrypted
+    """
+    sealer = StreamSealer(algorithm, key, chunk_size, associated_data)
+    sink.write(sealer.header)
+    total = 0
+    # An empty input still gets its final chunk, so truncation to the header is detected
+    blocks = _blocks(source, chunk_size, allow_empty=True)
+    for plaintext_size, sealed in _ordered(
+        lambda index, chunk, final: (len(chunk), sealer.seal(index, chunk, final)), blocks, workers
+    ):
+        sink.write(sealed)
+        total += plaintext_size
+    return total
+
+
+def decrypt_stream(
+    source: BinaryIO,
+    sink: BinaryIO,
+    key: bytes,
+    associated_data: Optional[bytes] = None,
+    workers: int = 1
+) -> int:
+    """
+    Decrypt a stream produced by encrypt_stream
+
+    Only authenticated chunks are written, but a stream that fails part
+    way leaves the chunks before the failure in the sink; discard the
+    output unless this returns.
+
+    Args:
+        source: Ciphertext input
+        sink: Plaintext output
+        key: 256-bit encryption key
+        associated_data: Must match what the stream was sealed with
+        workers: Threads opening chunks concurrently
+
+    Returns:
+        Plaintext bytes decrypted
+
+    Raises:
+        ValueError: If the stream is corrupted, reordered or truncated
+    """
+    opener = StreamOpener(key, _read_exact(source, HEADER.size), associated_data)
+    total = 0
+    blocks = _blocks(source, opener.chunk_size + TAG_SIZE, allow_empty=False)
+    opened = False
+    for plaintext in _ordered(opener.open, blocks, workers):
+        sink.write(plaintext)
+        total += len(plaintext)
+        opened = True
+    if not opened:
+        raise ValueError("Decryption failed: stream is truncated")
+    return total
+
+
+async def encrypt_chunks(
+    chunks: AsyncIterable[bytes],
+    algorithm: str,
+    key: bytes,
+    associated_data: Optional[bytes] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    Encrypt an async stream of byte strings of any size
+
+    Yields:
+        The header, then one sealed chunk at a time
+    """
+    sealer = StreamSealer(algorithm, key, chunk_size, associated_data)
+    yield sealer.header
+    buffer = bytearray()
+    index = 0
+    async for data in chunks:
+        buffer += data
+        # Strictly more than a chunk buffered means this one is not the last
+        while len(buffer) > chunk_size:
+            yield sealer.seal(index, bytes(buffer[:chunk_size]), final=False)
+            del buffer[:chunk_size]
+            index += 1
+    yield sealer.seal(index, bytes(buffer), final=True)
+
+
+async def decrypt_chunks(
+    chunks: AsyncIterable[bytes],
+    key: bytes,
+    associated_data: Optional[bytes] = None
+) -> AsyncIterator[bytes]:
+    """
+    Decrypt an async stream produced by encrypt_chunks or encrypt_stream
+
+    Yields:
+        Plaintext, one authenticated chunk at a time
+
+    Raises:
+        ValueError: If the stream is corrupted, reordered or truncated
+    """
+    buffer = bytearray()
+    opener: Optional[StreamOpener] = None
+    index = 0
+    async for data in chunks:
+        buffer += data
+        if opener is None:
+            if len(buffer) < HEADER.size:
+                continue
+            opener = StreamOpener(key, bytes(buffer[:HEADER.size]), associated_data)
+            del buffer[:HEADER.size]
+        block = opener.chunk_size + TAG_SIZE
+        while len(buffer) > block:
+            yield opener.open(index, bytes(buffer[:block]), final=False)
+            del buffer[:block]
+            index += 1
+    if opener is None:
+        raise ValueError("Decryption failed: stream is truncated")
+    yield opener.open(index, bytes(buffer), final=True)
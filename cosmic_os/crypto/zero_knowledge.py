@@ -6,12 +6,24 @@ Constitutional requirement: Article II, Section 1 (Right to Privacy)
 All data MUST be encrypted client-side. Server NEVER sees plaintext or keys.
 """
 
-from typing import Optional, Dict, Any
+from typing import (
+    Optional, Dict, Any, List, Union, AsyncIterable, AsyncIterator, BinaryIO, Callable, Sequence
+)
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from dataclasses import dataclass
 from datetime import datetime
+import asyncio
 import base64
+import os
 import secrets
+import threading
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+
+from .key_derivation import DEFAULT_KDF_PARAMS, DerivedKeyCache, derive, kdf_executor
+from . import streaming
 
 
 class EncryptionAlgorithm(Enum):
@@ -43,6 +55,7 @@ class EncryptedData:
     kdf_params: Dict[str, Any]
     metadata: Dict[str, Any]
     encrypted_at: datetime
+    key_id: Optional[str] = None  # WrappedKey holding the data key, for envelope encryption
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization"""
@@ -54,14 +67,72 @@ class EncryptedData:
             "kdf": self.kdf.value,
             "kdf_params": self.kdf_params,
             "metadata": self.metadata,
-            "encrypted_at": self.encrypted_at.isoformat()
+            "encrypted_at": self.encrypted_at.isoformat(),
+            "key_id": self.key_id
         }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "EncryptedData":
         """Create from dictionary"""
-        # TODO: Implement deserialization
-        raise NotImplementedError("Deserialization pending implementation")
+        return cls(
+            ciphertext=base64.b64decode(data["ciphertext"]),
+            nonce=base64.b64decode(data["nonce"]),
+            salt=base64.b64decode(data["salt"]),
+            algorithm=EncryptionAlgorithm(data["algorithm"]),
+            kdf=KeyDerivationFunction(data["kdf"]),
+            kdf_params=dict(data.get("kdf_params", {})),
+            metadata=dict(data.get("metadata", {})),
+            encrypted_at=datetime.fromisoformat(data["encrypted_at"]),
+            key_id=data.get("key_id")
+        )
+
+
+@dataclass
+class WrappedKey:
+    """
+    A data key sealed under a master key derived from the user passphrase
+
+    Envelope encryption: payloads are encrypted with data keys, and only
+    these small blobs depend on the passphrase, so changing it re-wraps
+    the blobs instead of re-encrypting every payload. Carries the salt and
+    KDF parameters needed to re-derive the master key, but never the
+    master key or the data key in the clear.
+    """
+    key_id: str
+    wrapped: bytes  # AEAD ciphertext of the data key, bound to key_id
+    nonce: bytes
+    salt: bytes  # Master key salt
+    algorithm: EncryptionAlgorithm
+    kdf: KeyDerivationFunction
+    kdf_params: Dict[str, Any]
+    created_at: datetime
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for serialization"""
+        return {
+            "key_id": self.key_id,
+            "wrapped": base64.b64encode(self.wrapped).decode(),
+            "nonce": base64.b64encode(self.nonce).decode(),
+            "salt": base64.b64encode(self.salt).decode(),
+            "algorithm": self.algorithm.value,
+            "kdf": self.kdf.value,
+            "kdf_params": self.kdf_params,
+            "created_at": self.created_at.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WrappedKey":
+        """Create from dictionary"""
+        return cls(
+            key_id=data["key_id"],
+            wrapped=base64.b64decode(data["wrapped"]),
+            nonce=base64.b64decode(data["nonce"]),
+            salt=base64.b64decode(data["salt"]),
+            algorithm=EncryptionAlgorithm(data["algorithm"]),
+            kdf=KeyDerivationFunction(data["kdf"]),
+            kdf_params=dict(data.get("kdf_params", {})),
+            created_at=datetime.fromisoformat(data["created_at"])
+        )
 
 
 class ZeroKnowledgeEncryption:
@@ -79,7 +150,11 @@ class ZeroKnowledgeEncryption:
     def __init__(
         self,
         algorithm: EncryptionAlgorithm = EncryptionAlgorithm.AES_256_GCM,
-        kdf: KeyDerivationFunction = KeyDerivationFunction.PBKDF2
+        kdf: KeyDerivationFunction = KeyDerivationFunction.PBKDF2,
+        kdf_params: Optional[Dict[str, int]] = None,
+        key_cache_ttl: float = 300.0,
+        batch_workers: Optional[int] = None,
+        parallel_min_bytes: int = 256 * 1024
     ):
         """
         Initialize zero-knowledge encryption
@@ -87,15 +162,47 @@ class ZeroKnowledgeEncryption:
         Args:
             algorithm: Encryption algorithm to use
             kdf: Key derivation function to use
+            kdf_params: Overrides for the KDF cost parameters
+                (see key_derivation.DEFAULT_KDF_PARAMS)
+            key_cache_ttl: Seconds a derived key stays cached for
+                repeated unlocks (0 disables the cache)
+            batch_workers: Threads encrypt_many/decrypt_many fan out to
+                (default: CPU count, at most 8; 1 keeps batches inline)
+            parallel_min_bytes: Smallest batch payload worth fanning out
         """
         self.algorithm = algorithm
         self.kdf = kdf
+        self.kdf_params = dict(kdf_params or {})
+        self.key_cache = DerivedKeyCache(key_cache_ttl)
+        self.batch_workers = batch_workers or min(8, os.cpu_count() or 1)
+        self.parallel_min_bytes = parallel_min_bytes
+        self._batch_pool: Optional[ThreadPoolExecutor] = None
+        self._batch_pool_lock = threading.Lock()
+
+    def kdf_parameters(self, iterations: Optional[int] = None) -> Dict[str, int]:
+        """
+        Effective cost parameters of the configured KDF
+
+        Args:
+            iterations: PBKDF2 iteration count, or Argon2 time cost,
+                overriding the configured value
+
+        Returns:
+            Parameters to record alongside the salt
+        """
+        params = {**DEFAULT_KDF_PARAMS[self.kdf.value], **self.kdf_params}
+        if iterations is not None:
+            if self.kdf == KeyDerivationFunction.PBKDF2:
+                params["iterations"] = iterations
+            elif self.kdf == KeyDerivationFunction.ARGON2:
+                params["time_cost"] = iterations
+        return params
 
     def derive_key(
         self,
         passphrase: str,
         salt: Optional[bytes] = None,
-        iterations: int = 600_000
+        iterations: Optional[int] = None
     ) -> tuple[bytes, bytes]:
         """
         Derive encryption key from user passphrase
@@ -103,26 +210,234 @@ class ZeroKnowledgeEncryption:
         CRITICAL: This MUST happen on the client side.
         The passphrase MUST NEVER be transmitted to the server.
 
+        Runs in the calling thread; use derive_key_async from a coroutine.
+
         Args:
             passphrase: User passphrase (NEVER transmitted)
             salt: Salt for key derivation (generated if not provided)
-            iterations: KDF iterations (higher = more secure but slower)
+            iterations: KDF iterations (higher = more secure but slower);
+                defaults to the configured parameters
 
         Returns:
             Tuple of (derived_key, salt)
         """
-        # TODO: Implement key derivation
-        # CRITICAL: This function is called CLIENT-SIDE ONLY
-        # 1. Generate salt if not provided
-        # 2. Derive key using PBKDF2/Argon2/Scrypt
-        # 3. Return key and salt
-        raise NotImplementedError("Key derivation pending implementation")
+        salt = salt or self.generate_salt()
+        return self._derive(self.kdf, passphrase, salt, self.kdf_parameters(iterations)), salt
+
+    async def derive_key_async(
+        self,
+        passphrase: str,
+        salt: Optional[bytes] = None,
+        iterations: Optional[int] = None
+    ) -> tuple[bytes, bytes]:
+        """
+        Derive encryption key from user passphrase off the event loop
+
+        The KDF runs in the shared process pool, so concurrent derivations
+        (e.g. unlocking several stores) proceed in parallel instead of
+        serializing on the GIL. Keys derived earlier in the session are
+        returned from the cache without running the KDF.
+
+        Args:
+            passphrase: User passphrase (NEVER transmitted)
+            salt: Salt for key derivation (generated if not provided)
+            iterations: KDF iterations; defaults to the configured parameters
+
+        Returns:
+            Tuple of (derived_key, salt)
+        """
+        salt = salt or self.generate_salt()
+        key = await self._derive_async(self.kdf, passphrase, salt, self.kdf_parameters(iterations))
+        return key, salt
+
+    def lock(self) -> None:
+        """Forget every cached derived key; the next unlock pays the KDF cost again"""
+        self.key_cache.wipe()
+
+    def _derive(
+        self,
+        kdf: KeyDerivationFunction,
+        passphrase: str,
+        salt: bytes,
+        params: Dict[str, Any]
+    ) -> bytes:
+        """Derive a key in the calling thread, going through the cache"""
+        secret = passphrase.encode("utf-8")
+        cache_key = self.key_cache.cache_key(kdf.value, secret, salt, params)
+        key = self.key_cache.get(cache_key)
+        if key is None:
+            key = derive(kdf.value, secret, salt, params)
+            self.key_cache.put(cache_key, key)
+        return key
+
+    async def _derive_async(
+        self,
+        kdf: KeyDerivationFunction,
+        passphrase: str,
+        salt: bytes,
+        params: Dict[str, Any]
+    ) -> bytes:
+        """Derive a key in the process pool, going through the cache"""
+        secret = passphrase.encode("utf-8")
+        cache_key = self.key_cache.cache_key(kdf.value, secret, salt, params)
+        key = self.key_cache.get(cache_key)
+        if key is None:
+            key = await asyncio.get_running_loop().run_in_executor(
+                kdf_executor(), derive, kdf.value, secret, salt, params
+            )
+            self.key_cache.put(cache_key, key)
+        return key
+
+    @staticmethod
+    def generate_data_key() -> bytes:
+        """
+        Generate a random 256-bit data key for envelope encryption
+
+        Returns:
+            Data key, to be kept only in wrapped form
+        """
+        return secrets.token_bytes(32)
+
+    def wrap_key(
+        self,
+        data_key: bytes,
+        master_key: bytes,
+        salt: bytes,
+        key_id: Optional[str] = None,
+        kdf_params: Optional[Dict[str, Any]] = None
+    ) -> WrappedKey:
+        """
+        Seal a data key under a passphrase-derived master key
+
+        CRITICAL: This MUST happen on the client side.
+
+        Args:
+            data_key: Data key to protect (NEVER transmitted in the clear)
+            master_key: Key from derive_key
+            salt: Salt master_key was derived with
+            key_id: Reference stored in EncryptedData.key_id (random if omitted)
+            kdf_params: Parameters master_key was derived with
+                (defaults to the configured parameters)
+
+        Returns:
+            WrappedKey (safe to transmit to server)
+        """
+        key_id = key_id or secrets.token_hex(16)
+        nonce = self.generate_nonce(self.algorithm)
+        wrapped = self._cipher(master_key).encrypt(nonce, data_key, key_id.encode("utf-8"))
+        return WrappedKey(
+            key_id=key_id,
+            wrapped=wrapped,
+            nonce=nonce,
+            salt=salt,
+            algorithm=self.algorithm,
+            kdf=self.kdf,
+            kdf_params=dict(kdf_params if kdf_params is not None else self.kdf_parameters()),
+            created_at=datetime.utcnow()
+        )
+
+    def unwrap_key(self, wrapped_key: WrappedKey, master_key: bytes) -> bytes:
+        """
+        Recover a data key with the master key
+
+        Args:
+            wrapped_key: Wrapped data key
+            master_key: Master key it was wrapped under
+
+        Returns:
+            Data key
+
+        Raises:
+            ValueError: If the master key is wrong or the blob was tampered with
+        """
+        cipher = self._cipher(master_key, wrapped_key.algorithm)
+        try:
+            return cipher.decrypt(
+                wrapped_key.nonce, wrapped_key.wrapped, wrapped_key.key_id.encode("utf-8")
+            )
+        except InvalidTag as e:
+            raise ValueError("Key unwrap failed: wrong passphrase or corrupted key") from e
+
+    def unlock_key(self, wrapped_key: WrappedKey, passphrase: str) -> bytes:
+        """
+        Recover a data key from the passphrase
+
+        Re-derives the master key with the KDF, salt and parameters
+        recorded in the wrapped key (cached for the session).
+
+        Args:
+            wrapped_key: Wrapped data key
+            passphrase: User passphrase (NEVER transmitted)
+
+        Returns:
+            Data key
+
+        Raises:
+            ValueError: If the passphrase is wrong
+        """
+        master_key = self._derive(
+            wrapped_key.kdf, passphrase, wrapped_key.salt, wrapped_key.kdf_params
+        )
+        return self.unwrap_key(wrapped_key, master_key)
+
+    async def unlock_key_async(self, wrapped_key: WrappedKey, passphrase: str) -> bytes:
+        """
+        Recover a data key from the passphrase off the event loop
+
+        Args:
+            wrapped_key: Wrapped data key
+            passphrase: User passphrase (NEVER transmitted)
+
+        Returns:
+            Data key
+
+        Raises:
+            ValueError: If the passphrase is wrong
+        """
+        master_key = await self._derive_async(
+            wrapped_key.kdf, passphrase, wrapped_key.salt, wrapped_key.kdf_params
+        )
+        return self.unwrap_key(wrapped_key, master_key)
+
+    def rewrap_keys(
+        self,
+        wrapped_keys: List[WrappedKey],
+        old_master_key: bytes,
+        new_passphrase: str
+    ) -> List[WrappedKey]:
+        """
+        Move data keys under a master key derived from a new passphrase
+
+        The new master key is derived once, with a fresh salt, and every
+        data key keeps its key_id, so payloads referencing them are left
+        untouched.
+
+        Args:
+            wrapped_keys: Keys wrapped under the current master key
+            old_master_key: Current master key
+            new_passphrase: New user passphrase
+
+        Returns:
+            The re-wrapped keys, in order
+
+        Raises:
+            ValueError: If old_master_key does not unwrap a key
+        """
+        data_keys = [self.unwrap_key(wrapped, old_master_key) for wrapped in wrapped_keys]
+        new_master_key, salt = self.derive_key(new_passphrase)
+        params = self.kdf_parameters()
+        return [
+            self.wrap_key(data_key, new_master_key, salt, wrapped.key_id, params)
+            for data_key, wrapped in zip(data_keys, wrapped_keys)
+        ]
 
     def encrypt(
         self,
         plaintext: bytes,
         key: bytes,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        associated_data: Optional[bytes] = None,
+        key_id: Optional[str] = None
     ) -> EncryptedData:
         """
         Encrypt data with zero-knowledge guarantee
@@ -134,21 +449,165 @@ class ZeroKnowledgeEncryption:
             plaintext: Data to encrypt (NEVER transmitted)
             key: Encryption key (NEVER transmitted)
             metadata: Optional metadata (NOT encrypted)
+            associated_data: Optional data authenticated but not encrypted
+            key_id: WrappedKey.key_id when key is an envelope data key
 
         Returns:
             EncryptedData container (safe to transmit to server)
         """
-        # TODO: Implement encryption
-        # CRITICAL: This function is called CLIENT-SIDE ONLY
-        # 1. Generate nonce
-        # 2. Encrypt plaintext with key
-        # 3. Return EncryptedData container
-        raise NotImplementedError("Encryption pending implementation")
+        nonce = self.generate_nonce(self.algorithm)
+        ciphertext = self._cipher(key).encrypt(nonce, plaintext, associated_data)
+
+        return EncryptedData(
+            ciphertext=ciphertext,
+            nonce=nonce,
+            salt=b"",
+            algorithm=self.algorithm,
+            kdf=self.kdf,
+            kdf_params={},
+            metadata=dict(metadata or {}),
+            encrypted_at=datetime.utcnow(),
+            key_id=key_id
+        )
+
+    def encrypt_many(
+        self,
+        plaintexts: Sequence[bytes],
+        keys: Union[bytes, Sequence[bytes]],
+        associated_data: Optional[Sequence[Optional[bytes]]] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> List[EncryptedData]:
+        """
+        Encrypt a batch of payloads
+
+        One cipher is built per distinct key and shared by the whole
+        batch. Batches of at least parallel_min_bytes are split into
+        contiguous slices sealed on the batch thread pool; the AEAD
+        primitives release the GIL, so slices run on separate cores.
+
+        Args:
+            plaintexts: Data to encrypt (NEVER transmitted)
+            keys: One encryption key for every payload, or one per payload
+            associated_data: Per-payload data authenticated but not encrypted
+            metadata: Optional metadata attached to every result (NOT encrypted)
+
+        Returns:
+            EncryptedData containers, in input order
+        """
+        count = len(plaintexts)
+        # bytes() so bytearray keys, accepted by encrypt/decrypt, can index the cipher dict
+        keys = [bytes(key) for key in self._per_item(keys, count, "keys")]
+        associated_data = self._per_item(associated_data, count, "associated_data")
+        ciphers: Dict[bytes, Any] = {}
+        for key in keys:
+            if key not in ciphers:
+                ciphers[key] = self._cipher(key)
+        now = datetime.utcnow()
+
+        def seal(start: int, stop: int) -> List[EncryptedData]:
+            results = []
+            for i in range(start, stop):
+                nonce = self.generate_nonce(self.algorithm)
+                results.append(EncryptedData(
+                    ciphertext=ciphers[keys[i]].encrypt(nonce, plaintexts[i], associated_data[i]),
+                    nonce=nonce,
+                    salt=b"",
+                    algorithm=self.algorithm,
+                    kdf=self.kdf,
+                    kdf_params={},
+                    metadata=dict(metadata or {}),
+                    encrypted_at=now
+                ))
+            return results
+
+        return self._fan_out(seal, count, sum(len(plaintext) for plaintext in plaintexts))
+
+    def decrypt_many(
+        self,
+        encrypted_data: Sequence[EncryptedData],
+        keys: Union[bytes, Sequence[bytes]],
+        associated_data: Optional[Sequence[Optional[bytes]]] = None
+    ) -> List[bytes]:
+        """
+        Decrypt a batch of payloads
+
+        Shares ciphers and fans out across the batch thread pool like
+        encrypt_many.
+
+        Args:
+            encrypted_data: Encrypted data containers
+            keys: One encryption key for every container, or one per container
+            associated_data: Per-container data authenticated at encryption time
+
+        Returns:
+            Decrypted plaintexts, in input order
+
+        Raises:
+            ValueError: If any container fails to decrypt
+        """
+        count = len(encrypted_data)
+        # bytes() so bytearray keys, accepted by encrypt/decrypt, can index the cipher dict
+        keys = [bytes(key) for key in self._per_item(keys, count, "keys")]
+        associated_data = self._per_item(associated_data, count, "associated_data")
+        ciphers: Dict[tuple, Any] = {}
+        for key, encrypted in zip(keys, encrypted_data):
+            if (key, encrypted.algorithm) not in ciphers:
+                ciphers[key, encrypted.algorithm] = self._cipher(key, encrypted.algorithm)
+
+        def open_slice(start: int, stop: int) -> List[bytes]:
+            results = []
+            for i in range(start, stop):
+                encrypted = encrypted_data[i]
+                try:
+                    results.append(ciphers[keys[i], encrypted.algorithm].decrypt(
+                        encrypted.nonce, encrypted.ciphertext, associated_data[i]
+                    ))
+                except InvalidTag as e:
+                    raise ValueError(
+                        f"Decryption failed for item {i}: wrong key or corrupted data"
+                    ) from e
+            return results
+
+        return self._fan_out(
+            open_slice, count, sum(len(encrypted.ciphertext) for encrypted in encrypted_data)
+        )
+
+    def close(self) -> None:
+        """Stop the batch thread pool; it is restarted by the next large batch"""
+        with self._batch_pool_lock:
+            pool, self._batch_pool = self._batch_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    @staticmethod
+    def _per_item(values: Any, count: int, name: str) -> Sequence[Any]:
+        """Broadcast a single key (or no associated data) to every batch item"""
+        if values is None or isinstance(values, (bytes, bytearray)):
+            return [values] * count
+        if len(values) != count:
+            raise ValueError(f"Expected {count} {name}, got {len(values)}")
+        return values
+
+    def _fan_out(self, work: Callable[[int, int], List[Any]], count: int, nbytes: int) -> List[Any]:
+        """Run work over [0, count) inline, or in contiguous slices on the batch pool"""
+        workers = min(self.batch_workers, count)
+        if workers <= 1 or nbytes < self.parallel_min_bytes:
+            return work(0, count)
+        with self._batch_pool_lock:
+            if self._batch_pool is None:
+                self._batch_pool = ThreadPoolExecutor(
+                    max_workers=self.batch_workers, thread_name_prefix="zk-batch"
+                )
+            pool = self._batch_pool
+        step = -(-count // workers)
+        slices = [pool.submit(work, start, min(start + step, count)) for start in range(0, count, step)]
+        return [result for future in slices for result in future.result()]
 
     def decrypt(
         self,
         encrypted_data: EncryptedData,
-        key: bytes
+        key: bytes,
+        associated_data: Optional[bytes] = None
     ) -> bytes:
         """
         Decrypt data with zero-knowledge guarantee
@@ -159,6 +618,7 @@ class ZeroKnowledgeEncryption:
         Args:
             encrypted_data: Encrypted data container
             key: Encryption key (NEVER transmitted)
+            associated_data: Data that was authenticated at encryption time
 
         Returns:
             Decrypted plaintext
@@ -166,40 +626,166 @@ class ZeroKnowledgeEncryption:
         Raises:
             ValueError: If decryption fails (wrong key, corrupted data, etc.)
         """
-        # TODO: Implement decryption
-        # CRITICAL: This function is called CLIENT-SIDE ONLY
-        # 1. Extract ciphertext, nonce from container
-        # 2. Decrypt ciphertext with key
-        # 3. Verify integrity (GCM/Poly1305 tag)
-        # 4. Return plaintext
-        raise NotImplementedError("Decryption pending implementation")
+        cipher = self._cipher(key, encrypted_data.algorithm)
+        try:
+            return cipher.decrypt(
+                encrypted_data.nonce,
+                encrypted_data.ciphertext,
+                associated_data
+            )
+        except InvalidTag as e:
+            raise ValueError("Decryption failed: wrong key or corrupted data") from e
+
+    def encrypt_stream(
+        self,
+        source: BinaryIO,
+        sink: BinaryIO,
+        key: bytes,
+        associated_data: Optional[bytes] = None,
+        chunk_size: int = streaming.DEFAULT_CHUNK_SIZE,
+        workers: int = 1
+    ) -> int:
+        """
+        Encrypt a file-like stream in constant memory
+
+        CRITICAL: This MUST happen on the client side.
+
+        The input is sealed in fixed-size chunks whose index and position
+        are authenticated, so the output cannot be reordered or truncated
+        undetected (see crypto.streaming for the format).
+
+        Args:
+            source: Readable binary plaintext (NEVER transmitted)
+            sink: Writable binary output (safe to transmit to server)
+            key: Encryption key (NEVER transmitted)
+            associated_data: Optional data authenticated but not encrypted
+            chunk_size: Plaintext bytes per chunk
+            workers: Threads sealing chunks in parallel
+
+        Returns:
+            Plaintext bytes encrypted
+        """
+        return streaming.encrypt_stream(
+            source, sink, self.algorithm.value, key, associated_data, chunk_size, workers
+        )
+
+    def decrypt_stream(
+        self,
+        source: BinaryIO,
+        sink: BinaryIO,
+        key: bytes,
+        associated_data: Optional[bytes] = None,
+        workers: int = 1
+    ) -> int:
+        """
+        Decrypt a stream produced by encrypt_stream in constant memory
+
+        The algorithm and chunk size are read from the stream header.
+        Only authenticated chunks reach the sink, but if decryption fails
+        part way the sink holds a prefix of the plaintext; discard it.
+
+        Args:
+            source: Readable binary ciphertext
+            sink: Writable binary plaintext output
+            key: Encryption key (NEVER transmitted)
+            associated_data: Data that was authenticated at encryption time
+            workers: Threads opening chunks in parallel
+
+        Returns:
+            Plaintext bytes decrypted
+
+        Raises:
+            ValueError: If the stream is corrupted, reordered or truncated
+        """
+        return streaming.decrypt_stream(source, sink, key, associated_data, workers)
+
+    def encrypt_stream_async(
+        self,
+        chunks: AsyncIterable[bytes],
+        key: bytes,
+        associated_data: Optional[bytes] = None,
+        chunk_size: int = streaming.DEFAULT_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """
+        Encrypt an async iterator of byte strings in constant memory
+
+        Args:
+            chunks: Plaintext pieces of any size (NEVER transmitted)
+            key: Encryption key (NEVER transmitted)
+            associated_data: Optional data authenticated but not encrypted
+            chunk_size: Plaintext bytes per chunk
+
+        Returns:
+            Async iterator of ciphertext: the stream header, then sealed chunks
+        """
+        return streaming.encrypt_chunks(
+            chunks, self.algorithm.value, key, associated_data, chunk_size
+        )
+
+    def decrypt_stream_async(
+        self,
+        chunks: AsyncIterable[bytes],
+        key: bytes,
+        associated_data: Optional[bytes] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Decrypt an async iterator of ciphertext in constant memory
+
+        Args:
+            chunks: Ciphertext pieces of any size
+            key: Encryption key (NEVER transmitted)
+            associated_data: Data that was authenticated at encryption time
+
+        Returns:
+            Async iterator of plaintext, one authenticated chunk at a time;
+            iteration raises ValueError if the stream is corrupted,
+            reordered or truncated
+        """
+        return streaming.decrypt_chunks(chunks, key, associated_data)
 
     def change_passphrase(
         self,
-        encrypted_data: EncryptedData,
+        encrypted_data: Union[EncryptedData, WrappedKey],
         old_key: bytes,
         new_passphrase: str
-    ) -> EncryptedData:
+    ) -> Union[EncryptedData, WrappedKey]:
         """
         Change passphrase without exposing data to server
 
         CRITICAL: This MUST happen on the client side.
 
+        A WrappedKey is re-wrapped under the new passphrase, leaving every
+        payload sealed with its data key as it is. EncryptedData sealed
+        directly with a passphrase-derived key has to be decrypted and
+        re-encrypted in full; data sealed with an envelope data key is
+        rejected, since its WrappedKey is what carries the passphrase.
+
         Args:
-            encrypted_data: Currently encrypted data
-            old_key: Current encryption key
+            encrypted_data: Wrapped data key, or data encrypted directly
+                with a passphrase-derived key
+            old_key: Current master or encryption key
             new_passphrase: New user passphrase
 
         Returns:
-            Re-encrypted data with new key
+            Re-wrapped key, or re-encrypted data with the new salt and
+            KDF parameters recorded
+
+        Raises:
+            ValueError: If old_key is wrong, or the data uses a wrapped key
         """
-        # TODO: Implement passphrase change
-        # CRITICAL: This function is called CLIENT-SIDE ONLY
-        # 1. Decrypt with old key
-        # 2. Derive new key from new passphrase
-        # 3. Re-encrypt with new key
-        # 4. Return new EncryptedData
-        raise NotImplementedError("Passphrase change pending implementation")
+        if isinstance(encrypted_data, WrappedKey):
+            return self.rewrap_keys([encrypted_data], old_key, new_passphrase)[0]
+        if encrypted_data.key_id is not None:
+            raise ValueError(
+                f"Data is sealed with wrapped key {encrypted_data.key_id}; re-wrap that key instead"
+            )
+
+        plaintext = self.decrypt(encrypted_data, old_key)
+        new_key, salt = self.derive_key(new_passphrase)
+        reencrypted = self.encrypt(plaintext, new_key, encrypted_data.metadata)
+        reencrypted.salt = salt
+        reencrypted.kdf_params = self.kdf_parameters()
+        return reencrypted
 
     def generate_key_pair(self) -> tuple[bytes, bytes]:
         """
@@ -233,6 +819,32 @@ class ZeroKnowledgeEncryption:
         # For end-to-end encrypted sharing
         raise NotImplementedError("Recipient encryption pending implementation")
 
+    def _cipher(
+        self,
+        key: bytes,
+        algorithm: Optional[EncryptionAlgorithm] = None
+    ) -> Any:
+        """
+        Build the AEAD primitive for an algorithm
+
+        Args:
+            key: 256-bit encryption key
+            algorithm: Algorithm to use (defaults to the instance algorithm)
+
+        Returns:
+            AESGCM or ChaCha20Poly1305 instance bound to the key
+        """
+        algorithm = algorithm or self.algorithm
+        if len(key) != 32:
+            raise ValueError("Encryption key must be 256 bits")
+
+        if algorithm == EncryptionAlgorithm.AES_256_GCM:
+            return AESGCM(key)
+        elif algorithm == EncryptionAlgorithm.CHACHA20_POLY1305:
+            return ChaCha20Poly1305(key)
+        else:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+
     @staticmethod
     def generate_salt(length: int = 32) -> bytes:
         """
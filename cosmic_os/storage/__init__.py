@@ -5,6 +5,68 @@ Local-First Storage Module
 Implements local-first data storage with optional cloud sync.
 """
 
-from .local_first import LocalFirstStorage, StorageBackend, SyncStatus
+from .local_first import (
+    LocalFirstStorage, StorageBackend, StorageSnapshot, KeyPage, ConflictPolicy
+)
+from .metadata import StorageMetadata, SyncStatus, MetadataStore, StorageCounters
+from .metadata_index import MetadataIndex
+from .engine import StorageEngine, EngineSnapshot, MemoryEngine
+from .segment_log import SegmentLogEngine
+from .sqlite_engine import SQLiteEngine
+from .cache import ValueCache
+from .blob_store import BlobStore, DedupEngine
+from .codecs import Codec, CompressionPolicy, register_codec
+from .key_index import SortedKeyIndex
+from .export import ExportProgress, ImportProgress
+from .sync import SyncJournal, SyncItem, CloudRemote, LocalDirectoryRemote
+from .locking import KeyLocks, StoreLease, StorageLockedError
+from .durability import Durability
+from .secondary_index import Range, FieldIndex, SecondaryIndexes
+from .tiering import TierPolicy, TieredEngine, TieredMetadataStore
+from .expiry import ExpiryIndex, RetentionPolicies
+from .shredding import Keyring, PurgeReport
 
-__all__ = ["LocalFirstStorage", "StorageBackend", "SyncStatus"]
+__all__ = [
+    "LocalFirstStorage",
+    "StorageBackend",
+    "StorageSnapshot",
+    "KeyPage",
+    "ConflictPolicy",
+    "StorageMetadata",
+    "SyncStatus",
+    "MetadataStore",
+    "StorageCounters",
+    "MetadataIndex",
+    "StorageEngine",
+    "EngineSnapshot",
+    "MemoryEngine",
+    "SegmentLogEngine",
+    "SQLiteEngine",
+    "ValueCache",
+    "BlobStore",
+    "DedupEngine",
+    "Codec",
+    "CompressionPolicy",
+    "register_codec",
+    "SortedKeyIndex",
+    "ExportProgress",
+    "ImportProgress",
+    "SyncJournal",
+    "SyncItem",
+    "CloudRemote",
+    "LocalDirectoryRemote",
+    "KeyLocks",
+    "StoreLease",
+    "StorageLockedError",
+    "Durability",
+    "Range",
+    "FieldIndex",
+    "SecondaryIndexes",
+    "TierPolicy",
+    "TieredEngine",
+    "TieredMetadataStore",
+    "ExpiryIndex",
+    "RetentionPolicies",
+    "Keyring",
+    "PurgeReport"
+]
@@ -0,0 +1,609 @@
+"""
+Blob Store
+==========
+
+Content-addressed, reference-counted chunk storage for deduplicated values.
+
+A deduplicated value is split into fixed-size chunks. Each chunk is named
+by a keyed hash of its content (HMAC-SHA256 under a key derived from the
+data key, so chunk names reveal nothing to anyone without it) and stored
+once, encrypted, no matter how many values contain it. The value itself
+is replaced by a small manifest listing its chunk ids, so a payload
+bloomed from several peers costs one copy plus a manifest per key.
+
+Chunks live in their own engine under ``c/<id>``, with a reference count
+record under ``r/<id>``. Counts are raised before a manifest is written
+and lowered only after it is replaced or deleted, so a crash can leak a
+chunk but never drop one still referenced; collect_garbage() reconciles
+the counts with the manifests and reclaims leaks.
+"""
+
+from typing import Dict, List, Optional, Any, Iterable, Sequence, Tuple, Union
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+import hashlib
+import hmac
+import struct
+import threading
+
+from ..crypto import ZeroKnowledgeEncryption, EncryptedData
+from .durability import Durability
+from .engine import EngineSnapshot, StorageEngine
+from .metadata import StorageMetadata, SyncStatus, MetadataStore
+
+
+CHUNK_SIZE = 64 * 1024
+CHUNK_ID_SIZE = 32
+
+NONCE_SIZE = 12
+
+# magic, version, encrypted flag, total length, chunk count; then the chunk ids
+_MANIFEST = struct.Struct("<4sBBQI")
+_MANIFEST_MAGIC = b"CBLM"
+_MANIFEST_VERSION = 1
+
+_REFS = struct.Struct("<QI")  # reference count, chunk length
+_TOTALS = struct.Struct("<QQQ")  # chunks, stored bytes, logical bytes
+_TOTALS_KEY = "totals"
+
+
+def _chunk_key(chunk_id: bytes) -> str:
+    return "c/" + chunk_id.hex()
+
+
+def _refs_key(chunk_id: bytes) -> str:
+    return "r/" + chunk_id.hex()
+
+
+def parse_manifest(manifest: bytes) -> Tuple[bool, int, List[bytes]]:
+    """
+    Decode a manifest
+
+    Returns:
+        Tuple of (encrypted, total length, chunk ids)
+
+    Raises:
+        ValueError: If the bytes are not a manifest
+    """
+    if len(manifest) < _MANIFEST.size:
+        raise ValueError("Truncated blob manifest")
+    magic, version, encrypted, total, count = _MANIFEST.unpack_from(manifest)
+    if magic != _MANIFEST_MAGIC or version != _MANIFEST_VERSION:
+        raise ValueError("Not a blob manifest")
+    if len(manifest) != _MANIFEST.size + count * CHUNK_ID_SIZE:
+        raise ValueError("Corrupt blob manifest")
+    ids = [
+        manifest[offset:offset + CHUNK_ID_SIZE]
+        for offset in range(_MANIFEST.size, len(manifest), CHUNK_ID_SIZE)
+    ]
+    return bool(encrypted), total, ids
+
+
+class BlobStore:
+    """
+    Reference-counted store of encrypted content-addressed chunks.
+
+    Mutations are serialized by a lock so concurrent reference count
+    updates never interleave.
+    """
+
+    def __init__(
+        self,
+        engine: StorageEngine,
+        data_key: bytes,
+        encryption: Optional[ZeroKnowledgeEncryption] = None,
+        chunk_size: int = CHUNK_SIZE
+    ):
+        """
+        Initialize the blob store
+
+        Args:
+            engine: Engine holding chunks and reference counts
+            data_key: 256-bit key used to encrypt and name chunks
+            encryption: Encryption provider
+            chunk_size: Bytes per chunk
+        """
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.encryption = encryption or ZeroKnowledgeEncryption()
+        self._data_key = data_key
+        self._id_key = hmac.new(data_key, b"cosmic-os/blob-id", hashlib.sha256).digest()
+        self._chunks = self._stored_bytes = self._logical_bytes = 0
+        self._lock = threading.Lock()
+
+    def recover(self) -> None:
+        """Open the chunk engine and load the running totals"""
+        self.engine.recover()
+        totals = self.engine.get(_TOTALS_KEY)
+        if totals is not None:
+            self._chunks, self._stored_bytes, self._logical_bytes = _TOTALS.unpack(totals)
+
+    def chunk_id(self, chunk: bytes, encrypted: bool) -> bytes:
+        """Keyed content hash naming a chunk"""
+        flag = b"\x01" if encrypted else b"\x00"
+        return hmac.new(self._id_key, flag + chunk, hashlib.sha256).digest()
+
+    def store_many(self, payloads: Sequence[Tuple[bytes, bool]]) -> List[bytes]:
+        """
+        Add references to the chunks of several payloads
+
+        Only chunks not already stored are written; for the rest just
+        the reference count changes.
+
+        Args:
+            payloads: (plaintext, encrypted) pairs
+
+        Returns:
+            One manifest per payload, in order
+        """
+        manifests = []
+        added: Counter = Counter()
+        contents: Dict[bytes, Tuple[bytes, bool]] = {}
+        for payload, encrypted in payloads:
+            ids = []
+            for offset in range(0, len(payload), self.chunk_size):
+                chunk = payload[offset:offset + self.chunk_size]
+                chunk_id = self.chunk_id(chunk, encrypted)
+                ids.append(chunk_id)
+                added[chunk_id] += 1
+                contents.setdefault(chunk_id, (chunk, encrypted))
+            manifests.append(
+                _MANIFEST.pack(_MANIFEST_MAGIC, _MANIFEST_VERSION, encrypted, len(payload), len(ids))
+                + b"".join(ids)
+            )
+
+        with self._lock:
+            refs = self._read_refs(added)
+            writes = []
+            for chunk_id, count in added.items():
+                chunk, encrypted = contents[chunk_id]
+                previous = refs.get(chunk_id, (0, len(chunk)))[0]
+                if previous == 0:
+                    writes.append(self._record(
+                        _chunk_key(chunk_id), self._seal(chunk_id, chunk, encrypted), encrypted
+                    ))
+                    self._chunks += 1
+                    self._stored_bytes += len(chunk)
+                self._logical_bytes += count * len(chunk)
+                writes.append(self._record(
+                    _refs_key(chunk_id), _REFS.pack(previous + count, len(chunk))
+                ))
+            self._write(writes, [])
+        return manifests
+
+    def release_many(self, manifests: Iterable[bytes]) -> None:
+        """
+        Drop references held by manifests, deleting unreferenced chunks
+
+        Args:
+            manifests: Manifests of replaced or deleted values
+        """
+        removed: Counter = Counter()
+        for manifest in manifests:
+            removed.update(parse_manifest(manifest)[2])
+        if not removed:
+            return
+
+        with self._lock:
+            refs = self._read_refs(removed)
+            writes, deletes = [], []
+            for chunk_id, count in removed.items():
+                if chunk_id not in refs:
+                    continue  # Already reclaimed
+                previous, length = refs[chunk_id]
+                released = min(count, previous)
+                self._logical_bytes -= released * length
+                if previous > released:
+                    writes.append(self._record(
+                        _refs_key(chunk_id), _REFS.pack(previous - released, length)
+                    ))
+                else:
+                    deletes.extend([_refs_key(chunk_id), _chunk_key(chunk_id)])
+                    self._chunks -= 1
+                    self._stored_bytes -= length
+            self._write(writes, deletes)
+
+    def load_many(
+        self,
+        manifests: Sequence[bytes],
+        source: Optional[Union[StorageEngine, EngineSnapshot]] = None
+    ) -> List[Optional[bytes]]:
+        """
+        Reassemble payloads from their manifests
+
+        Args:
+            manifests: Manifests to resolve
+            source: Snapshot of the chunk engine to read from instead of the engine
+
+        Returns:
+            Plaintext per manifest, or None where a chunk is missing
+            (the value was deleted while being read)
+        """
+        parsed = [parse_manifest(manifest) for manifest in manifests]
+        wanted = list({chunk_id: None for _, _, ids in parsed for chunk_id in ids})
+        source = source or self.engine
+        stored = dict(zip(wanted, source.get_many([_chunk_key(c) for c in wanted])))
+
+        payloads: List[Optional[bytes]] = []
+        opened: Dict[bytes, bytes] = {}
+        for encrypted, _, ids in parsed:
+            if any(stored[chunk_id] is None for chunk_id in ids):
+                payloads.append(None)
+                continue
+            for chunk_id in ids:
+                if chunk_id not in opened:
+                    opened[chunk_id] = self._open(chunk_id, stored[chunk_id], encrypted)
+            payloads.append(b"".join(opened[chunk_id] for chunk_id in ids))
+        return payloads
+
+    def load(self, manifest: bytes) -> Optional[bytes]:
+        """Reassemble one payload"""
+        return self.load_many([manifest])[0]
+
+    def collect_garbage(self, manifests: Iterable[bytes]) -> Dict[str, int]:
+        """
+        Rebuild reference counts from the live manifests
+
+        Reclaims chunks leaked by a crash between a chunk write and its
+        manifest write (or a manifest delete and its release).
+
+        Args:
+            manifests: Every manifest currently referenced
+
+        Returns:
+            Dict with chunks_reclaimed and bytes_reclaimed
+        """
+        live: Counter = Counter()
+        for manifest in manifests:
+            live.update(parse_manifest(manifest)[2])
+
+        with self._lock:
+            ids = [bytes.fromhex(key[2:]) for key in self.engine.metadata.iter_keys("c/")]
+            refs = self._read_refs(ids)
+            writes, deletes = [], []
+            chunks = stored_bytes = logical_bytes = reclaimed = reclaimed_bytes = 0
+            for chunk_id in ids:
+                count = live.get(chunk_id, 0)
+                if chunk_id in refs:
+                    length = refs[chunk_id][1]
+                else:
+                    length = len(self._open(
+                        chunk_id,
+                        self.engine.get(_chunk_key(chunk_id)),
+                        self.engine.metadata.get(_chunk_key(chunk_id)).encrypted
+                    ))
+                if count == 0:
+                    deletes.extend([_refs_key(chunk_id), _chunk_key(chunk_id)])
+                    reclaimed += 1
+                    reclaimed_bytes += length
+                    continue
+                chunks += 1
+                stored_bytes += length
+                logical_bytes += count * length
+                if refs.get(chunk_id, (0, 0))[0] != count:
+                    writes.append(self._record(_refs_key(chunk_id), _REFS.pack(count, length)))
+
+            stored = set(ids)
+            deletes.extend(
+                key for key in self.engine.metadata.iter_keys("r/")
+                if bytes.fromhex(key[2:]) not in stored
+            )
+            self._chunks, self._stored_bytes, self._logical_bytes = (
+                chunks, stored_bytes, logical_bytes
+            )
+            self._write(writes, deletes)
+        return {"chunks_reclaimed": reclaimed, "bytes_reclaimed": reclaimed_bytes}
+
+    def clear(self) -> None:
+        """Drop every chunk and reference count at once"""
+        with self._lock:
+            self.engine.delete_prefix("")
+            self._chunks = self._stored_bytes = self._logical_bytes = 0
+
+    def rekey(self, data_key: bytes) -> None:
+        """
+        Seal and name chunks stored from now on under a new data key
+
+        Only valid on an empty store: existing chunks stay sealed under
+        the old key.
+        """
+        with self._lock:
+            self._data_key = data_key
+            self._id_key = hmac.new(data_key, b"cosmic-os/blob-id", hashlib.sha256).digest()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Deduplication statistics
+
+        Returns:
+            Dict with chunk count, stored and logical bytes and the dedup
+            ratio (logical bytes per stored byte)
+        """
+        with self._lock:
+            return {
+                "chunks": self._chunks,
+                "stored_bytes": self._stored_bytes,
+                "logical_bytes": self._logical_bytes,
+                "saved_bytes": self._logical_bytes - self._stored_bytes,
+                "dedup_ratio": (
+                    self._logical_bytes / self._stored_bytes if self._stored_bytes else 1.0
+                ),
+                "chunk_size": self.chunk_size
+            }
+
+    def close(self) -> None:
+        """Release the chunk engine"""
+        self.engine.close()
+
+    def _read_refs(self, chunk_ids: Iterable[bytes]) -> Dict[bytes, Tuple[int, int]]:
+        """Current (count, length) for chunks that have a reference record"""
+        chunk_ids = list(chunk_ids)
+        values = self.engine.get_many([_refs_key(chunk_id) for chunk_id in chunk_ids])
+        return {
+            chunk_id: _REFS.unpack(value)
+            for chunk_id, value in zip(chunk_ids, values)
+            if value is not None
+        }
+
+    def _write(self, writes: List[Tuple[str, bytes, StorageMetadata]], deletes: List[str]) -> None:
+        """Apply one batch of chunk engine changes, totals included"""
+        writes.append(self._record(
+            _TOTALS_KEY, _TOTALS.pack(self._chunks, self._stored_bytes, self._logical_bytes)
+        ))
+        self.engine.put_many(writes)
+        if deletes:
+            self.engine.delete_many(deletes)
+
+    @staticmethod
+    def _record(key: str, value: bytes, encrypted: bool = False) -> Tuple[str, bytes, StorageMetadata]:
+        now = datetime.utcnow()
+        return key, value, StorageMetadata(
+            key=key,
+            created_at=now,
+            updated_at=now,
+            sync_status=SyncStatus.SYNC_DISABLED,
+            encrypted=encrypted,
+            size_bytes=len(value),
+            encoding="bytes"
+        )
+
+    def _seal(self, chunk_id: bytes, chunk: bytes, encrypted: bool) -> bytes:
+        """Encrypt a chunk, binding its id as associated data"""
+        if not encrypted:
+            return chunk
+        sealed = self.encryption.encrypt(chunk, self._data_key, associated_data=chunk_id)
+        return sealed.nonce + sealed.ciphertext
+
+    def _open(self, chunk_id: bytes, stored: bytes, encrypted: bool) -> bytes:
+        """Decrypt a chunk produced by _seal"""
+        if not encrypted:
+            return bytes(stored)
+        sealed = EncryptedData(
+            ciphertext=stored[NONCE_SIZE:],
+            nonce=stored[:NONCE_SIZE],
+            salt=b"",
+            algorithm=self.encryption.algorithm,
+            kdf=self.encryption.kdf,
+            kdf_params={},
+            metadata={},
+            encrypted_at=datetime.utcnow()
+        )
+        return self.encryption.decrypt(sealed, self._data_key, associated_data=chunk_id)
+
+
+class DedupEngine(StorageEngine):
+    """
+    Engine wrapper storing deduplicated values as chunk manifests.
+
+    Values whose metadata is marked deduplicated arrive as plaintext and
+    are handed to the blob store; the wrapped engine stores only their
+    manifests. Other values pass through untouched. Writes run on one
+    dedicated thread, so reading a key's old manifest, replacing it and
+    releasing its chunks is never interleaved with another write.
+    """
+
+    def __init__(self, inner: StorageEngine, blobs: BlobStore):
+        """
+        Initialize the wrapper
+
+        Args:
+            inner: Engine holding values and manifests
+            blobs: Chunk store for deduplicated values
+        """
+        self.inner = inner
+        self.blobs = blobs
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dedup-writer")
+
+    def recover(self) -> MetadataStore:
+        """Recover the wrapped engine and the chunk store"""
+        self.metadata = self.inner.recover()
+        self.blobs.recover()
+        return self.metadata
+
+    def put(self, key: str, value: bytes, metadata: StorageMetadata) -> int:
+        """Store one value"""
+        return self.put_many([(key, value, metadata)])[0]
+
+    def put_many(self, items: Sequence[Tuple[str, bytes, StorageMetadata]]) -> List[int]:
+        """Store values, replacing deduplicated payloads by manifests"""
+        deduplicated = [i for i, (_, _, metadata) in enumerate(items) if metadata.deduplicated]
+        manifests = self.blobs.store_many(
+            [(items[i][1], items[i][2].encrypted) for i in deduplicated]
+        )
+        stored = list(items)
+        for i, manifest in zip(deduplicated, manifests):
+            stored[i] = (items[i][0], manifest, items[i][2])
+
+        replaced = self._manifests([key for key, _, _ in items])
+        sequences = self.inner.put_many(stored)
+        self.blobs.release_many(replaced)
+        return sequences
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Fetch a value, reassembling deduplicated payloads"""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Fetch values, reassembling deduplicated payloads in one chunk read"""
+        values = self.inner.get_many(keys)
+        positions = [
+            i for i, (key, value) in enumerate(zip(keys, values))
+            if value is not None and self._is_deduplicated(key)
+        ]
+        for i, payload in zip(positions, self.blobs.load_many([values[i] for i in positions])):
+            values[i] = payload
+        return values
+
+    def get_view(self, key: str) -> Optional[memoryview]:
+        """
+        View a stored value in place; deduplicated values are copied
+
+        Only values stored whole can be exposed without reassembly.
+        """
+        if self._is_deduplicated(key):
+            return super().get_view(key)
+        return self.inner.get_view(key)
+
+    def get_manifest(self, key: str) -> Optional[bytes]:
+        """The stored manifest of a deduplicated value, without reassembling it"""
+        return self.inner.get(key)
+
+    def delete(self, key: str) -> bool:
+        """Remove a value and release its chunks"""
+        return self.delete_many([key])[0]
+
+    def delete_many(self, keys: Sequence[str]) -> List[bool]:
+        """Remove values, then release the chunks they referenced"""
+        replaced = self._manifests(keys)
+        deleted = self.inner.delete_many(keys)
+        self.blobs.release_many(replaced)
+        return deleted
+
+    def delete_prefix(self, prefix: str) -> List[str]:
+        """Remove a key range; deleting every key empties the chunk store outright"""
+        if prefix:
+            return super().delete_prefix(prefix)
+        removed = self.inner.delete_prefix(prefix)
+        self.blobs.clear()
+        return removed
+
+    def submit_put(self, key: str, value: bytes, metadata: StorageMetadata) -> Future:
+        return self._writer.submit(self.put, key, value, metadata)
+
+    def submit_delete(self, key: str) -> Future:
+        return self._writer.submit(self.delete, key)
+
+    def submit_put_many(self, items: Sequence[Tuple[str, bytes, StorageMetadata]]) -> Future:
+        return self._writer.submit(self.put_many, items)
+
+    def submit_delete_many(self, keys: Sequence[str]) -> Future:
+        return self._writer.submit(self.delete_many, keys)
+
+    def submit_delete_prefix(self, prefix: str) -> Future:
+        return self._writer.submit(self.delete_prefix, prefix)
+
+    def submit_sync(self, durability: Durability) -> Future:
+        """Sync chunks, then the manifests that reference them, after queued writes"""
+        return self._writer.submit(self._sync, durability)
+
+    def snapshot(self) -> EngineSnapshot:
+        """
+        Pin manifests and chunks together, between two writes
+
+        Chunks released after the snapshot stay readable through it,
+        since the chunk engine is pinned as well.
+        """
+        return self._writer.submit(self._snapshot).result()
+
+    def refresh(self) -> Optional[List[str]]:
+        """Catch up chunks before values, so new manifests always resolve"""
+        self.blobs.engine.refresh()
+        return self.inner.refresh()
+
+    def collect_garbage(self) -> Dict[str, int]:
+        """
+        Reconcile chunk reference counts with every stored manifest
+
+        Returns:
+            Dict with chunks_reclaimed and bytes_reclaimed
+        """
+        return self._writer.submit(self._collect_garbage).result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Wrapped engine statistics plus deduplication figures"""
+        return {**self.inner.stats(), "dedup": self.blobs.stats()}
+
+    def close(self) -> None:
+        """Drain pending writes and close both engines"""
+        self._writer.shutdown(wait=True)
+        self.inner.close()
+        self.blobs.close()
+
+    def _collect_garbage(self) -> Dict[str, int]:
+        keys = [metadata.key for metadata in self.metadata.values() if metadata.deduplicated]
+        manifests = (
+            manifest
+            for start in range(0, len(keys), 1024)
+            for manifest in self.inner.get_many(keys[start:start + 1024])
+            if manifest is not None
+        )
+        return self.blobs.collect_garbage(manifests)
+
+    def _snapshot(self) -> EngineSnapshot:
+        chunks = self.blobs.engine.snapshot()
+        try:
+            return _DedupSnapshot(self.inner.snapshot(), chunks, self.blobs)
+        except Exception:
+            chunks.close()
+            raise
+
+    def _sync(self, durability: Durability) -> None:
+        self.blobs.engine.submit_sync(durability).result()
+        self.inner.submit_sync(durability).result()
+
+    def _is_deduplicated(self, key: str) -> bool:
+        metadata = self.metadata.get(key)
+        return metadata is not None and metadata.deduplicated
+
+    def _manifests(self, keys: Sequence[str]) -> List[bytes]:
+        """Current manifests of the deduplicated values among keys"""
+        keys = [key for key in dict.fromkeys(keys) if self._is_deduplicated(key)]
+        return [manifest for manifest in self.inner.get_many(keys) if manifest is not None]
+
+
+class _DedupSnapshot(EngineSnapshot):
+    """Snapshots of the wrapped engine and the chunk engine taken together"""
+
+    def __init__(self, inner: EngineSnapshot, chunks: EngineSnapshot, blobs: BlobStore):
+        self.inner = inner
+        self.metadata = inner.metadata
+        self.sequence = inner.sequence
+        self._chunks = chunks
+        self._blobs = blobs
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Value of a key as of the snapshot"""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Values as of the snapshot, reassembled from the pinned chunks"""
+        values = self.inner.get_many(keys)
+        positions = []
+        for i, (key, value) in enumerate(zip(keys, values)):
+            metadata = self.metadata.get(key) if value is not None else None
+            if metadata is not None and metadata.deduplicated:
+                positions.append(i)
+        payloads = self._blobs.load_many([values[i] for i in positions], self._chunks)
+        for i, payload in zip(positions, payloads):
+            values[i] = payload
+        return values
+
+    def get_manifest(self, key: str) -> Optional[bytes]:
+        """The manifest of a deduplicated value as of the snapshot"""
+        return self.inner.get(key)
+
+    def close(self) -> None:
+        """Release both snapshots"""
+        self.inner.close()
+        self._chunks.close()
@@ -0,0 +1,146 @@
+"""
+Value Cache
+===========
+
+Size-bounded LRU cache for values read through LocalFirstStorage.
+
+The budget is measured in bytes, not entries, so a handful of large
+documents cannot push the process over its memory allowance. Entries are
+stored as encoded payload bytes and deserialized on every hit, so callers
+never share a mutable object with the cache.
+"""
+
+from typing import Dict, Optional, Any, NamedTuple
+from collections import OrderedDict
+
+
+ENTRY_OVERHEAD_BYTES = 96  # Rough per-entry bookkeeping cost
+
+
+class CachedValue(NamedTuple):
+    """A cached payload and how to decode it"""
+    payload: bytes
+    encoding: str
+    encrypted: bool
+    sealed: bool
+    codec: Optional[str] = None  # Only set for sealed payloads, which are still compressed
+
+
+class ValueCache:
+    """
+    Byte-bounded least-recently-used value cache.
+
+    When plaintext caching is disabled, encrypted values are cached in
+    their sealed form only: hits still skip the disk read, but must be
+    decrypted again, and no plaintext outlives the read call.
+    """
+
+    def __init__(self, max_bytes: int, cache_plaintext: bool = True):
+        """
+        Initialize the cache
+
+        Args:
+            max_bytes: Memory budget in bytes (0 disables caching)
+            cache_plaintext: Whether decrypted values may be kept in memory
+        """
+        self.max_bytes = max_bytes
+        self.cache_plaintext = cache_plaintext
+        self._entries: "OrderedDict[str, CachedValue]" = OrderedDict()
+        self._current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache holds anything at all"""
+        return self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[CachedValue]:
+        """
+        Look up a key, marking it most recently used
+
+        Args:
+            key: Storage key
+
+        Returns:
+            CachedValue or None on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(
+        self,
+        key: str,
+        payload: bytes,
+        encoding: str,
+        encrypted: bool,
+        sealed: bool,
+        codec: Optional[str] = None
+    ) -> None:
+        """
+        Cache a payload, evicting least recently used entries to fit
+
+        Args:
+            key: Storage key
+            payload: Plaintext payload, or sealed payload if sealed is True
+            encoding: Value encoding recorded in metadata
+            encrypted: Whether the value is encrypted at rest
+            sealed: Whether payload is still encrypted
+            codec: Compression codec of a sealed payload
+        """
+        if not self.enabled:
+            return
+        size = self._entry_size(key, payload)
+        if size > self.max_bytes:
+            return
+
+        self.invalidate(key)
+        while self._current_bytes + size > self.max_bytes:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._current_bytes -= self._entry_size(evicted_key, evicted.payload)
+            self.evictions += 1
+
+        self._entries[key] = CachedValue(bytes(payload), encoding, encrypted, sealed, codec)
+        self._current_bytes += size
+
+    def invalidate(self, key: str) -> None:
+        """Drop a key after it was written or deleted"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._current_bytes -= self._entry_size(key, entry.payload)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        self._entries.clear()
+        self._current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Cache counters for storage statistics
+
+        Returns:
+            Dict with budget, usage and hit/miss/eviction counters
+        """
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "max_bytes": self.max_bytes,
+            "current_bytes": self._current_bytes,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "cache_plaintext": self.cache_plaintext
+        }
+
+    @staticmethod
+    def _entry_size(key: str, payload: bytes) -> int:
+        """Bytes charged against the budget for one entry"""
+        return len(payload) + len(key) + ENTRY_OVERHEAD_BYTES
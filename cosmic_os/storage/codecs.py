@@ -0,0 +1,175 @@
+"""
+Compression Codecs
+==================
+
+Compression stage applied to serialized values before encryption.
+
+Ciphertext is indistinguishable from random bytes and does not compress,
+so values are compressed first and sealed afterwards. Each value records
+the codec it was written with in its StorageMetadata, so the codec can
+change at any time without rewriting existing data.
+
+New codecs subclass Codec and are made readable with register_codec().
+"""
+
+from typing import Dict, Optional, Tuple, Union
+import lzma
+import zlib
+
+
+class Codec:
+    """
+    Base class for compression codecs.
+
+    Implementations must be deterministic and stateless: the same input
+    always yields the same output, which keeps deduplication effective.
+    """
+
+    name: str = ""
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a payload"""
+        raise NotImplementedError
+
+    def decompress(self, data: bytes) -> bytes:
+        """Reverse compress()"""
+        raise NotImplementedError
+
+
+class ZlibCodec(Codec):
+    """DEFLATE via zlib: fast, moderate ratio"""
+
+    name = "zlib"
+
+    def __init__(self, level: int = 6):
+        """
+        Initialize the codec
+
+        Args:
+            level: Compression level, 1 (fastest) to 9 (smallest)
+        """
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class LzmaCodec(Codec):
+    """LZMA (xz): slower, best ratio for large text payloads"""
+
+    name = "lzma"
+
+    def __init__(self, preset: int = 6):
+        """
+        Initialize the codec
+
+        Args:
+            preset: Compression preset, 0 (fastest) to 9 (smallest)
+        """
+        self.preset = preset
+
+    def compress(self, data: bytes) -> bytes:
+        return lzma.compress(data, format=lzma.FORMAT_XZ, preset=self.preset)
+
+    def decompress(self, data: bytes) -> bytes:
+        return lzma.decompress(data, format=lzma.FORMAT_XZ)
+
+
+CODECS: Dict[str, Codec] = {}
+
+
+def register_codec(codec: Codec) -> None:
+    """
+    Make a codec available for writing and reading
+
+    Args:
+        codec: Codec instance; its name is recorded in metadata
+
+    Raises:
+        ValueError: If the codec has no name
+    """
+    if not codec.name:
+        raise ValueError("Codec must define a name")
+    CODECS[codec.name] = codec
+
+
+def get_codec(name: str) -> Codec:
+    """
+    Look up a registered codec
+
+    Raises:
+        ValueError: If no codec of that name is registered
+    """
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Unknown compression codec: {name}")
+    return codec
+
+
+register_codec(ZlibCodec())
+register_codec(LzmaCodec())
+
+
+class CompressionPolicy:
+    """
+    Decides per value whether compression is worth it.
+
+    Values below min_bytes are stored as is, and so are values the codec
+    cannot shrink to at most max_ratio of their size (already compressed
+    media, random tokens), so reads of those never pay for decompression.
+    """
+
+    def __init__(
+        self,
+        codec: Union[str, Codec],
+        min_bytes: int = 512,
+        max_ratio: float = 0.9
+    ):
+        """
+        Initialize the policy
+
+        Args:
+            codec: Codec or registered codec name
+            min_bytes: Smallest payload worth compressing
+            max_ratio: Largest compressed/original size ratio worth keeping
+        """
+        if isinstance(codec, str):
+            codec = get_codec(codec)
+        elif codec.name not in CODECS:
+            register_codec(codec)
+        self.codec = codec
+        self.min_bytes = min_bytes
+        self.max_ratio = max_ratio
+
+    def compress(self, payload: bytes) -> Tuple[bytes, Optional[str]]:
+        """
+        Compress a payload if it pays off
+
+        Returns:
+            Tuple of (payload, codec name or None if left uncompressed)
+        """
+        if len(payload) < self.min_bytes:
+            return payload, None
+        compressed = self.codec.compress(payload)
+        if len(compressed) > len(payload) * self.max_ratio:
+            return payload, None
+        return compressed, self.codec.name
+
+
+def decompress(payload: bytes, codec: Optional[str]) -> bytes:
+    """
+    Undo the compression recorded for a value
+
+    Args:
+        payload: Stored plaintext payload
+        codec: Codec name from StorageMetadata, or None
+
+    Returns:
+        Uncompressed payload
+    """
+    if codec is None:
+        return payload
+    return get_codec(codec).decompress(payload)
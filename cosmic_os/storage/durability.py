@@ -0,0 +1,148 @@
+"""
+Durability
+==========
+
+When a write to LocalFirstStorage survives a crash or power loss.
+
+Both persistent engines write ahead: the segment log is itself an
+append-only log, and SQLite runs with a write-ahead log. A write is
+therefore crash-consistent as soon as it returns; what the durability
+mode decides is when the log reaches stable storage:
+
+- SYNC: the log is synced before the write returns
+- GROUP: the write waits for the next group commit, so concurrent writers
+  share one sync and syncs happen at most once per commit interval
+- BUFFERED: the write returns once the OS has the data; the log is synced
+  in the background (the segment log within a second, SQLite at its next
+  WAL checkpoint), so a power failure can lose the most recent writes
+
+The mode is chosen per storage instance (BUFFERED by default) and can be
+overridden per call.
+"""
+
+from typing import Callable, List, Optional
+from concurrent.futures import Future
+from enum import Enum
+import threading
+import time
+
+
+class Durability(Enum):
+    """When a write is forced to stable storage"""
+    SYNC = "sync"
+    GROUP = "group"
+    BUFFERED = "buffered"
+
+
+class GroupCommitter:
+    """
+    Coalesces durability requests onto as few syncs as possible.
+
+    SYNC requests start a sync right away; GROUP requests wait for the
+    next commit tick, so there is at most one sync per interval however
+    many writers are waiting. Requests that arrive while a sync runs are
+    served by the next one. With a flush interval, writes that nobody
+    waited for are synced in the background too.
+    """
+
+    def __init__(
+        self,
+        sync: Callable[[], None],
+        interval: float,
+        flush_interval: Optional[float] = None,
+        name: str = "group-commit"
+    ):
+        """
+        Initialize the committer and start its thread
+
+        Args:
+            sync: Forces every write issued so far to stable storage
+            interval: Minimum seconds between group commits
+            flush_interval: Seconds after the first unsynced buffered write
+                at which it is synced anyway (None leaves that to the engine)
+            name: Thread name
+        """
+        self._sync = sync
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.syncs = 0
+
+        self._cond = threading.Condition()
+        self._waiting: List[Future] = []
+        self._urgent = False
+        self._dirty_since: Optional[float] = None
+        self._closing = False
+        self._last_sync = 0.0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def request(self, durability: Durability) -> Future:
+        """
+        Ask for every write issued so far to become durable
+
+        Args:
+            durability: SYNC or GROUP
+
+        Returns:
+            Future resolving once the covering sync has completed
+        """
+        future: Future = Future()
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("Group committer is closed")
+            self._waiting.append(future)
+            if durability == Durability.SYNC:
+                self._urgent = True
+            self._cond.notify()
+        return future
+
+    def mark_dirty(self) -> None:
+        """Note a buffered write for the background flush"""
+        if self._dirty_since is None:
+            with self._cond:
+                if self._dirty_since is None:
+                    self._dirty_since = time.monotonic()
+                    self._cond.notify()
+
+    def close(self) -> None:
+        """Serve outstanding requests and stop the thread"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _next_due(self, now: float) -> Optional[float]:
+        """When the next sync should start; caller holds the condition"""
+        if self._waiting:
+            if self._urgent or self._closing:
+                return now
+            return self._last_sync + self.interval
+        if self._dirty_since is not None and self.flush_interval is not None and not self._closing:
+            return self._dirty_since + self.flush_interval
+        return None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    due = self._next_due(now)
+                    if due is None and self._closing:
+                        return
+                    if due is not None and due <= now:
+                        break
+                    self._cond.wait(None if due is None else due - now)
+                batch, self._waiting = self._waiting, []
+                self._urgent = False
+                self._dirty_since = None
+                self._last_sync = now
+
+            try:
+                self._sync()
+            except Exception as e:
+                for future in batch:
+                    future.set_exception(e)
+            else:
+                self.syncs += 1
+                for future in batch:
+                    future.set_result(None)
@@ -0,0 +1,440 @@
+"""
+Storage Engines
+===============
+
+Byte-level engines that persist values for LocalFirstStorage.
+
+An engine only stores opaque (already encoded and encrypted) values along
+with their StorageMetadata. Serialization, encryption and constitutional
+checks stay in LocalFirstStorage so every backend enforces them equally.
+"""
+
+from typing import Dict, List, Optional, Any, Callable, Iterable, Iterator, Sequence, Set, Tuple
+from concurrent.futures import Future
+from itertools import islice
+import heapq
+import threading
+
+from .durability import Durability
+from .metadata import StorageMetadata, MetadataStore, InMemoryMetadataStore, SyncStatus
+
+
+# Keys listed per lock hold when scanning a memory snapshot
+_SCAN_CHUNK = 1024
+
+
+class EngineSnapshot:
+    """
+    Read-only view of an engine pinned at one point in time.
+
+    Reads through a snapshot see exactly the keys, metadata and values
+    committed when it was taken, whatever is written, deleted or
+    compacted afterwards. A snapshot holds on to the storage it needs
+    (files, a read transaction) until it is closed, and must be closed
+    before its engine is.
+    """
+
+    metadata: MetadataStore
+    sequence: int
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Value of a key as of the snapshot, or None"""
+        raise NotImplementedError
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Values of several keys as of the snapshot, in order"""
+        return [self.get(key) for key in keys]
+
+    def close(self) -> None:
+        """Release what the snapshot pins"""
+
+    def __enter__(self) -> "EngineSnapshot":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class StorageEngine:
+    """
+    Base class for storage engines.
+
+    Engines are synchronous and thread-safe; LocalFirstStorage drives
+    writes through submit_put/submit_delete so engines with their own
+    writer thread never block the event loop. Every engine owns a
+    MetadataStore that it keeps in step with its writes and deletes.
+    """
+
+    metadata: MetadataStore
+
+    def recover(self) -> MetadataStore:
+        """
+        Open the engine and rebuild its state from persistent storage
+
+        Returns:
+            The engine's metadata store
+        """
+        raise NotImplementedError
+
+    def put(self, key: str, value: bytes, metadata: StorageMetadata) -> int:
+        """
+        Store a value, replacing any previous value for the key
+
+        Args:
+            key: Storage key
+            value: Encoded value bytes
+            metadata: Metadata describing the value
+
+        Returns:
+            Sequence number assigned to the write
+        """
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Fetch the value stored for a key
+
+        Args:
+            key: Storage key
+
+        Returns:
+            Value bytes or None if not found
+        """
+        raise NotImplementedError
+
+    def get_view(self, key: str) -> Optional[memoryview]:
+        """
+        Fetch the value stored for a key without copying it, where possible
+
+        Engines that can expose stored bytes in place (for example through
+        a memory map) override this; the default wraps get().
+
+        Args:
+            key: Storage key
+
+        Returns:
+            Read-only view of the value bytes or None if not found
+        """
+        value = self.get(key)
+        return None if value is None else memoryview(value).toreadonly()
+
+    def delete(self, key: str) -> bool:
+        """
+        Remove a key
+
+        Args:
+            key: Storage key
+
+        Returns:
+            True if deleted, False if not found
+        """
+        raise NotImplementedError
+
+    def put_many(self, items: Sequence[Tuple[str, bytes, StorageMetadata]]) -> List[int]:
+        """
+        Store several values as one batch
+
+        Args:
+            items: (key, value, metadata) tuples; later items win on duplicate keys
+
+        Returns:
+            Sequence numbers assigned to each write, in order
+        """
+        return [self.put(key, value, metadata) for key, value, metadata in items]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """
+        Fetch several values
+
+        Args:
+            keys: Storage keys
+
+        Returns:
+            Values (or None) in the same order as keys
+        """
+        return [self.get(key) for key in keys]
+
+    def delete_many(self, keys: Sequence[str]) -> List[bool]:
+        """
+        Remove several keys as one batch
+
+        Args:
+            keys: Storage keys
+
+        Returns:
+            Per-key deletion results, in order
+        """
+        return [self.delete(key) for key in keys]
+
+    def delete_prefix(self, prefix: str) -> List[str]:
+        """
+        Remove every key starting with prefix
+
+        Engines that can drop a key range or their whole contents at once
+        override this; the default deletes the matching keys as one batch.
+
+        Args:
+            prefix: Key prefix ("" for every key)
+
+        Returns:
+            The removed keys
+        """
+        keys = list(self.metadata.iter_keys(prefix))
+        return [key for key, deleted in zip(keys, self.delete_many(keys)) if deleted]
+
+    def submit_put(self, key: str, value: bytes, metadata: StorageMetadata) -> Future:
+        """
+        Schedule a put, returning a future resolving to its sequence number
+
+        The default implementation runs the put inline.
+        """
+        return self._run_inline(self.put, key, value, metadata)
+
+    def submit_delete(self, key: str) -> Future:
+        """
+        Schedule a delete, returning a future resolving to its result
+
+        The default implementation runs the delete inline.
+        """
+        return self._run_inline(self.delete, key)
+
+    def submit_put_many(self, items: Sequence[Tuple[str, bytes, StorageMetadata]]) -> Future:
+        """Schedule a batch put; the default implementation runs it inline"""
+        return self._run_inline(self.put_many, items)
+
+    def submit_delete_many(self, keys: Sequence[str]) -> Future:
+        """Schedule a batch delete; the default implementation runs it inline"""
+        return self._run_inline(self.delete_many, keys)
+
+    def submit_delete_prefix(self, prefix: str) -> Future:
+        """Schedule a prefix delete; the default implementation runs it inline"""
+        return self._run_inline(self.delete_prefix, prefix)
+
+    def submit_sync(self, durability: Durability) -> Future:
+        """
+        Schedule a durability barrier for every write submitted so far
+
+        The default implementation has nothing to sync.
+
+        Args:
+            durability: SYNC or GROUP; BUFFERED needs no barrier
+
+        Returns:
+            Future resolving once those writes are on stable storage
+        """
+        return self._run_inline(lambda: None)
+
+    @staticmethod
+    def _run_inline(operation: Callable[..., Any], *args: Any) -> Future:
+        """Run an operation now and wrap its outcome in a completed future"""
+        future: Future = Future()
+        try:
+            future.set_result(operation(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def snapshot(self) -> EngineSnapshot:
+        """
+        Pin the current state for consistent reads without blocking writers
+
+        Returns:
+            Snapshot to read from and close when done
+        """
+        raise NotImplementedError
+
+    def refresh(self) -> Optional[List[str]]:
+        """
+        Pick up changes committed by another process
+
+        Only meaningful for engines opened read-only next to a writer.
+
+        Returns:
+            Keys that changed, or None if any key may have changed
+        """
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Engine-specific statistics
+
+        Returns:
+            Dict containing engine statistics
+        """
+        return {}
+
+    def close(self) -> None:
+        """Flush pending data and release resources"""
+
+
+class MemoryEngine(StorageEngine):
+    """
+    In-process engine for the MEMORY backend.
+
+    Nothing is persisted; data lives for the lifetime of the process.
+    Snapshots are copy-on-write: taking one is O(1), and each change
+    first saves the previous version of its key for every open snapshot.
+    """
+
+    def __init__(self):
+        """Initialize an empty in-memory engine"""
+        self.metadata = _MemoryMetadataStore(self)
+        self._values: Dict[str, bytes] = {}
+        self._sequence = 0
+        self._snapshots: Set["_MemorySnapshot"] = set()
+        self._lock = threading.Lock()
+
+    def recover(self) -> MetadataStore:
+        """Nothing to recover for an in-memory engine"""
+        return self.metadata
+
+    def put(self, key: str, value: bytes, metadata: StorageMetadata) -> int:
+        """Store a value in memory"""
+        with self._lock:
+            self._preserve(key)
+            self._sequence += 1
+            metadata.sequence = self._sequence
+            self._values[key] = bytes(value)
+            self.metadata.put(metadata)
+            return self._sequence
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Fetch a value from memory"""
+        return self._values.get(key)
+
+    def delete(self, key: str) -> bool:
+        """Remove a value from memory"""
+        with self._lock:
+            if key not in self._values:
+                return False
+            self._preserve(key)
+            self._sequence += 1
+            del self._values[key]
+            self.metadata.remove(key)
+            return True
+
+    def set_sync_status(self, keys: Iterable[str], status: SyncStatus) -> None:
+        """Update sync statuses, keeping the old entries for open snapshots"""
+        with self._lock:
+            keys = list(keys)
+            for key in keys:
+                self._preserve(key)
+            InMemoryMetadataStore.set_sync_status(self.metadata, keys, status)
+
+    def snapshot(self) -> EngineSnapshot:
+        """Pin the current state; nothing is copied until a key changes"""
+        with self._lock:
+            snapshot = _MemorySnapshot(self, self._sequence)
+            self._snapshots.add(snapshot)
+            return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        """Memory engine statistics"""
+        return {
+            "engine": "memory",
+            "resident_bytes": sum(len(v) for v in self._values.values())
+        }
+
+    def _preserve(self, key: str) -> None:
+        """Save the current version of a key for snapshots that still see it; caller holds _lock"""
+        for snapshot in self._snapshots:
+            if key not in snapshot._undo:
+                snapshot._undo[key] = (self._values.get(key), self.metadata.get(key))
+
+    def _release(self, snapshot: "_MemorySnapshot") -> None:
+        """Stop saving old versions for a closed snapshot"""
+        with self._lock:
+            self._snapshots.discard(snapshot)
+
+
+class _MemoryMetadataStore(InMemoryMetadataStore):
+    """InMemoryMetadataStore whose sync status changes go through the engine"""
+
+    def __init__(self, engine: MemoryEngine):
+        super().__init__()
+        self._engine = engine
+
+    def set_sync_status(self, keys: Iterable[str], status: SyncStatus) -> None:
+        self._engine.set_sync_status(keys, status)
+
+
+# (value, metadata) of a key when the snapshot was taken; None if it did not exist
+_Version = Tuple[Optional[bytes], Optional[StorageMetadata]]
+
+
+class _MemorySnapshot(EngineSnapshot):
+    """Point-in-time view of a MemoryEngine: the live tables plus keys changed since"""
+
+    def __init__(self, engine: MemoryEngine, sequence: int):
+        self._engine = engine
+        self._undo: Dict[str, _Version] = {}
+        self.metadata = _MemorySnapshotMetadata(self)
+        self.sequence = sequence
+
+    def version(self, key: str) -> _Version:
+        """Value and metadata of a key as of the snapshot"""
+        engine = self._engine
+        with engine._lock:
+            if key in self._undo:
+                return self._undo[key]
+            return engine._values.get(key), engine.metadata.get(key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Value of a key as of the snapshot"""
+        return self.version(key)[0]
+
+    def close(self) -> None:
+        """Stop keeping old versions for this snapshot"""
+        self._engine._release(self)
+
+
+class _MemorySnapshotMetadata(MetadataStore):
+    """Metadata of a MemoryEngine as of a snapshot"""
+
+    def __init__(self, snapshot: _MemorySnapshot):
+        self._snapshot = snapshot
+
+    def get(self, key: str) -> Optional[StorageMetadata]:
+        """Metadata for a key as of the snapshot"""
+        return self._snapshot.version(key)[1]
+
+    def __len__(self) -> int:
+        return self.summary()["total_items"]
+
+    def iter_keys(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[str]:
+        """Live keys that existed at the snapshot, merged with keys deleted since"""
+        engine = self._snapshot._engine
+        undo = self._snapshot._undo
+        while True:
+            with engine._lock:
+                live = list(islice(engine.metadata.iter_keys(prefix, start_after), _SCAN_CHUNK))
+                upper = live[-1] if len(live) == _SCAN_CHUNK else None
+                visible = [key for key in live if key not in undo or undo[key][1] is not None]
+                deleted = sorted(
+                    key for key, (_, metadata) in undo.items()
+                    if metadata is not None and key not in engine._values
+                    and key.startswith(prefix)
+                    and (start_after is None or key > start_after)
+                    and (upper is None or key <= upper)
+                )
+            yield from heapq.merge(visible, deleted)
+            if upper is None:
+                return
+            start_after = upper
+
+    def values(self) -> Iterator[StorageMetadata]:
+        """Iterate over all metadata records as of the snapshot"""
+        return (self.get(key) for key in self.iter_keys())
+
+    def summary(self) -> Dict[str, Any]:
+        """Live counters with the keys changed since the snapshot rolled back"""
+        engine = self._snapshot._engine
+        with engine._lock:
+            counters = engine.metadata.counters()
+            for key, (_, metadata) in self._snapshot._undo.items():
+                current = engine.metadata.get(key)
+                if current is not None:
+                    counters.account(current, -1)
+                if metadata is not None:
+                    counters.account(metadata, 1)
+        return counters.summary()
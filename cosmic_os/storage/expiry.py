@@ -0,0 +1,205 @@
+"""
+Expiry and Retention
+====================
+
+Time-to-live support for LocalFirstStorage.
+
+A key expires at the instant recorded in its StorageMetadata.expires_at,
+set on write from an explicit TTL or from the retention policy of the
+longest matching key prefix. From that instant reads treat the key as
+missing; a background sweeper deletes it afterwards.
+
+The sweeper never scans the store. ExpiryIndex keeps every scheduled key
+in a min-heap ordered by expiry, so each sweep pops only the keys that
+are due. Overwrites and deletes leave stale heap entries behind, which
+are skipped when they surface and dropped when the heap is compacted.
+"""
+
+from typing import Dict, List, Optional, Iterable, Tuple
+from datetime import datetime, timedelta
+from pathlib import Path
+import heapq
+import json
+import os
+
+from .metadata import StorageMetadata
+
+
+RETENTION_FILENAME = "retention.json"
+EXPIRY_SNAPSHOT_FILENAME = "expiry.snapshot.json"
+
+
+class ExpiryIndex:
+    """Keys with an expiry, ordered by when they expire"""
+
+    def __init__(self):
+        self._deadlines: Dict[str, datetime] = {}
+        self._heap: List[Tuple[datetime, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, key: str, expires_at: Optional[datetime]) -> None:
+        """Set or clear the expiry of a key"""
+        if expires_at is None:
+            self._deadlines.pop(key, None)
+            return
+        if self._deadlines.get(key) == expires_at:
+            return
+        self._deadlines[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, key))
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._compact()
+
+    def discard(self, keys: Iterable[str]) -> None:
+        """Forget deleted keys"""
+        for key in keys:
+            self._deadlines.pop(key, None)
+
+    def expired(self, key: str, now: datetime) -> bool:
+        """Whether a key has expired as of now"""
+        deadline = self._deadlines.get(key)
+        return deadline is not None and deadline <= now
+
+    def next_deadline(self) -> Optional[datetime]:
+        """Earliest scheduled expiry, or None"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def due(self, now: datetime, limit: int) -> List[str]:
+        """
+        Take up to limit keys that have expired as of now
+
+        Taken keys stay expired for reads until they are discarded or
+        rescheduled.
+        """
+        keys: List[str] = []
+        while len(keys) < limit:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, key = heapq.heappop(self._heap)
+            keys.append(key)
+        return keys
+
+    def requeue(self, keys: Iterable[str]) -> None:
+        """Return keys taken with due() but not deleted to the queue"""
+        for key in keys:
+            deadline = self._deadlines.get(key)
+            if deadline is not None:
+                heapq.heappush(self._heap, (deadline, key))
+
+    def rebuild(self, records: Iterable[StorageMetadata]) -> None:
+        """Schedule every record that carries an expiry"""
+        self._deadlines = {
+            record.key: record.expires_at for record in records if record.expires_at is not None
+        }
+        self._compact()
+
+    def save(self, path: Path) -> None:
+        """Snapshot the schedule beside the data on a clean shutdown"""
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps({
+            "deadlines": [[key, deadline.isoformat()] for key, deadline in self._deadlines.items()]
+        }, separators=(",", ":")))
+        os.replace(tmp, path)
+
+    def load(self, path: Path) -> bool:
+        """
+        Restore and consume a snapshot left by save()
+
+        Returns:
+            Whether a valid snapshot was loaded
+        """
+        if not path.exists():
+            return False
+        try:
+            self._deadlines = {
+                key: datetime.fromisoformat(deadline)
+                for key, deadline in json.loads(path.read_text())["deadlines"]
+            }
+            loaded = True
+        except (ValueError, KeyError, TypeError):
+            self._deadlines = {}
+            loaded = False
+        # Consumed, so a crash before the next clean close forces a rebuild
+        path.unlink()
+        self._compact()
+        return loaded
+
+    def _drop_stale(self) -> None:
+        """Pop heap entries superseded by a reschedule or delete"""
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _compact(self) -> None:
+        self._heap = [(deadline, key) for key, deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
+
+
+class RetentionPolicies:
+    """
+    Default TTLs per key prefix.
+
+    A write without an explicit TTL takes the retention of the longest
+    prefix matching its key. Policies are stamped into metadata at write
+    time, so changing one only affects later writes.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        """
+        Initialize the policy set
+
+        Args:
+            directory: Where the policies are persisted, None for memory only
+        """
+        self.directory = directory
+        self._ttls: Dict[str, float] = {}
+        if directory is not None and (directory / RETENTION_FILENAME).exists():
+            self._ttls = json.loads((directory / RETENTION_FILENAME).read_text())["prefixes"]
+
+    def set(self, prefix: str, ttl: Optional[float]) -> None:
+        """
+        Set the retention of a prefix, or remove it when ttl is None
+
+        Raises:
+            ValueError: If ttl is not positive
+        """
+        if ttl is None:
+            if self._ttls.pop(prefix, None) is None:
+                return
+        elif ttl <= 0:
+            raise ValueError("Retention must be positive")
+        else:
+            self._ttls[prefix] = ttl
+        if self.directory is not None:
+            path = self.directory / RETENTION_FILENAME
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(json.dumps({"prefixes": self._ttls}, separators=(",", ":")))
+            os.replace(tmp, path)
+
+    def ttl_for(self, key: str) -> Optional[float]:
+        """Retention in seconds for a key, or None if it is kept indefinitely"""
+        matched = None
+        for prefix in self._ttls:
+            if key.startswith(prefix) and (matched is None or len(prefix) > len(matched)):
+                matched = prefix
+        return None if matched is None else self._ttls[matched]
+
+    def items(self) -> Dict[str, float]:
+        """Retention per prefix"""
+        return dict(self._ttls)
+
+
+def expiry_from_ttl(now: datetime, ttl: Optional[float]) -> Optional[datetime]:
+    """
+    Expiry instant for a write at now
+
+    Raises:
+        ValueError: If ttl is not positive
+    """
+    if ttl is None:
+        return None
+    if ttl <= 0:
+        raise ValueError("TTL must be positive")
+    return now + timedelta(seconds=ttl)
@@ -0,0 +1,494 @@
+"""
+Data Export
+===========
+
+Streaming writers behind LocalFirstStorage.export_all (Article II,
+Section 7: Right to Exit), and the matching readers behind import_data.
+
+Records arrive in key order, one batch at a time, and every batch is
+appended to the export file as soon as it is decrypted, so memory use is
+bounded by the batch size rather than by the size of the store. After
+each batch the writer's byte offset and the last exported key are saved
+to a small checkpoint file next to the export; an interrupted export is
+resumed by truncating back to that offset and continuing after that key.
+
+Formats:
+    jsonl: one JSON object per line (``json`` is accepted as an alias)
+    csv:   key, encoding, value, timestamps; bytes values are base64
+    tar:   gzip-compressed tar of raw values, metadata in PAX headers
+    zip:   deflated zip of raw values, metadata in entry comments
+
+Readers stream records back in file order and can skip the records an
+interrupted import already consumed.
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Type
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from datetime import datetime
+from itertools import islice
+from urllib.parse import quote
+import base64
+import calendar
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+import zipfile
+import zlib
+
+from .metadata import StorageMetadata, SyncStatus
+
+
+FORMAT_ALIASES = {"json": "jsonl"}
+
+PAX_PREFIX = "COSMIC."  # Vendor namespace for tar metadata headers
+
+_TAR_BLOCK = tarfile.BLOCKSIZE
+
+
+@dataclass
+class ExportRecord:
+    """A decrypted value as it appears in an export"""
+    key: str
+    payload: bytes
+    metadata: StorageMetadata
+
+
+@dataclass
+class ExportProgress:
+    """Progress reported after every written batch"""
+    exported: int
+    total: int
+    bytes_written: int
+    cursor: Optional[str]
+
+
+@dataclass
+class ExportCheckpoint:
+    """Resume point of an interrupted export"""
+    format: str
+    cursor: Optional[str]
+    exported: int
+    offset: int
+
+    @staticmethod
+    def path_for(export_path: Path) -> Path:
+        """Location of the checkpoint for an export file"""
+        return export_path.with_name(export_path.name + ".progress")
+
+    @classmethod
+    def load(cls, export_path: Path) -> Optional["ExportCheckpoint"]:
+        """Read the checkpoint, or None if there is no usable one"""
+        try:
+            data = json.loads(cls.path_for(export_path).read_text())
+            return cls(**data)
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def save(self, export_path: Path) -> None:
+        """Atomically replace the checkpoint file"""
+        path = self.path_for(export_path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(asdict(self)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def clear(cls, export_path: Path) -> None:
+        """Remove the checkpoint once the export is complete"""
+        try:
+            cls.path_for(export_path).unlink()
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class ImportProgress:
+    """Progress reported after every imported batch"""
+    consumed: int
+    imported: int
+    skipped: int
+
+
+@dataclass
+class ImportCheckpoint:
+    """
+    Resume point of an interrupted import.
+
+    Tied to the source file's size and modification time, so a replaced
+    file is imported from the start rather than from a stale position.
+    """
+    format: str
+    size: int
+    mtime_ns: int
+    consumed: int = 0
+    imported: int = 0
+    skipped: int = 0
+
+    @classmethod
+    def for_source(cls, source: Path, format: str) -> "ImportCheckpoint":
+        """A fresh checkpoint for a source file"""
+        stat = source.stat()
+        return cls(format=format, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+    @staticmethod
+    def path_for(directory: Path, source: Path) -> Path:
+        """Checkpoint location for a source file"""
+        digest = hashlib.sha256(str(source.resolve()).encode("utf-8")).hexdigest()
+        return directory / f"{digest[:16]}.progress"
+
+    def resume(self, path: Path) -> "ImportCheckpoint":
+        """The checkpoint saved at path if it belongs to this very file, else self"""
+        try:
+            saved = type(self)(**json.loads(path.read_text()))
+        except (OSError, ValueError, TypeError):
+            return self
+        if (saved.format, saved.size, saved.mtime_ns) != (self.format, self.size, self.mtime_ns):
+            return self
+        return saved
+
+    def save(self, path: Path) -> None:
+        """Atomically replace the checkpoint file"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(asdict(self)))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def clear(path: Path) -> None:
+        """Remove the checkpoint once the import is complete"""
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def resolve_format(format: str) -> str:
+    """
+    Normalize an export format name
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    name = FORMAT_ALIASES.get(format.lower(), format.lower())
+    if name not in WRITERS:
+        raise ValueError(
+            f"Unsupported export format: {format} (expected one of {', '.join(sorted(WRITERS))})"
+        )
+    return name
+
+
+def _value_text(record: ExportRecord) -> str:
+    """JSON text for json values, base64 for raw bytes"""
+    if record.metadata.encoding == "bytes":
+        return base64.b64encode(record.payload).decode("ascii")
+    return record.payload.decode("utf-8")
+
+
+class ExportWriter:
+    """
+    Append-only writer for one export format.
+
+    Subclasses encode a batch of records into bytes; the base class owns
+    the file, its durability and truncation on resume.
+    """
+
+    resumable = True
+
+    def __init__(self, path: Path):
+        """
+        Initialize the writer
+
+        Args:
+            path: Export file path
+        """
+        self.path = path
+        self._file: Optional[io.BufferedRandom] = None
+
+    def open(self, offset: Optional[int] = None) -> None:
+        """
+        Open the export file
+
+        Args:
+            offset: Byte offset to truncate to and continue from, or
+                None to start a new file
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if offset is None:
+            self._file = open(self.path, "w+b")
+            self._file.write(self.header())
+        else:
+            self._file = open(self.path, "r+b")
+            self._file.truncate(offset)
+            self._file.seek(offset)
+
+    def header(self) -> bytes:
+        """Bytes written once at the start of a new file"""
+        return b""
+
+    def encode(self, records: List[ExportRecord]) -> bytes:
+        """Encode a batch of records"""
+        raise NotImplementedError
+
+    def trailer(self) -> bytes:
+        """Bytes written once when the export completes"""
+        return b""
+
+    def write_batch(self, records: List[ExportRecord]) -> int:
+        """
+        Append a batch and make it durable
+
+        Returns:
+            File offset after the batch
+        """
+        self._file.write(self.encode(records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def finish(self) -> int:
+        """
+        Complete the export and close the file
+
+        Returns:
+            Final file size
+        """
+        self._file.write(self.trailer())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        size = self._file.tell()
+        self.close()
+        return size
+
+    def close(self) -> None:
+        """Close the file without completing it"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class JsonLinesWriter(ExportWriter):
+    """One JSON object per record: key, metadata and value"""
+
+    def encode(self, records: List[ExportRecord]) -> bytes:
+        lines = []
+        for record in records:
+            head = json.dumps({"key": record.key, "metadata": record.metadata.to_dict()})
+            if record.metadata.encoding == "bytes":
+                value = json.dumps(_value_text(record))
+                lines.append(f'{head[:-1]}, "value_b64": {value}}}\n')
+            else:
+                # The stored payload is already compact JSON text
+                lines.append(f'{head[:-1]}, "value": {_value_text(record)}}}\n')
+        return "".join(lines).encode("utf-8")
+
+
+class CsvWriter(ExportWriter):
+    """Spreadsheet-friendly rows; bytes values are base64 encoded"""
+
+    COLUMNS = ["key", "encoding", "value", "created_at", "updated_at", "encrypted", "size_bytes"]
+
+    def header(self) -> bytes:
+        return self._rows([self.COLUMNS])
+
+    def encode(self, records: List[ExportRecord]) -> bytes:
+        return self._rows(
+            [
+                record.key,
+                record.metadata.encoding,
+                _value_text(record),
+                record.metadata.created_at.isoformat(),
+                record.metadata.updated_at.isoformat(),
+                int(record.metadata.encrypted),
+                record.metadata.size_bytes
+            ]
+            for record in records
+        )
+
+    @staticmethod
+    def _rows(rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+
+def member_name(key: str, encoding: str) -> str:
+    """
+    Archive member name for a key
+
+    Keys are percent-encoded into a flat namespace so that keys such as
+    ``a`` and ``a/b`` cannot collide as file and directory, and no key
+    can escape the archive root when extracted.
+    """
+    suffix = ".bin" if encoding == "bytes" else ".json"
+    return "data/" + quote(key, safe="") + suffix
+
+
+class TarWriter(ExportWriter):
+    """
+    Gzip-compressed tar of raw values.
+
+    Each batch is compressed as its own gzip member; concatenated members
+    form a valid gzip stream, which keeps the archive appendable after a
+    resume.
+    """
+
+    def encode(self, records: List[ExportRecord]) -> bytes:
+        blocks = bytearray()
+        for record in records:
+            metadata = record.metadata
+            info = tarfile.TarInfo(member_name(record.key, metadata.encoding))
+            info.size = len(record.payload)
+            info.mtime = calendar.timegm(metadata.updated_at.utctimetuple())
+            info.mode = 0o600
+            info.pax_headers = {
+                PAX_PREFIX + "key": record.key,
+                PAX_PREFIX + "metadata": json.dumps(metadata.to_dict())
+            }
+            blocks += info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+            blocks += record.payload
+            blocks += bytes(-len(record.payload) % _TAR_BLOCK)
+        return self._gzip_member(bytes(blocks))
+
+    def trailer(self) -> bytes:
+        return self._gzip_member(bytes(2 * _TAR_BLOCK))
+
+    @staticmethod
+    def _gzip_member(data: bytes) -> bytes:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+
+class ZipWriter(ExportWriter):
+    """
+    Deflated zip of raw values with metadata in each entry's comment.
+
+    The zip central directory is only written on completion, so a
+    partial zip cannot be appended to; an interrupted zip export starts
+    over instead of resuming.
+    """
+
+    resumable = False
+
+    def open(self, offset: Optional[int] = None) -> None:
+        super().open(None)
+        self._zip = zipfile.ZipFile(self._file, "w", zipfile.ZIP_DEFLATED)
+
+    def encode(self, records: List[ExportRecord]) -> bytes:
+        for record in records:
+            info = zipfile.ZipInfo(
+                member_name(record.key, record.metadata.encoding),
+                date_time=max(record.metadata.updated_at.timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+            )
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.comment = json.dumps(record.metadata.to_dict()).encode("utf-8")
+            self._zip.writestr(info, record.payload)
+        return b""
+
+    def finish(self) -> int:
+        self._zip.close()
+        return super().finish()
+
+    def close(self) -> None:
+        if self._file is not None and getattr(self, "_zip", None) is not None:
+            self._zip.fp = None  # Leave the partial file as is
+        super().close()
+
+
+WRITERS: Dict[str, Type[ExportWriter]] = {
+    "jsonl": JsonLinesWriter,
+    "csv": CsvWriter,
+    "tar": TarWriter,
+    "zip": ZipWriter
+}
+
+
+def _json_record(line: bytes) -> ExportRecord:
+    """Parse one JSON Lines record"""
+    obj = json.loads(line)
+    metadata = StorageMetadata.from_dict({**obj["metadata"], "key": obj["key"]})
+    if "value_b64" in obj:
+        metadata.encoding = "bytes"
+        payload = base64.b64decode(obj["value_b64"])
+    else:
+        metadata.encoding = "json"
+        payload = json.dumps(obj["value"], separators=(",", ":")).encode("utf-8")
+    return ExportRecord(obj["key"], payload, metadata)
+
+
+def read_json_lines(path: Path, skip: int = 0) -> Iterator[ExportRecord]:
+    """Stream records from a JSON Lines export"""
+    with open(path, "rb") as f:
+        lines = (line for line in f if line.strip())
+        for line in islice(lines, skip, None):
+            yield _json_record(line)
+
+
+def read_csv(path: Path, skip: int = 0) -> Iterator[ExportRecord]:
+    """Stream records from a CSV export"""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in islice(csv.DictReader(f), skip, None):
+            encoding = row["encoding"]
+            if encoding == "bytes":
+                payload = base64.b64decode(row["value"])
+            else:
+                payload = row["value"].encode("utf-8")
+            metadata = StorageMetadata(
+                key=row["key"],
+                created_at=datetime.fromisoformat(row["created_at"]),
+                updated_at=datetime.fromisoformat(row["updated_at"]),
+                sync_status=SyncStatus.NOT_SYNCED,
+                encrypted=bool(int(row["encrypted"])),
+                size_bytes=int(row["size_bytes"]),
+                encoding=encoding
+            )
+            yield ExportRecord(row["key"], payload, metadata)
+
+
+def _archive_metadata(raw: Optional[str], name: str) -> StorageMetadata:
+    """Decode the metadata stored alongside an archive member"""
+    if not raw:
+        raise ValueError(f"Archive member {name} carries no storage metadata")
+    return StorageMetadata.from_dict(json.loads(raw))
+
+
+def read_tar(path: Path, skip: int = 0) -> Iterator[ExportRecord]:
+    """
+    Stream records from a tar export
+
+    The gzip layer is opened separately because tarfile's own stream
+    mode stops after the first gzip member.
+    """
+    with gzip.open(path, "rb") as raw, tarfile.open(fileobj=raw, mode="r|") as archive:
+        seen = 0
+        for member in archive:
+            archive.members = []  # tarfile keeps every header otherwise
+            if not member.isfile():
+                continue
+            seen += 1
+            if seen <= skip:
+                continue
+            metadata = _archive_metadata(
+                member.pax_headers.get(PAX_PREFIX + "metadata"), member.name
+            )
+            payload = archive.extractfile(member).read()
+            yield ExportRecord(metadata.key, payload, metadata)
+
+
+def read_zip(path: Path, skip: int = 0) -> Iterator[ExportRecord]:
+    """Stream records from a zip export"""
+    with zipfile.ZipFile(path) as archive:
+        for info in islice(archive.infolist(), skip, None):
+            metadata = _archive_metadata(info.comment.decode("utf-8"), info.filename)
+            yield ExportRecord(metadata.key, archive.read(info), metadata)
+
+
+READERS: Dict[str, Callable[[Path, int], Iterator[ExportRecord]]] = {
+    "jsonl": read_json_lines,
+    "csv": read_csv,
+    "tar": read_tar,
+    "zip": read_zip
+}
@@ -0,0 +1,196 @@
+"""
+Key Index
+=========
+
+Sorted key index and glob compilation for hierarchical storage keys.
+
+Keys such as ``node/<id>/entries/<ts>`` are listed by range: a glob
+pattern is split into its literal prefix, which bounds a sorted range
+scan, and a residual matcher applied only to keys inside that range.
+"""
+
+from typing import List, Optional, Callable, Iterable, Iterator, Set, Tuple
+import bisect
+import fnmatch
+import heapq
+import re
+
+
+GLOB_WILDCARDS = "*?["
+
+# Below this many pending changes, patch the sorted list in place
+_INCREMENTAL_LIMIT = 64
+
+
+def glob_prefix(pattern: str) -> str:
+    """
+    Literal prefix of a glob pattern
+
+    Args:
+        pattern: fnmatch-style pattern
+
+    Returns:
+        Characters before the first wildcard
+    """
+    for i, char in enumerate(pattern):
+        if char in GLOB_WILDCARDS:
+            return pattern[:i]
+    return pattern
+
+
+def compile_key_pattern(
+    pattern: Optional[str]
+) -> Tuple[str, Optional[Callable[[str], bool]]]:
+    """
+    Split a glob into a range prefix and a residual matcher
+
+    Args:
+        pattern: fnmatch-style pattern, or None for every key
+
+    Returns:
+        Tuple of (prefix, matcher); matcher is None when the prefix
+        alone decides membership
+    """
+    if pattern is None:
+        return "", None
+
+    prefix = glob_prefix(pattern)
+    rest = pattern[len(prefix):]
+    if rest == "*":
+        return prefix, None
+    if rest == "":
+        return prefix, pattern.__eq__
+    return prefix, re.compile(fnmatch.translate(pattern)).match
+
+
+def prefix_successor(prefix: str) -> Optional[str]:
+    """
+    Smallest string greater than every string starting with prefix
+
+    Args:
+        prefix: Key prefix
+
+    Returns:
+        Exclusive upper bound, or None if the range is unbounded
+    """
+    while prefix:
+        last = ord(prefix[-1])
+        if last < 0x10FFFF:
+            return prefix[:-1] + chr(last + 1)
+        prefix = prefix[:-1]
+    return None
+
+
+def range_start(prefix: str, start_after: Optional[str]) -> Tuple[str, bool]:
+    """
+    Where a range scan begins
+
+    Returns:
+        Tuple of (first candidate key, whether that key itself is excluded)
+    """
+    if start_after is not None and start_after >= prefix:
+        return start_after, True
+    return prefix, False
+
+
+class SortedKeyIndex:
+    """
+    Sorted set of keys supporting prefix range scans.
+
+    Writes are buffered and folded into the sorted list on the next
+    read, patching it in place for small batches and merging for bulk
+    loads, so ingest stays O(1) per key.
+    """
+
+    def __init__(self, keys: Iterable[str] = ()):
+        """
+        Initialize the index
+
+        Args:
+            keys: Initial keys
+        """
+        self._members: Set[str] = set(keys)
+        self._sorted: List[str] = sorted(self._members)
+        self._added: List[str] = []
+        self._removed: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._members
+
+    def add(self, key: str) -> None:
+        """Insert a key"""
+        if key not in self._members:
+            self._members.add(key)
+            self._added.append(key)
+
+    def discard(self, key: str) -> None:
+        """Remove a key if present"""
+        if key in self._members:
+            self._members.remove(key)
+            self._removed.append(key)
+
+    def _settle(self) -> List[str]:
+        """Fold buffered changes into the sorted list"""
+        if not self._added and not self._removed:
+            return self._sorted
+
+        if len(self._added) + len(self._removed) <= _INCREMENTAL_LIMIT:
+            for key in self._removed:
+                i = bisect.bisect_left(self._sorted, key)
+                if i < len(self._sorted) and self._sorted[i] == key and key not in self._members:
+                    del self._sorted[i]
+            for key in self._added:
+                i = bisect.bisect_left(self._sorted, key)
+                if key in self._members and (i == len(self._sorted) or self._sorted[i] != key):
+                    self._sorted.insert(i, key)
+        else:
+            merged = heapq.merge(self._sorted, sorted(set(self._added)))
+            deduped: List[str] = []
+            for key in merged:
+                if key in self._members and (not deduped or deduped[-1] != key):
+                    deduped.append(key)
+            self._sorted = deduped
+
+        self._added.clear()
+        self._removed.clear()
+        return self._sorted
+
+    def range(
+        self,
+        prefix: str = "",
+        start_after: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        """
+        Keys starting with prefix, in order
+
+        Args:
+            prefix: Required key prefix
+            start_after: Only return keys strictly greater than this
+            limit: Maximum number of keys
+
+        Returns:
+            Matching keys
+        """
+        keys = self._settle()
+        start, exclusive = range_start(prefix, start_after)
+        i = (bisect.bisect_right if exclusive else bisect.bisect_left)(keys, start)
+        end = len(keys)
+        upper = prefix_successor(prefix)
+        if upper is not None:
+            end = bisect.bisect_left(keys, upper, i)
+        if limit is not None:
+            end = min(end, i + limit)
+        return keys[i:end]
+
+    def iter_range(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[str]:
+        """Iterate over a prefix range without copying it at once"""
+        while True:
+            chunk = self.range(prefix, start_after, limit=1024)
+            if not chunk:
+                return
+            yield from chunk
+            start_after = chunk[-1]
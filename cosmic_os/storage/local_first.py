@@ -6,12 +6,106 @@ Constitutional requirement: Article II, Section 4 (Right to Sovereignty)
 Data MUST be stored locally first. Cloud sync is optional and requires consent.
 """
 
-from typing import Dict, List, Optional, Any, Callable
+from typing import (
+    Dict, List, Optional, Any, Callable, Tuple, Union,
+    Iterable, AsyncIterable, AsyncIterator, Set, TypeVar
+)
+from contextlib import asynccontextmanager
 from enum import Enum
-from dataclasses import dataclass
-from datetime import datetime
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
+import asyncio
 import json
+import os
+
+from ..core.validator import ConstitutionalViolationError, ViolationType
+from ..crypto import ZeroKnowledgeEncryption, EncryptedData
+from .blob_store import BlobStore, DedupEngine
+from .cache import ValueCache
+from .codecs import Codec, CompressionPolicy, decompress
+from .durability import Durability
+from .engine import EngineSnapshot, StorageEngine, MemoryEngine
+from .expiry import EXPIRY_SNAPSHOT_FILENAME, ExpiryIndex, RetentionPolicies, expiry_from_ttl
+from .locking import KeyLocks, StoreLease
+from .export import (
+    ExportCheckpoint, ExportProgress, ExportRecord, ExportWriter, ImportCheckpoint,
+    ImportProgress, READERS, WRITERS, resolve_format
+)
+from .metadata import StorageMetadata, SyncStatus, MetadataStore
+from .secondary_index import SecondaryIndexes, plan_query
+from .segment_log import SegmentLogEngine
+from .shredding import Keyring, PurgeReport
+from .sqlite_engine import SQLiteEngine
+from .tiering import TierPolicy, TieredEngine
+from .sync import (
+    Change, CloudRemote, SyncItem, SyncJournal, OP_DELETE, OP_PUT, plan_batches
+)
+
+NONCE_SIZE = 12  # 96-bit nonce for AES-GCM and ChaCha20-Poly1305
+
+WRITER_LOCK_FILENAME = "writer.lock"
+INDEX_DIRNAME = "indexes"
+
+T = TypeVar("T")
+
+_MISS = object()
+
+
+@dataclass
+class KeyPage:
+    """One page of a key listing"""
+    keys: List[str] = field(default_factory=list)
+    next_cursor: Optional[str] = None  # Pass back to continue; None when exhausted
+
+
+async def _batched(
+    items: Union[Iterable[T], AsyncIterable[T]],
+    batch_size: int
+) -> AsyncIterator[List[T]]:
+    """
+    Group a sync or async iterable into lists of at most batch_size
+
+    Args:
+        items: Items to group
+        batch_size: Maximum batch length
+
+    Yields:
+        Lists of items
+    """
+    batch: List[T] = []
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    else:
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _key_page(
+    metadata: MetadataStore,
+    pattern: Optional[str],
+    limit: int,
+    cursor: Optional[str]
+) -> KeyPage:
+    """One page of a metadata store's keys"""
+    if limit <= 0:
+        raise ValueError("limit must be positive")
+    keys = list(islice(metadata.scan_keys(pattern, cursor), limit + 1))
+    if len(keys) > limit:
+        keys = keys[:limit]
+        return KeyPage(keys=keys, next_cursor=keys[-1])
+    return KeyPage(keys=keys)
 
 
 class StorageBackend(Enum):
@@ -19,26 +113,145 @@ class StorageBackend(Enum):
     LOCAL_FILE = "local_file"
     LOCAL_DB = "local_db"
     MEMORY = "memory"
+    TIERED = "tiered"  # Hot memory, warm segment log and compressed cold archive
 
 
-class SyncStatus(Enum):
-    """Cloud sync status"""
-    NOT_SYNCED = "not_synced"
-    SYNCING = "syncing"
-    SYNCED = "synced"
-    SYNC_FAILED = "sync_failed"
-    SYNC_DISABLED = "sync_disabled"
+class ConflictPolicy(Enum):
+    """How import_data treats keys that already exist"""
+    SKIP = "skip"
+    OVERWRITE = "overwrite"
+    NEWEST_WINS = "newest_wins"  # Compare updated_at timestamps
 
 
-@dataclass
-class StorageMetadata:
-    """Metadata for stored data"""
-    key: str
-    created_at: datetime
-    updated_at: datetime
-    sync_status: SyncStatus
-    encrypted: bool
-    size_bytes: int
+class StorageSnapshot:
+    """
+    Read-only view of a LocalFirstStorage as of one point in time.
+
+    Every read sees the keys, metadata and values committed when the
+    snapshot was taken, while writers carry on unblocked. Snapshot reads
+    bypass the read cache. Close the snapshot (or use it as an async
+    context manager) to release what it pins.
+    """
+
+    def __init__(self, storage: "LocalFirstStorage", engine: EngineSnapshot):
+        """
+        Initialize the view
+
+        Args:
+            storage: Storage the snapshot was taken of
+            engine: Pinned engine state
+        """
+        self._storage = storage
+        self._engine: Optional[EngineSnapshot] = engine
+        self.sequence = engine.sequence
+        self.taken_at = datetime.utcnow()
+
+    @property
+    def engine(self) -> EngineSnapshot:
+        """The pinned engine state"""
+        if self._engine is None:
+            raise ValueError("Snapshot is closed")
+        return self._engine
+
+    async def read(self, key: str, decrypt: bool = True) -> Optional[Any]:
+        """
+        Read data as of the snapshot
+
+        Args:
+            key: Storage key
+            decrypt: Whether to decrypt (default True)
+
+        Returns:
+            Stored data or None if not found
+        """
+        return (await self.read_many([key], decrypt))[key]
+
+    async def read_many(
+        self,
+        keys: Iterable[str],
+        decrypt: bool = True
+    ) -> Dict[str, Optional[Any]]:
+        """
+        Read several keys as of the snapshot
+
+        Args:
+            keys: Storage keys
+            decrypt: Whether to decrypt (default True)
+
+        Returns:
+            Dict mapping each key to its data (None if not found)
+        """
+        keys = list(keys)
+        engine = self.engine
+        results: Dict[str, Optional[Any]] = {}
+        for key, payload in zip(keys, engine.get_many(keys)):
+            metadata = engine.metadata.get(key) if payload is not None else None
+            if metadata is None or metadata.is_expired(self.taken_at):
+                results[key] = None
+            else:
+                results[key] = self._storage._decode(
+                    key, payload, metadata, decrypt, source=engine, cache=False
+                )
+        return results
+
+    async def get_metadata(self, key: str) -> Optional[StorageMetadata]:
+        """Metadata of a key as of the snapshot"""
+        metadata = self.engine.metadata.get(key)
+        return None if metadata is None or metadata.is_expired(self.taken_at) else metadata
+
+    async def list_keys(self, pattern: Optional[str] = None) -> List[str]:
+        """Keys as of the snapshot, optionally filtered by a glob pattern"""
+        return self.engine.metadata.keys(pattern)
+
+    async def list_keys_page(
+        self,
+        pattern: Optional[str] = None,
+        limit: int = 1000,
+        cursor: Optional[str] = None
+    ) -> KeyPage:
+        """One page of the snapshot's keys; see LocalFirstStorage.list_keys_page"""
+        return _key_page(self.engine.metadata, pattern, limit, cursor)
+
+    async def iter_keys(
+        self,
+        pattern: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[str]:
+        """Iterate over the snapshot's keys in ascending order"""
+        cursor = None
+        while True:
+            page = await self.list_keys_page(pattern, limit=batch_size, cursor=cursor)
+            for key in page.keys:
+                yield key
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+            await asyncio.sleep(0)
+
+    async def get_storage_stats(self) -> Dict[str, Any]:
+        """Item, size and sync counts as of the snapshot"""
+        summary = self.engine.metadata.summary()
+        return {
+            "backend": self._storage.backend.value,
+            "sequence": self.sequence,
+            "taken_at": self.taken_at.isoformat(),
+            **summary,
+            "local_items": summary["total_items"],
+            "cloud_items": summary["sync_status"][SyncStatus.SYNCED.value]
+        }
+
+    def close(self) -> None:
+        """Release the pinned state"""
+        engine, self._engine = self._engine, None
+        if engine is not None:
+            self._storage._snapshots.discard(self)
+            engine.close()
+
+    async def __aenter__(self) -> "StorageSnapshot":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.close()
 
 
 class LocalFirstStorage:
@@ -57,7 +270,20 @@ class LocalFirstStorage:
         storage_path: Path,
         backend: StorageBackend = StorageBackend.LOCAL_FILE,
         cloud_sync_enabled: bool = False,
-        user_consent_callback: Optional[Callable[[], bool]] = None
+        user_consent_callback: Optional[Callable[[], bool]] = None,
+        encryption_key: Optional[bytes] = None,
+        cache_max_bytes: int = 0,
+        cache_plaintext: bool = True,
+        deduplicate: bool = False,
+        compression: Optional[Union[str, Codec]] = None,
+        compression_min_bytes: int = 512,
+        cloud_remote: Optional[CloudRemote] = None,
+        read_only: bool = False,
+        lock_timeout: Optional[float] = 10.0,
+        durability: Union[Durability, str] = Durability.BUFFERED,
+        group_commit_ms: float = 5.0,
+        tier_policy: Optional[TierPolicy] = None,
+        sweep_interval: Optional[float] = 60.0
     ):
         """
         Initialize local-first storage
@@ -67,22 +293,162 @@ class LocalFirstStorage:
             backend: Storage backend type
             cloud_sync_enabled: Whether cloud sync is enabled (requires consent)
             user_consent_callback: Callback to check user consent for cloud operations
+            encryption_key: 256-bit data key (a local key file is used if omitted)
+            cache_max_bytes: Memory budget for the read cache (0 disables it)
+            cache_plaintext: Allow decrypted values in the cache; when False
+                only sealed payloads are cached and every hit is decrypted again
+            deduplicate: Store new values as content-addressed chunks shared
+                between identical payloads
+            compression: Codec (or registered codec name, e.g. "zlib" or
+                "lzma") applied to new values before encryption
+            compression_min_bytes: Values smaller than this are never compressed
+            cloud_remote: Remote replica used by sync_to_cloud
+            read_only: Open an existing store as a reader; any number of
+                readers can run next to the one process that writes
+            lock_timeout: Seconds to wait for the writer lease held by
+                another process (None waits indefinitely)
+            durability: When writes reach stable storage by default: SYNC
+                (before returning), GROUP (next group commit, shared with
+                concurrent writers) or BUFFERED (synced in the background)
+            group_commit_ms: Minimum milliseconds between group commits
+            tier_policy: Tier budgets and thresholds of the TIERED backend
+            sweep_interval: Longest pause in seconds between sweeps for
+                expired keys (None disables the background sweeper)
+
+        Raises:
+            StorageLockedError: If another process keeps the writer lease
         """
         self.storage_path = storage_path
         self.backend = backend
         self.cloud_sync_enabled = cloud_sync_enabled
         self.user_consent_callback = user_consent_callback
-        self.metadata_cache: Dict[str, StorageMetadata] = {}
+        self.cloud_remote = cloud_remote
+        self.encryption = ZeroKnowledgeEncryption()
+        self.cache = ValueCache(cache_max_bytes, cache_plaintext)
+        self.deduplicate = deduplicate
+        self.compression = (
+            CompressionPolicy(compression, compression_min_bytes) if compression else None
+        )
+        self.blobs: Optional[BlobStore] = None
+        self.read_only = read_only
+        self.durability = Durability(durability)
+        self.group_commit_ms = group_commit_ms
+        self.tier_policy = tier_policy or TierPolicy()
+        self.key_locks = KeyLocks()
+        self.lease: Optional[StoreLease] = None
 
-        # Ensure local storage exists
-        self.storage_path.mkdir(parents=True, exist_ok=True)
+        if read_only and backend == StorageBackend.MEMORY:
+            raise ValueError("In-memory storage cannot be shared read-only")
+        if not read_only:
+            # Ensure local storage exists
+            self.storage_path.mkdir(parents=True, exist_ok=True)
+            if backend != StorageBackend.MEMORY:
+                self.lease = StoreLease.for_writer(
+                    self.storage_path / WRITER_LOCK_FILENAME, lock_timeout
+                )
+
+        # The key never leaves this device; in-memory stores get an ephemeral one
+        self.keyring = Keyring(
+            None if backend == StorageBackend.MEMORY else storage_path / "keys",
+            encryption_key,
+            read_only
+        )
+        self.engine = self._create_engine()
+        self.metadata_cache: MetadataStore = self.engine.recover()
+        self.sync_journal = self._open_sync_journal()
+        self.indexes = SecondaryIndexes(
+            None if backend == StorageBackend.MEMORY else storage_path / INDEX_DIRNAME
+        )
+        # A reader cannot tell whether snapshots match the data, so it rebuilds
+        self.indexes.load(use_snapshots=not read_only)
+        self._index_build: Optional[asyncio.Lock] = None
+        self._snapshots: Set[StorageSnapshot] = set()
+
+        self.sweep_interval = sweep_interval
+        self.retention = RetentionPolicies(None if backend == StorageBackend.MEMORY else storage_path)
+        self.expiry = ExpiryIndex()
+        self.swept = 0
+        self.sweep_failures = 0
+        self._load_expiry()
+        self._sweeper: Optional[asyncio.Task] = None
+        self._sweep_wakeup: Optional[asyncio.Event] = None
+        self._sweep_due: Optional[datetime] = None
+        self._sweep_stop = False
+
+    def _create_engine(self) -> StorageEngine:
+        """
+        Create the engine for the configured backend
+
+        The blob store is attached when deduplication is enabled or a
+        previous session left deduplicated values behind.
+
+        Returns:
+            StorageEngine instance
+        """
+        engine = self._create_backend_engine("segments", "storage.db")
+        if self.backend == StorageBackend.TIERED:
+            engine = TieredEngine(
+                engine,
+                self._create_backend_engine("archive", "archive.db"),
+                self.tier_policy,
+                unseal=self._open,
+                seal=self._seal,
+                read_only=self.read_only
+            )
+        blob_paths = {
+            StorageBackend.LOCAL_FILE: self.storage_path / "blobs",
+            StorageBackend.TIERED: self.storage_path / "blobs",
+            StorageBackend.LOCAL_DB: self.storage_path / "blobs.db"
+        }
+        if (self.deduplicate and not self.read_only) or (
+            self.backend in blob_paths and blob_paths[self.backend].exists()
+        ):
+            self.blobs = BlobStore(
+                self._create_backend_engine("blobs", "blobs.db"),
+                self.keyring.data_key,
+                self.encryption
+            )
+            engine = DedupEngine(engine, self.blobs)
+        return engine
+
+    def _create_backend_engine(self, directory: str, database: str) -> StorageEngine:
+        """
+        Create a bare engine of the configured backend type
+
+        TIERED stores each of its tiers in a segment log.
+
+        Args:
+            directory: Segment directory name for LOCAL_FILE and TIERED
+            database: Database file name for LOCAL_DB
+
+        Returns:
+            StorageEngine instance
+        """
+        if self.backend in (StorageBackend.LOCAL_FILE, StorageBackend.TIERED):
+            return SegmentLogEngine(
+                self.storage_path / directory,
+                read_only=self.read_only,
+                group_commit_ms=self.group_commit_ms
+            )
+        elif self.backend == StorageBackend.MEMORY:
+            return MemoryEngine()
+        elif self.backend == StorageBackend.LOCAL_DB:
+            return SQLiteEngine(
+                self.storage_path / database,
+                read_only=self.read_only,
+                group_commit_ms=self.group_commit_ms
+            )
+        else:
+            raise ValueError(f"Unknown backend: {self.backend}")
 
     async def write(
         self,
         key: str,
         data: Any,
         encrypt: bool = True,
-        force_sync: bool = False
+        force_sync: bool = False,
+        durability: Optional[Union[Durability, str]] = None,
+        ttl: Optional[float] = None
     ) -> StorageMetadata:
         """
         Write data to local storage (CONSTITUTIONAL REQUIREMENT)
@@ -92,6 +458,9 @@ class LocalFirstStorage:
             data: Data to store
             encrypt: Whether to encrypt (default True for privacy)
             force_sync: Force cloud sync (still requires consent)
+            durability: Override the instance's durability mode for this write
+            ttl: Seconds until the value expires (default: the retention
+                policy of its prefix, if any)
 
         Returns:
             StorageMetadata for the written data
@@ -99,47 +468,374 @@ class LocalFirstStorage:
         Raises:
             ConstitutionalViolationError: If cloud-first storage is attempted
         """
-        # TODO: Implement local-first write
+        self._check_writable()
         # CRITICAL: Data MUST be written locally BEFORE any cloud operation
-        # 1. Validate constitutional compliance
-        # 2. Write to local storage
-        # 3. Update metadata
-        # 4. Optionally sync to cloud (with consent)
-        raise NotImplementedError("Local-first write pending implementation")
+        async with self.key_locks.hold([key]):
+            payload, metadata = self._prepare(key, data, encrypt, datetime.utcnow(), ttl)
+            self.sync_journal.record([key], OP_PUT)
+            await asyncio.wrap_future(self.engine.submit_put(key, payload, metadata))
+            self.cache.invalidate(key)
+            self.indexes.update(key, data, encrypt)
+            self._schedule_expiry([metadata])
+        await self._make_durable(durability)
 
-    async def read(self, key: str, decrypt: bool = True) -> Optional[Any]:
+        if force_sync and self.has_user_consent():
+            await self.sync_to_cloud(key=key, force=True)
+
+        return metadata
+
+    async def write_many(
+        self,
+        items: Union[Iterable[Tuple[str, Any]], AsyncIterable[Tuple[str, Any]]],
+        encrypt: bool = True,
+        batch_size: int = 1000,
+        durability: Optional[Union[Durability, str]] = None,
+        ttl: Optional[float] = None
+    ) -> List[StorageMetadata]:
+        """
+        Write many (key, data) pairs to local storage in batches
+
+        Each batch is serialized and encrypted in one pass and handed to
+        the engine as a single write with one durability barrier.
+
+        Args:
+            items: Iterable or async iterable of (key, data) pairs
+            encrypt: Whether to encrypt (default True for privacy)
+            batch_size: Number of records per engine batch
+            durability: Override the instance's durability mode for these writes
+            ttl: Seconds until the values expire (default: the retention
+                policy of each key's prefix, if any)
+
+        Returns:
+            StorageMetadata for every written item, in input order
+        """
+        self._check_writable()
+        written: List[StorageMetadata] = []
+        async for batch in _batched(items, batch_size):
+            async with self.key_locks.hold(key for key, _ in batch):
+                prepared = self._prepare_many(batch, encrypt, datetime.utcnow(), ttl)
+                self.sync_journal.record([key for key, _, _ in prepared], OP_PUT)
+                await asyncio.wrap_future(self.engine.submit_put_many(prepared))
+                for key, _, metadata in prepared:
+                    self.cache.invalidate(key)
+                    written.append(metadata)
+                for key, data in batch:
+                    self.indexes.update(key, data, encrypt)
+                self._schedule_expiry([metadata for _, _, metadata in prepared])
+            await self._make_durable(durability)
+        return written
+
+    async def read(
+        self,
+        key: str,
+        decrypt: bool = True,
+        zero_copy: bool = False
+    ) -> Optional[Any]:
         """
         Read data from local storage
 
+        With zero_copy, values whose stored bytes are exactly what the
+        caller gets back (unencrypted, uncompressed raw bytes, or sealed
+        bytes when decrypt is False) are returned as a read-only memoryview
+        over a memory map of the LOCAL_FILE segment instead of a copy.
+        Such reads bypass the read cache. Other values are decoded as usual.
+
         Args:
             key: Storage key
             decrypt: Whether to decrypt (default True)
+            zero_copy: Return eligible values as a memoryview (default False)
 
         Returns:
-            Stored data or None if not found
+            Stored data or None if not found or expired
+        """
+        self._refresh()
+        if self._expired(key):
+            return None
+        if zero_copy:
+            metadata = self.metadata_cache.get(key)
+            if metadata is not None and self._viewable(metadata, decrypt):
+                return self.engine.get_view(key)
+
+        if self.cache.enabled:
+            cached = self._read_cached(key, decrypt)
+            if cached is not _MISS:
+                return cached
+
+        metadata = self.metadata_cache.get(key)
+        if metadata is None:
+            return None
+
+        payload = self.engine.get(key)
+        if payload is None:
+            return None
+
+        return self._decode(key, payload, metadata, decrypt)
+
+    async def read_many(
+        self,
+        keys: Iterable[str],
+        decrypt: bool = True
+    ) -> Dict[str, Optional[Any]]:
+        """
+        Read several keys from local storage
+
+        Args:
+            keys: Storage keys
+            decrypt: Whether to decrypt (default True)
+
+        Returns:
+            Dict mapping each key to its data (None if not found or expired)
         """
-        # TODO: Implement local-first read
-        # 1. Read from local storage
-        # 2. Decrypt if requested
-        # 3. Return data
-        raise NotImplementedError("Local-first read pending implementation")
+        self._refresh()
+        results: Dict[str, Optional[Any]] = {}
+        missing = []
+        for key in keys:
+            if self._expired(key):
+                results[key] = None
+                continue
+            cached = self._read_cached(key, decrypt) if self.cache.enabled else _MISS
+            if cached is _MISS:
+                missing.append(key)
+            else:
+                results[key] = cached
+
+        payloads = self.engine.get_many(missing)
+        for key, payload in zip(missing, payloads):
+            metadata = self.metadata_cache.get(key) if payload is not None else None
+            if metadata is None:
+                results[key] = None
+            else:
+                results[key] = self._decode(key, payload, metadata, decrypt)
+        return results
 
-    async def delete(self, key: str, sync_deletion: bool = False) -> bool:
+    async def delete(
+        self,
+        key: str,
+        sync_deletion: bool = False,
+        durability: Optional[Union[Durability, str]] = None
+    ) -> bool:
         """
         Delete data from local storage
 
         Args:
             key: Storage key
             sync_deletion: Whether to sync deletion to cloud (requires consent)
+            durability: Override the instance's durability mode for this delete
 
         Returns:
             True if deleted, False if not found
         """
-        # TODO: Implement local-first delete
-        # 1. Delete from local storage
-        # 2. Update metadata
-        # 3. Optionally sync deletion to cloud (with consent)
-        raise NotImplementedError("Local-first delete pending implementation")
+        self._check_writable()
+        async with self.key_locks.hold([key]):
+            if key in self.metadata_cache:
+                self.sync_journal.record([key], OP_DELETE)
+            deleted = await asyncio.wrap_future(self.engine.submit_delete(key))
+            self.cache.invalidate(key)
+            self.expiry.discard([key])
+            if deleted:
+                self.indexes.discard([key])
+        if deleted:
+            await self._make_durable(durability)
+        if deleted and sync_deletion and self.has_user_consent():
+            await self.sync_to_cloud(key=key)
+        return deleted
+
+    async def delete_many(
+        self,
+        keys: Union[Iterable[str], AsyncIterable[str]],
+        batch_size: int = 1000,
+        durability: Optional[Union[Durability, str]] = None
+    ) -> Dict[str, bool]:
+        """
+        Delete many keys from local storage in batches
+
+        Args:
+            keys: Iterable or async iterable of storage keys
+            batch_size: Number of keys per engine batch
+            durability: Override the instance's durability mode for these deletes
+
+        Returns:
+            Dict mapping each key to whether it was deleted
+        """
+        self._check_writable()
+        results: Dict[str, bool] = {}
+        async for batch in _batched(keys, batch_size):
+            async with self.key_locks.hold(batch):
+                self.sync_journal.record([key for key in batch if key in self.metadata_cache], OP_DELETE)
+                deleted = await asyncio.wrap_future(self.engine.submit_delete_many(batch))
+                gone = [key for key, removed in zip(batch, deleted) if removed]
+                self.indexes.discard(gone)
+                self.expiry.discard(batch)
+                for key in batch:
+                    self.cache.invalidate(key)
+            if any(deleted):
+                await self._make_durable(durability)
+            results.update(zip(batch, deleted))
+        return results
+
+    async def create_keyspace(self, prefix: str) -> None:
+        """
+        Seal values under a key prefix with a data key of their own
+
+        Give each user's data a keyspace, and delete_prefix can
+        crypto-shred it on exit. Create the keyspace before anything is
+        written under the prefix. Deduplicated values are chunked under
+        the store key and are not covered.
+
+        Args:
+            prefix: Key prefix, e.g. "users/alice/"
+
+        Raises:
+            ValueError: If the prefix is empty, already a keyspace, or
+                already holds keys
+        """
+        self._check_writable()
+        async with self.key_locks.hold_all():
+            if next(iter(self.metadata_cache.iter_keys(prefix)), None) is not None:
+                raise ValueError(f"Keys already exist under {prefix!r}")
+            self.keyring.create(prefix)
+
+    async def delete_prefix(self, prefix: str, sync_deletion: bool = False) -> PurgeReport:
+        """
+        Delete every key under a prefix (Right to Exit)
+
+        The engine removes the whole range in one operation: one range
+        delete on LOCAL_DB, one batch of tombstones on the segment log.
+        Keyspaces under the prefix are crypto-shredded first, so every
+        leftover copy of their ciphertext (dead segment records, free
+        database pages, open snapshots, backups, the cloud replica) is
+        unreadable from the moment their key files are overwritten, even
+        if the process dies before the deletion finishes.
+
+        Other writers wait until the deletion completes; reads carry on.
+        The deletion is synced to stable storage before returning and
+        journaled like any other, so it reaches the cloud replica on the
+        next sync.
+
+        Args:
+            prefix: Key prefix ("" deletes everything, see purge_all)
+            sync_deletion: Sync the deletion to the cloud right away (requires consent)
+
+        Returns:
+            PurgeReport with the counts to verify the deletion against
+        """
+        self._check_writable()
+        started_at = datetime.utcnow()
+        async with self.key_locks.hold_all():
+            before = self.metadata_cache.summary()
+            self.sync_journal.record(list(self.metadata_cache.iter_keys(prefix)), OP_DELETE)
+            # Old keys stay usable in memory until the records they sealed are gone
+            with self.keyring.shredding(self.keyring.within(prefix), data_key=not prefix) as shredded:
+                removed = await asyncio.wrap_future(self.engine.submit_delete_prefix(prefix))
+                await self._make_durable(Durability.SYNC)
+            if "" in shredded and self.blobs is not None:
+                self.blobs.rekey(self.keyring.data_key)
+
+            self.expiry.discard(removed)
+            if prefix:
+                self.indexes.discard(removed)
+                for key in removed:
+                    self.cache.invalidate(key)
+            else:
+                for index in self.indexes:
+                    index.clear()
+                self.cache.clear()
+            after = self.metadata_cache.summary()
+            remaining = sum(1 for _ in self.metadata_cache.iter_keys(prefix))
+
+        if removed and sync_deletion and self.has_user_consent():
+            await self.sync_to_cloud()
+        return PurgeReport(
+            prefix=prefix,
+            keys_deleted=len(removed),
+            keys_remaining=remaining,
+            items_before=before["total_items"],
+            items_after=after["total_items"],
+            bytes_freed=before["total_size_bytes"] - after["total_size_bytes"],
+            shredded=shredded,
+            started_at=started_at,
+            completed_at=datetime.utcnow()
+        )
+
+    async def purge_all(self, sync_deletion: bool = False) -> PurgeReport:
+        """
+        Delete everything and shred every data key
+
+        Segment files are dropped and the database table emptied
+        wholesale rather than key by key, and the store key and every
+        keyspace key are replaced. The store stays open, empty, under
+        new keys; retention policies and index definitions are kept. A
+        store key passed in as encryption_key belongs to the caller and
+        is not shredded.
+
+        Args:
+            sync_deletion: Sync the deletion to the cloud right away (requires consent)
+
+        Returns:
+            PurgeReport with the counts to verify the purge against
+        """
+        return await self.delete_prefix("", sync_deletion)
+
+    async def set_retention(self, prefix: str, ttl: Optional[float]) -> None:
+        """
+        Set how long values under a key prefix are kept
+
+        The retention is stamped into each value's metadata when it is
+        written, so it applies to writes made from now on. A write with
+        an explicit ttl overrides it; keys under several prefixes take
+        the longest one's retention.
+
+        Args:
+            prefix: Key prefix ("" for the whole store)
+            ttl: Seconds a value is kept after its last write, None to
+                remove the policy
+
+        Raises:
+            ValueError: If ttl is not positive
+        """
+        self._check_writable()
+        self.retention.set(prefix, ttl)
+
+    async def sweep_expired(self, batch_size: int = 1000) -> int:
+        """
+        Delete every key that has expired
+
+        Runs in the background every sweep_interval seconds (or as soon
+        as the next key expires), but may be called directly. Expired
+        keys are popped from the expiry index in deadline order, so a
+        sweep only touches keys that are due. Deletions are journaled
+        like any other, so they reach the cloud replica on the next sync.
+
+        Args:
+            batch_size: Keys deleted per engine batch
+
+        Returns:
+            Number of keys deleted
+        """
+        self._check_writable()
+        deleted = 0
+        while True:
+            now = datetime.utcnow()
+            due = self.expiry.due(now, batch_size)
+            if not due:
+                return deleted
+            try:
+                async with self.key_locks.hold(due):
+                    # A rewrite may have extended a key after it was taken from the index
+                    expired = []
+                    for key in due:
+                        metadata = self.metadata_cache.get(key)
+                        if metadata is not None and metadata.is_expired(now):
+                            expired.append(key)
+                        elif metadata is None:
+                            self.expiry.discard([key])
+                    results = await self.delete_many(expired, batch_size)
+            except BaseException:
+                self.expiry.requeue(due)
+                raise
+            removed = sum(results.values())
+            deleted += removed
+            self.swept += removed
 
     async def list_keys(self, pattern: Optional[str] = None) -> List[str]:
         """
@@ -151,8 +847,56 @@ class LocalFirstStorage:
         Returns:
             List of storage keys
         """
-        # TODO: Implement key listing
-        raise NotImplementedError("Key listing pending implementation")
+        self._refresh()
+        return self.metadata_cache.keys(pattern)
+
+    async def list_keys_page(
+        self,
+        pattern: Optional[str] = None,
+        limit: int = 1000,
+        cursor: Optional[str] = None
+    ) -> KeyPage:
+        """
+        List one page of keys in ascending order
+
+        Args:
+            pattern: Optional glob pattern to filter keys
+            limit: Maximum number of keys in the page
+            cursor: next_cursor from the previous page, None to start
+
+        Returns:
+            KeyPage with the keys and the cursor for the next page
+        """
+        self._refresh()
+        return _key_page(self.metadata_cache, pattern, limit, cursor)
+
+    async def iter_keys(
+        self,
+        pattern: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[str]:
+        """
+        Iterate over keys in ascending order without materializing them
+
+        Yields to the event loop between pages, so huge namespaces can
+        be walked without stalling other tasks.
+
+        Args:
+            pattern: Optional glob pattern to filter keys
+            batch_size: Keys fetched per page
+
+        Yields:
+            Matching storage keys
+        """
+        cursor = None
+        while True:
+            page = await self.list_keys_page(pattern, limit=batch_size, cursor=cursor)
+            for key in page.keys:
+                yield key
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+            await asyncio.sleep(0)
 
     async def get_metadata(self, key: str) -> Optional[StorageMetadata]:
         """
@@ -162,22 +906,175 @@ class LocalFirstStorage:
             key: Storage key
 
         Returns:
-            StorageMetadata or None if not found
+            StorageMetadata or None if not found or expired
+        """
+        self._refresh()
+        if self._expired(key):
+            return None
+        return self.metadata_cache.get(key)
+
+    async def create_index(self, field: str, non_sensitive: bool = False) -> None:
         """
-        # TODO: Implement metadata retrieval
-        raise NotImplementedError("Metadata retrieval pending implementation")
+        Declare a secondary index on a field and build it
+
+        Indexed values are kept in memory and snapshotted in plaintext
+        next to the data, so encrypted values are only indexed when the
+        field is marked non_sensitive; otherwise the index covers the
+        unencrypted values alone. Declaring an existing index is a no-op.
+
+        Args:
+            field: Dotted path into JSON values, e.g. "meta.author"
+            non_sensitive: Index this field of encrypted values too
+
+        Raises:
+            ValueError: If the field is already indexed with other settings
+        """
+        self._check_writable()
+        self.indexes.create(field, non_sensitive)
+        await self._build_indexes()
+
+    async def drop_index(self, field: str) -> bool:
+        """
+        Remove a secondary index
+
+        Args:
+            field: Indexed field path
+
+        Returns:
+            True if the index existed
+        """
+        self._check_writable()
+        return self.indexes.drop(field)
+
+    async def query(
+        self,
+        where: Dict[str, Any],
+        limit: Optional[int] = None,
+        reverse: bool = False,
+        batch_size: int = 100
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Iterate over the values matching field predicates
+
+        Every predicate must name an indexed field and is either a value
+        (equality) or a Range. The most selective index drives the walk,
+        in that field's order; the others filter. Writes made while
+        iterating are respected: a value is yielded only if it still
+        matches when read.
+
+        Args:
+            where: Field path -> value or Range, all of which must hold
+            limit: Maximum number of results
+            reverse: Walk the driving index in descending order
+            batch_size: Values read per batch
+
+        Yields:
+            (key, data) pairs, decrypted
+
+        Raises:
+            ValueError: If a field has no index or a predicate is not indexable
+        """
+        self._refresh()
+        driver, bounds, filters = plan_query(self.indexes, where)
+        await self._build_indexes()
+        predicates = [(driver, bounds), *filters]
+
+        remaining = limit
+        cursor = None
+        while remaining is None or remaining > 0:
+            page = driver.page(bounds, cursor, batch_size, reverse)
+            if not page:
+                return
+            cursor = page[-1]
+            keys = [
+                key for _, key in page
+                if all(index.matches(key, predicate) for index, predicate in filters)
+            ]
+            values = await self.read_many(keys)
+            for key in keys:
+                data = values[key]
+                if data is None or not all(
+                    index.satisfied_by(data, predicate) for index, predicate in predicates
+                ):
+                    continue
+                yield key, data
+                if remaining is not None:
+                    remaining -= 1
+                    if remaining == 0:
+                        return
+            await asyncio.sleep(0)
+
+    async def _build_indexes(self, batch_size: int = 1000) -> None:
+        """Populate indexes that are declared but not ready by scanning the store"""
+        if self._index_build is None:
+            self._index_build = asyncio.Lock()
+        async with self._index_build:
+            pending = [index for index in self.indexes if not index.ready]
+            if not pending:
+                return
+            for index in pending:
+                index.clear()
+            sensitive_too = any(index.non_sensitive for index in pending)
+            async for batch in _batched(self.iter_keys(batch_size=batch_size), batch_size):
+                # Locked so a concurrent write cannot land between read and index
+                async with self.key_locks.hold(batch):
+                    keys = []
+                    for key in batch:
+                        metadata = self.metadata_cache.get(key)
+                        if metadata is not None and (sensitive_too or not metadata.encrypted):
+                            keys.append(key)
+                    values = await self.read_many(keys)
+                    for key in keys:
+                        metadata = self.metadata_cache.get(key)
+                        if values[key] is not None and metadata is not None:
+                            for index in pending:
+                                index.update(key, values[key], metadata.encrypted)
+            for index in pending:
+                index.ready = True
+
+    def _open_sync_journal(self) -> SyncJournal:
+        """
+        Open the change journal that drives incremental sync
+
+        A store that predates its journal is seeded once with every key
+        not yet synced. Read-only openers never record changes.
+        """
+        if self.read_only:
+            return SyncJournal()
+        path = None if self.backend == StorageBackend.MEMORY else self.storage_path / "sync"
+        journal = SyncJournal(path, group_commit_ms=self.group_commit_ms).open()
+        if journal.created and len(self.metadata_cache):
+            journal.record(
+                (
+                    metadata.key for metadata in self.metadata_cache.values()
+                    if metadata.sync_status != SyncStatus.SYNCED
+                ),
+                OP_PUT
+            )
+        return journal
 
     async def sync_to_cloud(
         self,
         key: Optional[str] = None,
-        force: bool = False
+        force: bool = False,
+        max_batch_bytes: int = 4 * 1024 * 1024,
+        max_batch_items: int = 256,
+        concurrency: int = 4
     ) -> Dict[str, SyncStatus]:
         """
         Sync data to cloud (REQUIRES USER CONSENT)
 
+        Only keys changed since their last acknowledged upload are
+        shipped, read from the change journal rather than found by
+        scanning. Changes are grouped into size-bounded batches uploaded
+        concurrently, and sync statuses are updated in bulk.
+
         Args:
             key: Specific key to sync, or None for all
             force: Force sync even if already synced
+            max_batch_bytes: Payload budget per upload batch
+            max_batch_items: Maximum keys per upload batch
+            concurrency: Maximum batches in flight
 
         Returns:
             Dict mapping keys to their sync status
@@ -185,52 +1082,568 @@ class LocalFirstStorage:
         Raises:
             ConstitutionalViolationError: If user consent not granted
         """
-        # TODO: Implement cloud sync with consent validation
         # CRITICAL: MUST check user consent before any cloud operation
-        # 1. Validate user consent
-        # 2. Check cloud_sync_enabled
-        # 3. Sync data to cloud
-        # 4. Update metadata
-        raise NotImplementedError("Cloud sync pending implementation")
+        if not self.has_user_consent():
+            raise ConstitutionalViolationError(
+                ViolationType.CONSENT_VIOLATION,
+                "Cloud sync requires cloud_sync_enabled and explicit user consent"
+            )
+        if self.cloud_remote is None:
+            raise ValueError("No cloud remote configured")
+        self._check_writable()
+
+        keys = None if key is None else [key]
+        if force:
+            stored = self.metadata_cache.keys() if key is None else keys
+            self.sync_journal.record([k for k in stored if k in self.metadata_cache], OP_PUT)
+
+        changes = self.sync_journal.pending(keys)
+        # Taken after reading the journal: a write racing the upload
+        # supersedes its journaled change, which then stays pending
+        async with self.snapshot() as snapshot:
+            sizes = {}
+            for i, change in enumerate(changes):
+                metadata = snapshot.engine.metadata.get(change.key)
+                # Journaled ahead of the engine: ship what is stored, not what was intended
+                op = OP_PUT if metadata is not None else OP_DELETE
+                if op != change.op:
+                    changes[i] = replace(change, op=op)
+                if metadata is not None:
+                    sizes[change.key] = metadata.size_bytes
+            batches = plan_batches(changes, sizes, max_batch_bytes, max_batch_items)
+
+            loop = asyncio.get_running_loop()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def ship(op: int, batch: List[Change]) -> bool:
+                async with semaphore:
+                    try:
+                        if op == OP_PUT:
+                            items = await loop.run_in_executor(
+                                None, self._sync_items, batch, snapshot.engine
+                            )
+                            await self.cloud_remote.put_many(items)
+                        else:
+                            await self.cloud_remote.delete_many([change.key for change in batch])
+                    except Exception:
+                        return False
+                    return True
+
+            outcomes = await asyncio.gather(*(ship(op, batch) for op, batch in batches))
+
+        results: Dict[str, SyncStatus] = {}
+        # Key -> the journal's pending sequence while the uploaded value is still current
+        synced: Dict[str, Optional[int]] = {}
+        failed: Dict[str, Optional[int]] = {}
+        for (op, batch), shipped in zip(batches, outcomes):
+            if shipped:
+                for change in self.sync_journal.acknowledge(batch):
+                    results[change.key] = SyncStatus.SYNCED
+                    if op == OP_PUT:
+                        synced[change.key] = None
+            else:
+                for change in batch:
+                    results[change.key] = SyncStatus.SYNC_FAILED
+                    if op == OP_PUT:
+                        failed[change.key] = change.sequence
+
+        for status, updated in ((SyncStatus.SYNCED, synced), (SyncStatus.SYNC_FAILED, failed)):
+            if not updated:
+                continue
+            async with self.key_locks.hold(updated):
+                # A write since the upload journaled a newer change; the status is not its own
+                pending = {change.key: change.sequence for change in self.sync_journal.pending(updated)}
+                current = [key for key, sequence in updated.items() if pending.get(key) == sequence]
+                if current:
+                    await loop.run_in_executor(
+                        None, self.metadata_cache.set_sync_status, current, status
+                    )
+        return results
+
+    def _sync_items(self, changes: List[Change], snapshot: EngineSnapshot) -> List[SyncItem]:
+        """
+        Read values for upload exactly as they are protected at rest
+
+        Deduplicated values are stored as shared chunks, so their
+        reassembled payload is sealed on the way out.
+        """
+        keys = [change.key for change in changes]
+        items = []
+        for key, payload in zip(keys, snapshot.get_many(keys)):
+            metadata = snapshot.metadata.get(key)
+            if payload is None or metadata is None:
+                continue  # Deleted since it was journaled
+            if metadata.deduplicated and metadata.encrypted:
+                payload = self._seal(key, payload)
+            items.append(SyncItem(key, bytes(payload), {
+                "encoding": metadata.encoding,
+                "codec": metadata.codec,
+                "encrypted": metadata.encrypted,
+                "created_at": metadata.created_at.isoformat(),
+                "updated_at": metadata.updated_at.isoformat()
+            }))
+        return items
 
     async def export_all(
         self,
         export_path: Path,
-        format: str = "json"
+        format: str = "json",
+        batch_size: int = 500,
+        workers: Optional[int] = None,
+        progress: Optional[Callable[[ExportProgress], None]] = None,
+        resume: bool = True
     ) -> Path:
         """
         Export all data (Article II, Section 7: Right to Exit)
 
+        Keys are walked in order one batch at a time; each batch is
+        decrypted on a bounded worker pool and appended to the export
+        while the next one is fetched, so memory stays bounded no matter
+        how large the store is. Progress is checkpointed next to the
+        export after every batch. The export reads from a snapshot, so it
+        is consistent as of its start however long it runs; a resumed
+        export continues from a fresh snapshot.
+
         Args:
             export_path: Path to export data
-            format: Export format (json, csv, etc.)
+            format: Export format (json/jsonl, csv, tar, zip)
+            batch_size: Records decrypted and written per batch
+            workers: Decryption threads (defaults to the CPU count, max 4)
+            progress: Callback invoked with ExportProgress after each batch
+            resume: Continue an interrupted export of the same format
+                from its checkpoint instead of starting over
 
         Returns:
             Path to exported data
         """
-        # TODO: Implement data export
-        # Constitutional requirement: Users must be able to export all their data
-        raise NotImplementedError("Data export pending implementation")
+        export_format = resolve_format(format)
+        self._refresh()
+        writer = WRITERS[export_format](export_path)
+        checkpoint = ExportCheckpoint.load(export_path) if resume else None
+        if (
+            checkpoint is None
+            or checkpoint.format != export_format
+            or not writer.resumable
+            or not export_path.exists()
+        ):
+            checkpoint = ExportCheckpoint(export_format, cursor=None, exported=0, offset=-1)
+
+        loop = asyncio.get_running_loop()
+        workers = workers or min(4, os.cpu_count() or 1)
+        async with self.snapshot() as snapshot:
+            total = len(snapshot.engine.metadata)
+            with ThreadPoolExecutor(max_workers=workers + 1) as pool:
+                pending: Optional[asyncio.Future] = None
+                try:
+                    writer.open(checkpoint.offset if checkpoint.offset >= 0 else None)
+                    async for records in self._export_batches(
+                        snapshot.engine, checkpoint.cursor, batch_size, workers, pool
+                    ):
+                        if pending is not None:
+                            await pending
+                        pending = asyncio.ensure_future(
+                            self._write_export_batch(writer, checkpoint, records, pool, total, progress)
+                        )
+                    if pending is not None:
+                        await pending
+                    await loop.run_in_executor(pool, writer.finish)
+                finally:
+                    if pending is not None and not pending.done():
+                        pending.cancel()
+                    writer.close()
+
+        ExportCheckpoint.clear(export_path)
+        return export_path
+
+    async def _export_batches(
+        self,
+        snapshot: EngineSnapshot,
+        cursor: Optional[str],
+        batch_size: int,
+        workers: int,
+        pool: ThreadPoolExecutor
+    ) -> AsyncIterator[List[ExportRecord]]:
+        """
+        Fetch and decrypt the store in key order, one batch at a time
+
+        Each batch is split into one chunk per worker so decryption of
+        a batch runs in parallel.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            keys = list(islice(snapshot.metadata.scan_keys(None, cursor), batch_size))
+            if not keys:
+                return
+            cursor = keys[-1]
+            payloads = await loop.run_in_executor(pool, snapshot.get_many, keys)
+            now = datetime.utcnow()
+            entries = [
+                (key, payload, metadata)
+                for key, payload, metadata in (
+                    (key, payload, snapshot.metadata.get(key))
+                    for key, payload in zip(keys, payloads)
+                )
+                if payload is not None and not metadata.is_expired(now)
+            ]
+            chunk = -(-len(entries) // workers) or 1
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(pool, self._open_export_chunk, entries[i:i + chunk])
+                for i in range(0, len(entries), chunk)
+            ))
+            yield [record for records in chunks for record in records]
+
+    def _open_export_chunk(
+        self,
+        entries: List[Tuple[str, bytes, Optional[StorageMetadata]]]
+    ) -> List[ExportRecord]:
+        """Decrypt a chunk of stored payloads for export"""
+        records = []
+        for key, payload, metadata in entries:
+            if metadata is None:
+                continue  # Deleted while the batch was in flight
+            if metadata.encrypted and not metadata.deduplicated:
+                payload = self._open(key, payload)
+            payload = decompress(payload, metadata.codec)
+            records.append(ExportRecord(key, bytes(payload), metadata))
+        return records
+
+    async def _write_export_batch(
+        self,
+        writer: ExportWriter,
+        checkpoint: ExportCheckpoint,
+        records: List[ExportRecord],
+        pool: ThreadPoolExecutor,
+        total: int,
+        progress: Optional[Callable[[ExportProgress], None]]
+    ) -> None:
+        """Append a batch, then advance and persist the resume point"""
+        if not records:
+            return
+        loop = asyncio.get_running_loop()
+        offset = await loop.run_in_executor(pool, writer.write_batch, records)
+        checkpoint.cursor = records[-1].key
+        checkpoint.exported += len(records)
+        checkpoint.offset = offset
+        if writer.resumable:
+            checkpoint.save(writer.path)
+        if progress is not None:
+            progress(ExportProgress(
+                exported=checkpoint.exported,
+                total=total,
+                bytes_written=offset,
+                cursor=checkpoint.cursor
+            ))
 
     async def import_data(
         self,
         import_path: Path,
         format: str = "json",
-        overwrite: bool = False
+        overwrite: bool = False,
+        conflict: Optional[Union[ConflictPolicy, str]] = None,
+        encrypt: Optional[bool] = None,
+        batch_size: int = 500,
+        workers: Optional[int] = None,
+        progress: Optional[Callable[[ImportProgress], None]] = None,
+        resume: bool = True
     ) -> int:
         """
         Import data from external source
 
+        The file is parsed as a stream. Each batch is checked against the
+        metadata index (no values are read), encrypted on a bounded
+        worker pool and written as one engine batch while the next batch
+        is parsed. Progress is checkpointed under the storage directory,
+        so rerunning a killed import skips what was already consumed.
+
         Args:
             import_path: Path to import data from
-            format: Import format (json, csv, etc.)
-            overwrite: Whether to overwrite existing data
+            format: Import format (json/jsonl, csv, tar, zip)
+            overwrite: Whether to overwrite existing data (shorthand for
+                conflict=ConflictPolicy.OVERWRITE)
+            conflict: Policy for keys that already exist
+            encrypt: Encrypt imported values; None keeps each record's
+                original at-rest setting
+            batch_size: Records per engine batch
+            workers: Encryption threads (defaults to the CPU count, max 4)
+            progress: Callback invoked with ImportProgress after each batch
+            resume: Continue an interrupted import of the same file
 
         Returns:
             Number of records imported
         """
-        # TODO: Implement data import
-        raise NotImplementedError("Data import pending implementation")
+        self._check_writable()
+        import_format = resolve_format(format)
+        if conflict is None:
+            conflict = ConflictPolicy.OVERWRITE if overwrite else ConflictPolicy.SKIP
+        policy = ConflictPolicy(conflict)
+
+        checkpoint_path = ImportCheckpoint.path_for(self.storage_path / "imports", import_path)
+        checkpoint = ImportCheckpoint.for_source(import_path, import_format)
+        if resume:
+            checkpoint = checkpoint.resume(checkpoint_path)
+
+        loop = asyncio.get_running_loop()
+        workers = workers or min(4, os.cpu_count() or 1)
+        records = READERS[import_format](import_path, checkpoint.consumed)
+
+        with ThreadPoolExecutor(max_workers=workers + 1) as pool:
+            pending: Optional[asyncio.Future] = None
+            try:
+                while True:
+                    batch = await loop.run_in_executor(
+                        pool, lambda: list(islice(records, batch_size))
+                    )
+                    if pending is not None:
+                        await pending
+                    if not batch:
+                        break
+                    pending = asyncio.ensure_future(self._import_batch(
+                        batch, policy, encrypt, workers, pool,
+                        checkpoint, checkpoint_path, progress
+                    ))
+            finally:
+                if pending is not None and not pending.done():
+                    pending.cancel()
+                await loop.run_in_executor(pool, records.close)
+
+        ImportCheckpoint.clear(checkpoint_path)
+        return checkpoint.imported
+
+    async def _import_batch(
+        self,
+        batch: List[ExportRecord],
+        policy: ConflictPolicy,
+        encrypt: Optional[bool],
+        workers: int,
+        pool: ThreadPoolExecutor,
+        checkpoint: ImportCheckpoint,
+        checkpoint_path: Path,
+        progress: Optional[Callable[[ImportProgress], None]]
+    ) -> None:
+        """Resolve conflicts, encrypt and write one batch, then advance the checkpoint"""
+        loop = asyncio.get_running_loop()
+        # Conflicts are resolved against what is stored when the batch is written
+        async with self.key_locks.hold(record.key for record in batch):
+            accepted = []
+            for record in batch:
+                existing = self.metadata_cache.get(record.key)
+                if existing is None or policy == ConflictPolicy.OVERWRITE or (
+                    policy == ConflictPolicy.NEWEST_WINS
+                    and record.metadata.updated_at > existing.updated_at
+                ):
+                    accepted.append(record)
+
+            chunk = -(-len(accepted) // workers) or 1
+            prepared = [
+                item
+                for items in await asyncio.gather(*(
+                    loop.run_in_executor(
+                        pool, self._prepare_imported, accepted[i:i + chunk], encrypt
+                    )
+                    for i in range(0, len(accepted), chunk)
+                ))
+                for item in items
+            ]
+            if prepared:
+                self.sync_journal.record([key for key, _, _ in prepared], OP_PUT)
+                await asyncio.wrap_future(self.engine.submit_put_many(prepared))
+                for key, _, _ in prepared:
+                    self.cache.invalidate(key)
+                self._schedule_expiry([metadata for _, _, metadata in prepared])
+                if len(self.indexes):
+                    for record, (_, _, metadata) in zip(accepted, prepared):
+                        data = self._deserialize(record.payload, metadata.encoding)
+                        self.indexes.update(record.key, data, metadata.encrypted)
+        if prepared:
+            # Durable before the checkpoint claims the batch was imported
+            await self._make_durable(None)
+
+        checkpoint.consumed += len(batch)
+        checkpoint.imported += len(prepared)
+        checkpoint.skipped += len(batch) - len(prepared)
+        await loop.run_in_executor(pool, checkpoint.save, checkpoint_path)
+        if progress is not None:
+            progress(ImportProgress(checkpoint.consumed, checkpoint.imported, checkpoint.skipped))
+
+    def _prepare_imported(
+        self,
+        records: List[ExportRecord],
+        encrypt: Optional[bool]
+    ) -> List[Tuple[str, bytes, StorageMetadata]]:
+        """Seal imported records, keeping their original timestamps"""
+        prepared = []
+        for record in records:
+            source = record.metadata
+            sealed = source.encrypted if encrypt is None else encrypt
+            payload, codec = self._compress(record.payload)
+            if sealed and not self.deduplicate:
+                payload = self._seal(record.key, payload)
+            prepared.append((record.key, payload, StorageMetadata(
+                key=record.key,
+                created_at=source.created_at,
+                updated_at=source.updated_at,
+                sync_status=SyncStatus.NOT_SYNCED,
+                encrypted=sealed,
+                size_bytes=len(payload),
+                encoding=source.encoding,
+                deduplicated=self.deduplicate,
+                codec=codec,
+                expires_at=source.expires_at
+            )))
+        return prepared
+
+    def snapshot(self) -> StorageSnapshot:
+        """
+        Pin the current state of the store for consistent reads
+
+        Taking a snapshot is cheap and never blocks writers: the segment
+        log pins its index and segment files, SQLite holds a read
+        transaction, and the memory backend keeps the previous version of
+        each key changed afterwards. Until the snapshot is closed,
+        replaced segment files (or WAL pages, or old values) it still
+        references are kept.
+
+        Returns:
+            StorageSnapshot, usable as an async context manager
+        """
+        self._refresh()
+        snapshot = StorageSnapshot(self, self.engine.snapshot())
+        self._snapshots.add(snapshot)
+        return snapshot
+
+    @asynccontextmanager
+    async def lock(self, *keys: str) -> AsyncIterator[None]:
+        """
+        Hold the write locks of keys, e.g. for a read-modify-write
+
+        Writes and deletes issued inside the block by the same task
+        proceed; other tasks writing these keys wait until it exits.
+
+        Args:
+            keys: Keys to lock
+        """
+        async with self.key_locks.hold(keys):
+            yield
+
+    async def _make_durable(self, durability: Optional[Union[Durability, str]]) -> None:
+        """Wait until the writes issued so far satisfy the durability mode"""
+        mode = self.durability if durability is None else Durability(durability)
+        if mode != Durability.BUFFERED:
+            await asyncio.gather(
+                asyncio.wrap_future(self.sync_journal.submit_sync(mode)),
+                asyncio.wrap_future(self.engine.submit_sync(mode))
+            )
+
+    def _check_writable(self) -> None:
+        """Refuse mutations on a read-only opener"""
+        if self.read_only:
+            raise PermissionError(f"{self.storage_path} was opened read-only")
+
+    def _refresh(self) -> None:
+        """Pick up what the writer process committed since the last read"""
+        if not self.read_only:
+            # Expiries loaded at open are swept from the first call on, not only after a write
+            if self._sweeper is None:
+                self._start_sweeper()
+            return
+        if self.keyring.refresh():
+            self.cache.clear()
+        changed = self.engine.refresh()
+        if changed is None:
+            self.cache.clear()
+            self.expiry.rebuild(self.metadata_cache.values())
+            for index in self.indexes:
+                index.ready = False
+        else:
+            for key in changed:
+                self.cache.invalidate(key)
+                metadata = self.metadata_cache.get(key)
+                self.expiry.schedule(key, metadata.expires_at if metadata else None)
+            if changed and len(self.indexes):
+                self._reindex(changed)
+
+    def _expired(self, key: str) -> bool:
+        """Whether a key has expired and must read as missing"""
+        return len(self.expiry) > 0 and self.expiry.expired(key, datetime.utcnow())
+
+    def _load_expiry(self) -> None:
+        """Restore the expiry index from its snapshot, or rebuild it from metadata"""
+        if self.backend != StorageBackend.MEMORY and not self.read_only:
+            snapshot = self.storage_path / INDEX_DIRNAME / EXPIRY_SNAPSHOT_FILENAME
+            if self.expiry.load(snapshot):
+                return
+        self.expiry.rebuild(self.metadata_cache.values())
+
+    def _schedule_expiry(self, records: Iterable[StorageMetadata]) -> None:
+        """Track the expiry of written values, starting or waking the sweeper"""
+        for metadata in records:
+            self.expiry.schedule(metadata.key, metadata.expires_at)
+        if self.sweep_interval is None or not len(self.expiry):
+            return
+        if self._sweeper is None:
+            self._start_sweeper()
+        elif self._sweep_due is not None:
+            deadline = self.expiry.next_deadline()
+            if deadline is not None and deadline < self._sweep_due:
+                self._sweep_wakeup.set()
+
+    def _start_sweeper(self) -> None:
+        """Start the background sweeper if there are expiries to watch"""
+        if self.sweep_interval is None or self._sweep_stop or not len(self.expiry):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Called from synchronous code such as snapshot(); the next async call starts it
+            return
+        self._sweep_wakeup = asyncio.Event()
+        self._sweeper = loop.create_task(self._sweep_loop())
+
+    async def _sweep_loop(self) -> None:
+        """Background task: sleep until the next key expires, then sweep"""
+        while not self._sweep_stop:
+            now = datetime.utcnow()
+            self._sweep_due = now + timedelta(seconds=self.sweep_interval)
+            deadline = self.expiry.next_deadline()
+            if deadline is not None and deadline < self._sweep_due:
+                self._sweep_due = deadline
+            self._sweep_wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._sweep_wakeup.wait(), max((self._sweep_due - now).total_seconds(), 0)
+                )
+            except asyncio.TimeoutError:
+                pass
+            if self._sweep_stop:
+                return
+            try:
+                await self.sweep_expired()
+            except Exception:
+                # Reads keep hiding expired keys; the next pass retries
+                self.sweep_failures += 1
+
+    def _expiry_stats(self) -> Dict[str, Any]:
+        """Expiry index and sweeper statistics"""
+        deadline = self.expiry.next_deadline()
+        return {
+            "scheduled": len(self.expiry),
+            "next_expiry": deadline.isoformat() if deadline else None,
+            "swept": self.swept,
+            "sweep_failures": self.sweep_failures,
+            "retention": self.retention.items()
+        }
+
+    def _reindex(self, keys: List[str]) -> None:
+        """Bring the indexes up to date for keys another process changed"""
+        for key in keys:
+            metadata = self.metadata_cache.get(key)
+            payload = self.engine.get(key) if metadata is not None else None
+            if payload is None:
+                self.indexes.discard([key])
+            else:
+                self.indexes.update(
+                    key, self._decode(key, payload, metadata, True), metadata.encrypted
+                )
 
     def has_user_consent(self) -> bool:
         """
@@ -254,9 +1667,249 @@ class LocalFirstStorage:
         Returns:
             Dict containing storage statistics
         """
-        # TODO: Implement storage statistics
-        # - Total items
-        # - Total size
-        # - Sync status breakdown
-        # - Local vs cloud storage
-        raise NotImplementedError("Storage statistics pending implementation")
+        self._refresh()
+        summary = self.metadata_cache.summary()
+        return {
+            "backend": self.backend.value,
+            "read_only": self.read_only,
+            **summary,
+            "local_items": summary["total_items"],
+            "cloud_items": summary["sync_status"][SyncStatus.SYNCED.value],
+            "cloud_sync_enabled": self.cloud_sync_enabled,
+            "cache": self.cache.stats(),
+            "dedup": self.blobs.stats() if self.blobs is not None else None,
+            "indexes": self.indexes.stats(),
+            "expiry": self._expiry_stats(),
+            "keyspaces": len(self.keyring),
+            "engine": self.engine.stats()
+        }
+
+    async def close(self) -> None:
+        """Flush pending writes, release the storage engine and the writer lease"""
+        self._sweep_stop = True
+        if self._sweeper is not None:
+            # Let a sweep in progress finish its deletes rather than cancel it midway
+            self._sweep_wakeup.set()
+            await self._sweeper
+            self._sweeper = None
+        for snapshot in list(self._snapshots):
+            snapshot.close()
+        self.cache.clear()
+        self.sync_journal.close()
+        if not self.read_only:
+            self.indexes.save_snapshots()
+            if self.backend != StorageBackend.MEMORY:
+                (self.storage_path / INDEX_DIRNAME).mkdir(exist_ok=True)
+                self.expiry.save(self.storage_path / INDEX_DIRNAME / EXPIRY_SNAPSHOT_FILENAME)
+        self.engine.close()
+        self.encryption.close()
+        if self.lease is not None:
+            self.lease.close()
+            self.lease = None
+
+    def _prepare(
+        self,
+        key: str,
+        data: Any,
+        encrypt: bool,
+        now: datetime,
+        ttl: Optional[float] = None
+    ) -> Tuple[bytes, StorageMetadata]:
+        """
+        Serialize and optionally encrypt a value, building its metadata
+
+        Args:
+            key: Storage key
+            data: Data to store
+            encrypt: Whether to encrypt
+            now: Write timestamp
+            ttl: Seconds until expiry, None for the prefix's retention
+
+        Returns:
+            Tuple of (payload, metadata)
+        """
+        (_, payload, metadata), = self._prepare_many([(key, data)], encrypt, now, ttl)
+        return payload, metadata
+
+    def _prepare_many(
+        self,
+        items: List[Tuple[str, Any]],
+        encrypt: bool,
+        now: datetime,
+        ttl: Optional[float] = None
+    ) -> List[Tuple[str, bytes, StorageMetadata]]:
+        """
+        Serialize and optionally encrypt a batch of values, building their metadata
+
+        The whole batch is sealed in one encrypt_many call, which fans
+        large batches out across cores.
+
+        Args:
+            items: (key, data) pairs
+            encrypt: Whether to encrypt
+            now: Write timestamp
+            ttl: Seconds until expiry, None for each prefix's retention
+
+        Returns:
+            (key, payload, metadata) for every item, in order
+        """
+        encoded = []
+        for key, data in items:
+            payload, encoding = self._serialize(data)
+            payload, codec = self._compress(payload)
+            encoded.append((key, payload, encoding, codec))
+        payloads = [payload for _, payload, _, _ in encoded]
+        if encrypt and not self.deduplicate:
+            payloads = self._seal_many([key for key, _, _, _ in encoded], payloads)
+
+        prepared = []
+        for (key, _, encoding, codec), payload in zip(encoded, payloads):
+            previous = self.metadata_cache.get(key)
+            prepared.append((key, payload, StorageMetadata(
+                key=key,
+                created_at=previous.created_at if previous else now,
+                updated_at=now,
+                sync_status=SyncStatus.NOT_SYNCED,
+                encrypted=encrypt,
+                size_bytes=len(payload),
+                encoding=encoding,
+                deduplicated=self.deduplicate,
+                codec=codec,
+                expires_at=expiry_from_ttl(
+                    now, ttl if ttl is not None else self.retention.ttl_for(key)
+                )
+            )))
+        return prepared
+
+    def _serialize(self, data: Any) -> Tuple[bytes, str]:
+        """
+        Serialize a value for storage
+
+        Args:
+            data: Raw bytes or a JSON-serialisable value
+
+        Returns:
+            Tuple of (payload, encoding)
+        """
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            return bytes(data), "bytes"
+        return json.dumps(data, separators=(",", ":")).encode("utf-8"), "json"
+
+    def _decode(
+        self,
+        key: str,
+        payload: bytes,
+        metadata: StorageMetadata,
+        decrypt: bool,
+        source: Optional[Union[StorageEngine, EngineSnapshot]] = None,
+        cache: bool = True
+    ) -> Any:
+        """
+        Turn a stored payload back into data
+
+        Encrypted payloads are returned as raw sealed bytes when
+        decrypt is False (the chunk manifest for deduplicated values,
+        looked up in source, by default the engine). Decoded values are
+        offered to the read cache unless cache is False.
+        """
+        sealed = None
+        if metadata.encrypted:
+            if not decrypt:
+                if metadata.deduplicated:
+                    return (source or self.engine).get_manifest(key)
+                return payload
+            if not metadata.deduplicated:
+                # Deduplicated values arrive already reassembled and decrypted
+                sealed = payload
+                payload = self._open(key, sealed)
+
+        payload = decompress(payload, metadata.codec)
+        if cache and sealed is not None and not self.cache.cache_plaintext:
+            self.cache.put(
+                key, sealed, metadata.encoding, encrypted=True, sealed=True, codec=metadata.codec
+            )
+        elif cache and (not metadata.encrypted or self.cache.cache_plaintext):
+            self.cache.put(
+                key, payload, metadata.encoding, encrypted=metadata.encrypted, sealed=False
+            )
+        return self._deserialize(payload, metadata.encoding)
+
+    @staticmethod
+    def _viewable(metadata: StorageMetadata, decrypt: bool) -> bool:
+        """Whether a read can hand out the stored bytes unchanged"""
+        if metadata.deduplicated or metadata.codec is not None:
+            return False
+        if metadata.encrypted:
+            return not decrypt
+        return metadata.encoding == "bytes"
+
+    def _read_cached(self, key: str, decrypt: bool) -> Any:
+        """
+        Serve a read from the cache
+
+        Returns:
+            The decoded value, or _MISS if the cache cannot answer
+        """
+        entry = self.cache.get(key)
+        if entry is None:
+            return _MISS
+        if not entry.encrypted:
+            return self._deserialize(entry.payload, entry.encoding)
+        if not decrypt:
+            return entry.payload if entry.sealed else _MISS
+
+        if entry.sealed:
+            plaintext = decompress(self._open(key, entry.payload), entry.codec)
+        else:
+            plaintext = entry.payload
+        return self._deserialize(plaintext, entry.encoding)
+
+    def _compress(self, payload: bytes) -> Tuple[bytes, Optional[str]]:
+        """Apply the compression policy, if any"""
+        if self.compression is None:
+            return payload, None
+        return self.compression.compress(payload)
+
+    @staticmethod
+    def _deserialize(payload: bytes, encoding: str) -> Any:
+        """Reverse _serialize"""
+        if encoding == "bytes":
+            return bytes(payload)
+        return json.loads(payload)
+
+    def _seal(self, key: str, payload: bytes) -> bytes:
+        """
+        Encrypt a payload client-side with the data key of its keyspace
+
+        The storage key is bound as associated data so ciphertext
+        cannot be swapped between keys.
+
+        Returns:
+            nonce || ciphertext
+        """
+        return self._seal_many([key], [payload])[0]
+
+    def _seal_many(self, keys: List[str], payloads: List[bytes]) -> List[bytes]:
+        """Encrypt payloads like _seal, as one batch"""
+        encrypted = self.encryption.encrypt_many(
+            payloads,
+            [self.keyring.key_for(key) for key in keys],
+            associated_data=[key.encode("utf-8") for key in keys]
+        )
+        return [sealed.nonce + sealed.ciphertext for sealed in encrypted]
+
+    def _open(self, key: str, sealed: bytes) -> bytes:
+        """Decrypt a payload produced by _seal"""
+        encrypted = EncryptedData(
+            ciphertext=sealed[NONCE_SIZE:],
+            nonce=sealed[:NONCE_SIZE],
+            salt=b"",
+            algorithm=self.encryption.algorithm,
+            kdf=self.encryption.kdf,
+            kdf_params={},
+            metadata={},
+            encrypted_at=datetime.utcnow()
+        )
+        return self.encryption.decrypt(
+            encrypted, self.keyring.key_for(key), associated_data=key.encode("utf-8")
+        )
@@ -0,0 +1,242 @@
+"""
+Storage Locking
+===============
+
+Concurrency control for LocalFirstStorage.
+
+Within a process, mutations of a key are serialized by striped asyncio
+locks: keys hash onto a fixed number of stripes, so memory stays constant
+however many keys exist, and reads never wait on them.
+
+Across processes, a storage directory has at most one writer. The writer
+holds an exclusive lease on a lock file for as long as it is open, while
+any number of read-only openers share the directory alongside it. Leases
+are flock()-based, so the kernel drops them when a process dies and a
+crashed writer never leaves the store locked. Writers opened within one
+process share their lease; it arbitrates between processes only.
+"""
+
+from typing import Dict, Iterable, Iterator, AsyncContextManager, AsyncIterator, Optional
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+import asyncio
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; leases become no-ops
+    fcntl = None
+
+
+class StorageLockedError(Exception):
+    """Raised when another process holds the writer lease of a store"""
+
+
+_writer_leases: Dict[Path, "StoreLease"] = {}
+_writer_leases_lock = threading.Lock()
+
+
+class _Stripe:
+    """An asyncio lock that the owning task may re-enter"""
+
+    __slots__ = ("lock", "owner", "depth")
+
+    def __init__(self):
+        # Created on first use: before 3.10 a lock binds to the loop current at construction
+        self.lock: Optional[asyncio.Lock] = None
+        self.owner: Optional[asyncio.Task] = None
+        self.depth = 0
+
+
+class KeyLocks:
+    """
+    Striped, task-reentrant per-key async locks.
+
+    Multi-key holds acquire their stripes in ascending order, so two
+    holds never deadlock on each other. A task may nest holds as long as
+    the inner hold only covers keys it already holds.
+    """
+
+    def __init__(self, stripes: int = 256):
+        """
+        Initialize the lock table
+
+        Args:
+            stripes: Number of underlying locks
+        """
+        self._stripes = [_Stripe() for _ in range(stripes)]
+
+    def hold(self, keys: Iterable[str]) -> AsyncContextManager[None]:
+        """
+        Hold the locks covering keys for the duration of the block
+
+        Args:
+            keys: Keys to lock
+        """
+        return self._hold(sorted({hash(key) % len(self._stripes) for key in keys}))
+
+    def hold_all(self) -> AsyncContextManager[None]:
+        """Hold every stripe, excluding all other writers for the duration of the block"""
+        return self._hold(range(len(self._stripes)))
+
+    @asynccontextmanager
+    async def _hold(self, indexes: Iterable[int]) -> AsyncIterator[None]:
+        """Acquire stripes in ascending order, re-entering those the task already holds"""
+        task = asyncio.current_task()
+        acquired = []
+        try:
+            for index in indexes:
+                stripe = self._stripes[index]
+                if stripe.owner is task:
+                    stripe.depth += 1
+                else:
+                    if stripe.lock is None:
+                        stripe.lock = asyncio.Lock()
+                    await stripe.lock.acquire()
+                    stripe.owner = task
+                    stripe.depth = 1
+                acquired.append(stripe)
+            yield
+        finally:
+            for stripe in reversed(acquired):
+                stripe.depth -= 1
+                if stripe.depth == 0:
+                    stripe.owner = None
+                    stripe.lock.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Lock table statistics"""
+        return {
+            "stripes": len(self._stripes),
+            "held": sum(1 for stripe in self._stripes if stripe.lock is not None and stripe.lock.locked())
+        }
+
+
+class StoreLease:
+    """
+    Cross-process readers-writer lock on a lock file.
+
+    Shared holds are reference counted within the process, so threads
+    can overlap them on the single file descriptor the lease owns.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initialize the lease
+
+        Args:
+            path: Lock file, created on first use
+        """
+        self.path = path
+        self._fd: Optional[int] = None
+        self._mode = 0
+        self._shared = 0
+        self._guard = threading.Lock()
+        self._exclusive = threading.Lock()
+        self._holders = 0
+
+    @classmethod
+    def for_writer(cls, path: Path, timeout: Optional[float] = None) -> "StoreLease":
+        """
+        Join this process's exclusive lease on path, acquiring it if needed
+
+        Every call must be matched by close().
+
+        Args:
+            path: Lock file
+            timeout: Seconds to wait for another process, None to wait indefinitely
+
+        Raises:
+            StorageLockedError: If another process keeps the lease
+        """
+        key = path.resolve()
+        with _writer_leases_lock:
+            lease = _writer_leases.get(key)
+            if lease is None:
+                lease = cls(path)
+                lease.acquire(exclusive=True, timeout=timeout)
+                _writer_leases[key] = lease
+            lease._holders += 1
+        return lease
+
+    def close(self) -> None:
+        """Leave a lease joined with for_writer(), releasing it after the last holder"""
+        with _writer_leases_lock:
+            self._holders -= 1
+            if self._holders <= 0:
+                _writer_leases.pop(self.path.resolve(), None)
+                self.release()
+
+    @property
+    def held(self) -> bool:
+        """Whether this process currently holds the lease"""
+        return self._mode != 0
+
+    def acquire(self, exclusive: bool, timeout: Optional[float] = None) -> None:
+        """
+        Take the lease, waiting up to timeout seconds
+
+        Args:
+            exclusive: Exclusive (writer) rather than shared (reader) lease
+            timeout: Seconds to wait, None to wait indefinitely
+
+        Raises:
+            StorageLockedError: If the lease is not granted in time
+        """
+        if fcntl is None:
+            self._mode = 1
+            return
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        if timeout is None:
+            fcntl.flock(self._fd, mode)
+        else:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(self._fd, mode | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        self.release()
+                        raise StorageLockedError(
+                            f"{self.path} is locked by another process"
+                        ) from None
+                    time.sleep(0.05)
+        self._mode = mode
+
+    def release(self) -> None:
+        """Give the lease up and close the lock file"""
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._mode = 0
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        """Hold the lease shared for the duration of the block"""
+        with self._guard:
+            if self._shared == 0:
+                self.acquire(exclusive=False)
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._guard:
+                self._shared -= 1
+                if self._shared == 0:
+                    self.release()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Hold the lease exclusively for the duration of the block"""
+        with self._exclusive:
+            self.acquire(exclusive=True)
+            try:
+                yield
+            finally:
+                self.release()
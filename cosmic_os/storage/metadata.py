@@ -0,0 +1,368 @@
+"""
+Storage Metadata
+================
+
+Metadata records describing every value held by local-first storage,
+and the aggregate counters kept over them.
+"""
+
+from typing import Dict, List, Optional, Any, Iterable, Iterator
+from enum import Enum
+from dataclasses import dataclass, replace
+from datetime import datetime
+import copy
+
+from .key_index import SortedKeyIndex, compile_key_pattern
+
+
+class SyncStatus(Enum):
+    """Cloud sync status"""
+    NOT_SYNCED = "not_synced"
+    SYNCING = "syncing"
+    SYNCED = "synced"
+    SYNC_FAILED = "sync_failed"
+    SYNC_DISABLED = "sync_disabled"
+
+
+@dataclass
+class StorageMetadata:
+    """Metadata for stored data"""
+    key: str
+    created_at: datetime
+    updated_at: datetime
+    sync_status: SyncStatus
+    encrypted: bool
+    size_bytes: int
+    encoding: str = "json"
+    sequence: int = 0
+    deduplicated: bool = False  # Value is a manifest of shared content-addressed chunks
+    codec: Optional[str] = None  # Compression applied before encryption
+    expires_at: Optional[datetime] = None  # Read as missing from this instant on
+
+    def is_expired(self, now: Optional[datetime] = None) -> bool:
+        """Whether the value has expired as of now (default: the current time)"""
+        return self.expires_at is not None and self.expires_at <= (now or datetime.utcnow())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for serialization"""
+        return {
+            "key": self.key,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+            "sync_status": self.sync_status.value,
+            "encrypted": self.encrypted,
+            "size_bytes": self.size_bytes,
+            "encoding": self.encoding,
+            "sequence": self.sequence,
+            "deduplicated": self.deduplicated,
+            "codec": self.codec,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StorageMetadata":
+        """Create from dictionary"""
+        return cls(
+            key=data["key"],
+            created_at=datetime.fromisoformat(data["created_at"]),
+            updated_at=datetime.fromisoformat(data["updated_at"]),
+            sync_status=SyncStatus(data["sync_status"]),
+            encrypted=data["encrypted"],
+            size_bytes=data["size_bytes"],
+            encoding=data.get("encoding", "json"),
+            sequence=data.get("sequence", 0),
+            deduplicated=data.get("deduplicated", False),
+            codec=data.get("codec"),
+            expires_at=(
+                datetime.fromisoformat(data["expires_at"]) if data.get("expires_at") else None
+            )
+        )
+
+
+PREFIX_SEPARATOR = "/"
+
+
+def key_prefix(key: str) -> str:
+    """Prefix a key is counted under in per-prefix breakdowns"""
+    end = key.find(PREFIX_SEPARATOR)
+    return "" if end < 0 else key[:end + 1]
+
+
+def size_bucket(size: int) -> int:
+    """Histogram bucket of a value size: sizes in [2**(b-1), 2**b) share bucket b"""
+    return size.bit_length()
+
+
+def bucket_label(bucket: int) -> str:
+    """Histogram key of a bucket: its exclusive upper bound in bytes"""
+    return str(1 << bucket)
+
+
+class StorageCounters:
+    """
+    Incrementally maintained aggregates over a set of metadata records.
+
+    Metadata stores update them on every write, delete and sync status
+    change, so summaries cost the same however large the store is.
+    Besides totals and the sync-status breakdown, records are counted
+    per key prefix (the key up to and including its first "/", or "" for
+    keys without one) and in a histogram of power-of-two value sizes.
+    """
+
+    def __init__(self):
+        """Initialize counters for an empty store"""
+        self.total_items = 0
+        self.total_size_bytes = 0
+        self.encrypted_items = 0
+        self.sync_status: Dict[str, int] = {status.value: 0 for status in SyncStatus}
+        self.prefixes: Dict[str, List[int]] = {}  # prefix -> [items, size_bytes]
+        self.buckets: Dict[int, int] = {}
+
+    def account(self, metadata: StorageMetadata, sign: int) -> None:
+        """Add (sign=1) or subtract (sign=-1) one record"""
+        self.total_items += sign
+        self.total_size_bytes += sign * metadata.size_bytes
+        self.encrypted_items += sign * int(metadata.encrypted)
+        self.sync_status[metadata.sync_status.value] += sign
+
+        prefix = key_prefix(metadata.key)
+        counts = self.prefixes.setdefault(prefix, [0, 0])
+        counts[0] += sign
+        counts[1] += sign * metadata.size_bytes
+        if counts[0] == 0:
+            del self.prefixes[prefix]
+
+        bucket = size_bucket(metadata.size_bytes)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + sign
+        if self.buckets[bucket] == 0:
+            del self.buckets[bucket]
+
+    def move_sync_status(self, old: SyncStatus, new: SyncStatus) -> None:
+        """Count one record under a new sync status"""
+        self.sync_status[old.value] -= 1
+        self.sync_status[new.value] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Current aggregates
+
+        Returns:
+            Dict with total_items, total_size_bytes, encrypted_items, a
+            sync_status breakdown, items and bytes per prefix, and the
+            size histogram keyed by exclusive upper bound in bytes
+        """
+        return {
+            "total_items": self.total_items,
+            "total_size_bytes": self.total_size_bytes,
+            "encrypted_items": self.encrypted_items,
+            "sync_status": dict(self.sync_status),
+            "prefixes": {
+                prefix: {"items": items, "size_bytes": size}
+                for prefix, (items, size) in sorted(self.prefixes.items())
+            },
+            "size_histogram": {
+                bucket_label(bucket): count for bucket, count in sorted(self.buckets.items())
+            }
+        }
+
+    @classmethod
+    def from_summary(cls, summary: Dict[str, Any]) -> Optional["StorageCounters"]:
+        """
+        Restore counters from a persisted summary()
+
+        Returns:
+            Counters, or None if the summary predates per-prefix and
+            size breakdowns and they must be recounted
+        """
+        if "prefixes" not in summary or "size_histogram" not in summary:
+            return None
+        counters = cls()
+        counters.total_items = summary["total_items"]
+        counters.total_size_bytes = summary["total_size_bytes"]
+        counters.encrypted_items = summary["encrypted_items"]
+        counters.sync_status.update(summary["sync_status"])
+        counters.prefixes = {
+            prefix: [counts["items"], counts["size_bytes"]]
+            for prefix, counts in summary["prefixes"].items()
+        }
+        counters.buckets = {
+            int(label).bit_length() - 1: count
+            for label, count in summary["size_histogram"].items()
+        }
+        return counters
+
+    def copy(self) -> "StorageCounters":
+        """Independent copy"""
+        return copy.deepcopy(self)
+
+
+def merge_summaries(*summaries: Dict[str, Any]) -> Dict[str, Any]:
+    """Aggregates of several disjoint stores combined"""
+    merged = StorageCounters().summary()
+    for summary in summaries:
+        for name in ("total_items", "total_size_bytes", "encrypted_items"):
+            merged[name] += summary[name]
+        for status, count in summary["sync_status"].items():
+            merged["sync_status"][status] = merged["sync_status"].get(status, 0) + count
+        for prefix, counts in summary["prefixes"].items():
+            total = merged["prefixes"].setdefault(prefix, {"items": 0, "size_bytes": 0})
+            total["items"] += counts["items"]
+            total["size_bytes"] += counts["size_bytes"]
+        for label, count in summary["size_histogram"].items():
+            merged["size_histogram"][label] = merged["size_histogram"].get(label, 0) + count
+    merged["prefixes"] = dict(sorted(merged["prefixes"].items()))
+    merged["size_histogram"] = dict(
+        sorted(merged["size_histogram"].items(), key=lambda item: int(item[0]))
+    )
+    return merged
+
+
+class MetadataStore:
+    """
+    Queryable collection of StorageMetadata owned by a storage engine.
+
+    Engines keep it in step with their writes and deletes, so
+    LocalFirstStorage never has to walk the stored values.
+    """
+
+    def get(self, key: str) -> Optional[StorageMetadata]:
+        """Metadata for a key, or None if not stored"""
+        raise NotImplementedError
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.get(key) is not None
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def iter_keys(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[str]:
+        """
+        Keys starting with prefix, in ascending order
+
+        Args:
+            prefix: Required key prefix
+            start_after: Only yield keys strictly greater than this
+
+        Returns:
+            Iterator over matching keys
+        """
+        raise NotImplementedError
+
+    def scan_keys(
+        self,
+        pattern: Optional[str] = None,
+        start_after: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Keys matching a glob pattern, in ascending order
+
+        The pattern's literal prefix bounds a range scan and only keys
+        inside that range are tested against the rest of the pattern.
+
+        Args:
+            pattern: fnmatch-style pattern (case-sensitive)
+            start_after: Only yield keys strictly greater than this
+
+        Returns:
+            Iterator over matching keys
+        """
+        prefix, matcher = compile_key_pattern(pattern)
+        keys = self.iter_keys(prefix, start_after)
+        if matcher is None:
+            return keys
+        return (key for key in keys if matcher(key))
+
+    def keys(self, pattern: Optional[str] = None) -> List[str]:
+        """
+        Sorted keys, optionally filtered by a glob pattern
+
+        Args:
+            pattern: fnmatch-style pattern (case-sensitive)
+
+        Returns:
+            Matching keys in ascending order
+        """
+        return list(self.scan_keys(pattern))
+
+    def values(self) -> Iterator[StorageMetadata]:
+        """Iterate over all metadata records"""
+        raise NotImplementedError
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Aggregate counts used by storage statistics
+
+        Returns:
+            Dict in the format of StorageCounters.summary()
+        """
+        raise NotImplementedError
+
+    def set_sync_status(self, keys: Iterable[str], status: SyncStatus) -> None:
+        """Update the sync status of several keys at once"""
+        raise NotImplementedError
+
+
+class InMemoryMetadataStore(MetadataStore):
+    """Dict-backed metadata store rebuilt by engine recovery"""
+
+    def __init__(self):
+        """Initialize an empty store"""
+        self._entries: Dict[str, StorageMetadata] = {}
+        self._sorted_keys = SortedKeyIndex()
+        self._counters = StorageCounters()
+
+    def get(self, key: str) -> Optional[StorageMetadata]:
+        """Metadata for a key, or None if not stored"""
+        return self._entries.get(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, metadata: StorageMetadata) -> None:
+        """Record metadata for a key"""
+        previous = self._entries.get(metadata.key)
+        if previous is not None:
+            self._counters.account(previous, -1)
+        self._counters.account(metadata, 1)
+        self._entries[metadata.key] = metadata
+        self._sorted_keys.add(metadata.key)
+
+    def remove(self, key: str) -> None:
+        """Forget a key"""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._counters.account(previous, -1)
+        self._sorted_keys.discard(key)
+
+    def iter_keys(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[str]:
+        """Range scan over the sorted key index"""
+        return self._sorted_keys.iter_range(prefix, start_after)
+
+    def values(self) -> Iterator[StorageMetadata]:
+        """Iterate over all metadata records"""
+        return iter(list(self._entries.values()))
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate counters maintained on every change"""
+        return self._counters.summary()
+
+    def set_sync_status(self, keys: Iterable[str], status: SyncStatus) -> None:
+        """Update the sync status of several keys at once"""
+        for key in keys:
+            metadata = self._entries.get(key)
+            if metadata is not None:
+                self._counters.move_sync_status(metadata.sync_status, status)
+                # Replaced rather than mutated: snapshots may share the old entry
+                self._entries[key] = replace(metadata, sync_status=status)
+
+    def counters(self) -> StorageCounters:
+        """Independent copy of the aggregate counters"""
+        return self._counters.copy()
+
+    def copy(self) -> "InMemoryMetadataStore":
+        """Independent copy sharing the (never mutated) entries"""
+        clone = InMemoryMetadataStore()
+        clone._entries = dict(self._entries)
+        clone._sorted_keys = SortedKeyIndex(clone._entries)
+        clone._counters = self._counters.copy()
+        return clone
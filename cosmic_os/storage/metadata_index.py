@@ -0,0 +1,557 @@
+"""
+Persistent Metadata Index
+=========================
+
+Key index for the segment log: maps every key to the location of its
+newest record together with its StorageMetadata.
+
+The index is a sorted, checksummed checkpoint file that is memory-mapped
+on startup plus an in-memory overlay of changes made since. Lookups
+binary-search the mapped file and only decode the entries they touch, so
+a node holding millions of keys can answer get_metadata, list_keys and
+get_storage_stats without first rebuilding a dict. Checkpoints are
+written incrementally: the current base file is streamed into a new one
+with the overlay merged in, then swapped atomically.
+
+File layout (little endian):
+
+    header: magic "CMIX" | version (2) | reserved (2) | crc32 (4) |
+            sequence (8) | entry_count (8) | info_len (4)
+    info:   JSON with the segment table and aggregate summary
+    entries: key_len (2) | segment_id (4) | offset (8) | length (4) |
+             meta_len (4) | key | meta (JSON), sorted by key
+    offsets: entry_count x u64, relative to the start of the entries
+
+The CRC covers everything after the header.
+"""
+
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Tuple
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+import copy
+import heapq
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+from .key_index import SortedKeyIndex, range_start
+from .metadata import StorageMetadata, StorageCounters, SyncStatus, MetadataStore
+
+
+INDEX_MAGIC = b"CMIX"
+INDEX_VERSION = 1
+
+_INDEX_HEADER = struct.Struct("<4sHHIQQI")
+_OFFSET = struct.Struct("<Q")
+_ENTRY = struct.Struct("<HIQII")
+
+
+@dataclass(frozen=True)
+class RecordLocation:
+    """Position of a record inside the segment log"""
+    segment_id: int
+    offset: int
+    length: int
+
+
+@dataclass
+class CheckpointInfo:
+    """State of the segment log captured by a checkpoint"""
+    sequence: int
+    segments: List[Dict[str, int]]
+    summary: Dict[str, Any] = field(default_factory=dict)
+
+
+_Entry = Tuple[RecordLocation, StorageMetadata]
+
+
+@dataclass
+class IndexSnapshot:
+    """Frozen view of the index used to write a checkpoint"""
+    base: Optional["_MappedCheckpoint"]
+    overlay: Dict[str, Optional[_Entry]]
+    summary: Dict[str, Any]
+
+
+def _encode_entry(key: str, location: RecordLocation, metadata: StorageMetadata) -> bytes:
+    """Encode one index entry"""
+    key_bytes = key.encode("utf-8")
+    fields = metadata.to_dict()
+    del fields["key"]
+    meta = json.dumps(fields, separators=(",", ":")).encode("utf-8")
+    return b"".join((
+        _ENTRY.pack(len(key_bytes), location.segment_id, location.offset, location.length, len(meta)),
+        key_bytes,
+        meta
+    ))
+
+
+class _MappedCheckpoint:
+    """Read-only view over a memory-mapped checkpoint file"""
+
+    def __init__(self, path: Path):
+        """
+        Map and validate a checkpoint file
+
+        Raises:
+            ValueError: If the file is not a valid checkpoint
+        """
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._validate()
+        except Exception:
+            self._mm.close()
+            raise
+
+    def _validate(self) -> None:
+        """Check magic, version and checksum, then parse the info block"""
+        if len(self._mm) < _INDEX_HEADER.size:
+            raise ValueError("Metadata index is truncated")
+        magic, version, _, crc, sequence, count, info_len = _INDEX_HEADER.unpack_from(self._mm, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError("Not a metadata index file")
+        if version != INDEX_VERSION:
+            raise ValueError(f"Unsupported metadata index version: {version}")
+        if zlib.crc32(memoryview(self._mm)[_INDEX_HEADER.size:]) != crc:
+            raise ValueError("Metadata index failed checksum")
+
+        info_start = _INDEX_HEADER.size
+        info = json.loads(self._mm[info_start:info_start + info_len])
+        self.count = count
+        self.info = CheckpointInfo(
+            sequence=sequence,
+            segments=info["segments"],
+            summary=info["summary"]
+        )
+        self._entries_start = info_start + info_len
+        self._offsets_start = len(self._mm) - count * _OFFSET.size
+
+    def _entry_at(self, i: int) -> int:
+        """Absolute file offset of entry i"""
+        (relative,) = _OFFSET.unpack_from(self._mm, self._offsets_start + i * _OFFSET.size)
+        return self._entries_start + relative
+
+    def key(self, i: int) -> bytes:
+        """Encoded key of entry i"""
+        start = self._entry_at(i)
+        key_len = _ENTRY.unpack_from(self._mm, start)[0]
+        return self._mm[start + _ENTRY.size:start + _ENTRY.size + key_len]
+
+    def entry(self, i: int) -> Tuple[str, _Entry]:
+        """Decode entry i"""
+        start = self._entry_at(i)
+        key_len, segment_id, offset, length, meta_len = _ENTRY.unpack_from(self._mm, start)
+        key_start = start + _ENTRY.size
+        key = self._mm[key_start:key_start + key_len].decode("utf-8")
+        fields = json.loads(self._mm[key_start + key_len:key_start + key_len + meta_len])
+        fields["key"] = key
+        return key, (RecordLocation(segment_id, offset, length), StorageMetadata.from_dict(fields))
+
+    def raw_entry(self, i: int) -> Tuple[bytes, bytes]:
+        """Encoded key and the undecoded bytes of entry i"""
+        start = self._entry_at(i)
+        key_len, _, _, _, meta_len = _ENTRY.unpack_from(self._mm, start)
+        key_start = start + _ENTRY.size
+        return self._mm[key_start:key_start + key_len], self._mm[start:key_start + key_len + meta_len]
+
+    def lower_bound(self, key: bytes) -> int:
+        """Index of the first entry whose key is >= key"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, key: bytes) -> Optional[int]:
+        """Binary search for a key"""
+        i = self.lower_bound(key)
+        if i < self.count and self.key(i) == key:
+            return i
+        return None
+
+    def close(self) -> None:
+        """Unmap the file"""
+        self._mm.close()
+
+
+def _iter_snapshot(snapshot: IndexSnapshot) -> Iterator[Tuple[str, _Entry]]:
+    """All live entries of a snapshot in key order"""
+    base, overlay = snapshot.base, snapshot.overlay
+
+    def base_entries() -> Iterator[Tuple[str, _Entry]]:
+        if base is None:
+            return
+        for i in range(base.count):
+            key, entry = base.entry(i)
+            if key not in overlay:
+                yield key, entry
+
+    changed = sorted(
+        (key, entry) for key, entry in overlay.items() if entry is not None
+    )
+    return heapq.merge(base_entries(), changed, key=lambda item: item[0])
+
+
+def _encode_snapshot(snapshot: IndexSnapshot) -> Iterator[bytes]:
+    """
+    Encoded entries of a snapshot in key order
+
+    Base entries the overlay does not shadow are copied from the mapping
+    as they are; only changed entries are encoded.
+    """
+    base, overlay = snapshot.base, snapshot.overlay
+    shadowed = {key.encode("utf-8") for key in overlay}
+
+    def base_entries() -> Iterator[Tuple[bytes, bytes]]:
+        if base is None:
+            return
+        for i in range(base.count):
+            key, raw = base.raw_entry(i)
+            if key not in shadowed:
+                yield key, raw
+
+    changed = sorted(
+        ((key.encode("utf-8"), _encode_entry(key, *entry))
+         for key, entry in overlay.items() if entry is not None),
+        key=lambda item: item[0]
+    )
+    return (raw for _, raw in heapq.merge(base_entries(), changed, key=lambda item: item[0]))
+
+
+def _base_keys(
+    base: Optional[_MappedCheckpoint],
+    prefix: str,
+    start_after: Optional[str],
+    shadowed: Iterable[str]
+) -> Iterator[str]:
+    """Keys of a mapped checkpoint in a prefix range, minus shadowed ones"""
+    if base is None:
+        return
+    start, exclusive = range_start(prefix, start_after)
+    start_bytes = start.encode("utf-8")
+    prefix_bytes = prefix.encode("utf-8")
+    i = base.lower_bound(start_bytes)
+    while i < base.count:
+        key_bytes = base.key(i)
+        i += 1
+        if not key_bytes.startswith(prefix_bytes):
+            return
+        if exclusive and key_bytes == start_bytes:
+            continue
+        key = key_bytes.decode("utf-8")
+        if key not in shadowed:
+            yield key
+
+
+class MetadataIndex(MetadataStore):
+    """
+    Persistent key -> (location, metadata) index.
+
+    Guarantees:
+    1. Startup maps the last checkpoint instead of rebuilding every entry
+    2. A checkpoint with a bad checksum or version is ignored, never trusted
+    3. Aggregate counters are maintained on every change, so summary() is O(1)
+    4. Checkpoints are written beside the live file and swapped atomically
+    """
+
+    def __init__(self):
+        """Initialize an empty index"""
+        self._base: Optional[_MappedCheckpoint] = None
+        self._overlay: Dict[str, Optional[_Entry]] = {}
+        self._overlay_keys = SortedKeyIndex()
+        self._counters = StorageCounters()
+        self._lock = threading.RLock()
+
+    def load(self, path: Path) -> Optional[CheckpointInfo]:
+        """
+        Map a checkpoint file as the base of the index
+
+        Args:
+            path: Checkpoint file path
+
+        Returns:
+            The checkpoint's CheckpointInfo, or None if missing or invalid
+        """
+        self.reset()
+        if not path.exists():
+            return None
+        try:
+            base = _MappedCheckpoint(path)
+        except (ValueError, OSError, KeyError):
+            return None
+
+        counters = StorageCounters.from_summary(base.info.summary)
+        if counters is None:
+            # Written before per-prefix and size counters: recount once
+            counters = StorageCounters()
+            for i in range(base.count):
+                counters.account(base.entry(i)[1][1], 1)
+        with self._lock:
+            self._base = base
+            self._counters = counters
+        return base.info
+
+    def reset(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            # Not closed here: snapshots may still read the old mapping
+            self._base = None
+            self._overlay.clear()
+            self._overlay_keys = SortedKeyIndex()
+            self._counters = StorageCounters()
+
+    def _lookup(self, key: str) -> Optional[_Entry]:
+        """Overlay first, then the mapped base"""
+        if key in self._overlay:
+            return self._overlay[key]
+        if self._base is None:
+            return None
+        i = self._base.find(key.encode("utf-8"))
+        return self._base.entry(i)[1] if i is not None else None
+
+    def get(self, key: str) -> Optional[StorageMetadata]:
+        """Metadata for a key, or None if not stored"""
+        with self._lock:
+            entry = self._lookup(key)
+        return entry[1] if entry else None
+
+    def location(self, key: str) -> Optional[RecordLocation]:
+        """Where the newest record for a key lives"""
+        with self._lock:
+            entry = self._lookup(key)
+        return entry[0] if entry else None
+
+    def put(self, metadata: StorageMetadata, location: RecordLocation) -> Optional[RecordLocation]:
+        """
+        Record the newest location and metadata for a key
+
+        Returns:
+            The location this entry replaced, if any
+        """
+        with self._lock:
+            previous = self._lookup(metadata.key)
+            if previous is not None:
+                self._account(previous[1], -1)
+            self._account(metadata, 1)
+            self._overlay[metadata.key] = (location, metadata)
+            self._overlay_keys.add(metadata.key)
+        return previous[0] if previous else None
+
+    def remove(self, key: str) -> Optional[RecordLocation]:
+        """
+        Forget a key
+
+        Returns:
+            The location of the removed entry, if any
+        """
+        with self._lock:
+            previous = self._lookup(key)
+            if previous is None:
+                return None
+            self._account(previous[1], -1)
+            self._overlay_keys.discard(key)
+            if self._base is not None and self._base.find(key.encode("utf-8")) is not None:
+                self._overlay[key] = None
+            else:
+                self._overlay.pop(key, None)
+        return previous[0]
+
+    def relocate(self, key: str, location: RecordLocation) -> None:
+        """Point a key at a moved copy of the same record"""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self._overlay[key] = (location, entry[1])
+                self._overlay_keys.add(key)
+
+    def __len__(self) -> int:
+        return self._counters.total_items
+
+    def snapshot(self) -> IndexSnapshot:
+        """Capture the current state for a checkpoint"""
+        with self._lock:
+            return IndexSnapshot(self._base, dict(self._overlay), self.summary())
+
+    def _iter_entries(self, snapshot: Optional[IndexSnapshot] = None) -> Iterator[Tuple[str, _Entry]]:
+        """All live entries in key order"""
+        return _iter_snapshot(snapshot or self.snapshot())
+
+    def iter_keys(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[str]:
+        """Range scan merging the mapped base with the overlay"""
+        with self._lock:
+            base = self._base
+            shadowed = set(self._overlay)
+            changed = self._overlay_keys.range(prefix, start_after)
+        return heapq.merge(_base_keys(base, prefix, start_after, shadowed), changed)
+
+    def values(self) -> Iterator[StorageMetadata]:
+        """Iterate over all metadata records in key order"""
+        return (entry[1] for _, entry in self._iter_entries())
+
+    def items(self) -> Iterator[Tuple[str, _Entry]]:
+        """Iterate over (key, (location, metadata)) in key order"""
+        return self._iter_entries()
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate counters maintained on every change"""
+        with self._lock:
+            return self._counters.summary()
+
+    def set_sync_status(self, keys: Iterable[str], status: SyncStatus) -> None:
+        """Update the sync status of several keys at once"""
+        with self._lock:
+            for key in keys:
+                entry = self._lookup(key)
+                if entry is None:
+                    continue
+                location, metadata = entry
+                self._counters.move_sync_status(metadata.sync_status, status)
+                # Replaced rather than mutated: snapshots may share the old entry
+                self._overlay[key] = (location, replace(metadata, sync_status=status))
+                self._overlay_keys.add(key)
+
+    @property
+    def pending_changes(self) -> int:
+        """Number of entries changed since the last checkpoint"""
+        return len(self._overlay)
+
+    def _account(self, metadata: StorageMetadata, sign: int) -> None:
+        """Add or subtract one entry from the aggregate counters"""
+        self._counters.account(metadata, sign)
+
+    def write_checkpoint(self, path: Path, info: CheckpointInfo, snapshot: IndexSnapshot) -> None:
+        """
+        Persist a snapshot of the index and install it as the new base
+
+        Callers capture info and the snapshot together while holding off
+        writes, so the segment table matches the index; the file itself is
+        written afterwards and does not block further updates.
+
+        Args:
+            path: Checkpoint file path
+            info: Segment log state the snapshot corresponds to
+            snapshot: Index state from snapshot()
+        """
+        info.summary = snapshot.summary
+
+        info_bytes = json.dumps(
+            {"segments": info.segments, "summary": info.summary},
+            separators=(",", ":")
+        ).encode("utf-8")
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        offsets = bytearray()
+        count = 0
+        with open(tmp_path, "wb") as out:
+            out.write(bytes(_INDEX_HEADER.size))
+            out.write(info_bytes)
+            crc = zlib.crc32(info_bytes)
+            position = 0
+            for encoded in _encode_snapshot(snapshot):
+                offsets += _OFFSET.pack(position)
+                out.write(encoded)
+                crc = zlib.crc32(encoded, crc)
+                position += len(encoded)
+                count += 1
+            out.write(offsets)
+            crc = zlib.crc32(offsets, crc)
+
+            out.seek(0)
+            out.write(_INDEX_HEADER.pack(
+                INDEX_MAGIC, INDEX_VERSION, 0, crc, info.sequence, count, len(info_bytes)
+            ))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, path)
+
+        new_base = _MappedCheckpoint(path)
+        with self._lock:
+            # The old mapping is released once in-flight iterators finish with it
+            self._base = new_base
+            for key, entry in snapshot.overlay.items():
+                if key not in self._overlay:
+                    if entry is not None:
+                        # Removed while the file was written, but the new base holds it
+                        self._overlay[key] = None
+                elif self._overlay[key] is entry:
+                    del self._overlay[key]
+                    self._overlay_keys.discard(key)
+
+    def close(self) -> None:
+        """Unmap the base file"""
+        with self._lock:
+            if self._base is not None:
+                self._base.close()
+        self.reset()
+
+
+class FrozenMetadataIndex(MetadataStore):
+    """
+    Read-only MetadataStore over an IndexSnapshot.
+
+    Shares the mapped base with the live index and owns a copy of the
+    overlay, so later writes to the live index never show through.
+    """
+
+    def __init__(self, snapshot: IndexSnapshot):
+        """
+        Initialize the view
+
+        Args:
+            snapshot: State captured by MetadataIndex.snapshot()
+        """
+        self._snapshot = snapshot
+        self._overlay_keys: Optional[SortedKeyIndex] = None
+
+    def _lookup(self, key: str) -> Optional[_Entry]:
+        overlay, base = self._snapshot.overlay, self._snapshot.base
+        if key in overlay:
+            return overlay[key]
+        if base is None:
+            return None
+        i = base.find(key.encode("utf-8"))
+        return base.entry(i)[1] if i is not None else None
+
+    def get(self, key: str) -> Optional[StorageMetadata]:
+        """Metadata for a key as of the snapshot"""
+        entry = self._lookup(key)
+        return entry[1] if entry else None
+
+    def location(self, key: str) -> Optional[RecordLocation]:
+        """Where a key's record lived as of the snapshot"""
+        entry = self._lookup(key)
+        return entry[0] if entry else None
+
+    def __len__(self) -> int:
+        return self._snapshot.summary["total_items"]
+
+    def iter_keys(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[str]:
+        """Range scan merging the mapped base with the frozen overlay"""
+        if self._overlay_keys is None:
+            # Sorted on first scan only; point lookups never pay for it
+            self._overlay_keys = SortedKeyIndex(
+                key for key, entry in self._snapshot.overlay.items() if entry is not None
+            )
+        return heapq.merge(
+            _base_keys(self._snapshot.base, prefix, start_after, self._snapshot.overlay),
+            self._overlay_keys.iter_range(prefix, start_after)
+        )
+
+    def values(self) -> Iterator[StorageMetadata]:
+        """Iterate over all metadata records in key order"""
+        return (entry[1] for _, entry in _iter_snapshot(self._snapshot))
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate counters as of the snapshot"""
+        return copy.deepcopy(self._snapshot.summary)
+
+    def set_sync_status(self, keys: Iterable[str], status: SyncStatus) -> None:
+        """Snapshots are immutable"""
+        raise PermissionError("Snapshots are read-only")
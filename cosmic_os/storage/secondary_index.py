@@ -0,0 +1,436 @@
+"""
+Secondary Indexes
+=================
+
+Sorted field indexes over JSON values for LocalFirstStorage.query().
+
+An index is declared on a dotted field path (``author``, ``meta.created``)
+and maps the field's value to the keys holding it, kept in value order so
+equality and range predicates are resolved by binary search instead of a
+scan. Only scalar values (None, booleans, numbers, strings) are indexed;
+values of different types never compare equal and sort by type first.
+
+Indexed values are held in memory and snapshotted in plaintext beside the
+data on a clean shutdown. Encrypted values are therefore only indexed by
+indexes explicitly declared non-sensitive. A store that was not shut down
+cleanly rebuilds its indexes on the first query.
+"""
+
+from typing import Dict, List, Optional, Any, Iterator, Tuple
+from dataclasses import dataclass
+from pathlib import Path
+import bisect
+import json
+import math
+import os
+
+
+DEFINITIONS_FILENAME = "indexes.json"
+SNAPSHOT_SUFFIX = ".snapshot.json"
+
+SortKey = Tuple[Any, ...]
+
+
+def sort_key(value: Any) -> Optional[SortKey]:
+    """
+    Order-preserving key for an indexable value
+
+    Returns:
+        (type rank, value), or None if the value cannot be indexed
+    """
+    if value is None:
+        return (0, None)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    return None
+
+
+def field_value(data: Any, field: str) -> Tuple[bool, Any]:
+    """
+    Look up a dotted field path in a JSON value
+
+    Returns:
+        Tuple of (found, value)
+    """
+    for part in field.split("."):
+        if not isinstance(data, dict) or part not in data:
+            return False, None
+        data = data[part]
+    return True, data
+
+
+@dataclass
+class Range:
+    """Range predicate for query(); unset bounds are open"""
+    gt: Any = None
+    gte: Any = None
+    lt: Any = None
+    lte: Any = None
+
+
+class _Bounds:
+    """A predicate translated into sort key space"""
+
+    def __init__(self, predicate: Any):
+        if not isinstance(predicate, Range):
+            key = sort_key(predicate)
+            if key is None:
+                raise ValueError(f"Cannot query by value {predicate!r}")
+            self.rank = key[0]
+            self.lower, self.lower_inclusive = key, True
+            self.upper, self.upper_inclusive = key, True
+            return
+
+        if predicate.gt is not None and predicate.gte is not None:
+            raise ValueError("Range takes gt or gte, not both")
+        if predicate.lt is not None and predicate.lte is not None:
+            raise ValueError("Range takes lt or lte, not both")
+        lower = predicate.gte if predicate.gte is not None else predicate.gt
+        upper = predicate.lte if predicate.lte is not None else predicate.lt
+        self.lower = sort_key(lower) if lower is not None else None
+        self.upper = sort_key(upper) if upper is not None else None
+        self.lower_inclusive = predicate.gte is not None
+        self.upper_inclusive = predicate.lte is not None
+
+        if (lower is not None and self.lower is None) or (upper is not None and self.upper is None):
+            raise ValueError(f"Cannot query by range {predicate!r}")
+        ranks = {key[0] for key in (self.lower, self.upper) if key is not None}
+        if len(ranks) != 1:
+            raise ValueError("Range needs at least one bound, all of one comparable type")
+        self.rank = ranks.pop()
+
+    def contains(self, key: SortKey) -> bool:
+        """Whether a sort key satisfies the predicate"""
+        if key[0] != self.rank:
+            return False
+        if self.lower is not None:
+            if key < self.lower or (key == self.lower and not self.lower_inclusive):
+                return False
+        if self.upper is not None:
+            if key > self.upper or (key == self.upper and not self.upper_inclusive):
+                return False
+        return True
+
+
+class FieldIndex:
+    """
+    Sorted (value, key) index over one field.
+
+    Entries live in two parallel lists ordered by (value, key), so a
+    predicate maps to one contiguous slice found by binary search.
+    """
+
+    def __init__(self, field: str, non_sensitive: bool = False):
+        """
+        Initialize an empty index
+
+        Args:
+            field: Dotted field path
+            non_sensitive: Whether encrypted values may be indexed
+        """
+        self.field = field
+        self.non_sensitive = non_sensitive
+        self.ready = True
+        self._values: List[SortKey] = []
+        self._keys: List[str] = []
+        self._by_key: Dict[str, SortKey] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def update(self, key: str, data: Any, encrypted: bool) -> None:
+        """
+        Index (or unindex) a key for its newly written value
+
+        Args:
+            key: Storage key
+            data: The value as written
+            encrypted: Whether the value is encrypted at rest
+        """
+        value_key = None
+        if not encrypted or self.non_sensitive:
+            found, value = field_value(data, self.field)
+            if found:
+                value_key = sort_key(value)
+        self.discard(key)
+        if value_key is not None:
+            position = self._position(value_key, key)
+            self._values.insert(position, value_key)
+            self._keys.insert(position, key)
+            self._by_key[key] = value_key
+
+    def discard(self, key: str) -> None:
+        """Remove a key from the index"""
+        value_key = self._by_key.pop(key, None)
+        if value_key is not None:
+            position = self._position(value_key, key)
+            del self._values[position]
+            del self._keys[position]
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        self._values.clear()
+        self._keys.clear()
+        self._by_key.clear()
+
+    def count(self, bounds: _Bounds) -> int:
+        """Number of entries matching a predicate"""
+        lo, hi = self._slice(bounds)
+        return hi - lo
+
+    def matches(self, key: str, bounds: _Bounds) -> bool:
+        """Whether a key's indexed value satisfies a predicate"""
+        value_key = self._by_key.get(key)
+        return value_key is not None and bounds.contains(value_key)
+
+    def satisfied_by(self, data: Any, bounds: _Bounds) -> bool:
+        """Whether a value's field satisfies a predicate"""
+        found, value = field_value(data, self.field)
+        value_key = sort_key(value) if found else None
+        return value_key is not None and bounds.contains(value_key)
+
+    def page(
+        self,
+        bounds: _Bounds,
+        after: Optional[Tuple[SortKey, str]],
+        limit: int,
+        reverse: bool = False
+    ) -> List[Tuple[SortKey, str]]:
+        """
+        Entries matching a predicate, continuing past a cursor
+
+        The slice is located afresh on every call, so the index may
+        change between pages without invalidating the cursor.
+
+        Args:
+            bounds: Predicate
+            after: Last (value, key) returned by the previous page
+            limit: Maximum entries
+            reverse: Walk in descending order
+
+        Returns:
+            (value, key) pairs in walk order
+        """
+        lo, hi = self._slice(bounds)
+        if after is not None:
+            value_key, key = after
+            start = bisect.bisect_left(self._values, value_key)
+            end = bisect.bisect_right(self._values, value_key, start)
+            if reverse:
+                hi = min(hi, bisect.bisect_left(self._keys, key, start, end))
+            else:
+                lo = max(lo, bisect.bisect_right(self._keys, key, start, end))
+        if reverse:
+            positions = range(hi - 1, max(lo, hi - limit) - 1, -1)
+        else:
+            positions = range(lo, min(hi, lo + limit))
+        return [(self._values[i], self._keys[i]) for i in positions]
+
+    def entries(self) -> Iterator[Tuple[str, Any]]:
+        """(key, value) pairs in index order"""
+        for value_key, key in zip(self._values, self._keys):
+            yield key, value_key[1]
+
+    def load(self, entries: List[Tuple[str, Any]]) -> None:
+        """Replace the contents with (key, value) pairs"""
+        pairs = sorted(
+            (value_key, key)
+            for key, value_key in ((key, sort_key(value)) for key, value in entries)
+            if value_key is not None
+        )
+        self._values = [value_key for value_key, _ in pairs]
+        self._keys = [key for _, key in pairs]
+        self._by_key = {key: value_key for value_key, key in pairs}
+
+    def _position(self, value_key: SortKey, key: str) -> int:
+        """Insertion point of (value, key)"""
+        start = bisect.bisect_left(self._values, value_key)
+        end = bisect.bisect_right(self._values, value_key, start)
+        return bisect.bisect_left(self._keys, key, start, end)
+
+    def _slice(self, bounds: _Bounds) -> Tuple[int, int]:
+        """Positions [lo, hi) of the entries matching a predicate"""
+        if bounds.lower is None:
+            lo = bisect.bisect_left(self._values, (bounds.rank,))
+        elif bounds.lower_inclusive:
+            lo = bisect.bisect_left(self._values, bounds.lower)
+        else:
+            lo = bisect.bisect_right(self._values, bounds.lower)
+        if bounds.upper is None:
+            hi = bisect.bisect_left(self._values, (bounds.rank + 1,))
+        elif bounds.upper_inclusive:
+            hi = bisect.bisect_right(self._values, bounds.upper)
+        else:
+            hi = bisect.bisect_left(self._values, bounds.upper)
+        return lo, max(lo, hi)
+
+
+class SecondaryIndexes:
+    """
+    The declared indexes of a store and their persistence.
+
+    Definitions are saved whenever they change. Index contents are
+    snapshotted on close and the snapshot is consumed when loaded, so
+    after a crash no stale snapshot is ever trusted.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        """
+        Initialize the index set
+
+        Args:
+            directory: Where definitions and snapshots live, None for memory only
+        """
+        self.directory = directory
+        self._indexes: Dict[str, FieldIndex] = {}
+
+    def __iter__(self) -> Iterator[FieldIndex]:
+        return iter(list(self._indexes.values()))
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def get(self, field: str) -> Optional[FieldIndex]:
+        """Index on a field, or None"""
+        return self._indexes.get(field)
+
+    def load(self, use_snapshots: bool = True) -> None:
+        """
+        Read definitions and, where available, snapshotted contents
+
+        Args:
+            use_snapshots: Trust snapshots left by a clean shutdown
+        """
+        if self.directory is None:
+            return
+        definitions = self.directory / DEFINITIONS_FILENAME
+        if not definitions.exists():
+            return
+        for spec in json.loads(definitions.read_text())["indexes"]:
+            index = FieldIndex(spec["field"], spec["non_sensitive"])
+            index.ready = False
+            snapshot = self._snapshot_path(index.field)
+            if use_snapshots and snapshot.exists():
+                try:
+                    index.load(json.loads(snapshot.read_text())["entries"])
+                    index.ready = True
+                except (ValueError, KeyError, TypeError):
+                    pass
+                snapshot.unlink()
+            self._indexes[index.field] = index
+
+    def create(self, field: str, non_sensitive: bool = False) -> FieldIndex:
+        """
+        Declare an index; it is empty and not ready until built
+
+        Raises:
+            ValueError: If the field already has an index with other settings
+        """
+        index = self._indexes.get(field)
+        if index is not None:
+            if index.non_sensitive != non_sensitive:
+                raise ValueError(f"Index on {field} exists with other settings")
+            return index
+        index = FieldIndex(field, non_sensitive)
+        index.ready = False
+        self._indexes[field] = index
+        self._save_definitions()
+        return index
+
+    def drop(self, field: str) -> bool:
+        """Remove an index, returning whether it existed"""
+        if self._indexes.pop(field, None) is None:
+            return False
+        self._save_definitions()
+        if self.directory is not None:
+            self._snapshot_path(field).unlink(missing_ok=True)
+        return True
+
+    def update(self, key: str, data: Any, encrypted: bool) -> None:
+        """Reindex a key for its newly written value"""
+        for index in self._indexes.values():
+            index.update(key, data, encrypted)
+
+    def discard(self, keys: List[str]) -> None:
+        """Remove deleted keys from every index"""
+        for index in self._indexes.values():
+            for key in keys:
+                index.discard(key)
+
+    def save_snapshots(self) -> None:
+        """Persist the contents of every ready index"""
+        if self.directory is None:
+            return
+        for index in self._indexes.values():
+            if index.ready:
+                self._write_json(
+                    self._snapshot_path(index.field),
+                    {"field": index.field, "entries": list(index.entries())}
+                )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Entry counts per index"""
+        return {
+            index.field: {
+                "entries": len(index),
+                "non_sensitive": index.non_sensitive,
+                "ready": index.ready
+            }
+            for index in self._indexes.values()
+        }
+
+    def _save_definitions(self) -> None:
+        if self.directory is None:
+            return
+        self._write_json(self.directory / DEFINITIONS_FILENAME, {
+            "indexes": [
+                {"field": index.field, "non_sensitive": index.non_sensitive}
+                for index in self._indexes.values()
+            ]
+        })
+
+    def _snapshot_path(self, field: str) -> Path:
+        return self.directory / f"{field}{SNAPSHOT_SUFFIX}"
+
+    def _write_json(self, path: Path, data: Dict[str, Any]) -> None:
+        """Write a file atomically"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")))
+        os.replace(tmp, path)
+
+
+def plan_query(
+    indexes: SecondaryIndexes,
+    where: Dict[str, Any]
+) -> Tuple[FieldIndex, _Bounds, List[Tuple[FieldIndex, _Bounds]]]:
+    """
+    Pick the most selective index to drive a query
+
+    Args:
+        indexes: Declared indexes
+        where: Field path -> value (equality) or Range
+
+    Returns:
+        Tuple of (driving index, its bounds, remaining (index, bounds) filters)
+
+    Raises:
+        ValueError: If where is empty or names a field without an index
+    """
+    if not where:
+        raise ValueError("query() needs at least one predicate")
+    predicates = []
+    for field, predicate in where.items():
+        index = indexes.get(field)
+        if index is None:
+            raise ValueError(f"No index on field {field}; declare one with create_index()")
+        predicates.append((index, _Bounds(predicate)))
+    predicates.sort(key=lambda item: item[0].count(item[1]))
+    (driver, bounds), filters = predicates[0], predicates[1:]
+    return driver, bounds, filters
@@ -0,0 +1,1005 @@
+"""
+Segment Log Engine
+==================
+
+Append-only, log-structured engine behind the LOCAL_FILE backend.
+
+Every write appends one record to the active segment file and an in-memory
+index maps each key to the (segment, offset, length) of its newest record,
+so writes are sequential and a read is a single positioned read. Large
+values can also be read in place through a read-only memory map of their
+segment (get_view), which skips the copy into a fresh bytes object. Sealed
+segments that accumulate overwritten or deleted records are compacted in
+the background, and the index is rebuilt on startup by replaying segments.
+
+Record layout (little endian):
+
+    crc32 (4) | op (1) | sequence (8) | key_len (2) | meta_len (4) |
+    value_len (4) | key | meta (JSON) | value
+
+Sync status changes are appended as small status records (meta holds the
+SyncStatus value, no value bytes) that replay onto the key's current
+version, so a status survives a crash before the next checkpoint.
+
+The CRC covers everything after itself, so a torn write at the tail of
+the active segment is detected and truncated during recovery. The key
+index is persisted as a MetadataIndex checkpoint, so recovery maps the
+checkpoint and only replays records appended after it.
+
+Snapshots pin the index as it stands together with duplicated descriptors
+of the segment files it points into. Segments are append-only and
+compaction replaces files instead of rewriting them, so a snapshot keeps
+reading its records, at the cost of holding replaced files' space,
+without ever holding up a writer.
+
+A segment directory can be opened read-only by other processes while its
+writer is running. Readers catch up by scanning the tail of the log, and
+a shared lock on the directory keeps them from rebuilding their index in
+the middle of a compaction, which holds that lock exclusively while it
+swaps segment files.
+"""
+
+from typing import Dict, Iterable, List, Optional, Any, Sequence, Tuple
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+from .durability import Durability, GroupCommitter
+from .engine import EngineSnapshot, StorageEngine
+from .metadata import StorageMetadata, SyncStatus, MetadataStore
+from .metadata_index import MetadataIndex, FrozenMetadataIndex, CheckpointInfo, RecordLocation
+from .locking import StoreLease
+
+
+_CRC = struct.Struct("<I")
+_HEADER = struct.Struct("<BQHII")
+_PREFIX_SIZE = _CRC.size + _HEADER.size
+
+OP_PUT = 1
+OP_DELETE = 2
+OP_STATUS = 3
+
+SEGMENT_SUFFIX = ".seg"
+COMPACT_SUFFIX = ".compact"
+INDEX_FILENAME = "metadata.idx"
+LOCK_FILENAME = "LOCK"
+
+
+@dataclass
+class _Record:
+    """Decoded segment record"""
+    op: int
+    sequence: int
+    key: str
+    meta: bytes
+    value: bytes
+    offset: int
+    length: int
+
+
+class _Segment:
+    """Open segment file and its garbage accounting"""
+
+    def __init__(self, segment_id: int, path: Path, fd: int, size: int):
+        self.id = segment_id
+        self.path = path
+        self.fd = fd
+        self.size = size
+        self.dead_bytes = 0
+        self._mapping: Optional[mmap.mmap] = None
+
+    def mapping(self, end: int) -> mmap.mmap:
+        """
+        Read-only map of the segment covering at least end bytes
+
+        The active segment grows, so it is remapped when a read reaches
+        past the current map. Superseded maps are never closed explicitly;
+        they are released once the last view into them is gone.
+        """
+        if self._mapping is None or len(self._mapping) < end:
+            self._mapping = mmap.mmap(self.fd, 0, access=mmap.ACCESS_READ)
+        return self._mapping
+
+    def unmap(self) -> None:
+        """Drop the map, e.g. before the file is replaced"""
+        self._mapping = None
+
+    @property
+    def dead_ratio(self) -> float:
+        """Fraction of the segment occupied by dead records"""
+        return self.dead_bytes / self.size if self.size else 0.0
+
+
+def encode_record(
+    op: int,
+    sequence: int,
+    key: str,
+    meta: bytes = b"",
+    value: bytes = b""
+) -> bytes:
+    """
+    Encode a segment record
+
+    Args:
+        op: OP_PUT, OP_DELETE or OP_STATUS
+        sequence: Write sequence number
+        key: Storage key
+        meta: Encoded metadata
+        value: Value bytes
+
+    Returns:
+        Encoded record including its CRC
+    """
+    key_bytes = key.encode("utf-8")
+    if len(key_bytes) > 0xFFFF:
+        raise ValueError("Storage key exceeds 65535 bytes")
+
+    body = b"".join((
+        _HEADER.pack(op, sequence, len(key_bytes), len(meta), len(value)),
+        key_bytes,
+        meta,
+        value
+    ))
+    return _CRC.pack(zlib.crc32(body)) + body
+
+
+def decode_record(buffer: bytes, offset: int = 0) -> _Record:
+    """
+    Decode a complete record from a buffer
+
+    Args:
+        buffer: Bytes holding the whole record
+        offset: Offset of the record in its segment
+
+    Returns:
+        Decoded record
+
+    Raises:
+        ValueError: If the record is truncated or fails its CRC check
+    """
+    if len(buffer) < _PREFIX_SIZE:
+        raise ValueError("Truncated segment record")
+
+    (crc,) = _CRC.unpack_from(buffer, 0)
+    op, sequence, key_len, meta_len, value_len = _HEADER.unpack_from(buffer, _CRC.size)
+    length = _PREFIX_SIZE + key_len + meta_len + value_len
+    if len(buffer) < length:
+        raise ValueError("Truncated segment record")
+    if zlib.crc32(memoryview(buffer)[_CRC.size:length]) != crc:
+        raise ValueError("Segment record failed CRC check")
+
+    key_end = _PREFIX_SIZE + key_len
+    meta_end = key_end + meta_len
+    return _Record(
+        op=op,
+        sequence=sequence,
+        key=buffer[_PREFIX_SIZE:key_end].decode("utf-8"),
+        meta=bytes(buffer[key_end:meta_end]),
+        value=bytes(buffer[meta_end:length]),
+        offset=offset,
+        length=length
+    )
+
+
+def value_view(view: memoryview) -> memoryview:
+    """
+    Validate a complete record in place and slice out its value
+
+    Args:
+        view: View holding exactly one record
+
+    Returns:
+        View of the record's value bytes
+
+    Raises:
+        ValueError: If the record is truncated or fails its CRC check
+    """
+    (crc,) = _CRC.unpack_from(view, 0)
+    _, _, key_len, meta_len, value_len = _HEADER.unpack_from(view, _CRC.size)
+    length = _PREFIX_SIZE + key_len + meta_len + value_len
+    if len(view) < length:
+        raise ValueError("Truncated segment record")
+    if zlib.crc32(view[_CRC.size:length]) != crc:
+        raise ValueError("Segment record failed CRC check")
+    return view[length - value_len:length]
+
+
+def scan_segment(path: Path, start: int = 0) -> Tuple[List[_Record], int]:
+    """
+    Read every valid record of a segment file in order
+
+    Scanning stops at the first truncated or corrupt record.
+
+    Args:
+        path: Segment file path
+        start: Offset of the first record to read
+
+    Returns:
+        Tuple of (records, offset just past the last valid record)
+    """
+    records: List[_Record] = []
+    offset = start
+    with open(path, "rb") as f:
+        f.seek(start)
+        while True:
+            prefix = f.read(_PREFIX_SIZE)
+            if len(prefix) < _PREFIX_SIZE:
+                break
+            _, _, key_len, meta_len, value_len = _HEADER.unpack_from(prefix, _CRC.size)
+            body = f.read(key_len + meta_len + value_len)
+            try:
+                record = decode_record(prefix + body, offset)
+            except ValueError:
+                break
+            records.append(record)
+            offset += record.length
+    return records, offset
+
+
+def encode_metadata(metadata: StorageMetadata) -> bytes:
+    """Encode the immutable part of metadata stored alongside a value"""
+    fields = metadata.to_dict()
+    for transient in ("key", "sequence", "sync_status"):
+        fields.pop(transient)
+    return json.dumps(fields, separators=(",", ":")).encode("utf-8")
+
+
+def decode_metadata(key: str, sequence: int, meta: bytes) -> StorageMetadata:
+    """Rebuild metadata from a replayed record"""
+    fields = json.loads(meta)
+    fields.update(key=key, sequence=sequence, sync_status=SyncStatus.NOT_SYNCED.value)
+    return StorageMetadata.from_dict(fields)
+
+
+class _LoggedMetadataIndex(MetadataIndex):
+    """MetadataIndex whose sync status changes are logged by the engine"""
+
+    def __init__(self, engine: "SegmentLogEngine"):
+        super().__init__()
+        self._engine = engine
+
+    def set_sync_status(self, keys: Iterable[str], status: SyncStatus) -> None:
+        """Append status records for several keys, then update the index"""
+        self._engine.set_sync_status(keys, status)
+
+
+class _SegmentLogSnapshot(EngineSnapshot):
+    """Frozen index plus private descriptors of the segments it references"""
+
+    def __init__(self, metadata: FrozenMetadataIndex, fds: Dict[int, int], sequence: int):
+        self.metadata = metadata
+        self.sequence = sequence
+        self._fds = fds
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Value of a key as of the snapshot"""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Values of several keys as of the snapshot"""
+        if self._fds is None:
+            raise ValueError("Snapshot is closed")
+        locations = [self.metadata.location(key) for key in keys]
+        values: List[Optional[bytes]] = [None] * len(keys)
+        for location, position in sorted(
+            ((location, position) for position, location in enumerate(locations) if location),
+            key=lambda item: (item[0].segment_id, item[0].offset)
+        ):
+            buffer = os.pread(self._fds[location.segment_id], location.length, location.offset)
+            values[position] = decode_record(buffer, location.offset).value
+        return values
+
+    def close(self) -> None:
+        """Close the duplicated descriptors, letting replaced files go"""
+        fds, self._fds = self._fds, None
+        for fd in (fds or {}).values():
+            os.close(fd)
+
+
+class SegmentLogEngine(StorageEngine):
+    """
+    Append-only segment log engine.
+
+    Guarantees:
+    1. Writes are sequential appends to a single active segment
+    2. Reads are one positioned read of a CRC-checked record
+    3. Dead records are reclaimed by compaction without blocking writers
+    4. A crash loses at most the torn record at the tail of the log
+    5. Startup replays only what was written after the last index checkpoint
+    6. Writes reach stable storage when a submit_sync barrier covering
+       them resolves, or within flush_interval seconds otherwise
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        compaction_threshold: float = 0.5,
+        background_compaction: bool = True,
+        checkpoint_interval: int = 50_000,
+        read_only: bool = False,
+        group_commit_ms: float = 5.0,
+        flush_interval: float = 1.0
+    ):
+        """
+        Initialize the segment log engine
+
+        Args:
+            path: Directory holding segment files
+            max_segment_bytes: Size at which the active segment is sealed
+            compaction_threshold: Dead-byte ratio that triggers compaction
+            background_compaction: Compact and checkpoint on a background thread
+            checkpoint_interval: Index changes that trigger a background checkpoint
+            read_only: Open as a reader alongside another process's writer
+            group_commit_ms: Minimum milliseconds between GROUP syncs
+            flush_interval: Seconds after which buffered writes are synced
+        """
+        self.path = path
+        self.max_segment_bytes = max_segment_bytes
+        self.compaction_threshold = compaction_threshold
+        self.background_compaction = background_compaction
+        self.checkpoint_interval = checkpoint_interval
+        self.read_only = read_only
+        self.group_commit_ms = group_commit_ms
+        self.flush_interval = flush_interval
+
+        self.metadata = _LoggedMetadataIndex(self)
+        self._structure = StoreLease(path / LOCK_FILENAME)
+        self._index_identity: Optional[Tuple[int, int]] = None
+        self._segments: Dict[int, _Segment] = {}
+        self._active: Optional[_Segment] = None
+        self._sequence = 0
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._maintenance_wanted = threading.Event()
+        self._closing = False
+        self._compactor: Optional[threading.Thread] = None
+        self._committer: Optional[GroupCommitter] = None
+
+    @property
+    def index_path(self) -> Path:
+        """Path of the metadata index checkpoint"""
+        return self.path / INDEX_FILENAME
+
+    def recover(self) -> MetadataStore:
+        """
+        Map the index checkpoint and replay segments written after it
+
+        Falls back to replaying every segment when the checkpoint is
+        missing, corrupt, or no longer matches the segment files.
+
+        Returns:
+            Metadata store holding every live key
+        """
+        if self.read_only:
+            with self._structure.shared():
+                with self._lock:
+                    self._load()
+            return self.metadata
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        with self._structure.exclusive():
+            for leftover in self.path.glob(f"*{COMPACT_SUFFIX}"):
+                leftover.unlink()
+            with self._lock:
+                self._load()
+
+        self._committer = GroupCommitter(
+            self._sync_active,
+            self.group_commit_ms / 1000,
+            self.flush_interval,
+            name=f"segment-commit-{self.path.name}"
+        )
+        if self.background_compaction:
+            self._compactor = threading.Thread(
+                target=self._maintenance_loop,
+                name=f"segment-maintenance-{self.path.name}",
+                daemon=True
+            )
+            self._compactor.start()
+
+        return self.metadata
+
+    def _load(self) -> None:
+        """Build the index from the checkpoint and segment files; caller holds the lock"""
+        self._index_identity = self._file_identity(self.index_path)
+        segment_ids = sorted(
+            int(p.stem) for p in self.path.glob(f"*{SEGMENT_SUFFIX}") if p.stem.isdigit()
+        )
+
+        checkpointed: Dict[int, Dict[str, int]] = {}
+        info = self.metadata.load(self.index_path)
+        if info is not None and self._checkpoint_matches(info, segment_ids):
+            checkpointed = {segment["id"]: segment for segment in info.segments}
+            self._sequence = info.sequence
+        else:
+            self.metadata.reset()
+
+        for position, segment_id in enumerate(segment_ids):
+            segment_path = self._segment_path(segment_id)
+            known = checkpointed.get(segment_id, {"size": 0, "dead": 0})
+            records, valid_end = scan_segment(segment_path, known["size"])
+            if (
+                not self.read_only
+                and valid_end < segment_path.stat().st_size
+                and position == len(segment_ids) - 1
+            ):
+                # Torn write at the tail of the active segment
+                os.truncate(segment_path, valid_end)
+
+            segment = self._open_segment(segment_id, valid_end)
+            segment.dead_bytes = known["dead"]
+            for record in records:
+                self._sequence = max(self._sequence, record.sequence)
+                self._apply(record, segment)
+
+        if segment_ids:
+            self._active = self._segments[segment_ids[-1]]
+        elif not self.read_only:
+            self._active = self._open_segment(1, 0)
+
+    def refresh(self) -> Optional[List[str]]:
+        """
+        Catch up with records the writer appended since the last refresh
+
+        Only the tail of the active segment and any segments created after
+        it are scanned. A changed index checkpoint means the writer
+        compacted or checkpointed, and the index is rebuilt from scratch.
+
+        Returns:
+            Keys changed since the last refresh, or None after a rebuild
+        """
+        if not self.read_only:
+            return []
+        with self._structure.shared():
+            with self._lock:
+                if self._file_identity(self.index_path) != self._index_identity:
+                    self._close_segments()
+                    self._sequence = 0
+                    self._load()
+                    return None
+
+                changed = []
+                segment = self._active
+                while True:
+                    if segment is not None:
+                        records, segment.size = scan_segment(segment.path, segment.size)
+                        for record in records:
+                            self._sequence = max(self._sequence, record.sequence)
+                            self._apply(record, segment)
+                            changed.append(record.key)
+                    next_id = segment.id + 1 if segment is not None else 1
+                    if not self._segment_path(next_id).exists():
+                        return changed
+                    segment = self._open_segment(next_id, 0)
+                    self._active = segment
+
+    @staticmethod
+    def _file_identity(path: Path) -> Optional[Tuple[int, int]]:
+        """Inode and modification time of a file, None if it is missing"""
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _checkpoint_matches(self, info: CheckpointInfo, segment_ids: List[int]) -> bool:
+        """Whether a checkpoint still describes the segment files on disk"""
+        on_disk = set(segment_ids)
+        for segment in info.segments:
+            path = self._segment_path(segment["id"])
+            if segment["id"] not in on_disk:
+                return False
+            stat = path.stat()
+            if stat.st_ino != segment["inode"] or stat.st_size < segment["size"]:
+                return False
+        newest = max((segment["id"] for segment in info.segments), default=0)
+        known = {segment["id"] for segment in info.segments}
+        return all(sid in known or sid > newest for sid in segment_ids)
+
+    def _apply(self, record: _Record, segment: _Segment) -> None:
+        """Apply a replayed record to the index"""
+        if record.op == OP_PUT:
+            location = RecordLocation(segment.id, record.offset, record.length)
+            metadata = decode_metadata(record.key, record.sequence, record.meta)
+            previous = self.metadata.put(metadata, location)
+        elif record.op == OP_STATUS:
+            # Folded into the index entry, so garbage from the start, like a tombstone
+            status = SyncStatus(record.meta.decode("utf-8"))
+            MetadataIndex.set_sync_status(self.metadata, [record.key], status)
+            segment.dead_bytes += record.length
+            return
+        else:
+            previous = self.metadata.remove(record.key)
+            segment.dead_bytes += record.length
+
+        if previous is not None:
+            self._segments[previous.segment_id].dead_bytes += previous.length
+
+    def put(self, key: str, value: bytes, metadata: StorageMetadata) -> int:
+        """Append a value record to the active segment"""
+        self._check_writable()
+        with self._lock:
+            sequence = self._sequence + 1
+            record = encode_record(OP_PUT, sequence, key, encode_metadata(metadata), value)
+            location = self._append(record)
+            self._sequence = sequence
+
+            metadata.sequence = sequence
+            previous = self.metadata.put(metadata, location)
+            if previous is not None:
+                self._mark_dead(previous)
+            self._maybe_checkpoint()
+            return sequence
+
+    def put_many(self, items: Sequence[Tuple[str, bytes, StorageMetadata]]) -> List[int]:
+        """Append a batch of value records with one write per segment"""
+        self._check_writable()
+        with self._lock:
+            records = []
+            sequences = []
+            for key, value, metadata in items:
+                sequence = self._sequence + len(sequences) + 1
+                records.append(encode_record(
+                    OP_PUT, sequence, key, encode_metadata(metadata), value
+                ))
+                sequences.append(sequence)
+
+            locations = self._append_many(records)
+            self._sequence += len(sequences)
+
+            for (_, _, metadata), location, sequence in zip(items, locations, sequences):
+                metadata.sequence = sequence
+                previous = self.metadata.put(metadata, location)
+                if previous is not None:
+                    self._mark_dead(previous)
+
+            self._maybe_checkpoint()
+            return sequences
+
+    def set_sync_status(self, keys: Iterable[str], status: SyncStatus) -> None:
+        """
+        Log sync status changes with one write, then apply them to the index
+
+        Keys that are no longer stored are skipped.
+        """
+        self._check_writable()
+        with self._lock:
+            present = [key for key in keys if self.metadata.get(key) is not None]
+            if not present:
+                return
+            marker = status.value.encode("utf-8")
+            records = [
+                encode_record(OP_STATUS, self._sequence + i + 1, key, marker)
+                for i, key in enumerate(present)
+            ]
+            locations = self._append_many(records)
+            self._sequence += len(records)
+            for location in locations:
+                self._segments[location.segment_id].dead_bytes += location.length
+            MetadataIndex.set_sync_status(self.metadata, present, status)
+            self._maybe_checkpoint()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Read a value with a single positioned read"""
+        with self._lock:
+            location = self.metadata.location(key)
+            if location is None:
+                return None
+            segment = self._segments[location.segment_id]
+            buffer = os.pread(segment.fd, location.length, location.offset)
+        return decode_record(buffer, location.offset).value
+
+    def get_view(self, key: str) -> Optional[memoryview]:
+        """
+        Read a value in place from a memory map of its segment
+
+        Segment files are append-only and compaction swaps in a new file
+        rather than rewriting one, so the returned view stays valid and
+        unchanged even if the key is later overwritten or compacted away.
+        """
+        with self._lock:
+            location = self.metadata.location(key)
+            if location is None:
+                return None
+            segment = self._segments[location.segment_id]
+            end = location.offset + location.length
+            mapping = segment.mapping(end)
+        return value_view(memoryview(mapping)[location.offset:end])
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Read several values, visiting records in on-disk order"""
+        with self._lock:
+            wanted = [
+                (location, position)
+                for position, location in enumerate(self.metadata.location(key) for key in keys)
+                if location is not None
+            ]
+            wanted.sort(key=lambda item: (item[0].segment_id, item[0].offset))
+            buffers = [
+                (position, location, os.pread(
+                    self._segments[location.segment_id].fd, location.length, location.offset
+                ))
+                for location, position in wanted
+            ]
+
+        values: List[Optional[bytes]] = [None] * len(keys)
+        for position, location, buffer in buffers:
+            values[position] = decode_record(buffer, location.offset).value
+        return values
+
+    def snapshot(self) -> EngineSnapshot:
+        """
+        Pin the index and the segment files it references
+
+        Costs a copy of the index overlay (bounded by checkpoint_interval)
+        and one dup() per segment.
+        """
+        with self._lock:
+            frozen = FrozenMetadataIndex(self.metadata.snapshot())
+            fds = {segment_id: os.dup(segment.fd) for segment_id, segment in self._segments.items()}
+            return _SegmentLogSnapshot(frozen, fds, self._sequence)
+
+    def delete_many(self, keys: Sequence[str]) -> List[bool]:
+        """Append tombstones for several keys with one write"""
+        self._check_writable()
+        with self._lock:
+            results = []
+            doomed = []
+            for key in keys:
+                previous = self.metadata.remove(key)
+                results.append(previous is not None)
+                if previous is not None:
+                    doomed.append((key, previous))
+            if not doomed:
+                return results
+
+            records = [
+                encode_record(OP_DELETE, self._sequence + i + 1, key)
+                for i, (key, _) in enumerate(doomed)
+            ]
+            tombstones = self._append_many(records)
+            self._sequence += len(records)
+            for (_, previous), tombstone in zip(doomed, tombstones):
+                self._mark_dead(previous)
+                self._segments[tombstone.segment_id].dead_bytes += tombstone.length
+
+            self._maybe_checkpoint()
+            return results
+
+    def delete(self, key: str) -> bool:
+        """Append a tombstone for a key"""
+        self._check_writable()
+        with self._lock:
+            previous = self.metadata.remove(key)
+            if previous is None:
+                return False
+
+            sequence = self._sequence + 1
+            tombstone = self._append(encode_record(OP_DELETE, sequence, key))
+            self._sequence = sequence
+            self._mark_dead(previous)
+            self._segments[tombstone.segment_id].dead_bytes += tombstone.length
+            self._maybe_checkpoint()
+            return True
+
+    def delete_prefix(self, prefix: str) -> List[str]:
+        """
+        Remove every key starting with prefix
+
+        Deleting every key drops the segment files outright instead of
+        appending a tombstone per key. Segments are unlinked oldest
+        first, so a crash part way leaves a subset of the live keys with
+        their current values, never a superseded one.
+        """
+        if prefix:
+            return super().delete_prefix(prefix)
+        self._check_writable()
+        with self._compaction_lock, self._structure.exclusive(), self._lock:
+            keys = list(self.metadata.iter_keys())
+            retired = sorted(self._segments.values(), key=lambda segment: segment.id)
+            next_id = retired[-1].id + 1 if retired else 1
+            if self._active is not None:
+                os.fsync(self._active.fd)
+            self._active = self._open_segment(next_id, 0)
+            self._fsync_directory()
+            for segment in retired:
+                # Open snapshots keep their own descriptors on the unlinked files
+                segment.unmap()
+                os.close(segment.fd)
+                segment.path.unlink()
+                del self._segments[segment.id]
+            self._fsync_directory()
+            self.metadata.reset()
+            self._sequence += len(keys)
+            self._write_checkpoint()
+        return keys
+
+    def location(self, key: str) -> Optional[RecordLocation]:
+        """Return where a key's newest record lives"""
+        return self.metadata.location(key)
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the most recent write"""
+        return self._sequence
+
+    def submit_sync(self, durability: Durability) -> Future:
+        """Wait for a sync of the active segment, shared with concurrent writers"""
+        if durability == Durability.BUFFERED or self._committer is None:
+            return self._run_inline(lambda: None)
+        return self._committer.request(durability)
+
+    def _sync_active(self) -> None:
+        """
+        Force the active segment to stable storage
+
+        Earlier segments were synced when they were sealed. The sync runs
+        outside the engine lock so appends continue while it is in flight.
+        """
+        with self._lock:
+            if self._active is None:
+                return
+            fd = self._active.fd
+        os.fsync(fd)
+
+    def _check_writable(self) -> None:
+        """Refuse mutations on a read-only engine"""
+        if self.read_only:
+            raise PermissionError(f"{self.path} is open read-only")
+
+    def _append(self, record: bytes) -> RecordLocation:
+        """Append an encoded record, rotating the active segment if full"""
+        return self._append_many([record])[0]
+
+    def _append_many(self, records: List[bytes]) -> List[RecordLocation]:
+        """Append encoded records with one write per segment touched"""
+        locations = []
+        pending: List[bytes] = []
+        for record in records:
+            if self._active.size and self._active.size + len(record) > self.max_segment_bytes:
+                self._write_out(pending)
+                pending = []
+                self._rotate()
+            locations.append(RecordLocation(self._active.id, self._active.size, len(record)))
+            self._active.size += len(record)
+            pending.append(record)
+        self._write_out(pending)
+        return locations
+
+    def _write_out(self, records: List[bytes]) -> None:
+        """Write already-placed records to the active segment"""
+        view = memoryview(b"".join(records))
+        while view:
+            written = os.write(self._active.fd, view)
+            view = view[written:]
+        if self._committer is not None:
+            self._committer.mark_dirty()
+
+    def _mark_dead(self, location: RecordLocation) -> None:
+        """Account a superseded record as garbage"""
+        segment = self._segments.get(location.segment_id)
+        if segment is None:
+            return
+        segment.dead_bytes += location.length
+        if (
+            segment is not self._active
+            and segment.dead_ratio >= self.compaction_threshold
+        ):
+            self._maintenance_wanted.set()
+
+    def _rotate(self) -> None:
+        """Seal the active segment and open a new one"""
+        os.fsync(self._active.fd)
+        self._active = self._open_segment(max(self._segments) + 1, 0)
+        if self._compaction_candidates():
+            self._maintenance_wanted.set()
+
+    def compact(self) -> int:
+        """
+        Rewrite sealed segments whose dead ratio exceeds the threshold
+
+        Returns:
+            Number of bytes reclaimed
+        """
+        self._check_writable()
+        reclaimed = 0
+        with self._compaction_lock:
+            with self._lock:
+                candidates = self._compaction_candidates()
+            for segment_id in candidates:
+                reclaimed += self._compact_segment(segment_id)
+            if candidates:
+                # Compaction moves records, so the old checkpoint is stale
+                self._write_checkpoint()
+        return reclaimed
+
+    def _compaction_candidates(self) -> List[int]:
+        """Sealed segment ids worth compacting, oldest first"""
+        return sorted(
+            segment.id
+            for segment in self._segments.values()
+            if segment is not self._active
+            and segment.dead_ratio >= self.compaction_threshold
+        )
+
+    def _compact_segment(self, segment_id: int) -> int:
+        """Copy the live records of one sealed segment into a replacement file"""
+        with self._lock:
+            segment = self._segments[segment_id]
+            is_oldest = segment_id == min(self._segments)
+            old_size = segment.size
+
+        # Sealed segments are immutable, so they can be scanned without the lock
+        records, _ = scan_segment(segment.path)
+        tmp_path = segment.path.with_name(segment.path.name + COMPACT_SUFFIX)
+        copied: List[Tuple[_Record, int]] = []
+        new_size = 0
+        with open(tmp_path, "wb") as out:
+            for record in records:
+                live_location = RecordLocation(segment_id, record.offset, record.length)
+                current = self.metadata.location(record.key)
+                if record.op == OP_PUT:
+                    keep = current == live_location
+                elif record.op == OP_STATUS:
+                    # Still needed while it applies to the key's current version
+                    metadata = self.metadata.get(record.key)
+                    keep = metadata is not None and metadata.sequence < record.sequence
+                else:
+                    # Tombstones still shadow older segments unless this is the oldest
+                    keep = not is_oldest and current is None
+                if not keep:
+                    continue
+                out.write(encode_record(
+                    record.op, record.sequence, record.key, record.meta, record.value
+                ))
+                copied.append((record, new_size))
+                new_size += record.length
+            out.flush()
+            os.fsync(out.fileno())
+
+        with self._structure.exclusive(), self._lock:
+            dead_bytes = 0
+            relocated: Dict[str, RecordLocation] = {}
+            for record, new_offset in copied:
+                old_location = RecordLocation(segment_id, record.offset, record.length)
+                if record.op == OP_PUT and self.metadata.location(record.key) == old_location:
+                    relocated[record.key] = RecordLocation(segment_id, new_offset, record.length)
+                else:
+                    dead_bytes += record.length
+
+            os.close(segment.fd)
+            segment.unmap()
+            if new_size == 0:
+                tmp_path.unlink()
+                segment.path.unlink()
+                del self._segments[segment_id]
+            else:
+                os.replace(tmp_path, segment.path)
+                segment.fd = os.open(segment.path, os.O_RDWR | os.O_APPEND)
+                segment.size = new_size
+                segment.dead_bytes = dead_bytes
+            for key, location in relocated.items():
+                self.metadata.relocate(key, location)
+            self._fsync_directory()
+
+        return old_size - new_size
+
+    def checkpoint(self) -> None:
+        """Persist the metadata index so the next startup skips replay"""
+        self._check_writable()
+        with self._compaction_lock:
+            self._write_checkpoint()
+
+    def _write_checkpoint(self) -> None:
+        """Capture the segment table and index together, then write the index"""
+        with self._lock:
+            if self._active is None:
+                return
+            os.fsync(self._active.fd)
+            info = CheckpointInfo(
+                sequence=self._sequence,
+                segments=[
+                    {
+                        "id": segment.id,
+                        "size": segment.size,
+                        "dead": segment.dead_bytes,
+                        "inode": os.fstat(segment.fd).st_ino
+                    }
+                    for segment in self._segments.values()
+                ]
+            )
+            snapshot = self.metadata.snapshot()
+        self.metadata.write_checkpoint(self.index_path, info, snapshot)
+
+    def _maybe_checkpoint(self) -> None:
+        """Ask the maintenance thread for a checkpoint once enough has changed"""
+        if self._compactor is not None and self.metadata.pending_changes >= self.checkpoint_interval:
+            self._maintenance_wanted.set()
+
+    def _maintenance_loop(self) -> None:
+        """Background thread body: compact and checkpoint as work builds up"""
+        while True:
+            self._maintenance_wanted.wait()
+            if self._closing:
+                return
+            self._maintenance_wanted.clear()
+            self.compact()
+            if self.metadata.pending_changes >= self.checkpoint_interval:
+                self.checkpoint()
+
+    def stats(self) -> Dict[str, Any]:
+        """Segment log statistics"""
+        with self._lock:
+            return {
+                "engine": "segment_log",
+                "segments": len(self._segments),
+                "disk_bytes": sum(s.size for s in self._segments.values()),
+                "dead_bytes": sum(s.dead_bytes for s in self._segments.values()),
+                "sequence": self._sequence,
+                "index_pending_changes": self.metadata.pending_changes,
+                "syncs": self._committer.syncs if self._committer is not None else 0
+            }
+
+    def flush(self) -> None:
+        """Force the active segment to stable storage"""
+        with self._lock:
+            if self._active is not None:
+                os.fsync(self._active.fd)
+
+    def close(self) -> None:
+        """Stop maintenance, checkpoint the index and close all segment files"""
+        self._closing = True
+        self._maintenance_wanted.set()
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+        if self._committer is not None:
+            self._committer.close()
+            self._committer = None
+
+        if not self.read_only and self._active is not None and self.metadata.pending_changes:
+            self.checkpoint()
+
+        with self._lock:
+            if not self.read_only:
+                self.flush()
+            self._close_segments()
+            self.metadata.close()
+
+    def _close_segments(self) -> None:
+        """Close every segment file; caller holds the lock"""
+        for segment in self._segments.values():
+            segment.unmap()
+            os.close(segment.fd)
+        self._segments.clear()
+        self._active = None
+
+    def _segment_path(self, segment_id: int) -> Path:
+        """Path of a segment file"""
+        return self.path / f"{segment_id:012d}{SEGMENT_SUFFIX}"
+
+    def _open_segment(self, segment_id: int, size: int) -> _Segment:
+        """Open (creating if needed) a segment file"""
+        path = self._segment_path(segment_id)
+        if self.read_only:
+            fd = os.open(path, os.O_RDONLY)
+        else:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+        segment = _Segment(segment_id, path, fd, size)
+        self._segments[segment_id] = segment
+        return segment
+
+    def _fsync_directory(self) -> None:
+        """Persist directory entries after files are created or replaced"""
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
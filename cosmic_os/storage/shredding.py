@@ -0,0 +1,286 @@
+"""
+Crypto-Shredding
+================
+
+Data keys for LocalFirstStorage that can be destroyed to erase whatever
+was sealed with them.
+
+Deleting a key removes its record, but copies of the ciphertext linger
+until they happen to be overwritten: dead records in older segments, free
+pages of a SQLite database, open snapshots, backups and the cloud replica.
+Destroying the data key the ciphertext was sealed with makes every one of
+those copies unreadable at once, however many there are.
+
+Values are sealed with the store's data key unless their key falls under
+a keyspace: a key prefix (typically one user's data) that has a data key
+of its own. Shredding overwrites a key file in place with a fresh key and
+syncs it, so a deleted user's data is unrecoverable as soon as the call
+returns, even if the process dies before its records are gone. Overwriting
+in place cannot reach blocks a copy-on-write filesystem or an SSD's flash
+translation layer keeps aside; store key files on a volume that does not.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import json
+import os
+import secrets
+
+
+KEY_SIZE = 32
+DATA_KEY_FILENAME = "data.key"
+KEYSPACES_FILENAME = "keyspaces.json"
+KEYSPACE_DIRNAME = "keyspaces"
+
+
+@dataclass
+class PurgeReport:
+    """Outcome of a bulk deletion, with the counts needed to verify it"""
+    prefix: str
+    keys_deleted: int
+    keys_remaining: int  # Still stored under the prefix afterwards; 0 on success
+    items_before: int  # Store-wide totals from the metadata counters
+    items_after: int
+    bytes_freed: int
+    shredded: List[str] = field(default_factory=list)  # Keyspaces whose key was destroyed; "" is the store key
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = None
+
+    @property
+    def verified(self) -> bool:
+        """Nothing is left under the prefix and the store shrank by exactly what was deleted"""
+        return self.keys_remaining == 0 and self.items_before - self.items_after == self.keys_deleted
+
+    def to_dict(self) -> Dict[str, object]:
+        """Convert to dictionary for serialization"""
+        return {
+            "prefix": self.prefix,
+            "keys_deleted": self.keys_deleted,
+            "keys_remaining": self.keys_remaining,
+            "items_before": self.items_before,
+            "items_after": self.items_after,
+            "bytes_freed": self.bytes_freed,
+            "shredded": list(self.shredded),
+            "verified": self.verified,
+            "started_at": self.started_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+def _write_key(path: Path, key: bytes) -> None:
+    """Create a key file readable by the owner only"""
+    tmp = path.with_name(path.name + ".tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.write(fd, key)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+
+
+def _overwrite_key(path: Path, key: bytes) -> None:
+    """Replace a key file's bytes in place, so the old key is gone once this returns"""
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        os.write(fd, key)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Keyring:
+    """
+    The store's data key and the keys of its keyspaces.
+
+    A key is sealed with the key of the longest keyspace prefix it
+    starts with, or with the store key when none matches. Keys live in
+    one file each under the directory; keyspaces.json lists the
+    keyspaces and a generation number that read-only openers watch to
+    pick up new or shredded keys.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        data_key: Optional[bytes] = None,
+        read_only: bool = False
+    ):
+        """
+        Load the keyring, creating the store key on first use
+
+        Args:
+            directory: Where keys are kept, None for ephemeral in-memory keys
+            data_key: Store key managed by the caller; it is never written
+                to disk and cannot be shredded
+            read_only: Never create or modify key files
+        """
+        self.directory = directory
+        self.read_only = read_only
+        self.owns_data_key = data_key is None
+        self._data_key = data_key
+        self._keyspaces: Dict[str, bytes] = {}
+        self._lengths: List[int] = []
+        self._generation = 0
+        self._identity: Optional[Tuple[int, int]] = None
+        self._load()
+
+    @property
+    def data_key(self) -> bytes:
+        """The store key"""
+        return self._data_key
+
+    def __len__(self) -> int:
+        return len(self._keyspaces)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(self._keyspaces))
+
+    def key_for(self, key: str) -> bytes:
+        """Data key sealing the value of a storage key"""
+        for length in self._lengths:
+            keyspace = self._keyspaces.get(key[:length])
+            if keyspace is not None:
+                return keyspace
+        return self._data_key
+
+    def within(self, prefix: str) -> List[str]:
+        """Keyspaces lying entirely under a prefix"""
+        return sorted(keyspace for keyspace in self._keyspaces if keyspace.startswith(prefix))
+
+    def create(self, prefix: str) -> None:
+        """
+        Give a key prefix its own data key
+
+        Raises:
+            ValueError: If the prefix is empty or already a keyspace
+        """
+        self._check_writable()
+        if not prefix:
+            raise ValueError("The whole store is sealed with the store key")
+        if prefix in self._keyspaces:
+            raise ValueError(f"{prefix!r} is already a keyspace")
+        key = secrets.token_bytes(KEY_SIZE)
+        if self.directory is not None:
+            (self.directory / KEYSPACE_DIRNAME).mkdir(mode=0o700, parents=True, exist_ok=True)
+            _write_key(self._keyspace_path(prefix), key)
+        self._keyspaces[prefix] = key
+        self._index()
+        self._save_manifest()
+
+    @contextmanager
+    def shredding(self, keyspaces: Iterable[str], data_key: bool = False) -> Iterator[List[str]]:
+        """
+        Destroy keys on disk now, and in memory when the block exits
+
+        Every key is replaced by a fresh one. The old keys stay usable in
+        this process until the block exits, so the records they sealed can
+        still be deleted, compacted or moved safely; nothing written to
+        disk can decrypt them any more.
+
+        Args:
+            keyspaces: Keyspaces to shred
+            data_key: Shred the store key as well (ignored when it is
+                managed by the caller)
+
+        Returns:
+            The shredded keyspaces, with "" standing for the store key
+        """
+        self._check_writable()
+        replacements: Dict[str, bytes] = {
+            keyspace: secrets.token_bytes(KEY_SIZE)
+            for keyspace in keyspaces if keyspace in self._keyspaces
+        }
+        if data_key and self.owns_data_key:
+            replacements[""] = secrets.token_bytes(KEY_SIZE)
+        if self.directory is not None:
+            for keyspace, key in replacements.items():
+                _overwrite_key(self._keyspace_path(keyspace), key)
+            if replacements:
+                self._save_manifest()
+        try:
+            yield sorted(replacements)
+        finally:
+            for keyspace, key in replacements.items():
+                if keyspace:
+                    self._keyspaces[keyspace] = key
+                else:
+                    self._data_key = key
+
+    def refresh(self) -> bool:
+        """
+        Reload keys changed by the writing process
+
+        Returns:
+            Whether anything was reloaded
+        """
+        if self.directory is None or self._manifest_identity() == self._identity:
+            return False
+        self._load()
+        return True
+
+    def _load(self) -> None:
+        """Read every key file, creating the store key if there is none"""
+        if self.directory is None:
+            if self._data_key is None:
+                self._data_key = secrets.token_bytes(KEY_SIZE)
+            return
+
+        if self.owns_data_key:
+            key_path = self.directory / DATA_KEY_FILENAME
+            if not key_path.exists() and not self.read_only:
+                self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+                _write_key(key_path, secrets.token_bytes(KEY_SIZE))
+            self._data_key = key_path.read_bytes()
+
+        self._identity = self._manifest_identity()
+        manifest_path = self.directory / KEYSPACES_FILENAME
+        manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+        self._generation = manifest.get("generation", 0)
+        self._keyspaces = {
+            keyspace: self._keyspace_path(keyspace).read_bytes()
+            for keyspace in manifest.get("keyspaces", [])
+        }
+        self._index()
+
+    def _index(self) -> None:
+        """Distinct keyspace lengths, longest first, probed by key_for"""
+        self._lengths = sorted({len(keyspace) for keyspace in self._keyspaces}, reverse=True)
+
+    def _save_manifest(self) -> None:
+        """Persist the keyspace list under a new generation"""
+        self._generation += 1
+        if self.directory is None:
+            return
+        path = self.directory / KEYSPACES_FILENAME
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(
+            {"generation": self._generation, "keyspaces": sorted(self._keyspaces)},
+            separators=(",", ":")
+        ))
+        os.replace(tmp, path)
+        self._identity = self._manifest_identity()
+
+    def _manifest_identity(self) -> Optional[Tuple[int, int]]:
+        """Inode and modification time of the manifest, None if there is none"""
+        try:
+            stat = (self.directory / KEYSPACES_FILENAME).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _keyspace_path(self, keyspace: str) -> Path:
+        """Key file of a keyspace ("" is the store key)"""
+        if not keyspace:
+            return self.directory / DATA_KEY_FILENAME
+        digest = hashlib.sha256(keyspace.encode("utf-8")).hexdigest()
+        return self.directory / KEYSPACE_DIRNAME / f"{digest}.key"
+
+    def _check_writable(self) -> None:
+        """Refuse changes on a read-only keyring"""
+        if self.read_only:
+            raise PermissionError(f"{self.directory} was opened read-only")
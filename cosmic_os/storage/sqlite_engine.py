@@ -0,0 +1,692 @@
+"""
+SQLite Engine
+=============
+
+Single-file embedded database engine behind the LOCAL_DB backend.
+
+The database runs in WAL mode so readers never block the writer. All
+writes go through one dedicated writer thread that drains its queue and
+commits everything it found in a single transaction (group commit), so
+concurrent write() coroutines share one durability barrier and the event
+loop only ever awaits a future. Metadata columns are indexed, making key
+listing an index scan rather than a table walk, and triggers keep the
+aggregates behind statistics in a small table updated by the same
+transaction as each write. Snapshots are
+read transactions on a private connection: WAL mode keeps serving them
+the pages of their starting commit while the writer carries on.
+"""
+
+from typing import Dict, List, Optional, Any, Callable, Iterable, Iterator, Sequence, Tuple
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+import queue
+import sqlite3
+import threading
+
+from .durability import Durability, GroupCommitter
+from .engine import EngineSnapshot, StorageEngine
+from .key_index import prefix_successor, range_start
+from .metadata import StorageMetadata, StorageCounters, SyncStatus, MetadataStore, size_bucket
+
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        sync_status TEXT NOT NULL,
+        encrypted INTEGER NOT NULL,
+        size_bytes INTEGER NOT NULL,
+        encoding TEXT NOT NULL,
+        sequence INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_entries_updated_at ON entries(updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_entries_sync_status "
+    "ON entries(sync_status, size_bytes, encrypted)",
+    "CREATE INDEX IF NOT EXISTS idx_entries_size_bytes ON entries(size_bytes)",
+    "CREATE TABLE IF NOT EXISTS engine_state (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+)
+
+# Metadata columns added after the first schema, applied to older databases on open
+_ADDED_COLUMNS = (
+    ("deduplicated", "INTEGER NOT NULL DEFAULT 0"),
+    ("codec", "TEXT"),
+    ("expires_at", "TEXT"),
+    ("size_bucket", "INTEGER"),
+)
+
+# Aggregates kept by triggers in the writing transaction, so statistics
+# never scan entries. kind is 'status', 'prefix' or 'size' (histogram bucket).
+_STATS_TABLE = """
+    CREATE TABLE IF NOT EXISTS stats (
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        items INTEGER NOT NULL,
+        size_bytes INTEGER NOT NULL,
+        encrypted INTEGER NOT NULL,
+        PRIMARY KEY (kind, name)
+    )
+"""
+_PREFIX_SQL = (
+    "CASE WHEN instr({row}.key, '/') > 0 "
+    "THEN substr({row}.key, 1, instr({row}.key, '/')) ELSE '' END"
+)
+_STATS_GROUPS = (
+    ("status", "{row}.sync_status"),
+    ("prefix", _PREFIX_SQL),
+    ("size", "CAST({row}.size_bucket AS TEXT)"),
+)
+
+
+def _stats_delta(row: str, sign: str) -> str:
+    """Trigger statements adding (sign '+') or removing (sign '-') one row from stats"""
+    return "".join(
+        f"INSERT INTO stats VALUES ('{kind}', {name.format(row=row)}, {sign}1, "
+        f"{sign}{row}.size_bytes, {sign}{row}.encrypted) "
+        "ON CONFLICT(kind, name) DO UPDATE SET items = items + excluded.items, "
+        "size_bytes = size_bytes + excluded.size_bytes, "
+        "encrypted = encrypted + excluded.encrypted; "
+        for kind, name in _STATS_GROUPS
+    )
+
+
+_STATS_TRIGGERS = (
+    f"CREATE TRIGGER IF NOT EXISTS stats_insert AFTER INSERT ON entries "
+    f"BEGIN {_stats_delta('NEW', '+')}END",
+    f"CREATE TRIGGER IF NOT EXISTS stats_delete AFTER DELETE ON entries "
+    f"BEGIN {_stats_delta('OLD', '-')}END",
+    f"CREATE TRIGGER IF NOT EXISTS stats_update AFTER UPDATE ON entries "
+    f"BEGIN {_stats_delta('OLD', '-')}{_stats_delta('NEW', '+')}END",
+)
+
+# Recount for databases created before the stats table
+_STATS_RECOUNT = (
+    "DELETE FROM stats",
+    *(
+        f"INSERT INTO stats SELECT '{kind}', {name.format(row='entries')}, COUNT(*), "
+        f"TOTAL(size_bytes), TOTAL(encrypted) FROM entries GROUP BY 2"
+        for kind, name in _STATS_GROUPS
+    ),
+    "INSERT INTO engine_state (name, value) VALUES ('stats', 1)",
+)
+
+_METADATA_COLUMNS = (
+    "key, created_at, updated_at, sync_status, encrypted, size_bytes, encoding, sequence, "
+    "deduplicated, codec, expires_at, size_bucket"
+)
+
+_UPSERT = f"""
+    INSERT INTO entries (value, {_METADATA_COLUMNS})
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET
+        value = excluded.value,
+        updated_at = excluded.updated_at,
+        sync_status = excluded.sync_status,
+        encrypted = excluded.encrypted,
+        size_bytes = excluded.size_bytes,
+        encoding = excluded.encoding,
+        sequence = excluded.sequence,
+        deduplicated = excluded.deduplicated,
+        codec = excluded.codec,
+        expires_at = excluded.expires_at,
+        size_bucket = excluded.size_bucket
+"""
+_DELETE = "DELETE FROM entries WHERE key = ?"
+_SELECT_VALUE = "SELECT value FROM entries WHERE key = ?"
+_SELECT_METADATA = f"SELECT {_METADATA_COLUMNS} FROM entries WHERE key = ?"
+_SAVE_SEQUENCE = (
+    "INSERT INTO engine_state (name, value) VALUES ('sequence', ?) "
+    "ON CONFLICT(name) DO UPDATE SET value = excluded.value"
+)
+
+_IN_CHUNK = 500  # Stay well below SQLITE_MAX_VARIABLE_NUMBER
+_KEY_PAGE = 1000  # Keys fetched per range query when listing
+
+_STOP = object()
+
+
+@dataclass
+class _WriteRequest:
+    """A write queued for the writer thread"""
+    op: str
+    args: tuple
+    future: Future = field(default_factory=Future)
+
+
+def _row_to_metadata(row: tuple) -> StorageMetadata:
+    """Build metadata from a row selected with _METADATA_COLUMNS"""
+    (key, created_at, updated_at, sync_status, encrypted, size_bytes, encoding, sequence,
+     deduplicated, codec, expires_at, _) = row
+    return StorageMetadata.from_dict({
+        "key": key,
+        "created_at": created_at,
+        "updated_at": updated_at,
+        "sync_status": sync_status,
+        "encrypted": bool(encrypted),
+        "size_bytes": size_bytes,
+        "encoding": encoding,
+        "sequence": sequence,
+        "deduplicated": bool(deduplicated),
+        "codec": codec,
+        "expires_at": expires_at
+    })
+
+
+def _fetch_values(
+    read: Callable[[str, tuple], sqlite3.Cursor],
+    keys: Sequence[str]
+) -> List[Optional[bytes]]:
+    """Fetch several values with chunked IN queries"""
+    found: Dict[str, bytes] = {}
+    for start in range(0, len(keys), _IN_CHUNK):
+        chunk = list(keys[start:start + _IN_CHUNK])
+        placeholders = ",".join("?" * len(chunk))
+        rows = read(f"SELECT key, value FROM entries WHERE key IN ({placeholders})", tuple(chunk))
+        found.update(rows)
+    return [found.get(key) for key in keys]
+
+
+class SQLiteMetadataStore(MetadataStore):
+    """Metadata store answering queries from the indexed entries table"""
+
+    def __init__(self, engine: "SQLiteEngine"):
+        """
+        Initialize the store
+
+        Args:
+            engine: Owning SQLite engine, or a snapshot of one
+        """
+        self._engine = engine
+
+    def get(self, key: str) -> Optional[StorageMetadata]:
+        """Metadata for a key via a primary-key lookup"""
+        row = self._engine._read(_SELECT_METADATA, (key,)).fetchone()
+        return _row_to_metadata(row) if row else None
+
+    def __len__(self) -> int:
+        return self._engine._read("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def iter_keys(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[str]:
+        """Page through a primary-key range, one bounded query per page"""
+        start, exclusive = range_start(prefix, start_after)
+        upper = prefix_successor(prefix)
+        while True:
+            clauses = ["key > ?" if exclusive else "key >= ?"]
+            params: List[Any] = [start]
+            if upper is not None:
+                clauses.append("key < ?")
+                params.append(upper)
+            rows = self._engine._read(
+                f"SELECT key FROM entries WHERE {' AND '.join(clauses)} "
+                f"ORDER BY key LIMIT {_KEY_PAGE}",
+                tuple(params)
+            ).fetchall()
+            for (key,) in rows:
+                yield key
+            if len(rows) < _KEY_PAGE:
+                return
+            start, exclusive = rows[-1][0], True
+
+    def values(self) -> Iterator[StorageMetadata]:
+        """Stream metadata rows in key order"""
+        rows = self._engine._read(f"SELECT {_METADATA_COLUMNS} FROM entries ORDER BY key")
+        return (_row_to_metadata(row) for row in rows)
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate counts read from the trigger-maintained stats table"""
+        counters = StorageCounters()
+        try:
+            rows = self._engine._read(
+                "SELECT kind, name, items, size_bytes, encrypted FROM stats WHERE items != 0"
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # A reader of a database no writer has opened since stats were added
+            for metadata in self.values():
+                counters.account(metadata, 1)
+            return counters.summary()
+        for kind, name, items, size, encrypted in rows:
+            if kind == "status":
+                counters.sync_status[name] = items
+                counters.total_items += items
+                counters.total_size_bytes += int(size)
+                counters.encrypted_items += int(encrypted)
+            elif kind == "prefix":
+                counters.prefixes[name] = [items, int(size)]
+            else:
+                counters.buckets[int(name)] = items
+        return counters.summary()
+
+    def set_sync_status(self, keys: Iterable[str], status: SyncStatus) -> None:
+        """Update sync status for several keys in one writer transaction"""
+        self._engine._submit("sync_status", (list(keys), status.value)).result()
+
+
+class SQLiteEngine(StorageEngine):
+    """
+    SQLite engine with WAL journaling and a group-committing writer thread.
+
+    Guarantees:
+    1. One writer thread owns the write connection; readers use their own
+    2. Concurrent writes are committed together in a single transaction
+    3. A failing write never takes the rest of its batch down with it
+    4. Statements are parameterised and served from the statement cache
+    5. A submit_sync barrier commits with synchronous=FULL, syncing the WAL
+       and with it every transaction committed before
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_batch: int = 1024,
+        synchronous: str = "NORMAL",
+        read_only: bool = False,
+        group_commit_ms: float = 5.0
+    ):
+        """
+        Initialize the SQLite engine
+
+        Args:
+            path: Database file path
+            max_batch: Maximum number of writes committed per transaction
+            synchronous: SQLite synchronous pragma (NORMAL is durable at
+                checkpoint under WAL; FULL syncs every commit)
+            read_only: Open as a reader alongside another process's writer
+            group_commit_ms: Minimum milliseconds between GROUP syncs
+        """
+        self.path = path
+        self.max_batch = max_batch
+        self.synchronous = synchronous
+        self.read_only = read_only
+        self.group_commit_ms = group_commit_ms
+        self.metadata = SQLiteMetadataStore(self)
+
+        self._sequence = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._batches_committed = 0
+        self._writes_committed = 0
+        self._data_version: Optional[int] = None
+        self._committer: Optional[GroupCommitter] = None
+
+    def recover(self) -> MetadataStore:
+        """Create the schema and start the writer thread"""
+        if self.read_only:
+            self.refresh()
+            return self.metadata
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        with conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            for column, definition in _ADDED_COLUMNS:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE entries ADD COLUMN {column} {definition}")
+            conn.execute(_STATS_TABLE)
+            if conn.execute("SELECT 1 FROM engine_state WHERE name = 'stats'").fetchone() is None:
+                # Before the triggers exist, so the backfill is not counted twice
+                conn.create_function("size_bucket", 1, size_bucket, deterministic=True)
+                conn.execute("UPDATE entries SET size_bucket = size_bucket(size_bytes)")
+                for statement in _STATS_RECOUNT:
+                    conn.execute(statement)
+            for statement in _STATS_TRIGGERS:
+                conn.execute(statement)
+        row = conn.execute("SELECT value FROM engine_state WHERE name = 'sequence'").fetchone()
+        self._sequence = row[0] if row else 0
+
+        ready = threading.Event()
+        self._writer = threading.Thread(
+            target=self._writer_loop,
+            args=(conn, ready),
+            name=f"sqlite-writer-{self.path.name}",
+            daemon=True
+        )
+        self._writer.start()
+        ready.wait()
+        self._committer = GroupCommitter(
+            lambda: self._submit("sync", ()).result(),
+            self.group_commit_ms / 1000,
+            name=f"sqlite-commit-{self.path.name}"
+        )
+        return self.metadata
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection configured for WAL mode"""
+        if self.read_only:
+            conn = sqlite3.connect(
+                f"{self.path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=256
+            )
+            conn.execute("PRAGMA busy_timeout=5000")
+            return conn
+
+        conn = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _read(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """Run a query on this thread's reader connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn.execute(sql, params)
+
+    def put(self, key: str, value: bytes, metadata: StorageMetadata) -> int:
+        """Store a value and wait for its transaction to commit"""
+        return self.submit_put(key, value, metadata).result()
+
+    def submit_put(self, key: str, value: bytes, metadata: StorageMetadata) -> Future:
+        """Queue a put for the writer thread"""
+        return self._submit("put", (key, bytes(value), metadata))
+
+    def put_many(self, items: Sequence[Tuple[str, bytes, StorageMetadata]]) -> List[int]:
+        """Store a batch of values in one transaction"""
+        return self.submit_put_many(items).result()
+
+    def submit_put_many(self, items: Sequence[Tuple[str, bytes, StorageMetadata]]) -> Future:
+        """Queue a batch put for the writer thread"""
+        return self._submit("put_many", (list(items),))
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Fetch a value via the primary-key index"""
+        row = self._read(_SELECT_VALUE, (key,)).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Fetch several values with chunked IN queries"""
+        return _fetch_values(self._read, keys)
+
+    def delete(self, key: str) -> bool:
+        """Delete a key and wait for its transaction to commit"""
+        return self.submit_delete(key).result()
+
+    def submit_delete(self, key: str) -> Future:
+        """Queue a delete for the writer thread"""
+        return self._submit("delete", (key,))
+
+    def delete_many(self, keys: Sequence[str]) -> List[bool]:
+        """Delete several keys in one transaction"""
+        return self.submit_delete_many(keys).result()
+
+    def submit_delete_many(self, keys: Sequence[str]) -> Future:
+        """Queue a batch delete for the writer thread"""
+        return self._submit("delete_many", (list(keys),))
+
+    def delete_prefix(self, prefix: str) -> List[str]:
+        """Delete a primary-key range in one statement and wait for it to commit"""
+        return self.submit_delete_prefix(prefix).result()
+
+    def submit_delete_prefix(self, prefix: str) -> Future:
+        """Queue a range delete for the writer thread"""
+        return self._submit("delete_prefix", (prefix,))
+
+    def submit_sync(self, durability: Durability) -> Future:
+        """Wait for a fully synchronous commit, shared with concurrent writers"""
+        if durability == Durability.BUFFERED or self._committer is None:
+            return self._run_inline(lambda: None)
+        return self._committer.request(durability)
+
+    def snapshot(self) -> EngineSnapshot:
+        """Open a read transaction on a private connection"""
+        return _SQLiteSnapshot(self._connect())
+
+    def refresh(self) -> Optional[List[str]]:
+        """
+        Detect commits by other connections
+
+        SQLite serves every query from the latest commit, so only the
+        fact that something changed is reported.
+
+        Returns:
+            [] if nothing was committed since the last call, otherwise None
+        """
+        if not self.read_only:
+            return []
+        version = self._read("PRAGMA data_version").fetchone()[0]
+        changed = self._data_version is not None and version != self._data_version
+        self._data_version = version
+        return None if changed else []
+
+    def _submit(self, op: str, args: tuple) -> Future:
+        """Hand a write to the writer thread"""
+        if self.read_only:
+            raise PermissionError(f"{self.path} is open read-only")
+        if self._writer is None:
+            raise RuntimeError("SQLite engine is not open")
+        request = _WriteRequest(op, args)
+        self._queue.put(request)
+        return request.future
+
+    def _writer_loop(self, conn: sqlite3.Connection, ready: threading.Event) -> None:
+        """Writer thread body: drain the queue and group-commit each batch"""
+        ready.set()
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit_batch(conn, batch)
+        conn.close()
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[_WriteRequest]) -> None:
+        """Commit a batch in one transaction, isolating failures if it aborts"""
+        start_sequence = self._sequence
+        durable = self.synchronous != "FULL" and any(r.op == "sync" for r in batch)
+        try:
+            if durable:
+                conn.execute("PRAGMA synchronous=FULL")
+            conn.execute("BEGIN IMMEDIATE")
+            results = [self._apply(conn, request) for request in batch]
+            conn.execute(_SAVE_SEQUENCE, (self._sequence,))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self._sequence = start_sequence
+            if len(batch) == 1:
+                batch[0].future.set_exception(e)
+                return
+            # Retry one by one so only the offending write fails
+            for request in batch:
+                self._commit_batch(conn, [request])
+            return
+
+        finally:
+            if durable:
+                conn.execute(f"PRAGMA synchronous={self.synchronous}")
+
+        # Barriers are not writes; a barrier-only commit is counted in syncs
+        writes = sum(1 for request in batch if request.op != "sync")
+        if writes:
+            self._batches_committed += 1
+            self._writes_committed += writes
+        for request, result in zip(batch, results):
+            request.future.set_result(result)
+
+    def _apply(self, conn: sqlite3.Connection, request: _WriteRequest) -> Any:
+        """Execute one queued write inside the open transaction"""
+        if request.op == "put":
+            conn.execute(_UPSERT, self._upsert_params(*request.args))
+            return self._sequence
+
+        if request.op == "put_many":
+            (items,) = request.args
+            conn.executemany(_UPSERT, [self._upsert_params(*item) for item in items])
+            return [metadata.sequence for _, _, metadata in items]
+
+        if request.op == "delete":
+            (key,) = request.args
+            return self._delete_row(conn, key)
+
+        if request.op == "delete_many":
+            (keys,) = request.args
+            return [self._delete_row(conn, key) for key in keys]
+
+        if request.op == "delete_prefix":
+            (prefix,) = request.args
+            return self._delete_range(conn, prefix)
+
+        if request.op == "sync":
+            # Nothing to write; the commit itself is what gets synced
+            return None
+
+        if request.op == "sync_status":
+            keys, status = request.args
+            conn.executemany(
+                "UPDATE entries SET sync_status = ? WHERE key = ?",
+                ((status, key) for key in keys)
+            )
+            return None
+
+        raise ValueError(f"Unknown write operation: {request.op}")
+
+    def _upsert_params(self, key: str, value: bytes, metadata: StorageMetadata) -> tuple:
+        """Assign the next sequence number and build _UPSERT parameters"""
+        self._sequence += 1
+        metadata.sequence = self._sequence
+        return (
+            value,
+            key,
+            metadata.created_at.isoformat(),
+            metadata.updated_at.isoformat(),
+            metadata.sync_status.value,
+            int(metadata.encrypted),
+            metadata.size_bytes,
+            metadata.encoding,
+            metadata.sequence,
+            int(metadata.deduplicated),
+            metadata.codec,
+            metadata.expires_at.isoformat() if metadata.expires_at else None,
+            size_bucket(metadata.size_bytes)
+        )
+
+    def _delete_row(self, conn: sqlite3.Connection, key: str) -> bool:
+        """Delete one row inside the open transaction"""
+        deleted = conn.execute(_DELETE, (key,)).rowcount > 0
+        if deleted:
+            self._sequence += 1
+        return deleted
+
+    def _delete_range(self, conn: sqlite3.Connection, prefix: str) -> List[str]:
+        """
+        Delete every key starting with prefix inside the open transaction
+
+        Emptying the table runs without its delete trigger, which lets
+        SQLite drop the table's pages wholesale rather than visit each
+        row; the stats are cleared along with it.
+        """
+        clauses, params = ["key >= ?"], [prefix]
+        upper = prefix_successor(prefix)
+        if upper is not None:
+            clauses.append("key < ?")
+            params.append(upper)
+        where = " AND ".join(clauses)
+        keys = [key for (key,) in conn.execute(f"SELECT key FROM entries WHERE {where}", params)]
+        if prefix:
+            conn.execute(f"DELETE FROM entries WHERE {where}", params)
+        else:
+            conn.execute("DROP TRIGGER stats_delete")
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM stats")
+            conn.execute(_STATS_TRIGGERS[1])
+        self._sequence += len(keys)
+        return keys
+
+    def stats(self) -> Dict[str, Any]:
+        """SQLite engine statistics"""
+        return {
+            "engine": "sqlite",
+            "disk_bytes": sum(
+                p.stat().st_size
+                for p in (self.path, Path(f"{self.path}-wal"))
+                if p.exists()
+            ),
+            "sequence": self._sequence,
+            "batches_committed": self._batches_committed,
+            "writes_committed": self._writes_committed,
+            "syncs": self._committer.syncs if self._committer is not None else 0
+        }
+
+    def close(self) -> None:
+        """Drain pending writes, stop the writer and close all connections"""
+        if self._committer is not None:
+            self._committer.close()
+            self._committer = None
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+            self._writer = None
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        self._local = threading.local()
+
+
+class _SQLiteSnapshot(EngineSnapshot):
+    """A read transaction held open on its own connection"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn: Optional[sqlite3.Connection] = conn
+        conn.execute("BEGIN")
+        # The first read fixes the commit the transaction sees
+        row = conn.execute("SELECT value FROM engine_state WHERE name = 'sequence'").fetchone()
+        self.sequence = row[0] if row else 0
+        self.metadata = SQLiteMetadataStore(self)
+
+    def _read(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """Run a query inside the snapshot's transaction"""
+        if self._conn is None:
+            raise ValueError("Snapshot is closed")
+        return self._conn.execute(sql, params)
+
+    def _submit(self, op: str, args: tuple) -> Future:
+        """Snapshots are immutable"""
+        raise PermissionError("Snapshots are read-only")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Value of a key as of the snapshot"""
+        row = self._read(_SELECT_VALUE, (key,)).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Values of several keys as of the snapshot"""
+        return _fetch_values(self._read, keys)
+
+    def close(self) -> None:
+        """End the read transaction, letting WAL checkpoints move past it"""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.execute("ROLLBACK")
+            conn.close()
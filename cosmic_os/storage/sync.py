@@ -0,0 +1,390 @@
+"""
+Cloud Sync
+==========
+
+Change journal and remote interface behind LocalFirstStorage.sync_to_cloud.
+
+Every local write and delete is appended to a change journal under a
+monotonically increasing sequence number. The journal keeps the latest
+unacknowledged change per key in memory, so a sync ships exactly the keys
+modified since their last acknowledged upload without scanning the store.
+Acknowledgements are journaled too, and the file is rewritten down to the
+pending entries once acknowledged records dominate it.
+
+Changes are journaled before the engine applies them, so a crash can
+leave a record whose write or delete never happened but never the other
+way round. A sync ships each journaled key as it is stored now: a put
+whose value is gone is shipped as a delete and vice versa.
+
+Remotes only ever receive what is stored locally: encrypted values leave
+the device sealed, so the cloud holds ciphertext it cannot read.
+"""
+
+from typing import Dict, List, Optional, Any, Iterable, Sequence, Tuple
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import quote
+import asyncio
+import json
+import os
+import struct
+import threading
+
+from .durability import Durability, GroupCommitter
+
+
+OP_PUT = 1
+OP_DELETE = 2
+OP_ACK = 3
+
+_RECORD = struct.Struct("<QBH")  # sequence, op, key length; then the key
+
+JOURNAL_FILENAME = "journal.log"
+
+# Rewrite the journal once superseded and acknowledged records outnumber
+# pending changes by this many, so rewrites stay amortized O(1) per record
+_COMPACT_SLACK = 4096
+
+
+@dataclass(frozen=True)
+class Change:
+    """The latest unacknowledged change to a key"""
+    sequence: int
+    key: str
+    op: int
+
+
+class SyncJournal:
+    """
+    Persistent dirty set keyed by change sequence number.
+
+    Records are flushed to the OS on every append, so they survive a
+    process crash, and are synced to stable storage by the same SYNC and
+    GROUP barriers as the engine (buffered records within flush_interval).
+    A BUFFERED write lost to power failure may keep its value but lose
+    its record; such a key is uploaded with its next change or a forced
+    sync.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        group_commit_ms: float = 5.0,
+        flush_interval: float = 1.0
+    ):
+        """
+        Initialize the journal
+
+        Args:
+            path: Journal directory, or None for an in-memory journal
+            group_commit_ms: Minimum milliseconds between GROUP syncs
+            flush_interval: Seconds after which buffered records are synced
+        """
+        self.path = path
+        self.group_commit_ms = group_commit_ms
+        self.flush_interval = flush_interval
+        self._committer: Optional[GroupCommitter] = None
+        self._pending: Dict[str, Change] = {}
+        self._sequence = 0
+        self._records = 0
+        self._file = None
+        self._lock = threading.Lock()
+        self.created = True
+
+    def open(self) -> "SyncJournal":
+        """Replay the journal file, creating it on first use"""
+        if self.path is None:
+            return self
+        self.path.mkdir(parents=True, exist_ok=True)
+        journal = self.path / JOURNAL_FILENAME
+        self.created = not journal.exists()
+        if not self.created:
+            data = journal.read_bytes()
+            offset = 0
+            while offset + _RECORD.size <= len(data):
+                sequence, op, key_len = _RECORD.unpack_from(data, offset)
+                end = offset + _RECORD.size + key_len
+                if end > len(data):
+                    break  # Torn final record
+                self._replay(Change(sequence, data[offset + _RECORD.size:end].decode("utf-8"), op))
+                offset = end
+            with open(journal, "r+b") as f:
+                f.truncate(offset)
+        self._file = open(journal, "ab")
+        with self._lock:
+            self._maybe_compact()
+        self._committer = GroupCommitter(
+            self._sync,
+            self.group_commit_ms / 1000,
+            self.flush_interval,
+            name="sync-journal-commit"
+        )
+        return self
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the latest change"""
+        return self._sequence
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(self, keys: Iterable[str], op: int) -> None:
+        """
+        Journal writes or deletes of keys
+
+        Args:
+            keys: Changed keys
+            op: OP_PUT or OP_DELETE
+        """
+        with self._lock:
+            changes = []
+            for key in keys:
+                self._sequence += 1
+                change = Change(self._sequence, key, op)
+                self._pending[key] = change
+                changes.append(change)
+            self._append(changes)
+            # Overwrites supersede records even while nothing is ever acknowledged
+            self._maybe_compact()
+
+    def pending(self, keys: Optional[Iterable[str]] = None) -> List[Change]:
+        """
+        Unacknowledged changes in sequence order
+
+        Args:
+            keys: Restrict to these keys
+
+        Returns:
+            Latest change per dirty key
+        """
+        with self._lock:
+            if keys is None:
+                changes = list(self._pending.values())
+            else:
+                changes = [self._pending[key] for key in keys if key in self._pending]
+        return sorted(changes, key=lambda change: change.sequence)
+
+    def submit_sync(self, durability: Durability) -> Future:
+        """
+        Schedule a sync of every record appended so far
+
+        Args:
+            durability: SYNC or GROUP; BUFFERED needs no barrier
+
+        Returns:
+            Future resolving once those records are on stable storage
+        """
+        if durability == Durability.BUFFERED or self._committer is None:
+            future: Future = Future()
+            future.set_result(None)
+            return future
+        return self._committer.request(durability)
+
+    def acknowledge(self, changes: Sequence[Change]) -> List[Change]:
+        """
+        Mark changes as uploaded
+
+        A change superseded by a newer write stays pending. Changes are
+        matched by sequence, so one shipped with a different op than it
+        was journaled with is still acknowledged.
+
+        Args:
+            changes: Uploaded changes
+
+        Returns:
+            The changes that were still current and are now clean
+        """
+        with self._lock:
+            acked = []
+            for change in changes:
+                current = self._pending.get(change.key)
+                if current is not None and current.sequence == change.sequence:
+                    acked.append(change)
+            for change in acked:
+                del self._pending[change.key]
+            self._append([Change(change.sequence, change.key, OP_ACK) for change in acked])
+            self._maybe_compact()
+        return acked
+
+    def close(self) -> None:
+        """Flush and close the journal file"""
+        if self._committer is not None:
+            self._committer.close()
+            self._committer = None
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+    def _replay(self, change: Change) -> None:
+        self._sequence = max(self._sequence, change.sequence)
+        self._records += 1
+        if change.op == OP_ACK:
+            current = self._pending.get(change.key)
+            if current is not None and current.sequence == change.sequence:
+                del self._pending[change.key]
+        else:
+            self._pending[change.key] = change
+
+    def _append(self, changes: List[Change]) -> None:
+        """Write records; caller holds the lock"""
+        self._records += len(changes)
+        if self._file is None or not changes:
+            return
+        self._file.write(b"".join(self._encode(change) for change in changes))
+        self._file.flush()
+        if self._committer is not None:
+            self._committer.mark_dirty()
+
+    def _sync(self) -> None:
+        """Force appended records to stable storage"""
+        with self._lock:
+            if self._file is None:
+                return
+            # A duplicate descriptor stays valid if a compaction swaps the file meanwhile
+            fd = os.dup(self._file.fileno())
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _maybe_compact(self) -> None:
+        """Compact once dead records dominate the file; caller holds the lock"""
+        if self._records > 2 * len(self._pending) + _COMPACT_SLACK:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the journal with only pending changes; caller holds the lock"""
+        if self._file is None:
+            self._records = len(self._pending)
+            return
+        journal = self.path / JOURNAL_FILENAME
+        tmp = journal.with_name(JOURNAL_FILENAME + ".tmp")
+        changes = sorted(self._pending.values(), key=lambda change: change.sequence)
+        # Keep the sequence high-water mark even when nothing is pending
+        marker = [] if changes else [Change(self._sequence, "", OP_ACK)]
+        with open(tmp, "wb") as f:
+            f.write(b"".join(self._encode(change) for change in marker + changes))
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp, journal)
+        self._file = open(journal, "ab")
+        self._records = len(marker) + len(changes)
+
+    @staticmethod
+    def _encode(change: Change) -> bytes:
+        key = change.key.encode("utf-8")
+        return _RECORD.pack(change.sequence, change.op, len(key)) + key
+
+
+@dataclass
+class SyncItem:
+    """A value as shipped to the remote"""
+    key: str
+    payload: bytes
+    metadata: Dict[str, Any]
+
+
+class CloudRemote:
+    """
+    Interface to a cloud replica.
+
+    Implementations must be idempotent: a batch may be retried after a
+    partial failure.
+    """
+
+    async def put_many(self, items: List[SyncItem]) -> None:
+        """Upload a batch of values"""
+        raise NotImplementedError
+
+    async def delete_many(self, keys: List[str]) -> None:
+        """Remove a batch of keys"""
+        raise NotImplementedError
+
+
+class LocalDirectoryRemote(CloudRemote):
+    """
+    Remote backed by a local directory, for tests and air-gapped mirrors.
+
+    Each key becomes a payload file plus a JSON metadata sidecar.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initialize the remote
+
+        Args:
+            path: Directory standing in for the cloud bucket
+        """
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.batches = 0
+
+    def object_path(self, key: str) -> Path:
+        """Location of a key's payload"""
+        return self.path / quote(key, safe="")
+
+    async def put_many(self, items: List[SyncItem]) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self._put_many, items)
+        self.batches += 1
+
+    async def delete_many(self, keys: List[str]) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self._delete_many, keys)
+        self.batches += 1
+
+    def _put_many(self, items: List[SyncItem]) -> None:
+        for item in items:
+            target = self.object_path(item.key)
+            target.write_bytes(item.payload)
+            target.with_name(target.name + ".meta.json").write_text(json.dumps(item.metadata))
+
+    def _delete_many(self, keys: List[str]) -> None:
+        for key in keys:
+            target = self.object_path(key)
+            for path in (target, target.with_name(target.name + ".meta.json")):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+def plan_batches(
+    changes: Sequence[Change],
+    sizes: Dict[str, int],
+    max_batch_bytes: int,
+    max_batch_items: int
+) -> List[Tuple[int, List[Change]]]:
+    """
+    Group changes into size-bounded upload batches
+
+    Puts and deletes go in separate batches. A single value larger than
+    max_batch_bytes gets a batch of its own.
+
+    Args:
+        changes: Changes in sequence order
+        sizes: Stored size per key for puts
+        max_batch_bytes: Payload budget per batch
+        max_batch_items: Maximum changes per batch
+
+    Returns:
+        List of (op, changes) batches
+    """
+    batches: List[Tuple[int, List[Change]]] = []
+    current: Dict[int, Tuple[List[Change], int]] = {}
+    for change in changes:
+        size = sizes.get(change.key, 0) if change.op == OP_PUT else 0
+        batch, used = current.get(change.op, ([], 0))
+        if batch and (used + size > max_batch_bytes or len(batch) >= max_batch_items):
+            batches.append((change.op, batch))
+            batch, used = [], 0
+        batch.append(change)
+        current[change.op] = (batch, used + size)
+    for op, (batch, _) in current.items():
+        if batch:
+            batches.append((op, batch))
+    return batches
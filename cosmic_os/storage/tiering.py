@@ -0,0 +1,591 @@
+"""
+Storage Tiering
+===============
+
+Engine composing three tiers behind the TIERED backend:
+
+- hot: stored bytes of recently accessed keys, in memory, within a byte budget
+- warm: the primary engine, holding the working set
+- cold: an archive engine holding rarely touched values, recompressed
+  with a strong codec
+
+Every key lives in exactly one of warm and cold; hot only ever holds
+copies. A maintenance thread demotes the least recently accessed keys
+from warm to cold once the warm tier exceeds its byte budget, or once a
+key has gone untouched for cold_after seconds. A key read repeatedly
+from cold is promoted back to warm.
+
+Archiving is invisible above the engine: a cold key keeps its metadata,
+and reads return exactly the bytes that were written to warm. Since most
+values are encrypted and ciphertext does not compress, the engine is
+given the functions that open and seal a value, and archives the
+compressed plaintext sealed again under the same key.
+
+Moves copy before they delete, so a crash in between leaves a key in
+both tiers; recovery keeps the warm copy, which is never older.
+"""
+
+from typing import Dict, List, Optional, Any, Callable, Iterable, Iterator, Sequence, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timezone
+import heapq
+import itertools
+import threading
+import time
+
+from .codecs import CompressionPolicy, decompress
+from .durability import Durability
+from .engine import EngineSnapshot, StorageEngine
+from .metadata import StorageMetadata, SyncStatus, MetadataStore, merge_summaries
+
+
+Cipher = Callable[[str, bytes], bytes]
+
+_MOVE_BATCH = 256
+
+
+@dataclass
+class TierPolicy:
+    """Budgets and thresholds of the TIERED backend"""
+    hot_max_bytes: int = 64 * 1024 * 1024
+    warm_max_bytes: Optional[int] = None  # Bytes kept warm; None leaves size unbounded
+    cold_after: Optional[float] = None  # Idle seconds after which a key is archived
+    promote_after: int = 2  # Cold reads that bring a key back to warm
+    archive_codec: str = "lzma"
+    archive_min_bytes: int = 64
+    rebalance_interval: float = 30.0
+
+
+class TieredMetadataStore(MetadataStore):
+    """Union of the warm and cold metadata stores, whose keys are disjoint"""
+
+    def __init__(self, warm: MetadataStore, cold: MetadataStore):
+        """
+        Initialize the union
+
+        Args:
+            warm: Metadata of the primary engine
+            cold: Metadata of the archive engine
+        """
+        self.warm = warm
+        self.cold = cold
+
+    def get(self, key: str) -> Optional[StorageMetadata]:
+        """Metadata for a key from whichever tier holds it"""
+        metadata = self.warm.get(key)
+        return metadata if metadata is not None else self.cold.get(key)
+
+    def __len__(self) -> int:
+        return len(self.warm) + len(self.cold)
+
+    def iter_keys(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[str]:
+        """Merged range scan over both tiers"""
+        return heapq.merge(
+            self.warm.iter_keys(prefix, start_after), self.cold.iter_keys(prefix, start_after)
+        )
+
+    def values(self) -> Iterator[StorageMetadata]:
+        """Metadata of every key in both tiers"""
+        return itertools.chain(self.warm.values(), self.cold.values())
+
+    def summary(self) -> Dict[str, Any]:
+        """Sum of the tiers' aggregate counts"""
+        return merge_summaries(self.warm.summary(), self.cold.summary())
+
+    def set_sync_status(self, keys: Iterable[str], status: SyncStatus) -> None:
+        """Update sync status in the tier holding each key"""
+        keys = list(keys)
+        self.warm.set_sync_status([key for key in keys if self.warm.get(key) is not None], status)
+        self.cold.set_sync_status([key for key in keys if self.cold.get(key) is not None], status)
+
+
+class _HotTier:
+    """Byte-bounded LRU of stored values"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        self.discard(key)
+        if len(value) > self.max_bytes:
+            return
+        self._entries[key] = value
+        self.current_bytes += len(value)
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= len(evicted)
+
+    def discard(self, key: str) -> None:
+        value = self._entries.pop(key, None)
+        if value is not None:
+            self.current_bytes -= len(value)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _ArchiveFormat:
+    """
+    Encoding of archived values: one length byte, the archive codec name
+    (empty if left uncompressed), then the body, sealed again if the
+    value is encrypted.
+    """
+
+    def __init__(self, policy: TierPolicy, unseal: Optional[Cipher], seal: Optional[Cipher]):
+        self.compression = CompressionPolicy(policy.archive_codec, policy.archive_min_bytes)
+        self.unseal = unseal
+        self.seal = seal
+
+    def pack(self, key: str, value: bytes, metadata: StorageMetadata) -> bytes:
+        """Encode a warm value for the archive"""
+        sealed = metadata.encrypted and not metadata.deduplicated
+        body, codec = value, None
+        # Values compressed on write would not shrink any further
+        if metadata.codec is None and (not sealed or self.unseal is not None):
+            plaintext = self.unseal(key, value) if sealed else value
+            compressed, codec = self.compression.compress(plaintext)
+            if codec is not None:
+                body = self.seal(key, compressed) if sealed else compressed
+        name = (codec or "").encode("ascii")
+        return bytes([len(name)]) + name + bytes(body)
+
+    def unpack(self, key: str, packed: bytes, metadata: StorageMetadata) -> bytes:
+        """Restore the warm value from its archived encoding"""
+        end = 1 + packed[0]
+        codec = bytes(packed[1:end]).decode("ascii") or None
+        body = bytes(packed[end:])
+        if codec is None:
+            return body
+        sealed = metadata.encrypted and not metadata.deduplicated
+        plaintext = decompress(self.unseal(key, body) if sealed else body, codec)
+        return self.seal(key, plaintext) if sealed else plaintext
+
+
+class TieredEngine(StorageEngine):
+    """
+    Hot/warm/cold engine with access-driven promotion and demotion.
+
+    Writes and tier moves exclude each other on one lock, so a move never
+    interleaves with a write of the same key, while reads go lock-free:
+    they look in hot, then warm, then cold, then warm again, which finds
+    a key even while it is being moved in either direction.
+    """
+
+    def __init__(
+        self,
+        warm: StorageEngine,
+        cold: StorageEngine,
+        policy: Optional[TierPolicy] = None,
+        unseal: Optional[Cipher] = None,
+        seal: Optional[Cipher] = None,
+        read_only: bool = False
+    ):
+        """
+        Initialize the tiered engine
+
+        Args:
+            warm: Primary engine
+            cold: Archive engine
+            policy: Tier budgets and thresholds
+            unseal: Decrypts the stored value of an encrypted key (encrypted
+                values are archived without recompression if omitted)
+            seal: Encrypts a payload for a key, reversing unseal
+            read_only: Serve reads only; no tier moves are made
+        """
+        self.warm = warm
+        self.cold = cold
+        self.policy = policy or TierPolicy()
+        self.read_only = read_only
+        self.promotions = 0
+        self.demotions = 0
+
+        self._archive = _ArchiveFormat(self.policy, unseal, seal)
+        self._lock = threading.RLock()
+        self._hot = _HotTier(self.policy.hot_max_bytes)
+        self._hot_lock = threading.Lock()
+        self._generation = 0
+        self._last_access: Dict[str, float] = {}
+        self._cold_reads: Dict[str, int] = {}
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tier-writer")
+        self._closing = threading.Event()
+        self._maintenance: Optional[threading.Thread] = None
+
+    def recover(self) -> MetadataStore:
+        """Recover both tiers, settle interrupted moves and start maintenance"""
+        self.metadata = TieredMetadataStore(self.warm.recover(), self.cold.recover())
+        if self.read_only:
+            return self.metadata
+
+        duplicated = [
+            key for key in self.cold.metadata.iter_keys()
+            if self.warm.metadata.get(key) is not None
+        ]
+        if duplicated:
+            self.cold.delete_many(duplicated)
+        self._maintenance = threading.Thread(
+            target=self._maintenance_loop, name="tier-maintenance", daemon=True
+        )
+        self._maintenance.start()
+        return self.metadata
+
+    def put(self, key: str, value: bytes, metadata: StorageMetadata) -> int:
+        """Store one value in the warm tier"""
+        return self.put_many([(key, value, metadata)])[0]
+
+    def put_many(self, items: Sequence[Tuple[str, bytes, StorageMetadata]]) -> List[int]:
+        """Store values in the warm tier, dropping archived copies they replace"""
+        self._check_writable()
+        with self._lock:
+            sequences = self.warm.put_many(items)
+            archived = [key for key, _, _ in items if self.cold.metadata.get(key) is not None]
+            if archived:
+                self.cold.delete_many(archived)
+            now = time.time()
+            with self._hot_lock:
+                self._generation += 1
+                for key, value, _ in items:
+                    self._hot.put(key, bytes(value))
+                    self._last_access[key] = now
+                    self._cold_reads.pop(key, None)
+        return sequences
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Fetch a value from the first tier holding it"""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Fetch values tier by tier, promoting keys read often from cold"""
+        values: List[Optional[bytes]] = [None] * len(keys)
+        with self._hot_lock:
+            generation = self._generation
+            for i, key in enumerate(keys):
+                values[i] = self._hot.get(key)
+        missing = [i for i, value in enumerate(values) if value is None]
+
+        cold_hits = []
+        for engine in (self.warm, self.cold, self.warm):
+            if not missing:
+                break
+            fetched = engine.get_many([keys[i] for i in missing])
+            for i, value in zip(missing, fetched):
+                if value is not None and engine is self.cold:
+                    metadata = self.cold.metadata.get(keys[i])
+                    if metadata is None:
+                        continue  # Promoted since the read; found in warm next
+                    value = self._archive.unpack(keys[i], value, metadata)
+                    cold_hits.append(keys[i])
+                values[i] = value
+            missing = [i for i in missing if values[i] is None]
+
+        self._record_access(keys, values, generation, cold_hits)
+        return values
+
+    def get_view(self, key: str) -> Optional[memoryview]:
+        """View a hot value in memory, or a warm value in place"""
+        with self._hot_lock:
+            value = self._hot.get(key)
+        if value is None:
+            view = self.warm.get_view(key)
+            if view is not None:
+                return view
+            value = self.get(key)
+            if value is None:
+                return None
+        return memoryview(value).toreadonly()
+
+    def delete(self, key: str) -> bool:
+        """Remove a key from every tier"""
+        return self.delete_many([key])[0]
+
+    def delete_many(self, keys: Sequence[str]) -> List[bool]:
+        """Remove keys from every tier"""
+        self._check_writable()
+        with self._lock:
+            warm = self.warm.delete_many(keys)
+            cold = self.cold.delete_many(keys)
+            with self._hot_lock:
+                self._generation += 1
+                for key in keys:
+                    self._hot.discard(key)
+                    self._last_access.pop(key, None)
+                    self._cold_reads.pop(key, None)
+        return [a or b for a, b in zip(warm, cold)]
+
+    def delete_prefix(self, prefix: str) -> List[str]:
+        """Remove a key range from every tier, each dropping it its own fastest way"""
+        self._check_writable()
+        with self._lock:
+            removed = set(self.warm.delete_prefix(prefix))
+            removed.update(self.cold.delete_prefix(prefix))
+            with self._hot_lock:
+                self._generation += 1
+                for key in removed:
+                    self._hot.discard(key)
+                    self._last_access.pop(key, None)
+                    self._cold_reads.pop(key, None)
+        return sorted(removed)
+
+    def submit_put(self, key: str, value: bytes, metadata: StorageMetadata) -> Future:
+        return self._writer.submit(self.put, key, value, metadata)
+
+    def submit_delete(self, key: str) -> Future:
+        return self._writer.submit(self.delete, key)
+
+    def submit_put_many(self, items: Sequence[Tuple[str, bytes, StorageMetadata]]) -> Future:
+        return self._writer.submit(self.put_many, items)
+
+    def submit_delete_many(self, keys: Sequence[str]) -> Future:
+        return self._writer.submit(self.delete_many, keys)
+
+    def submit_delete_prefix(self, prefix: str) -> Future:
+        return self._writer.submit(self.delete_prefix, prefix)
+
+    def submit_sync(self, durability: Durability) -> Future:
+        """Sync both tiers after queued writes"""
+        return self._writer.submit(self._sync, durability)
+
+    def snapshot(self) -> EngineSnapshot:
+        """Pin both tiers together, between two writes or moves"""
+        with self._lock:
+            warm = self.warm.snapshot()
+            try:
+                return _TieredSnapshot(warm, self.cold.snapshot(), self._archive)
+            except Exception:
+                warm.close()
+                raise
+
+    def refresh(self) -> Optional[List[str]]:
+        """Catch up both tiers with another process's writes and moves"""
+        warm, cold = self.warm.refresh(), self.cold.refresh()
+        with self._hot_lock:
+            self._generation += 1
+            if warm is None or cold is None:
+                self._hot.clear()
+                return None
+            for key in warm + cold:
+                self._hot.discard(key)
+        return warm + cold
+
+    def rebalance(self) -> Dict[str, int]:
+        """
+        Demote keys now instead of waiting for the maintenance thread
+
+        Returns:
+            Dict with the number of keys demoted and their bytes before and after
+        """
+        self._check_writable()
+        return self._demote()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-tier statistics"""
+        with self._hot_lock:
+            hot = {
+                "keys": len(self._hot),
+                "bytes": self._hot.current_bytes,
+                "max_bytes": self._hot.max_bytes,
+                "hits": self._hot.hits,
+                "misses": self._hot.misses
+            }
+        warm, cold = self.warm.metadata.summary(), self.cold.metadata.summary()
+        warm_stats = self.warm.stats()
+        return {
+            "engine": "tiered",
+            "syncs": warm_stats.get("syncs", 0),
+            "hot": hot,
+            "warm": {
+                "keys": warm["total_items"],
+                "bytes": warm["total_size_bytes"],
+                "max_bytes": self.policy.warm_max_bytes,
+                "engine": warm_stats
+            },
+            "cold": {
+                "keys": cold["total_items"],
+                "bytes": cold["total_size_bytes"],
+                "engine": self.cold.stats()
+            },
+            "promotions": self.promotions,
+            "demotions": self.demotions
+        }
+
+    def close(self) -> None:
+        """Stop maintenance, drain writes and close both tiers"""
+        self._closing.set()
+        if self._maintenance is not None:
+            self._maintenance.join()
+            self._maintenance = None
+        self._writer.shutdown(wait=True)
+        self.warm.close()
+        self.cold.close()
+
+    def _record_access(
+        self,
+        keys: Sequence[str],
+        values: Sequence[Optional[bytes]],
+        generation: int,
+        cold_hits: List[str]
+    ) -> None:
+        """Note reads, admit values to hot and schedule promotions"""
+        now = time.time()
+        promote = []
+        with self._hot_lock:
+            # A write or move since the read started may have made the values stale
+            admit = generation == self._generation
+            for key, value in zip(keys, values):
+                if value is not None:
+                    self._last_access[key] = now
+                    if admit:
+                        self._hot.put(key, bytes(value))
+            for key in cold_hits:
+                reads = self._cold_reads.get(key, 0) + 1
+                self._cold_reads[key] = reads
+                if reads >= self.policy.promote_after:
+                    promote.append(key)
+        if promote and not self.read_only and not self._closing.is_set():
+            try:
+                self._writer.submit(self._promote, promote)
+            except RuntimeError:
+                pass  # Closing; the keys stay cold
+
+    def _promote(self, keys: List[str]) -> None:
+        """Move keys from cold back to warm"""
+        with self._lock:
+            keys = [key for key in keys if self.cold.metadata.get(key) is not None]
+            items = []
+            for key, packed in zip(keys, self.cold.get_many(keys)):
+                metadata = self.cold.metadata.get(key)
+                if packed is not None:
+                    items.append((key, self._archive.unpack(key, packed, metadata), metadata))
+            if not items:
+                return
+            self.warm.put_many(items)
+            self.cold.delete_many([key for key, _, _ in items])
+            with self._hot_lock:
+                self._generation += 1
+                for key, _, _ in items:
+                    self._cold_reads.pop(key, None)
+            self.promotions += len(items)
+
+    def _demote(self) -> Dict[str, int]:
+        """Archive the least recently used warm keys that are over budget or idle"""
+        policy = self.policy
+        now = time.time()
+        with self._lock:
+            records = list(self.warm.metadata.values())
+        with self._hot_lock:
+            last_access = dict(self._last_access)
+
+        candidates = []
+        warm_bytes = 0
+        for metadata in records:
+            warm_bytes += metadata.size_bytes
+            if metadata.deduplicated:
+                continue  # Manifests are tiny; their chunks are shared
+            accessed = last_access.get(metadata.key)
+            if accessed is None:
+                accessed = metadata.updated_at.replace(tzinfo=timezone.utc).timestamp()
+            candidates.append((accessed, metadata.key, metadata.size_bytes))
+        candidates.sort()
+
+        excess = warm_bytes - policy.warm_max_bytes if policy.warm_max_bytes is not None else 0
+        chosen = []
+        for accessed, key, size in candidates:
+            idle = policy.cold_after is not None and now - accessed >= policy.cold_after
+            if excess <= 0 and not idle:
+                break
+            chosen.append(key)
+            excess -= size
+
+        result = {"demoted": 0, "bytes_before": 0, "bytes_after": 0}
+        for start in range(0, len(chosen), _MOVE_BATCH):
+            if self._closing.is_set():
+                break
+            demoted, before, after = self._move_to_archive(chosen[start:start + _MOVE_BATCH])
+            result["demoted"] += demoted
+            result["bytes_before"] += before
+            result["bytes_after"] += after
+        return result
+
+    def _move_to_archive(self, keys: List[str]) -> Tuple[int, int, int]:
+        """Archive warm values, then drop them from warm"""
+        with self._lock:
+            items = []
+            before = 0
+            for key, value in zip(keys, self.warm.get_many(keys)):
+                metadata = self.warm.metadata.get(key)
+                if value is None or metadata is None:
+                    continue
+                before += len(value)
+                items.append((key, self._archive.pack(key, value, metadata), metadata))
+            if not items:
+                return 0, 0, 0
+            self.cold.put_many(items)
+            self.warm.delete_many([key for key, _, _ in items])
+            with self._hot_lock:
+                self._generation += 1
+                for key, _, _ in items:
+                    self._hot.discard(key)
+            self.demotions += len(items)
+        return len(items), before, sum(len(packed) for _, packed, _ in items)
+
+    def _maintenance_loop(self) -> None:
+        """Background thread body: demote on a fixed interval"""
+        while not self._closing.wait(self.policy.rebalance_interval):
+            self._demote()
+
+    def _sync(self, durability: Durability) -> None:
+        self.warm.submit_sync(durability).result()
+        self.cold.submit_sync(durability).result()
+
+    def _check_writable(self) -> None:
+        """Refuse mutations on a read-only engine"""
+        if self.read_only:
+            raise PermissionError("Tiered engine is open read-only")
+
+
+class _TieredSnapshot(EngineSnapshot):
+    """Snapshots of both tiers taken together"""
+
+    def __init__(self, warm: EngineSnapshot, cold: EngineSnapshot, archive: _ArchiveFormat):
+        self.metadata = TieredMetadataStore(warm.metadata, cold.metadata)
+        self.sequence = warm.sequence
+        self._warm = warm
+        self._cold = cold
+        self._archive = archive
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Value of a key as of the snapshot"""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Values as of the snapshot from whichever tier held them"""
+        values = self._warm.get_many(keys)
+        missing = [i for i, value in enumerate(values) if value is None]
+        for i, packed in zip(missing, self._cold.get_many([keys[i] for i in missing])):
+            if packed is not None:
+                metadata = self._cold.metadata.get(keys[i])
+                values[i] = self._archive.unpack(keys[i], packed, metadata)
+        return values
+
+    def close(self) -> None:
+        """Release both snapshots"""
+        self._warm.close()
+        self._cold.close()
@@ -0,0 +1,117 @@
+"""
+Tests for the content-addressed deduplicated blob store
+"""
+
+import pytest
+from pathlib import Path
+import os
+import tempfile
+from cosmic_os.storage import LocalFirstStorage, StorageBackend
+from cosmic_os.storage.blob_store import parse_manifest
+
+
+DOCUMENT = {"title": "Organic bloom", "body": os.urandom(100_000).hex()}
+
+
+@pytest.mark.parametrize("backend", [
+    StorageBackend.MEMORY, StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB
+])
+class TestDeduplication:
+    """Test suite for deduplicated storage"""
+
+    def open_storage(self, backend, path=None):
+        self.path = path or Path(tempfile.mkdtemp())
+        return LocalFirstStorage(storage_path=self.path, backend=backend, deduplicate=True)
+
+    @pytest.mark.asyncio
+    async def test_identical_payloads_are_stored_once(self, backend):
+        """Test duplicates cost only a manifest"""
+        storage = self.open_storage(backend)
+        for peer in range(5):
+            await storage.write(key=f"peer/{peer}/doc", data=DOCUMENT)
+
+        stats = (await storage.get_storage_stats())["dedup"]
+        assert stats["dedup_ratio"] == pytest.approx(5.0)
+        assert stats["stored_bytes"] * 5 == stats["logical_bytes"]
+        assert await storage.read("peer/3/doc") == DOCUMENT
+        assert (await storage.read_many(["peer/0/doc"]))["peer/0/doc"] == DOCUMENT
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_delete_and_overwrite_collect_chunks(self, backend):
+        """Test chunks are reclaimed once the last reference goes"""
+        storage = self.open_storage(backend)
+        await storage.write(key="a", data=DOCUMENT)
+        await storage.write(key="b", data=DOCUMENT)
+        chunks = storage.blobs.stats()["chunks"]
+
+        await storage.delete("a")
+        assert storage.blobs.stats()["chunks"] == chunks
+        await storage.write(key="b", data="replaced")
+        assert storage.blobs.stats()["chunks"] == 1
+        assert storage.blobs.stats()["stored_bytes"] == len(b'"replaced"')
+        await storage.delete_many(["b"])
+        assert storage.blobs.stats()["chunks"] == 0
+        assert storage.blobs.engine.metadata.keys("c/*") == []
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_raw_read_returns_manifest(self, backend):
+        """Test decrypt=False exposes the manifest, never plaintext"""
+        storage = self.open_storage(backend)
+        await storage.write(key="a", data=DOCUMENT)
+
+        encrypted, total, ids = parse_manifest(await storage.read("a", decrypt=False))
+        assert encrypted is True
+        assert len(ids) == -(-total // storage.blobs.chunk_size)
+        await storage.close()
+
+
+class TestDeduplicationPersistence:
+    """Test deduplicated stores across restarts"""
+
+    @pytest.mark.parametrize("backend", [StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB])
+    @pytest.mark.asyncio
+    async def test_restart_keeps_counts_and_values(self, backend):
+        """Test reference counts and totals survive a restart"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(storage_path=path, backend=backend, deduplicate=True)
+        await storage.write_many((f"k{i}", DOCUMENT) for i in range(3))
+        await storage.close()
+
+        # Existing deduplicated values stay readable with deduplication off
+        reopened = LocalFirstStorage(storage_path=path, backend=backend)
+        assert await reopened.read("k2") == DOCUMENT
+        assert (await reopened.get_storage_stats())["dedup"]["dedup_ratio"] == pytest.approx(3.0)
+        await reopened.write(key="k0", data="plain")
+        await reopened.delete_many(["k1", "k2"])
+        assert reopened.blobs.stats()["chunks"] == 0
+        assert not (await reopened.get_metadata("k0")).deduplicated
+        await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_plaintext_never_reaches_disk(self):
+        """Test chunks are encrypted at rest"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(storage_path=path, deduplicate=True)
+        await storage.write(key="secret", data="plaintext-marker")
+        await storage.close()
+
+        for segment in path.rglob("*.seg"):
+            assert b"plaintext-marker" not in segment.read_bytes()
+
+    @pytest.mark.asyncio
+    async def test_collect_garbage_reclaims_leaked_chunks(self):
+        """Test a chunk orphaned by a crash is reclaimed"""
+        storage = LocalFirstStorage(
+            storage_path=Path(tempfile.mkdtemp()), backend=StorageBackend.MEMORY, deduplicate=True
+        )
+        await storage.write(key="kept", data=DOCUMENT)
+        # Simulate a crash after the chunks were written but before the manifest
+        storage.blobs.store_many([(b"orphan" * 100, True)])
+
+        result = storage.engine.collect_garbage()
+
+        assert result == {"chunks_reclaimed": 1, "bytes_reclaimed": 600}
+        assert storage.blobs.stats()["dedup_ratio"] == pytest.approx(1.0)
+        assert await storage.read("kept") == DOCUMENT
@@ -0,0 +1,136 @@
+"""
+Tests for the compression stage of the storage write path
+"""
+
+import pytest
+from pathlib import Path
+import json
+import os
+import tempfile
+import zlib
+from cosmic_os.storage import LocalFirstStorage, StorageBackend
+from cosmic_os.storage.codecs import Codec, CompressionPolicy, decompress, get_codec
+
+
+ENTRY = {"title": "Organic bloom", "body": "knowledge flows between nodes " * 200}
+
+
+class ReversedZlibCodec(Codec):
+    """A custom codec, registered on first use"""
+
+    name = "reversed-zlib"
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data)[::-1]
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data[::-1])
+
+
+class TestCompressionPolicy:
+    """Test suite for per-value compression decisions"""
+
+    def test_small_and_incompressible_values_stay_raw(self):
+        """Test the size and ratio thresholds"""
+        policy = CompressionPolicy("zlib", min_bytes=64)
+
+        assert policy.compress(b"a" * 63) == (b"a" * 63, None)
+        noise = os.urandom(4096)
+        assert policy.compress(noise) == (noise, None)
+        compressed, codec = policy.compress(b"a" * 4096)
+        assert codec == "zlib"
+        assert decompress(compressed, codec) == b"a" * 4096
+
+    def test_custom_codec_is_registered(self):
+        """Test pluggable codecs become readable by name"""
+        policy = CompressionPolicy(ReversedZlibCodec())
+
+        compressed, codec = policy.compress(b"b" * 1024)
+        assert get_codec("reversed-zlib") is policy.codec
+        assert decompress(compressed, codec) == b"b" * 1024
+
+    def test_unknown_codec_rejected(self):
+        """Test reading a value written with an unavailable codec fails loudly"""
+        with pytest.raises(ValueError):
+            decompress(b"", "snappy")
+
+
+@pytest.mark.parametrize("backend", [
+    StorageBackend.MEMORY, StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB
+])
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+class TestCompressedStorage:
+    """Test compressed values on every backend"""
+
+    @pytest.mark.asyncio
+    async def test_round_trip_records_codec(self, backend, codec):
+        """Test values are compressed before encryption and restored on read"""
+        storage = LocalFirstStorage(
+            storage_path=Path(tempfile.mkdtemp()), backend=backend, compression=codec
+        )
+        metadata = await storage.write(key="entry", data=ENTRY)
+        small = await storage.write(key="small", data="tiny")
+
+        assert metadata.codec == codec
+        assert metadata.size_bytes < len(json.dumps(ENTRY)) // 4
+        assert small.codec is None
+        assert await storage.read("entry") == ENTRY
+        assert (await storage.get_metadata("entry")).codec == codec
+        await storage.close()
+
+
+class TestCompressionPersistence:
+    """Test codec metadata across restarts and other read paths"""
+
+    @pytest.mark.parametrize("backend", [StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB])
+    @pytest.mark.asyncio
+    async def test_codec_survives_restart_without_compression(self, backend):
+        """Test old compressed values stay readable when compression is turned off"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(storage_path=path, backend=backend, compression="lzma")
+        await storage.write(key="entry", data=ENTRY)
+        await storage.close()
+
+        reopened = LocalFirstStorage(storage_path=path, backend=backend)
+        assert (await reopened.get_metadata("entry")).codec == "lzma"
+        assert await reopened.read("entry") == ENTRY
+        await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_sealed_cache_keeps_codec(self):
+        """Test sealed cache entries are decompressed on every hit"""
+        storage = LocalFirstStorage(
+            storage_path=Path(tempfile.mkdtemp()),
+            compression="zlib",
+            cache_max_bytes=1 << 20,
+            cache_plaintext=False
+        )
+        await storage.write(key="a", data=ENTRY)
+
+        assert await storage.read("a") == ENTRY
+        assert storage.cache.get("a").codec == "zlib"
+        assert await storage.read("a") == ENTRY
+        assert storage.cache.stats()["hits"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_compressed_values_still_deduplicate(self):
+        """Test deterministic compression keeps identical payloads identical"""
+        storage = LocalFirstStorage(
+            storage_path=Path(tempfile.mkdtemp()), compression="zlib", deduplicate=True
+        )
+        await storage.write(key="a", data=ENTRY)
+        await storage.write(key="b", data=ENTRY)
+
+        assert await storage.read("b") == ENTRY
+        assert storage.blobs.stats()["dedup_ratio"] == pytest.approx(2.0)
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_export_contains_uncompressed_values(self):
+        """Test exports never leak the internal codec"""
+        storage = LocalFirstStorage(storage_path=Path(tempfile.mkdtemp()), compression="zlib")
+        await storage.write(key="entry", data=ENTRY)
+
+        path = await storage.export_all(storage.storage_path / "export.jsonl")
+
+        assert json.loads(path.read_text())["value"] == ENTRY
@@ -0,0 +1,101 @@
+"""
+Tests for write durability modes
+"""
+
+import pytest
+from pathlib import Path
+import asyncio
+import tempfile
+import threading
+import time
+from cosmic_os.storage import LocalFirstStorage, StorageBackend, Durability
+from cosmic_os.storage.durability import GroupCommitter
+
+
+class TestGroupCommitter:
+    """Test suite for the group commit scheduler"""
+
+    def test_group_requests_share_syncs(self):
+        """Test many concurrent GROUP waiters are served by a few syncs"""
+        committer = GroupCommitter(lambda: time.sleep(0.002), interval=0.02)
+        futures = []
+
+        def request():
+            futures.append(committer.request(Durability.GROUP))
+
+        threads = [threading.Thread(target=request) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for future in futures:
+            future.result(timeout=5)
+        committer.close()
+
+        assert committer.syncs < 10
+
+    def test_sync_requests_skip_the_tick(self):
+        """Test SYNC requests do not wait for the commit interval"""
+        committer = GroupCommitter(lambda: None, interval=30)
+        committer.request(Durability.GROUP).result(timeout=5)
+
+        start = time.monotonic()
+        committer.request(Durability.SYNC).result(timeout=5)
+        assert time.monotonic() - start < 1
+        committer.close()
+
+    def test_buffered_writes_are_flushed_in_background(self):
+        """Test dirty state is synced within the flush interval"""
+        committer = GroupCommitter(lambda: None, interval=0, flush_interval=0.05)
+        committer.mark_dirty()
+        time.sleep(0.3)
+
+        assert committer.syncs == 1
+        committer.close()
+
+    def test_sync_failure_reaches_waiters(self):
+        """Test a failed sync is reported to every waiting writer"""
+        def fail():
+            raise OSError("disk gone")
+
+        committer = GroupCommitter(fail, interval=0)
+        with pytest.raises(OSError):
+            committer.request(Durability.SYNC).result(timeout=5)
+        committer.close()
+
+
+class TestStorageDurability:
+    """Test suite for durability modes on LocalFirstStorage"""
+
+    @pytest.mark.parametrize("backend", [StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB])
+    @pytest.mark.asyncio
+    async def test_modes_per_instance_and_per_call(self, backend):
+        """Test buffered writes skip syncs and per-call modes override the default"""
+        storage = LocalFirstStorage(
+            storage_path=Path(tempfile.mkdtemp()),
+            backend=backend,
+            durability=Durability.BUFFERED
+        )
+        await storage.write_many((f"bulk/{i}", i) for i in range(100))
+        assert storage.engine.stats()["syncs"] == 0
+
+        await storage.write(key="governance/vote", data={"yes": 3}, durability="sync")
+        assert storage.engine.stats()["syncs"] == 1
+        assert await storage.read("governance/vote") == {"yes": 3}
+        await storage.close()
+
+    @pytest.mark.parametrize("backend", [StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB])
+    @pytest.mark.asyncio
+    async def test_concurrent_group_writes_share_syncs(self, backend):
+        """Test concurrent writers under GROUP durability share syncs"""
+        storage = LocalFirstStorage(
+            storage_path=Path(tempfile.mkdtemp()),
+            backend=backend,
+            durability=Durability.GROUP,
+            group_commit_ms=20
+        )
+
+        await asyncio.gather(*(storage.write(key=f"k{i}", data=i) for i in range(100)))
+
+        assert 1 <= storage.engine.stats()["syncs"] < 20
+        await storage.close()
@@ -0,0 +1,158 @@
+"""
+Tests for TTLs, retention policies and the expiry sweeper
+"""
+
+import pytest
+from pathlib import Path
+import asyncio
+import json
+import tempfile
+from cosmic_os.storage import LocalFirstStorage, StorageBackend, ExpiryIndex
+from datetime import datetime, timedelta
+
+
+BACKENDS = [StorageBackend.MEMORY, StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB]
+
+
+class TestExpiryIndex:
+    """Test suite for the time-ordered expiry index"""
+
+    def test_due_in_deadline_order_skipping_stale_entries(self):
+        """Test due() pops expired keys in order and ignores superseded deadlines"""
+        index = ExpiryIndex()
+        now = datetime(2024, 1, 1)
+        for i, offset in enumerate([5, 1, 3, 2]):
+            index.schedule(f"k{i}", now + timedelta(seconds=offset))
+        index.schedule("k1", now + timedelta(seconds=10))  # Extended
+        index.schedule("k3", None)  # Made permanent
+        index.discard(["k2"])  # Deleted
+
+        assert index.next_deadline() == now + timedelta(seconds=5)
+        assert index.due(now + timedelta(seconds=6), 10) == ["k0"]
+        assert index.expired("k0", now + timedelta(seconds=6))
+        assert index.due(now + timedelta(seconds=20), 10) == ["k1"]
+
+    def test_requeue_returns_untaken_keys(self):
+        """Test keys whose deletion failed are swept again"""
+        index = ExpiryIndex()
+        now = datetime(2024, 1, 1)
+        index.schedule("a", now)
+        assert index.due(now, 10) == ["a"]
+        assert index.due(now, 10) == []
+        index.requeue(["a"])
+        assert index.due(now, 10) == ["a"]
+
+
+class TestStorageExpiry:
+    """Test suite for TTL handling in LocalFirstStorage"""
+
+    @pytest.mark.parametrize("backend", BACKENDS)
+    @pytest.mark.asyncio
+    async def test_expired_keys_read_as_missing_then_swept(self, backend):
+        """Test reads hide expired keys at once and the sweeper deletes them"""
+        storage = LocalFirstStorage(Path(tempfile.mkdtemp()), backend=backend)
+        await storage.write("short", {"v": 1}, ttl=0.05)
+        await storage.write_many([("batch/a", {"v": 2}), ("batch/b", {"v": 3})], ttl=0.05)
+        await storage.write("long", {"v": 4}, ttl=3600)
+        await storage.write("kept", {"v": 5})
+
+        await asyncio.sleep(0.06)
+        assert await storage.read("short") is None
+        assert await storage.get_metadata("short") is None
+        assert await storage.read_many(["batch/a", "long"]) == {"batch/a": None, "long": {"v": 4}}
+
+        await asyncio.sleep(0.1)
+        assert await storage.list_keys() == ["kept", "long"]
+        stats = (await storage.get_storage_stats())["expiry"]
+        assert stats["swept"] == 3
+        assert stats["scheduled"] == 1
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_retention_policies_by_prefix(self):
+        """Test the longest matching prefix sets the TTL unless overridden"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(path, backend=StorageBackend.LOCAL_FILE)
+        await storage.set_retention("cache/", 60)
+        await storage.set_retention("cache/audit/", 3600)
+
+        short = await storage.write("cache/x", {"v": 1})
+        long = await storage.write("cache/audit/x", {"v": 1})
+        explicit = await storage.write("cache/y", {"v": 1}, ttl=5)
+        plain = await storage.write("notes/x", {"v": 1})
+
+        assert short.expires_at - short.updated_at == timedelta(seconds=60)
+        assert long.expires_at - long.updated_at == timedelta(seconds=3600)
+        assert explicit.expires_at - explicit.updated_at == timedelta(seconds=5)
+        assert plain.expires_at is None
+        with pytest.raises(ValueError):
+            await storage.write("cache/z", {"v": 1}, ttl=0)
+        await storage.set_retention("cache/", None)
+        assert (await storage.write("cache/x", {"v": 2})).expires_at is None
+        await storage.close()
+
+        reopened = LocalFirstStorage(path, backend=StorageBackend.LOCAL_FILE)
+        assert reopened.retention.items() == {"cache/audit/": 3600}
+        await reopened.close()
+
+    @pytest.mark.parametrize("clean_close", [True, False])
+    @pytest.mark.asyncio
+    async def test_expiry_survives_restart(self, clean_close):
+        """Test expiries persist through the index snapshot or a rebuild"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(path, backend=StorageBackend.LOCAL_DB)
+        await storage.write("soon", {"v": 1}, ttl=0.2)
+        await storage.write("later", {"v": 2}, ttl=3600)
+        if clean_close:
+            await storage.close()
+        else:
+            storage._sweeper.cancel()
+            storage.engine.close()
+            storage.lease.close()
+
+        reopened = LocalFirstStorage(path, backend=StorageBackend.LOCAL_DB, sweep_interval=0.1)
+        assert len(reopened.expiry) == 2
+        assert await reopened.list_keys() == ["later", "soon"]
+        # The first call starts the sweeper for expiries loaded at open
+        assert reopened._sweeper is not None
+        await asyncio.sleep(0.5)
+        assert reopened.swept == 1
+        assert await reopened.list_keys() == ["later"]
+        await reopened.close()
+
+    def test_snapshot_outside_event_loop_with_expiries(self):
+        """Test synchronous calls on a store with expiries leave the sweeper for later"""
+        path = Path(tempfile.mkdtemp())
+
+        async def write_and_close():
+            storage = LocalFirstStorage(path, backend=StorageBackend.LOCAL_FILE)
+            await storage.write("later", {"v": 1}, ttl=3600)
+            await storage.close()
+
+        asyncio.run(write_and_close())
+
+        reopened = LocalFirstStorage(path, backend=StorageBackend.LOCAL_FILE)
+        snapshot = reopened.snapshot()
+        assert reopened._sweeper is None
+        snapshot.close()
+        asyncio.run(reopened.close())
+
+    @pytest.mark.asyncio
+    async def test_snapshots_and_exports_skip_expired(self):
+        """Test snapshot reads and exports treat expired keys as missing"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(
+            path / "store", backend=StorageBackend.LOCAL_FILE, sweep_interval=None
+        )
+        await storage.write("gone", {"v": 1}, ttl=0.01)
+        await storage.write("here", {"v": 2})
+        await asyncio.sleep(0.02)
+
+        async with storage.snapshot() as snapshot:
+            assert await snapshot.read("gone") is None
+            assert await snapshot.read("here") == {"v": 2}
+        export = await storage.export_all(path / "export.jsonl")
+        lines = [json.loads(line) for line in export.read_text().splitlines()]
+        assert [line["key"] for line in lines] == ["here"]
+        assert await storage.list_keys() == ["gone", "here"]
+        await storage.close()
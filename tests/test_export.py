@@ -0,0 +1,196 @@
+"""
+Tests for streaming data export (Article II, Section 7: Right to Exit)
+"""
+
+import pytest
+from pathlib import Path
+import base64
+import csv
+import json
+import tarfile
+import tempfile
+import zipfile
+from cosmic_os.storage import LocalFirstStorage, StorageBackend
+from cosmic_os.storage.export import ExportCheckpoint, PAX_PREFIX
+
+
+class TestExportAll:
+    """Test suite for export_all"""
+
+    async def _storage(self, backend=StorageBackend.LOCAL_FILE):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(storage_path=self.temp_dir / "store", backend=backend)
+        await storage.write_many((f"doc/{i:03d}", {"n": i}) for i in range(40))
+        await storage.write(key="blob", data=b"\x00\xffraw", encrypt=False)
+        return storage
+
+    @pytest.mark.parametrize("backend", [
+        StorageBackend.MEMORY, StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB
+    ])
+    @pytest.mark.asyncio
+    async def test_json_lines_decrypts_every_record(self, backend):
+        """Test each record becomes one decrypted JSON line"""
+        storage = await self._storage(backend)
+        reports = []
+
+        path = await storage.export_all(
+            self.temp_dir / "export.jsonl", batch_size=7, workers=3, progress=reports.append
+        )
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["key"] for line in lines] == ["blob"] + [f"doc/{i:03d}" for i in range(40)]
+        assert base64.b64decode(lines[0]["value_b64"]) == b"\x00\xffraw"
+        assert lines[5]["value"] == {"n": 4}
+        assert lines[5]["metadata"]["encrypted"] is True
+        assert reports[-1].exported == reports[-1].total == 41
+        assert not ExportCheckpoint.path_for(path).exists()
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_csv_export(self):
+        """Test CSV rows carry key, encoding and value"""
+        storage = await self._storage()
+
+        path = await storage.export_all(self.temp_dir / "export.csv", format="csv")
+
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 41
+        assert rows[1]["key"] == "doc/000"
+        assert json.loads(rows[1]["value"]) == {"n": 0}
+        assert base64.b64decode(rows[0]["value"]) == b"\x00\xffraw"
+
+    @pytest.mark.asyncio
+    async def test_archive_exports(self):
+        """Test tar and zip archives hold the raw values and metadata"""
+        storage = await self._storage()
+
+        tar_path = await storage.export_all(
+            self.temp_dir / "export.tar.gz", format="tar", batch_size=10
+        )
+        with tarfile.open(tar_path, "r:gz") as archive:
+            members = archive.getmembers()
+            assert len(members) == 41
+            assert members[1].pax_headers[PAX_PREFIX + "key"] == "doc/000"
+            assert archive.extractfile(members[0]).read() == b"\x00\xffraw"
+
+        zip_path = await storage.export_all(self.temp_dir / "export.zip", format="zip")
+        with zipfile.ZipFile(zip_path) as archive:
+            assert archive.read("data/doc%2F003.json") == b'{"n":3}'
+            assert json.loads(archive.getinfo("data/blob.bin").comment)["encoding"] == "bytes"
+
+    @pytest.mark.parametrize("format", ["jsonl", "tar"])
+    @pytest.mark.asyncio
+    async def test_interrupted_export_resumes_from_cursor(self, format):
+        """Test a failed export continues after the last written key"""
+        storage = await self._storage()
+        path = self.temp_dir / f"export.{format}"
+
+        def interrupt(progress):
+            if progress.exported >= 20:
+                raise ConnectionAbortedError("power lost")
+
+        with pytest.raises(ConnectionAbortedError):
+            await storage.export_all(path, format=format, batch_size=10, progress=interrupt)
+        checkpoint = ExportCheckpoint.load(path)
+        assert checkpoint.cursor == "doc/018"
+
+        resumed = []
+        await storage.export_all(path, format=format, batch_size=10, progress=resumed.append)
+
+        assert resumed[0].exported == 30
+        if format == "jsonl":
+            keys = [json.loads(line)["key"] for line in path.read_text().splitlines()]
+        else:
+            with tarfile.open(path, "r:gz") as archive:
+                keys = [m.pax_headers[PAX_PREFIX + "key"] for m in archive.getmembers()]
+        assert keys == ["blob"] + [f"doc/{i:03d}" for i in range(40)]
+
+    @pytest.mark.asyncio
+    async def test_unknown_format_rejected(self):
+        """Test unsupported formats fail before anything is written"""
+        storage = await self._storage()
+
+        with pytest.raises(ValueError):
+            await storage.export_all(self.temp_dir / "export.xml", format="xml")
+        assert not (self.temp_dir / "export.xml").exists()
+
+    @pytest.mark.parametrize("backend", [StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB])
+    @pytest.mark.asyncio
+    async def test_failed_open_releases_snapshot(self, backend):
+        """Test an export that cannot create its file does not leave a snapshot pinned"""
+        storage = await self._storage(backend)
+        (self.temp_dir / "taken").mkdir()
+
+        for _ in range(3):
+            with pytest.raises(IsADirectoryError):
+                await storage.export_all(self.temp_dir / "taken", resume=False)
+        assert not storage._snapshots
+        await storage.close()
+
+
+class TestImportData:
+    """Test suite for import_data"""
+
+    async def _export(self, format):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        source = LocalFirstStorage(storage_path=self.temp_dir / "source")
+        await source.write_many((f"doc/{i:03d}", {"n": i}) for i in range(30))
+        await source.write(key="blob", data=b"\x00raw", encrypt=False)
+        path = await source.export_all(self.temp_dir / f"export.{format}", format=format)
+        await source.close()
+        return path
+
+    @pytest.mark.parametrize("format", ["jsonl", "csv", "tar", "zip"])
+    @pytest.mark.asyncio
+    async def test_round_trip(self, format):
+        """Test every export format imports back into another node"""
+        path = await self._export(format)
+        target = LocalFirstStorage(
+            storage_path=self.temp_dir / "target", backend=StorageBackend.LOCAL_DB
+        )
+
+        imported = await target.import_data(path, format=format, batch_size=8, workers=2)
+
+        assert imported == 31
+        assert await target.read("doc/017") == {"n": 17}
+        assert await target.read("blob") == b"\x00raw"
+        assert (await target.get_metadata("doc/017")).encrypted is True
+        assert (await target.get_metadata("blob")).encrypted is False
+        await target.close()
+
+    @pytest.mark.asyncio
+    async def test_conflict_policies(self):
+        """Test skip, overwrite and newest-wins against existing keys"""
+        path = await self._export("jsonl")
+        target = LocalFirstStorage(storage_path=self.temp_dir / "target")
+        await target.write(key="doc/000", data="older")
+        assert await target.import_data(path) == 30
+        assert await target.read("doc/000") == "older"
+
+        await target.write(key="doc/001", data="newer")
+        assert await target.import_data(path, conflict="newest_wins") == 0
+        assert await target.read("doc/001") == "newer"
+
+        assert await target.import_data(path, overwrite=True) == 31
+        assert await target.read("doc/001") == {"n": 1}
+
+    @pytest.mark.asyncio
+    async def test_killed_import_resumes(self):
+        """Test a rerun skips records consumed before the failure"""
+        path = await self._export("jsonl")
+        target = LocalFirstStorage(storage_path=self.temp_dir / "target")
+
+        def interrupt(progress):
+            if progress.consumed >= 20:
+                raise ConnectionAbortedError("killed")
+
+        with pytest.raises(ConnectionAbortedError):
+            await target.import_data(path, batch_size=10, progress=interrupt)
+        reports = []
+        imported = await target.import_data(path, batch_size=10, progress=reports.append)
+
+        assert imported == 31
+        assert reports[0].consumed == 30
+        assert len(await target.list_keys()) == 31
+        assert not list((self.temp_dir / "target" / "imports").glob("*.progress"))
@@ -6,6 +6,7 @@ Tests for Local-First Storage
 import pytest
 from pathlib import Path
 from cosmic_os.storage import LocalFirstStorage, StorageBackend, SyncStatus
+import asyncio
 import tempfile
 
 
@@ -27,7 +28,6 @@ class TestLocalFirstStorage:
         assert self.storage.backend == StorageBackend.LOCAL_FILE
         assert self.storage.cloud_sync_enabled is False
 
-    @pytest.mark.skip(reason="Implementation pending")
     @pytest.mark.asyncio
     async def test_write_local_first(self):
         """Test data is written locally first (constitutional requirement)"""
@@ -41,7 +41,6 @@ class TestLocalFirstStorage:
         assert metadata.sync_status == SyncStatus.NOT_SYNCED
         assert metadata.encrypted is True
 
-    @pytest.mark.skip(reason="Implementation pending")
     @pytest.mark.asyncio
     async def test_read_from_local(self):
         """Test reading data from local storage"""
@@ -52,7 +51,6 @@ class TestLocalFirstStorage:
         result = await self.storage.read(key="test")
         assert result == {"value": 123}
 
-    @pytest.mark.skip(reason="Implementation pending")
     @pytest.mark.asyncio
     async def test_cloud_sync_requires_consent(self):
         """Test cloud sync requires user consent (constitutional requirement)"""
@@ -69,7 +67,6 @@ class TestLocalFirstStorage:
 
         assert "consent" in str(exc_info.value).lower()
 
-    @pytest.mark.skip(reason="Implementation pending")
     @pytest.mark.asyncio
     async def test_export_all_data(self):
         """Test data export (Article II, Section 7: Right to Exit)"""
@@ -84,6 +81,114 @@ class TestLocalFirstStorage:
 
         assert export_path.exists()
 
+    @pytest.mark.asyncio
+    async def test_delete_removes_key(self):
+        """Test deleted keys are no longer readable"""
+        await self.storage.write(key="gone", data="bye")
+
+        assert await self.storage.delete("gone") is True
+        assert await self.storage.read("gone") is None
+        assert await self.storage.delete("gone") is False
+
+    @pytest.mark.asyncio
+    async def test_data_survives_restart(self):
+        """Test data is recovered by replaying the local log"""
+        await self.storage.write(key="persist", data={"n": 1})
+        await self.storage.write(key="raw", data=b"\x00\x01", encrypt=False)
+        await self.storage.close()
+
+        reopened = LocalFirstStorage(storage_path=Path(self.temp_dir))
+
+        assert await reopened.read("persist") == {"n": 1}
+        assert await reopened.read("raw") == b"\x00\x01"
+        assert await reopened.list_keys("p*") == ["persist"]
+
+    @pytest.mark.asyncio
+    async def test_encrypted_at_rest(self):
+        """Test encrypted values never hit disk as plaintext"""
+        await self.storage.write(key="secret", data={"token": "plaintext-marker"})
+        await self.storage.close()
+
+        for segment in (Path(self.temp_dir) / "segments").iterdir():
+            assert b"plaintext-marker" not in segment.read_bytes()
+
+    @pytest.mark.asyncio
+    async def test_zero_copy_read(self):
+        """Test large raw and sealed values come back as memory-mapped views"""
+        await self.storage.write(key="raw", data=b"\x01" * 100_000, encrypt=False)
+        await self.storage.write(key="sealed", data=b"\x02" * 100_000)
+        await self.storage.write(key="doc", data={"n": 1}, encrypt=False)
+
+        raw = await self.storage.read("raw", zero_copy=True)
+        assert isinstance(raw, memoryview) and raw.readonly
+        assert raw == b"\x01" * 100_000
+
+        sealed = await self.storage.read("sealed", decrypt=False, zero_copy=True)
+        assert isinstance(sealed, memoryview)
+        assert bytes(sealed) == await self.storage.read("sealed", decrypt=False)
+
+        # Values that need decoding fall back to a regular read
+        assert await self.storage.read("sealed", zero_copy=True) == b"\x02" * 100_000
+        assert await self.storage.read("doc", zero_copy=True) == {"n": 1}
+
+    @pytest.mark.asyncio
+    async def test_batch_write_read_delete(self):
+        """Test bulk APIs accept sync and async iterables"""
+        async def entries():
+            for i in range(25):
+                yield f"bulk/{i:02d}", {"i": i}
+
+        written = await self.storage.write_many(entries(), batch_size=10)
+        assert [m.key for m in written] == [f"bulk/{i:02d}" for i in range(25)]
+        assert len({m.sequence for m in written}) == 25
+
+        values = await self.storage.read_many(["bulk/03", "missing", "bulk/24"])
+        assert values == {"bulk/03": {"i": 3}, "missing": None, "bulk/24": {"i": 24}}
+
+        deleted = await self.storage.delete_many(["bulk/00", "missing"])
+        assert deleted == {"bulk/00": True, "missing": False}
+        assert await self.storage.read("bulk/00") is None
+        assert len(await self.storage.list_keys("bulk/*")) == 24
+
+    @pytest.mark.asyncio
+    async def test_read_cache_is_byte_bounded(self):
+        """Test the read cache evicts by bytes and is invalidated on write"""
+        storage = LocalFirstStorage(
+            storage_path=Path(self.temp_dir) / "cached",
+            cache_max_bytes=2048
+        )
+        for i in range(10):
+            await storage.write(key=f"doc{i}", data="x" * 300)
+        for i in range(10):
+            await storage.read(f"doc{i}")
+        await storage.read("doc9")
+
+        cache = (await storage.get_storage_stats())["cache"]
+        assert cache["current_bytes"] <= 2048
+        assert cache["evictions"] > 0
+        assert cache["hits"] == 1
+
+        await storage.write(key="doc9", data="fresh")
+        assert await storage.read("doc9") == "fresh"
+        await storage.delete("doc9")
+        assert await storage.read("doc9") is None
+
+    @pytest.mark.asyncio
+    async def test_read_cache_without_plaintext(self):
+        """Test plaintext never enters the cache when forbidden"""
+        storage = LocalFirstStorage(
+            storage_path=Path(self.temp_dir) / "sealed",
+            cache_max_bytes=1 << 20,
+            cache_plaintext=False
+        )
+        await storage.write(key="secret", data="plaintext-marker")
+
+        assert await storage.read("secret") == "plaintext-marker"
+        assert await storage.read("secret") == "plaintext-marker"
+        entry = storage.cache.get("secret")
+        assert entry.sealed is True
+        assert b"plaintext-marker" not in entry.payload
+
     def test_has_user_consent_no_callback(self):
         """Test consent check when no callback provided"""
         assert self.storage.has_user_consent() is False
@@ -99,6 +204,129 @@ class TestLocalFirstStorage:
         assert storage_with_consent.has_user_consent() is True
 
 
+class TestLocalDatabaseBackend:
+    """Test suite for the SQLite-backed LOCAL_DB backend"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = LocalFirstStorage(
+            storage_path=Path(self.temp_dir),
+            backend=StorageBackend.LOCAL_DB
+        )
+
+    def teardown_method(self):
+        """Close the database"""
+        self.storage.engine.close()
+
+    @pytest.mark.asyncio
+    async def test_round_trip_and_restart(self):
+        """Test values persist in the database file"""
+        await self.storage.write(key="a", data={"x": 1})
+        await self.storage.write(key="a", data={"x": 2})
+        await self.storage.close()
+
+        self.storage = LocalFirstStorage(
+            storage_path=Path(self.temp_dir),
+            backend=StorageBackend.LOCAL_DB
+        )
+        assert await self.storage.read("a") == {"x": 2}
+        metadata = await self.storage.get_metadata("a")
+        assert metadata.sequence == 2
+        assert metadata.encrypted is True
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writes_are_group_committed(self):
+        """Test concurrent writes share transactions"""
+        await asyncio.gather(*(
+            self.storage.write(key=f"node/{i:03d}", data=i) for i in range(200)
+        ))
+
+        engine_stats = self.storage.engine.stats()
+        assert engine_stats["writes_committed"] == 200
+        assert engine_stats["batches_committed"] < 200
+        assert await self.storage.read("node/199") == 199
+
+    @pytest.mark.asyncio
+    async def test_batch_apis(self):
+        """Test bulk writes land in one transaction"""
+        await self.storage.write_many((f"k{i}", i) for i in range(50))
+
+        assert self.storage.engine.stats()["batches_committed"] == 1
+        assert (await self.storage.read_many(["k7", "k49"])) == {"k7": 7, "k49": 49}
+        assert (await self.storage.delete_many(["k7", "nope"])) == {"k7": True, "nope": False}
+
+    @pytest.mark.asyncio
+    async def test_list_keys_and_stats_use_indexes(self):
+        """Test key listing and statistics come from SQL queries"""
+        await self.storage.write(key="node/1/entries/a", data="a")
+        await self.storage.write(key="node/2/entries/b", data="b", encrypt=False)
+        await self.storage.delete("node/2/entries/b")
+        await self.storage.write(key="other", data="c")
+
+        assert await self.storage.list_keys("node/*") == ["node/1/entries/a"]
+        stats = await self.storage.get_storage_stats()
+        assert stats["total_items"] == 2
+        assert stats["sync_status"]["not_synced"] == 2
+        assert stats["engine"]["engine"] == "sqlite"
+
+
+@pytest.mark.parametrize("backend", [
+    StorageBackend.MEMORY, StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB
+])
+class TestKeyListing:
+    """Test prefix and glob key listing on every backend"""
+
+    async def _storage(self, backend):
+        storage = LocalFirstStorage(storage_path=Path(tempfile.mkdtemp()), backend=backend)
+        await storage.write_many(
+            (f"node/{n}/entries/{i:03d}", i) for n in ("a", "b") for i in range(30)
+        )
+        await storage.write_many([("nodes", 0), ("node/a/profile", 1), ("zeta", 2)])
+        return storage
+
+    @pytest.mark.asyncio
+    async def test_glob_with_inner_wildcard(self, backend):
+        """Test patterns are matched within their literal prefix range"""
+        storage = await self._storage(backend)
+
+        assert await storage.list_keys("node/a/*") == (
+            [f"node/a/entries/{i:03d}" for i in range(30)] + ["node/a/profile"]
+        )
+        assert await storage.list_keys("node/*/entries/00[0-2]") == [
+            "node/a/entries/000", "node/a/entries/001", "node/a/entries/002",
+            "node/b/entries/000", "node/b/entries/001", "node/b/entries/002"
+        ]
+        assert await storage.list_keys("zeta") == ["zeta"]
+        assert len(await storage.list_keys()) == 63
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_pagination_cursor(self, backend):
+        """Test pages resume after the cursor and skip concurrent deletes"""
+        storage = await self._storage(backend)
+
+        page = await storage.list_keys_page("node/b/*", limit=25)
+        assert len(page.keys) == 25
+        assert page.next_cursor == "node/b/entries/024"
+
+        await storage.delete("node/b/entries/025")
+        page = await storage.list_keys_page("node/b/*", limit=25, cursor=page.next_cursor)
+        assert page.keys == [f"node/b/entries/{i:03d}" for i in range(26, 30)]
+        assert page.next_cursor is None
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_async_iterator(self, backend):
+        """Test the async iterator walks every matching key in order"""
+        storage = await self._storage(backend)
+
+        keys = [key async for key in storage.iter_keys("node/*", batch_size=7)]
+        assert keys == await storage.list_keys("node/*")
+        assert len(keys) == 61
+        await storage.close()
+
+
 class TestConstitutionalCompliance:
     """Test constitutional compliance of storage"""
 
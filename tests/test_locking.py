@@ -0,0 +1,156 @@
+"""
+Tests for per-key locking and multi-process store access
+"""
+
+import pytest
+from pathlib import Path
+import asyncio
+import subprocess
+import sys
+import tempfile
+from cosmic_os.storage import LocalFirstStorage, StorageBackend, KeyLocks
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_python(code: str) -> subprocess.CompletedProcess:
+    """Run code in a separate interpreter"""
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60
+    )
+
+
+class TestKeyLocks:
+    """Test suite for in-process per-key locks"""
+
+    @pytest.mark.asyncio
+    async def test_read_modify_write_is_atomic(self):
+        """Test concurrent increments under storage.lock never lose an update"""
+        storage = LocalFirstStorage(storage_path=Path(tempfile.mkdtemp()))
+        await storage.write(key="counter", data=0)
+
+        async def increment():
+            async with storage.lock("counter"):
+                value = await storage.read("counter")
+                await asyncio.sleep(0)
+                await storage.write(key="counter", data=value + 1)
+
+        await asyncio.gather(*(increment() for _ in range(50)))
+        assert await storage.read("counter") == 50
+
+    @pytest.mark.asyncio
+    async def test_other_stripes_are_not_blocked(self):
+        """Test holding one key does not stall writers of unrelated keys"""
+        locks = KeyLocks(stripes=64)
+        keys = {}
+        for i in range(200):
+            keys.setdefault(hash(f"k{i}") % 64, f"k{i}")
+        first, second = list(keys.values())[:2]
+        order = []
+
+        async def slow():
+            async with locks.hold([first]):
+                await asyncio.sleep(0.05)
+                order.append(first)
+
+        async def fast():
+            await asyncio.sleep(0)
+            async with locks.hold([second]):
+                order.append(second)
+
+        await asyncio.gather(slow(), fast())
+        assert order == [second, first]
+        assert locks.stats()["held"] == 0
+
+
+class TestStoreLease:
+    """Test suite for the cross-process writer lease and read-only openers"""
+
+    def test_second_writer_process_is_refused(self):
+        """Test only one process at a time may open a store for writing"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(storage_path=path)
+        code = (
+            "from pathlib import Path\n"
+            "from cosmic_os.storage import LocalFirstStorage, StorageLockedError\n"
+            "try:\n"
+            f"    LocalFirstStorage(storage_path=Path({str(path)!r}), lock_timeout=0)\n"
+            "    print('opened')\n"
+            "except StorageLockedError:\n"
+            "    print('locked')\n"
+        )
+
+        assert run_python(code).stdout.strip() == "locked"
+        asyncio.run(storage.close())
+        assert run_python(code).stdout.strip() == "opened"
+
+    @pytest.mark.parametrize("backend", [StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB])
+    @pytest.mark.asyncio
+    async def test_reader_process_runs_beside_writer(self, backend):
+        """Test a read-only process reads while the writer keeps its lease"""
+        path = Path(tempfile.mkdtemp())
+        writer = LocalFirstStorage(storage_path=path, backend=backend)
+        await writer.write_many((f"doc/{i}", {"n": i}) for i in range(100))
+        code = (
+            "import asyncio\n"
+            "from pathlib import Path\n"
+            "from cosmic_os.storage import LocalFirstStorage, StorageBackend\n"
+            f"reader = LocalFirstStorage(Path({str(path)!r}), backend=StorageBackend({backend.value!r}),"
+            " read_only=True)\n"
+            "print(len(asyncio.run(reader.list_keys('doc/*'))), asyncio.run(reader.read('doc/42'))['n'])\n"
+        )
+
+        result = run_python(code)
+        assert result.stdout.split() == ["100", "42"], result.stderr
+        await writer.close()
+
+    @pytest.mark.parametrize("backend", [StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB])
+    @pytest.mark.asyncio
+    async def test_reader_follows_writer(self, backend):
+        """Test a reader sees later writes, deletes and compactions"""
+        path = Path(tempfile.mkdtemp())
+        writer = LocalFirstStorage(storage_path=path, backend=backend)
+        await writer.write(key="a", data=1)
+        reader = LocalFirstStorage(
+            storage_path=path, backend=backend, read_only=True, cache_max_bytes=1 << 20
+        )
+        assert await reader.read("a") == 1
+
+        await writer.write(key="a", data=2)
+        await writer.write_many((f"b{i}", "x" * 100) for i in range(50))
+        await writer.delete("b0")
+        assert await reader.read("a") == 2
+        assert await reader.read("b0") is None
+        assert len(await reader.list_keys("b*")) == 49
+
+        if backend == StorageBackend.LOCAL_FILE:
+            writer.engine.compact()
+            writer.engine.checkpoint()
+        await writer.write(key="a", data=3)
+        assert await reader.read("a") == 3
+        assert await reader.read("b7") == "x" * 100
+        await reader.close()
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_reader_rejects_writes(self):
+        """Test read-only openers cannot mutate the store"""
+        path = Path(tempfile.mkdtemp())
+        writer = LocalFirstStorage(storage_path=path)
+        await writer.write(key="a", data=1)
+        reader = LocalFirstStorage(storage_path=path, read_only=True)
+
+        with pytest.raises(PermissionError):
+            await reader.write(key="a", data=2)
+        with pytest.raises(PermissionError):
+            await reader.delete("a")
+        assert await writer.read("a") == 1
+
+    def test_memory_backend_cannot_be_shared(self):
+        """Test read-only mode needs a persistent backend"""
+        with pytest.raises(ValueError):
+            LocalFirstStorage(
+                storage_path=Path(tempfile.mkdtemp()),
+                backend=StorageBackend.MEMORY,
+                read_only=True
+            )
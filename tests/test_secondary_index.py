@@ -0,0 +1,165 @@
+"""
+Tests for secondary indexes and query()
+"""
+
+import pytest
+from pathlib import Path
+import tempfile
+from cosmic_os.storage import LocalFirstStorage, StorageBackend, Range, FieldIndex
+from cosmic_os.storage.secondary_index import _Bounds
+
+
+def records(count):
+    return [
+        (f"doc/{i:04d}", {"n": i, "kind": "even" if i % 2 == 0 else "odd", "meta": {"rank": i % 5}})
+        for i in range(count)
+    ]
+
+
+async def collect(storage, where, **kwargs):
+    return [key async for key, _ in storage.query(where, **kwargs)]
+
+
+class TestFieldIndex:
+    """Test suite for the sorted field index"""
+
+    def test_mixed_types_sort_by_type_then_value(self):
+        """Test values of different types never match each other's ranges"""
+        index = FieldIndex("v")
+        for key, value in [("a", 3), ("b", "3"), ("c", True), ("d", None), ("e", 2.5)]:
+            index.update(key, {"v": value}, encrypted=False)
+
+        page = index.page(_Bounds(Range(gte=0)), None, 10)
+        assert [key for _, key in page] == ["e", "a"]
+        assert index.count(_Bounds("3")) == 1
+        assert index.count(_Bounds(None)) == 1
+
+    def test_cursor_survives_concurrent_changes(self):
+        """Test paging continues after the cursor when entries move"""
+        index = FieldIndex("v")
+        for i in range(10):
+            index.update(f"k{i}", {"v": i}, encrypted=False)
+        bounds = _Bounds(Range(gte=0))
+
+        first = index.page(bounds, None, 3)
+        index.discard("k3")
+        index.update("k0", {"v": 100}, encrypted=False)
+        second = index.page(bounds, first[-1], 3)
+
+        assert [key for _, key in second] == ["k4", "k5", "k6"]
+
+    def test_invalid_predicates(self):
+        """Test unindexable predicates are rejected"""
+        with pytest.raises(ValueError):
+            _Bounds(Range())
+        with pytest.raises(ValueError):
+            _Bounds(Range(gt=1, lt="z"))
+        with pytest.raises(ValueError):
+            _Bounds([1, 2])
+
+
+@pytest.mark.parametrize("backend", [
+    StorageBackend.MEMORY, StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB
+])
+class TestQuery:
+    """Test suite for query() over each backend"""
+
+    @pytest.mark.asyncio
+    async def test_equality_and_range(self, backend):
+        """Test equality, range and combined predicates"""
+        storage = LocalFirstStorage(Path(tempfile.mkdtemp()), backend=backend)
+        await storage.write_many(records(50), encrypt=False)
+        await storage.create_index("n")
+        await storage.create_index("kind")
+
+        assert await collect(storage, {"n": 7}) == ["doc/0007"]
+        assert await collect(storage, {"n": Range(gte=10, lt=14)}) == [
+            "doc/0010", "doc/0011", "doc/0012", "doc/0013"
+        ]
+        assert await collect(storage, {"n": Range(gt=40), "kind": "even"}) == [
+            "doc/0042", "doc/0044", "doc/0046", "doc/0048"
+        ]
+        assert await collect(storage, {"n": Range(lte=3)}, reverse=True, limit=2) == [
+            "doc/0003", "doc/0002"
+        ]
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_maintained_on_write_and_delete(self, backend):
+        """Test indexes follow overwrites, deletes and batch operations"""
+        storage = LocalFirstStorage(Path(tempfile.mkdtemp()), backend=backend)
+        await storage.create_index("meta.rank")
+        await storage.write_many(records(20), encrypt=False)
+
+        await storage.write("doc/0000", {"meta": {"rank": 9}}, encrypt=False)
+        await storage.delete("doc/0005")
+        await storage.delete_many(["doc/0010", "doc/0015"])
+
+        assert await collect(storage, {"meta.rank": 0}) == []
+        assert await collect(storage, {"meta.rank": 9}) == ["doc/0000"]
+        assert len(await collect(storage, {"meta.rank": Range(gte=0)})) == 17
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_encrypted_values_are_opt_in(self, backend):
+        """Test encrypted values are indexed only for non-sensitive fields"""
+        storage = LocalFirstStorage(Path(tempfile.mkdtemp()), backend=backend)
+        await storage.write("plain", {"kind": "note", "secret": "a"}, encrypt=False)
+        await storage.write("sealed", {"kind": "note", "secret": "b"})
+        await storage.create_index("secret")
+        await storage.create_index("kind", non_sensitive=True)
+
+        assert await collect(storage, {"secret": Range(gte="")}) == ["plain"]
+        results = [item async for item in storage.query({"kind": "note"})]
+        assert results == [
+            ("plain", {"kind": "note", "secret": "a"}),
+            ("sealed", {"kind": "note", "secret": "b"})
+        ]
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_unindexed_field_is_rejected(self, backend):
+        """Test querying a field without an index raises"""
+        storage = LocalFirstStorage(Path(tempfile.mkdtemp()), backend=backend)
+        with pytest.raises(ValueError):
+            await collect(storage, {"n": 1})
+        await storage.close()
+
+
+class TestIndexPersistence:
+    """Test suite for index definitions and snapshots across restarts"""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_reused_after_clean_close(self):
+        """Test a cleanly closed store reopens with ready indexes"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(path, backend=StorageBackend.LOCAL_FILE)
+        await storage.write_many(records(30), encrypt=False)
+        await storage.create_index("n")
+        await storage.close()
+
+        reopened = LocalFirstStorage(path, backend=StorageBackend.LOCAL_FILE)
+        assert reopened.indexes.get("n").ready
+        assert await collect(reopened, {"n": Range(gte=28)}) == ["doc/0028", "doc/0029"]
+        await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_rebuilt_after_crash(self):
+        """Test indexes are rebuilt when no snapshot was left behind"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(path, backend=StorageBackend.LOCAL_DB)
+        await storage.create_index("kind")
+        await storage.write_many(records(10), encrypt=False)
+        # Simulate a crash: the engine is released but no snapshot is written
+        storage.engine.close()
+        storage.lease.close()
+
+        reopened = LocalFirstStorage(path, backend=StorageBackend.LOCAL_DB)
+        assert not reopened.indexes.get("kind").ready
+        assert len(await collect(reopened, {"kind": "odd"})) == 5
+        assert await reopened.drop_index("kind")
+        await reopened.close()
+
+        final = LocalFirstStorage(path, backend=StorageBackend.LOCAL_DB)
+        assert final.indexes.get("kind") is None
+        await final.close()
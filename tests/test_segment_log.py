@@ -0,0 +1,333 @@
+"""
+Tests for the Segment Log Engine
+================================
+"""
+
+from datetime import datetime
+from pathlib import Path
+import tempfile
+
+from cosmic_os.storage import SegmentLogEngine, StorageMetadata, SyncStatus
+from cosmic_os.storage import segment_log
+
+
+def make_metadata(key: str, size: int) -> StorageMetadata:
+    """Build metadata for a test value"""
+    now = datetime.utcnow()
+    return StorageMetadata(
+        key=key,
+        created_at=now,
+        updated_at=now,
+        sync_status=SyncStatus.NOT_SYNCED,
+        encrypted=False,
+        size_bytes=size
+    )
+
+
+class TestSegmentLogEngine:
+    """Test suite for the append-only segment log"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.path = Path(tempfile.mkdtemp()) / "segments"
+
+    def open_engine(self, **kwargs) -> SegmentLogEngine:
+        """Open an engine without the background compactor"""
+        kwargs.setdefault("background_compaction", False)
+        engine = SegmentLogEngine(self.path, **kwargs)
+        engine.recover()
+        return engine
+
+    def put(self, engine: SegmentLogEngine, key: str, value: bytes) -> int:
+        """Write a value with fresh metadata"""
+        return engine.put(key, value, make_metadata(key, len(value)))
+
+    def test_put_get_delete(self):
+        """Test basic round trip"""
+        engine = self.open_engine()
+        self.put(engine, "a", b"one")
+        self.put(engine, "a", b"two")
+
+        assert engine.get("a") == b"two"
+        assert engine.delete("a") is True
+        assert engine.get("a") is None
+        assert engine.delete("a") is False
+
+    def test_replay_rebuilds_index(self):
+        """Test recovery by segment replay"""
+        engine = self.open_engine(max_segment_bytes=256)
+        for i in range(50):
+            self.put(engine, f"key{i % 10}", f"value{i}".encode())
+        engine.delete("key3")
+        engine.close()
+
+        reopened = SegmentLogEngine(self.path, background_compaction=False)
+        metadata = reopened.recover()
+
+        assert metadata.keys() == sorted(f"key{i}" for i in range(10) if i != 3)
+        assert reopened.get("key9") == b"value49"
+        assert reopened.get("key3") is None
+        assert metadata.get("key9").sequence == 50
+
+    def test_torn_tail_is_truncated(self):
+        """Test a partially written record is discarded on recovery"""
+        engine = self.open_engine()
+        self.put(engine, "good", b"intact")
+        self.put(engine, "torn", b"x" * 100)
+        engine.close()
+
+        segment = next(self.path.glob("*.seg"))
+        segment.write_bytes(segment.read_bytes()[:-10])
+
+        reopened = SegmentLogEngine(self.path, background_compaction=False)
+        metadata = reopened.recover()
+
+        assert metadata.keys() == ["good"]
+        assert reopened.get("good") == b"intact"
+        self.put(reopened, "after", b"appended")
+        assert reopened.get("after") == b"appended"
+
+    def test_compaction_reclaims_dead_records(self):
+        """Test compaction drops overwritten records and keeps live ones"""
+        engine = self.open_engine(max_segment_bytes=512)
+        for i in range(200):
+            self.put(engine, f"key{i % 5}", bytes(40))
+        engine.delete("key0")
+        disk_before = engine.stats()["disk_bytes"]
+
+        reclaimed = engine.compact()
+
+        assert reclaimed > 0
+        assert engine.stats()["disk_bytes"] == disk_before - reclaimed
+        for i in range(1, 5):
+            assert engine.get(f"key{i}") == bytes(40)
+        engine.close()
+
+        reopened = SegmentLogEngine(self.path, background_compaction=False)
+        assert reopened.recover().keys() == ["key1", "key2", "key3", "key4"]
+
+    def test_tombstone_survives_compaction(self):
+        """Test a delete is not resurrected by compacting its segment"""
+        engine = self.open_engine(max_segment_bytes=256, compaction_threshold=0.1)
+        self.put(engine, "victim", b"v" * 64)
+        for i in range(10):
+            self.put(engine, "filler", bytes(64))
+        engine.delete("victim")
+        for i in range(10):
+            self.put(engine, "filler", bytes(64))
+        engine.compact()
+        engine.close()
+
+        reopened = SegmentLogEngine(self.path, background_compaction=False)
+        assert "victim" not in reopened.recover()
+        assert reopened.get("victim") is None
+
+    def test_mapped_view_outlives_compaction(self):
+        """Test a zero-copy view stays valid after its record is compacted away"""
+        engine = self.open_engine(max_segment_bytes=4096, compaction_threshold=0.1)
+        self.put(engine, "big", b"B" * 3000)
+        view = engine.get_view("big")
+        for i in range(4):
+            self.put(engine, "big", bytes(3000))
+        engine.compact()
+
+        assert view.readonly and bytes(view) == b"B" * 3000
+        assert engine.get_view("big") == bytes(3000)
+        assert engine.get_view("missing") is None
+        engine.close()
+        assert bytes(view[:1]) == b"B"
+
+
+class TestMetadataIndexCheckpoint:
+    """Test suite for the persisted metadata index"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.path = Path(tempfile.mkdtemp()) / "segments"
+
+    def open_engine(self, **kwargs) -> SegmentLogEngine:
+        """Open an engine without background maintenance"""
+        engine = SegmentLogEngine(self.path, background_compaction=False, **kwargs)
+        engine.recover()
+        return engine
+
+    def test_restart_maps_checkpoint_and_replays_tail(self, monkeypatch):
+        """Test startup only replays records written after the checkpoint"""
+        engine = self.open_engine()
+        for i in range(100):
+            engine.put(f"key{i:03d}", b"v", make_metadata(f"key{i:03d}", 1))
+        engine.checkpoint()
+        engine.put("key100", b"tail", make_metadata("key100", 4))
+        engine.delete("key000")
+        engine.metadata.set_sync_status(["key001"], SyncStatus.SYNCED)
+        engine.close()
+
+        replayed = []
+        original = segment_log.scan_segment
+
+        def counting_scan(path, start=0):
+            records, end = original(path, start)
+            replayed.extend(records)
+            return records, end
+
+        monkeypatch.setattr(segment_log, "scan_segment", counting_scan)
+        reopened = self.open_engine()
+
+        assert replayed == []
+        assert len(reopened.metadata) == 100
+        assert reopened.metadata.get("key000") is None
+        assert reopened.get("key100") == b"tail"
+        assert reopened.metadata.get("key001").sync_status == SyncStatus.SYNCED
+        assert reopened.metadata.summary()["sync_status"]["synced"] == 1
+        assert reopened.metadata.keys("key10*") == ["key100"]
+
+    def test_sync_status_survives_crash_and_compaction(self):
+        """Test status changes are logged, replayed onto current versions and kept by compaction"""
+        engine = self.open_engine(max_segment_bytes=512)
+        engine.put("a", b"x" * 40, make_metadata("a", 40))
+        engine.put("b", b"x" * 40, make_metadata("b", 40))
+        engine.checkpoint()
+        engine.metadata.set_sync_status(["a", "b", "gone"], SyncStatus.SYNCED)
+        engine.put("b", b"y" * 40, make_metadata("b", 40))  # The new version of b is not synced
+        # No close(): the process dies here
+        reopened = self.open_engine(max_segment_bytes=512)
+        assert reopened.metadata.get("a").sync_status == SyncStatus.SYNCED
+        assert reopened.metadata.get("b").sync_status == SyncStatus.NOT_SYNCED
+        assert reopened.metadata.summary()["sync_status"]["synced"] == 1
+
+        for i in range(40):
+            reopened.put(f"filler{i % 4}", b"z" * 40, make_metadata(f"filler{i % 4}", 40))
+        assert reopened.compact() > 0
+        reopened.close()
+        # Without a checkpoint every segment is replayed from scratch
+        reopened.index_path.unlink()
+        rebuilt = self.open_engine()
+        assert rebuilt.metadata.get("a").sync_status == SyncStatus.SYNCED
+        assert rebuilt.metadata.get("b").sync_status == SyncStatus.NOT_SYNCED
+        rebuilt.close()
+
+    def test_checkpoint_copies_unchanged_entries_without_decoding(self, monkeypatch):
+        """Test a checkpoint only encodes entries changed since the last one"""
+        engine = self.open_engine()
+        for i in range(100):
+            engine.put(f"key{i:03d}", b"v", make_metadata(f"key{i:03d}", 1))
+        engine.checkpoint()
+
+        def no_decode(self, i):
+            raise AssertionError("unchanged entry was decoded")
+
+        engine.put("key050", b"new", make_metadata("key050", 3))
+        engine.put("key100", b"tail", make_metadata("key100", 4))
+        engine.delete("key000")
+        engine.metadata.set_sync_status(["key001"], SyncStatus.SYNCED)
+        monkeypatch.setattr(type(engine.metadata._base), "entry", no_decode)
+        engine.checkpoint()
+        monkeypatch.undo()
+        engine.close()
+
+        reopened = self.open_engine()
+        assert reopened.metadata.keys() == [f"key{i:03d}" for i in range(1, 101)]
+        assert reopened.get("key050") == b"new"
+        assert reopened.get("key099") == b"v"
+        assert reopened.metadata.get("key001").sync_status == SyncStatus.SYNCED
+        assert reopened.metadata.summary()["total_items"] == 100
+
+    def test_delete_during_checkpoint_write_stays_deleted(self, monkeypatch):
+        """Test a key removed while its checkpoint is written is not resurrected"""
+        engine = self.open_engine()
+        engine.put("base", b"v", make_metadata("base", 1))
+        engine.checkpoint()
+        engine.put("fresh", b"v", make_metadata("fresh", 1))
+        engine.put("other", b"v", make_metadata("other", 1))
+
+        write_checkpoint = engine.metadata.write_checkpoint
+
+        def delete_then_write(path, info, snapshot):
+            assert engine.delete("fresh") is True
+            write_checkpoint(path, info, snapshot)
+
+        monkeypatch.setattr(engine.metadata, "write_checkpoint", delete_then_write)
+        engine.checkpoint()
+
+        assert engine.metadata.get("fresh") is None
+        assert engine.get("fresh") is None
+        assert list(engine.metadata.iter_keys()) == ["base", "other"]
+        assert len(engine.metadata) == 2
+        monkeypatch.undo()
+        engine.close()
+
+        reopened = self.open_engine()
+        assert reopened.metadata.keys() == ["base", "other"]
+
+    def test_crash_replays_only_records_after_checkpoint(self, monkeypatch):
+        """Test a crash after a checkpoint replays just the log tail"""
+        engine = self.open_engine()
+        for i in range(100):
+            engine.put(f"key{i:03d}", b"v", make_metadata(f"key{i:03d}", 1))
+        engine.checkpoint()
+        engine.put("key100", b"tail", make_metadata("key100", 4))
+        engine.delete("key000")
+        # No close(): the process dies here
+
+        replayed = []
+        original = segment_log.scan_segment
+
+        def counting_scan(path, start=0):
+            records, end = original(path, start)
+            replayed.extend(records)
+            return records, end
+
+        monkeypatch.setattr(segment_log, "scan_segment", counting_scan)
+        reopened = self.open_engine()
+
+        assert [r.key for r in replayed] == ["key100", "key000"]
+        assert len(reopened.metadata) == 100
+        assert reopened.get("key100") == b"tail"
+        assert reopened.get("key000") is None
+
+    def test_corrupt_checkpoint_falls_back_to_replay(self):
+        """Test a checkpoint failing its checksum is ignored"""
+        engine = self.open_engine()
+        engine.put("a", b"1", make_metadata("a", 1))
+        engine.close()
+
+        index = self.path / segment_log.INDEX_FILENAME
+        data = bytearray(index.read_bytes())
+        data[-1] ^= 0xFF
+        index.write_bytes(bytes(data))
+
+        reopened = self.open_engine()
+        assert reopened.metadata.keys() == ["a"]
+        assert reopened.get("a") == b"1"
+
+    def test_compaction_invalidates_stale_checkpoint(self):
+        """Test records moved by compaction are found after restart"""
+        engine = SegmentLogEngine(self.path, max_segment_bytes=512, background_compaction=False)
+        engine.recover()
+        for i in range(100):
+            engine.put(f"key{i % 4}", bytes([i]) * 40, make_metadata(f"key{i % 4}", 40))
+        engine.checkpoint()
+        engine.compact()
+        engine.close()
+
+        reopened = self.open_engine()
+        assert reopened.get("key3") == bytes([99]) * 40
+        assert reopened.metadata.summary()["total_items"] == 4
+
+    def test_range_scan_merges_checkpoint_and_overlay(self):
+        """Test key ranges combine mapped entries with unsaved changes"""
+        engine = self.open_engine()
+        for i in range(0, 20, 2):
+            engine.put(f"node/{i:02d}", b"v", make_metadata(f"node/{i:02d}", 1))
+        engine.checkpoint()
+        engine.put("node/05", b"v", make_metadata("node/05", 1))
+        engine.put("node/06", b"w", make_metadata("node/06", 1))
+        engine.delete("node/08")
+
+        keys = list(engine.metadata.iter_keys("node/", start_after="node/04"))
+        assert keys == ["node/05", "node/06", "node/10", "node/12",
+                        "node/14", "node/16", "node/18"]
+        assert list(engine.metadata.scan_keys("node/1?", start_after="node/12")) == [
+            "node/14", "node/16", "node/18"
+        ]
+        engine.close()
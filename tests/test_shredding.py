@@ -0,0 +1,189 @@
+"""
+Tests for bulk deletion and crypto-shredding
+"""
+
+import pytest
+from pathlib import Path
+import tempfile
+from cosmic_os.storage import LocalFirstStorage, StorageBackend, SegmentLogEngine, Keyring
+from cosmic_os.storage.metadata import StorageMetadata, SyncStatus
+from cosmic_os.storage.sync import OP_DELETE
+from datetime import datetime
+
+
+BACKENDS = [
+    StorageBackend.MEMORY, StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB, StorageBackend.TIERED
+]
+
+
+async def populate(storage):
+    await storage.write_many((f"users/alice/{i}", {"n": i}) for i in range(30))
+    await storage.write_many((f"users/bob/{i}", {"n": i}) for i in range(10))
+    await storage.write("settings", {"theme": "dark"})
+
+
+class TestDeletePrefix:
+    """Test suite for delete_prefix and purge_all"""
+
+    @pytest.mark.parametrize("backend", BACKENDS)
+    @pytest.mark.asyncio
+    async def test_delete_prefix_reports_verifiable_counts(self, backend):
+        """Test one user's keys go and every other key, index and counter stays right"""
+        storage = LocalFirstStorage(Path(tempfile.mkdtemp()), backend=backend, cache_max_bytes=1 << 20)
+        await storage.create_index("n", non_sensitive=True)
+        await populate(storage)
+        assert await storage.read("users/alice/3") == {"n": 3}
+
+        report = await storage.delete_prefix("users/alice/")
+
+        assert report.verified
+        assert report.keys_deleted == 30
+        assert (report.items_before, report.items_after) == (41, 11)
+        assert report.bytes_freed > 0
+        assert report.shredded == []
+        assert await storage.read("users/alice/3") is None
+        assert await storage.list_keys() == sorted([f"users/bob/{i}" for i in range(10)] + ["settings"])
+        assert sorted([key async for key, _ in storage.query({"n": 3})]) == ["users/bob/3"]
+        pending = {change.key: change.op for change in storage.sync_journal.pending()}
+        assert pending["users/alice/0"] == OP_DELETE
+        await storage.close()
+
+    @pytest.mark.parametrize("backend", [StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB])
+    @pytest.mark.asyncio
+    async def test_keyspace_is_shredded_on_exit(self, backend):
+        """Test ciphertext left behind by a deleted keyspace can no longer be opened"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(path, backend=backend)
+        await storage.create_keyspace("users/alice/")
+        await populate(storage)
+        sealed = await storage.read("users/alice/1", decrypt=False)
+        old_key = storage.keyring.key_for("users/alice/1")
+        assert old_key != storage.keyring.key_for("users/bob/1")
+
+        report = await storage.delete_prefix("users/")
+        assert report.verified
+        assert report.shredded == ["users/alice/"]
+        await storage.write("users/alice/new", {"n": "after"})
+        await storage.close()
+
+        reopened = LocalFirstStorage(path, backend=backend)
+        assert reopened.keyring.key_for("users/alice/1") not in (old_key, reopened.keyring.data_key)
+        with pytest.raises(ValueError):
+            reopened._open("users/alice/1", sealed)
+        assert await reopened.read("users/alice/new") == {"n": "after"}
+        assert await reopened.read("settings") == {"theme": "dark"}
+        await reopened.close()
+
+    @pytest.mark.parametrize("backend", BACKENDS)
+    @pytest.mark.asyncio
+    async def test_purge_all_shreds_the_store_key(self, backend):
+        """Test a purge empties the store, replaces its key and leaves it usable"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(path, backend=backend)
+        await populate(storage)
+        await storage.write("plain", {"v": 1}, encrypt=False)
+        sealed = await storage.read("users/bob/1", decrypt=False)
+
+        report = await storage.purge_all()
+
+        assert report.verified
+        assert report.keys_deleted == 42
+        assert report.items_after == 0
+        assert report.shredded == [""]
+        assert (await storage.get_storage_stats())["total_items"] == 0
+        await storage.write("fresh", {"v": 2})
+        assert await storage.read("fresh") == {"v": 2}
+        await storage.close()
+        if backend == StorageBackend.MEMORY:
+            return
+
+        reopened = LocalFirstStorage(path, backend=backend)
+        assert await reopened.list_keys() == ["fresh"]
+        assert await reopened.read("fresh") == {"v": 2}
+        with pytest.raises(ValueError):
+            reopened._open("users/bob/1", sealed)
+        await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_purge_all_empties_the_chunk_store(self):
+        """Test deduplicated values are dropped with their chunks and chunking restarts under the new key"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(path, deduplicate=True)
+        await populate(storage)
+        report = await storage.purge_all()
+        assert report.verified
+        assert storage.blobs.stats()["chunks"] == 0
+        assert storage.blobs.engine.metadata.keys() == []
+
+        await storage.write("fresh", {"v": 2})
+        await storage.close()
+        reopened = LocalFirstStorage(path, deduplicate=True)
+        assert await reopened.read("fresh") == {"v": 2}
+        await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_caller_managed_key_is_not_shredded(self):
+        """Test a key passed in as encryption_key survives a purge"""
+        key = bytes(range(32))
+        storage = LocalFirstStorage(Path(tempfile.mkdtemp()), encryption_key=key)
+        await populate(storage)
+        report = await storage.purge_all()
+        assert report.verified
+        assert report.shredded == []
+        assert storage.keyring.data_key == key
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_keyspace_requires_an_empty_prefix(self):
+        """Test values already sealed with the store key cannot be moved into a keyspace"""
+        storage = LocalFirstStorage(Path(tempfile.mkdtemp()))
+        await populate(storage)
+        with pytest.raises(ValueError):
+            await storage.create_keyspace("users/bob/")
+        with pytest.raises(ValueError):
+            await storage.create_keyspace("")
+        await storage.create_keyspace("users/carol/")
+        with pytest.raises(ValueError):
+            await storage.create_keyspace("users/carol/")
+        await storage.close()
+
+
+class TestKeyring:
+    """Test suite for keyspace key selection"""
+
+    def test_longest_keyspace_wins(self):
+        """Test nested keyspaces take precedence over their parents"""
+        keyring = Keyring(Path(tempfile.mkdtemp()))
+        keyring.create("users/")
+        keyring.create("users/alice/")
+        assert keyring.key_for("users/alice/x") != keyring.key_for("users/bob/x")
+        assert keyring.key_for("users/bob/x") != keyring.data_key
+        assert keyring.key_for("other") == keyring.data_key
+        assert keyring.within("users/a") == ["users/alice/"]
+
+
+class TestSegmentLogPurge:
+    """Test suite for dropping whole segment logs"""
+
+    def test_dropped_segments_stay_dropped_after_restart(self):
+        """Test deleting every key removes segment files rather than appending tombstones"""
+        path = Path(tempfile.mkdtemp())
+        engine = SegmentLogEngine(path, max_segment_bytes=512)
+        metadata = engine.recover()
+        now = datetime.utcnow()
+        for i in range(50):
+            engine.put(f"k{i}", b"v" * 40, StorageMetadata(
+                key=f"k{i}", created_at=now, updated_at=now,
+                sync_status=SyncStatus.NOT_SYNCED, encrypted=False, size_bytes=40
+            ))
+        assert engine.stats()["segments"] > 1
+
+        assert len(engine.delete_prefix("")) == 50
+        assert len(metadata) == 0
+        assert engine.stats()["segments"] == 1
+        assert engine.stats()["disk_bytes"] == 0
+        engine.close()
+
+        reopened = SegmentLogEngine(path)
+        assert len(reopened.recover()) == 0
+        reopened.close()
@@ -0,0 +1,180 @@
+"""
+Tests for point-in-time snapshots
+"""
+
+import pytest
+from pathlib import Path
+import asyncio
+import json
+import tempfile
+from cosmic_os.storage import LocalFirstStorage, StorageBackend, SegmentLogEngine, MemoryEngine
+from cosmic_os.storage.metadata import StorageMetadata, SyncStatus
+from datetime import datetime
+
+
+BACKENDS = [StorageBackend.MEMORY, StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB]
+
+
+class TestStorageSnapshot:
+    """Test suite for LocalFirstStorage.snapshot()"""
+
+    @pytest.mark.parametrize("backend", BACKENDS)
+    @pytest.mark.parametrize("deduplicate", [False, True])
+    @pytest.mark.asyncio
+    async def test_snapshot_ignores_later_writes(self, backend, deduplicate):
+        """Test overwrites, deletes and new keys after the snapshot stay invisible"""
+        storage = LocalFirstStorage(
+            Path(tempfile.mkdtemp()), backend=backend, deduplicate=deduplicate
+        )
+        await storage.write_many((f"doc/{i}", {"v": i}) for i in range(5))
+        await storage.write("raw", b"before", encrypt=False)
+
+        async with storage.snapshot() as snapshot:
+            await storage.write("doc/0", {"v": "changed"})
+            await storage.write("raw", b"after", encrypt=False)
+            await storage.delete("doc/1")
+            await storage.write("doc/9", {"v": 9})
+
+            assert await snapshot.read("doc/0") == {"v": 0}
+            assert await snapshot.read("raw") == b"before"
+            assert await snapshot.read("doc/1") == {"v": 1}
+            assert await snapshot.read("doc/9") is None
+            assert await snapshot.list_keys("doc/*") == [f"doc/{i}" for i in range(5)]
+            stats = await snapshot.get_storage_stats()
+            assert stats["total_items"] == 6
+
+        assert await storage.read("doc/0") == {"v": "changed"}
+        assert await storage.read("doc/1") is None
+        with pytest.raises(ValueError):
+            await snapshot.read("doc/0")
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_snapshot_reads_bypass_cache(self):
+        """Test snapshot values never leak into the live read cache"""
+        storage = LocalFirstStorage(
+            Path(tempfile.mkdtemp()), backend=StorageBackend.LOCAL_FILE, cache_max_bytes=1 << 20
+        )
+        await storage.write("key", {"v": 1})
+        snapshot = storage.snapshot()
+        await storage.write("key", {"v": 2})
+
+        assert await snapshot.read("key") == {"v": 1}
+        assert await storage.read("key") == {"v": 2}
+        snapshot.close()
+        await storage.close()
+
+    @pytest.mark.parametrize("backend", BACKENDS)
+    @pytest.mark.asyncio
+    async def test_export_is_consistent_under_writes(self, backend):
+        """Test an export reflects its starting point while writers keep going"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(path / "store", backend=backend)
+        await storage.write_many((f"doc/{i:03d}", {"v": i}) for i in range(200))
+
+        async def churn():
+            for i in range(200):
+                await storage.write(f"doc/{i:03d}", {"v": -1})
+                await storage.write(f"new/{i:03d}", {"v": i})
+                await asyncio.sleep(0)
+
+        export, _ = await asyncio.gather(
+            storage.export_all(path / "export.jsonl", batch_size=10, workers=2),
+            churn()
+        )
+
+        lines = [json.loads(line) for line in export.read_text().splitlines()]
+        assert [line["value"]["v"] for line in lines] == list(range(200))
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_close_releases_open_snapshots(self):
+        """Test closing the storage closes snapshots left open"""
+        storage = LocalFirstStorage(Path(tempfile.mkdtemp()), backend=StorageBackend.LOCAL_DB)
+        await storage.write("key", {"v": 1})
+        snapshot = storage.snapshot()
+        await storage.close()
+
+        with pytest.raises(ValueError):
+            await snapshot.read("key")
+
+
+class TestSegmentLogSnapshot:
+    """Test suite for segment log snapshots"""
+
+    def test_snapshot_survives_compaction_and_checkpoint(self):
+        """Test a snapshot keeps reading records compaction has moved or dropped"""
+        engine = SegmentLogEngine(
+            Path(tempfile.mkdtemp()), max_segment_bytes=1024,
+            compaction_threshold=0.1, background_compaction=False
+        )
+        engine.recover()
+        now = datetime.utcnow()
+
+        def put(key, value):
+            engine.put(key, value, StorageMetadata(
+                key=key, created_at=now, updated_at=now,
+                sync_status=SyncStatus.NOT_SYNCED, encrypted=False, size_bytes=len(value)
+            ))
+
+        for i in range(20):
+            put(f"k{i:02d}", bytes([i]) * 100)
+        snapshot = engine.snapshot()
+        sequence = snapshot.sequence
+        for i in range(20):
+            put(f"k{i:02d}", b"new" * 30)
+        engine.delete("k00")
+        engine.compact()
+        engine.checkpoint()
+
+        assert snapshot.sequence == sequence == 20
+        assert snapshot.get_many([f"k{i:02d}" for i in range(20)]) == [
+            bytes([i]) * 100 for i in range(20)
+        ]
+        assert len(snapshot.metadata) == 20
+        assert list(snapshot.metadata.iter_keys("k1")) == [f"k1{i}" for i in range(10)]
+        assert engine.get("k00") is None
+        snapshot.close()
+        engine.close()
+
+
+class TestMemorySnapshot:
+    """Test suite for copy-on-write memory snapshots"""
+
+    def test_snapshot_keeps_only_changed_keys(self):
+        """Test a snapshot copies nothing up front and sees its own point in time"""
+        engine = MemoryEngine()
+        now = datetime.utcnow()
+
+        def put(key, value):
+            engine.put(key, value, StorageMetadata(
+                key=key, created_at=now, updated_at=now,
+                sync_status=SyncStatus.NOT_SYNCED, encrypted=False, size_bytes=len(value)
+            ))
+
+        for i in range(3000):
+            put(f"k{i:04d}", b"old")
+        snapshot = engine.snapshot()
+        assert snapshot._undo == {}
+
+        put("k0001", b"new")
+        for i in range(1020, 1030):
+            engine.delete(f"k{i:04d}")
+        put("k5000", b"added")
+        engine.metadata.set_sync_status(["k0002"], SyncStatus.SYNCED)
+
+        assert len(snapshot._undo) == 13
+        assert snapshot.get("k0001") == b"old" and engine.get("k0001") == b"new"
+        assert snapshot.get("k1025") == b"old" and snapshot.get("k5000") is None
+        assert snapshot.metadata.get("k0002").sync_status == SyncStatus.NOT_SYNCED
+        assert engine.metadata.get("k0002").sync_status == SyncStatus.SYNCED
+        assert list(snapshot.metadata.iter_keys()) == [f"k{i:04d}" for i in range(3000)]
+        assert list(snapshot.metadata.iter_keys("k102")) == [f"k102{i}" for i in range(10)]
+        assert len(snapshot.metadata) == 3000
+        assert snapshot.metadata.summary()["sync_status"]["synced"] == 0
+        assert len(engine.metadata) == 2991
+
+        snapshot.close()
+        put("k0003", b"new")
+        assert snapshot._undo.get("k0003") is None
+        assert not engine._snapshots
@@ -0,0 +1,94 @@
+"""
+Tests for incrementally maintained storage statistics
+"""
+
+import pytest
+from pathlib import Path
+import sqlite3
+import tempfile
+from cosmic_os.storage import LocalFirstStorage, StorageBackend, SyncStatus
+from cosmic_os.storage.metadata import StorageCounters
+
+
+BACKENDS = [
+    StorageBackend.MEMORY, StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB, StorageBackend.TIERED
+]
+
+
+def recount(storage):
+    """Summary computed from scratch by walking every record"""
+    counters = StorageCounters()
+    for metadata in storage.metadata_cache.values():
+        counters.account(metadata, 1)
+    return counters.summary()
+
+
+async def populate(storage):
+    await storage.write_many((f"docs/{i}", b"x" * (10 * i)) for i in range(20))
+    await storage.write_many((f"audit/{i}", {"n": i}) for i in range(5))
+    await storage.write("loose", b"", encrypt=False)
+    await storage.write("docs/3", b"y" * 5000)
+    await storage.delete_many(["docs/0", "audit/4"])
+    storage.metadata_cache.set_sync_status(["docs/1", "docs/2", "loose"], SyncStatus.SYNCED)
+
+
+class TestStorageCounters:
+    """Test suite for per-backend incremental counters"""
+
+    @pytest.mark.parametrize("backend", BACKENDS)
+    @pytest.mark.asyncio
+    async def test_counters_match_a_full_recount(self, backend):
+        """Test counters follow writes, overwrites, deletes and sync status changes"""
+        storage = LocalFirstStorage(Path(tempfile.mkdtemp()), backend=backend)
+        await populate(storage)
+
+        stats = await storage.get_storage_stats()
+        assert {name: stats[name] for name in recount(storage)} == recount(storage)
+        assert stats["total_items"] == 24
+        assert stats["sync_status"]["synced"] == 3
+        assert stats["prefixes"]["docs/"]["items"] == 19
+        assert stats["prefixes"]["audit/"]["items"] == 4
+        assert stats["prefixes"][""] == {"items": 1, "size_bytes": 0}
+        assert stats["size_histogram"]["1"] == 1
+        assert stats["size_histogram"]["8192"] == 1
+        assert sum(stats["size_histogram"].values()) == 24
+        await storage.close()
+
+    @pytest.mark.parametrize("backend", [StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB])
+    @pytest.mark.asyncio
+    async def test_counters_persist_across_restart(self, backend):
+        """Test reopened stores serve the same counters without recounting"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(path, backend=backend)
+        await populate(storage)
+        before = await storage.get_storage_stats()
+        await storage.close()
+
+        reopened = LocalFirstStorage(path, backend=backend)
+        after = await reopened.get_storage_stats()
+        for name in ("total_items", "total_size_bytes", "sync_status", "prefixes", "size_histogram"):
+            assert after[name] == before[name]
+        await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_sqlite_database_without_stats_is_recounted(self):
+        """Test a database created before the stats table is counted once on open"""
+        path = Path(tempfile.mkdtemp())
+        storage = LocalFirstStorage(path, backend=StorageBackend.LOCAL_DB)
+        await populate(storage)
+        expected = recount(storage)
+        await storage.close()
+
+        conn = sqlite3.connect(path / "storage.db")
+        with conn:
+            for trigger in ("stats_insert", "stats_delete", "stats_update"):
+                conn.execute(f"DROP TRIGGER {trigger}")
+            conn.execute("DROP TABLE stats")
+            conn.execute("DELETE FROM engine_state WHERE name = 'stats'")
+            conn.execute("UPDATE entries SET size_bucket = NULL")
+        conn.close()
+
+        reopened = LocalFirstStorage(path, backend=StorageBackend.LOCAL_DB)
+        stats = await reopened.get_storage_stats()
+        assert {name: stats[name] for name in expected} == expected
+        await reopened.close()
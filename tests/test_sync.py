@@ -0,0 +1,250 @@
+"""
+Tests for incremental cloud sync
+"""
+
+import pytest
+from pathlib import Path
+import asyncio
+import tempfile
+from datetime import datetime
+from cosmic_os.core import ConstitutionalViolationError
+from cosmic_os.storage import LocalFirstStorage, StorageBackend, SyncStatus
+from cosmic_os.storage.sync import LocalDirectoryRemote, SyncJournal, OP_PUT, JOURNAL_FILENAME
+
+
+class TrackingRemote(LocalDirectoryRemote):
+    """Directory remote that records batches and can fail on demand"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.uploaded = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_keys = set()
+
+    async def put_many(self, items):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if any(item.key in self.fail_keys for item in items):
+                raise ConnectionError("upload failed")
+            await super().put_many(items)
+            self.uploaded.append([item.key for item in items])
+        finally:
+            self.in_flight -= 1
+
+
+class TestSyncJournal:
+    """Test suite for the persistent dirty set"""
+
+    def test_overwrites_compact_without_acknowledgements(self):
+        """Test a journal that is never acknowledged stays bounded by its pending keys"""
+        path = Path(tempfile.mkdtemp())
+        journal = SyncJournal(path).open()
+        for _ in range(60_000):
+            journal.record(["hot"], OP_PUT)
+        journal.record(["cold"], OP_PUT)
+        journal.close()
+
+        assert (path / JOURNAL_FILENAME).stat().st_size < 200_000
+        reopened = SyncJournal(path).open()
+        assert [change.key for change in reopened.pending()] == ["hot", "cold"]
+        assert reopened.sequence == 60_001
+        reopened.close()
+
+
+class TestIncrementalSync:
+    """Test suite for journal-driven sync"""
+
+    def open_storage(self, backend=StorageBackend.LOCAL_FILE, path=None):
+        self.path = path or Path(tempfile.mkdtemp())
+        self.remote = TrackingRemote(self.path / "cloud")
+        return LocalFirstStorage(
+            storage_path=self.path / "node",
+            backend=backend,
+            cloud_sync_enabled=True,
+            user_consent_callback=lambda: True,
+            cloud_remote=self.remote
+        )
+
+    @pytest.mark.asyncio
+    async def test_only_changed_keys_are_shipped(self):
+        """Test a second sync ships just the keys written since the first"""
+        storage = self.open_storage()
+        await storage.write_many((f"k{i:02d}", i) for i in range(20))
+
+        first = await storage.sync_to_cloud()
+        assert len(first) == 20
+        await storage.write(key="k05", data="changed")
+        second = await storage.sync_to_cloud()
+
+        assert second == {"k05": SyncStatus.SYNCED}
+        assert (await storage.get_metadata("k05")).sync_status == SyncStatus.SYNCED
+        assert (await storage.get_storage_stats())["cloud_items"] == 20
+        assert await storage.sync_to_cloud() == {}
+
+    @pytest.mark.parametrize("backend", [
+        StorageBackend.MEMORY, StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB
+    ])
+    @pytest.mark.asyncio
+    async def test_batches_are_bounded_and_concurrent(self, backend):
+        """Test uploads respect batch limits and the concurrency bound"""
+        storage = self.open_storage(backend)
+        await storage.write_many((f"k{i:02d}", "x" * 100) for i in range(40))
+
+        await storage.sync_to_cloud(max_batch_items=5, concurrency=3)
+
+        assert len(self.remote.uploaded) == 8
+        assert all(len(batch) <= 5 for batch in self.remote.uploaded)
+        assert self.remote.max_in_flight == 3
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_size_bound_and_deletions(self):
+        """Test byte budgets split batches and deletes reach the remote"""
+        storage = self.open_storage()
+        await storage.write_many((f"k{i}", "x" * 1000) for i in range(6))
+        await storage.sync_to_cloud(max_batch_bytes=2500)
+        assert [len(batch) for batch in self.remote.uploaded] == [2, 2, 2]
+
+        await storage.delete("k1")
+        assert await storage.sync_to_cloud() == {"k1": SyncStatus.SYNCED}
+        assert not self.remote.object_path("k1").exists()
+        assert self.remote.object_path("k2").exists()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_stays_dirty(self):
+        """Test failures are marked in bulk and retried on the next sync"""
+        storage = self.open_storage()
+        await storage.write_many((f"k{i}", i) for i in range(4))
+        self.remote.fail_keys = {"k2"}
+
+        result = await storage.sync_to_cloud(max_batch_items=2)
+        assert result["k2"] == result["k3"] == SyncStatus.SYNC_FAILED
+        assert result["k0"] == SyncStatus.SYNCED
+        assert (await storage.get_metadata("k3")).sync_status == SyncStatus.SYNC_FAILED
+
+        self.remote.fail_keys = set()
+        assert set(await storage.sync_to_cloud()) == {"k2", "k3"}
+
+    @pytest.mark.asyncio
+    async def test_journal_survives_restart(self):
+        """Test unsynced changes are remembered across restarts"""
+        storage = self.open_storage()
+        await storage.write_many((f"k{i}", i) for i in range(3))
+        await storage.sync_to_cloud()
+        await storage.write(key="k1", data="new")
+        await storage.close()
+
+        reopened = self.open_storage(path=self.path)
+        assert await reopened.sync_to_cloud() == {"k1": SyncStatus.SYNCED}
+
+    @pytest.mark.parametrize("backend", [
+        StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB, StorageBackend.TIERED
+    ])
+    @pytest.mark.asyncio
+    async def test_sync_status_survives_crash(self, backend):
+        """Test keys synced just before a crash come back synced"""
+        storage = self.open_storage(backend)
+        await storage.write_many((f"k{i}", i) for i in range(10))
+        await storage.sync_to_cloud()
+        # Simulate a crash: nothing is checkpointed or closed
+        storage.lease.close()
+
+        reopened = self.open_storage(backend, path=self.path)
+        assert (await reopened.get_metadata("k3")).sync_status == SyncStatus.SYNCED
+        assert (await reopened.get_storage_stats())["cloud_items"] == 10
+        assert len(reopened.sync_journal) == 0
+        await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_changes_are_journaled_before_the_engine(self):
+        """Test a crash between journal and engine ships what is actually stored"""
+        storage = self.open_storage()
+        await storage.write_many((f"k{i}", i) for i in range(2))
+        await storage.sync_to_cloud()
+        await storage.write("k0", "durable", durability="sync")
+        assert storage.sync_journal._committer.syncs >= 1
+
+        def crash(*args):
+            raise SystemError("process died")
+
+        # The process dies after journaling but before the engine applies the change
+        storage.engine.submit_put = crash
+        storage.engine.submit_delete = crash
+        with pytest.raises(SystemError):
+            await storage.write("k2", "never stored")
+        with pytest.raises(SystemError):
+            await storage.delete("k1")
+        storage.lease.close()
+
+        reopened = self.open_storage(path=self.path)
+        assert await reopened.sync_to_cloud() == {
+            "k0": SyncStatus.SYNCED, "k2": SyncStatus.SYNCED, "k1": SyncStatus.SYNCED
+        }
+        assert self.remote.object_path("k0").exists()
+        assert self.remote.object_path("k1").exists()
+        assert not self.remote.object_path("k2").exists()
+        assert len(reopened.sync_journal) == 0
+        await reopened.close()
+
+    @pytest.mark.parametrize("backend", [StorageBackend.LOCAL_FILE, StorageBackend.LOCAL_DB])
+    @pytest.mark.asyncio
+    async def test_write_after_acknowledgement_stays_unsynced(self, backend):
+        """Test a write racing the status update is not stamped as synced"""
+        storage = self.open_storage(backend)
+        await storage.write_many((f"k{i}", i) for i in range(2))
+        acknowledge = storage.sync_journal.acknowledge
+
+        def acknowledge_then_write(changes):
+            acked = acknowledge(changes)
+            # Lands after the upload is acknowledged, before statuses are updated
+            payload, metadata = storage._prepare("k1", "newer", True, datetime.utcnow())
+            storage.sync_journal.record(["k1"], OP_PUT)
+            storage.engine.submit_put("k1", payload, metadata).result()
+            return acked
+
+        storage.sync_journal.acknowledge = acknowledge_then_write
+        await storage.sync_to_cloud()
+
+        assert (await storage.get_metadata("k0")).sync_status == SyncStatus.SYNCED
+        assert (await storage.get_metadata("k1")).sync_status == SyncStatus.NOT_SYNCED
+        assert (await storage.get_storage_stats())["cloud_items"] == 1
+        assert [change.key for change in storage.sync_journal.pending()] == ["k1"]
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_existing_store_is_seeded_once(self):
+        """Test a store without a journal syncs everything not yet synced"""
+        storage = self.open_storage()
+        await storage.write_many((f"k{i}", i) for i in range(3))
+        await storage.close()
+        (self.path / "node" / "sync" / "journal.log").unlink()
+
+        reopened = self.open_storage(path=self.path)
+        assert len(await reopened.sync_to_cloud()) == 3
+
+    @pytest.mark.asyncio
+    async def test_remote_only_sees_ciphertext(self):
+        """Test encrypted values leave the device sealed"""
+        storage = self.open_storage()
+        await storage.write(key="secret", data="plaintext-marker")
+        await storage.sync_to_cloud()
+
+        assert b"plaintext-marker" not in self.remote.object_path("secret").read_bytes()
+
+    @pytest.mark.asyncio
+    async def test_consent_is_checked_first(self):
+        """Test nothing is shipped without consent"""
+        storage = LocalFirstStorage(
+            storage_path=Path(tempfile.mkdtemp()),
+            cloud_sync_enabled=True,
+            user_consent_callback=lambda: False,
+            cloud_remote=LocalDirectoryRemote(Path(tempfile.mkdtemp()))
+        )
+        await storage.write(key="k", data=1)
+
+        with pytest.raises(ConstitutionalViolationError):
+            await storage.sync_to_cloud()
+        assert storage.cloud_remote.batches == 0
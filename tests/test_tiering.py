@@ -0,0 +1,143 @@
+"""
+Tests for the tiered storage backend
+"""
+
+import pytest
+from pathlib import Path
+import tempfile
+from cosmic_os.storage import (
+    LocalFirstStorage, StorageBackend, TierPolicy, TieredEngine, SegmentLogEngine
+)
+from cosmic_os.storage.metadata import StorageMetadata, SyncStatus
+from datetime import datetime
+
+
+def text(i):
+    return {"body": f"entry {i} " * 40}
+
+
+def open_tiered(path, **policy):
+    return LocalFirstStorage(
+        path, backend=StorageBackend.TIERED,
+        tier_policy=TierPolicy(rebalance_interval=3600, **policy)
+    )
+
+
+def drain(engine):
+    """Wait for queued promotions"""
+    engine._writer.submit(lambda: None).result()
+
+
+class TestTieredStorage:
+    """Test suite for LocalFirstStorage on the TIERED backend"""
+
+    @pytest.mark.asyncio
+    async def test_demotes_least_recently_used_over_budget(self):
+        """Test rebalance archives the coldest keys and reads still find them"""
+        storage = open_tiered(Path(tempfile.mkdtemp()), warm_max_bytes=4000)
+        for i in range(10):
+            await storage.write(f"doc/{i}", text(i))
+        await storage.write("raw", b"x" * 500, encrypt=False)
+        for i in range(5, 10):
+            await storage.read(f"doc/{i}")
+
+        result = storage.engine.rebalance()
+        stats = storage.engine.stats()
+
+        assert result["demoted"] > 0
+        assert result["bytes_after"] < result["bytes_before"] / 2
+        assert stats["warm"]["bytes"] <= 4000
+        assert storage.engine.cold.metadata.get("doc/0") is not None
+        assert storage.engine.warm.metadata.get("doc/9") is not None
+        for i in range(10):
+            assert await storage.read(f"doc/{i}") == text(i)
+        assert await storage.read("raw") == b"x" * 500
+        assert await storage.list_keys("doc/*") == [f"doc/{i}" for i in range(10)]
+        assert (await storage.get_storage_stats())["total_items"] == 11
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_idle_keys_archived_and_promoted_on_access(self):
+        """Test keys idle past cold_after go cold and come back after repeated reads"""
+        storage = open_tiered(
+            Path(tempfile.mkdtemp()), cold_after=0, promote_after=2, hot_max_bytes=0
+        )
+        await storage.write_many((f"doc/{i}", text(i)) for i in range(3))
+
+        assert storage.engine.rebalance()["demoted"] == 3
+        assert await storage.read("doc/1") == text(1)
+        assert await storage.read("doc/1") == text(1)
+        drain(storage.engine)
+
+        assert storage.engine.warm.metadata.get("doc/1") is not None
+        assert storage.engine.cold.metadata.get("doc/1") is None
+        assert storage.engine.stats()["promotions"] == 1
+        assert await storage.read("doc/1") == text(1)
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_overwrite_and_delete_of_archived_key(self):
+        """Test writes replace archived copies and deletes reach every tier"""
+        storage = open_tiered(Path(tempfile.mkdtemp()), cold_after=0)
+        await storage.write_many((f"doc/{i}", text(i)) for i in range(3))
+        storage.engine.rebalance()
+
+        await storage.write("doc/0", {"v": "new"})
+        await storage.delete("doc/1")
+
+        assert storage.engine.cold.metadata.get("doc/0") is None
+        assert await storage.read("doc/0") == {"v": "new"}
+        assert await storage.read("doc/1") is None
+        assert await storage.list_keys() == ["doc/0", "doc/2"]
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_archive_survives_restart_and_snapshots(self):
+        """Test archived values persist and snapshots span both tiers"""
+        path = Path(tempfile.mkdtemp())
+        storage = open_tiered(path, cold_after=0)
+        await storage.write_many((f"doc/{i}", text(i)) for i in range(4))
+        storage.engine.rebalance()
+        await storage.write("doc/0", {"v": "warm"})
+        await storage.close()
+
+        reopened = open_tiered(path)
+        async with reopened.snapshot() as snapshot:
+            await reopened.write("doc/3", {"v": "after"})
+            assert await snapshot.read("doc/0") == {"v": "warm"}
+            assert await snapshot.read("doc/3") == text(3)
+        assert await reopened.read("doc/2") == text(2)
+        await reopened.close()
+
+
+class TestTieredEngine:
+    """Test suite for TieredEngine recovery"""
+
+    def test_recovery_keeps_warm_copy_of_interrupted_move(self):
+        """Test a key left in both tiers by a crash resolves to the warm copy"""
+        path = Path(tempfile.mkdtemp())
+        now = datetime.utcnow()
+
+        def metadata(key, value):
+            return StorageMetadata(
+                key=key, created_at=now, updated_at=now,
+                sync_status=SyncStatus.NOT_SYNCED, encrypted=False, size_bytes=len(value)
+            )
+
+        warm, cold = SegmentLogEngine(path / "warm"), SegmentLogEngine(path / "cold")
+        warm.recover()
+        cold.recover()
+        warm.put("key", b"warm", metadata("key", b"warm"))
+        cold.put("key", b"\x00stale", metadata("key", b"stale"))
+        warm.close()
+        cold.close()
+
+        engine = TieredEngine(
+            SegmentLogEngine(path / "warm"), SegmentLogEngine(path / "cold"),
+            TierPolicy(rebalance_interval=3600)
+        )
+        metadata_store = engine.recover()
+        assert engine.get("key") == b"warm"
+        assert len(metadata_store) == 1
+        assert engine.cold.metadata.get("key") is None
+        engine.close()
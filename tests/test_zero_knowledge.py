@@ -0,0 +1,246 @@
+"""
+Tests for zero-knowledge encryption
+"""
+
+import pytest
+import asyncio
+import hashlib
+import io
+import secrets
+from unittest import mock
+from cosmic_os.crypto import (
+    ZeroKnowledgeEncryption, EncryptionAlgorithm, KeyDerivationFunction, EncryptedData, WrappedKey,
+    DerivedKeyCache, shutdown_kdf_executor
+)
+from cosmic_os.crypto import key_derivation, streaming
+
+
+CHEAP_PARAMS = {
+    KeyDerivationFunction.PBKDF2: {"iterations": 1_000},
+    KeyDerivationFunction.SCRYPT: {"n": 2 ** 10, "r": 8, "p": 1},
+    KeyDerivationFunction.ARGON2: {"time_cost": 1, "memory_cost": 1024, "parallelism": 1}
+}
+
+
+def encryption_for(kdf, **kwargs):
+    if kdf == KeyDerivationFunction.ARGON2 and key_derivation.Argon2id is None:
+        pytest.skip("cryptography without Argon2id")
+    return ZeroKnowledgeEncryption(kdf=kdf, kdf_params=CHEAP_PARAMS[kdf], **kwargs)
+
+
+class TestKeyDerivation:
+    """Test suite for passphrase key derivation"""
+
+    @pytest.mark.parametrize("kdf", list(KeyDerivationFunction))
+    def test_derivation_is_deterministic_per_salt(self, kdf):
+        """Test the same passphrase and salt give the same key, and a new salt a new one"""
+        key, salt = encryption_for(kdf).derive_key("correct horse")
+        assert len(key) == 32 and len(salt) == 32
+        again, _ = encryption_for(kdf).derive_key("correct horse", salt)
+        assert again == key
+        assert encryption_for(kdf).derive_key("correct horse")[0] != key
+        assert encryption_for(kdf).derive_key("wrong horse", salt)[0] != key
+
+    def test_pbkdf2_matches_reference(self):
+        """Test the PBKDF2 path is plain PBKDF2-HMAC-SHA256"""
+        salt = b"s" * 32
+        key, _ = ZeroKnowledgeEncryption().derive_key("pw", salt, iterations=1_000)
+        assert key == hashlib.pbkdf2_hmac("sha256", b"pw", salt, 1_000, dklen=32)
+
+    @pytest.mark.parametrize("kdf", list(KeyDerivationFunction))
+    @pytest.mark.asyncio
+    async def test_async_derivation_runs_in_process_pool(self, kdf):
+        """Test keys derived in pool workers match in-process derivation, concurrently"""
+        encryption = encryption_for(kdf, key_cache_ttl=0)
+        salts = [bytes([i]) * 32 for i in range(4)]
+        derived = await asyncio.gather(*(encryption.derive_key_async("pw", salt) for salt in salts))
+        for (key, salt), expected in zip(derived, salts):
+            assert salt == expected
+            assert key == encryption_for(kdf).derive_key("pw", salt)[0]
+        shutdown_kdf_executor()
+
+    @pytest.mark.asyncio
+    async def test_repeated_unlock_hits_cache_until_lock(self):
+        """Test a second unlock skips the KDF and lock() forces it again"""
+        encryption = encryption_for(KeyDerivationFunction.PBKDF2)
+        key, salt = await encryption.derive_key_async("pw")
+        with mock.patch.object(key_derivation.hashlib, "pbkdf2_hmac") as kdf:
+            assert encryption.derive_key("pw", salt)[0] == key
+            assert (await encryption.derive_key_async("pw", salt))[0] == key
+            assert not kdf.called
+            assert encryption.derive_key("other", salt)[0] != key
+        encryption.lock()
+        assert len(encryption.key_cache) == 0
+        assert encryption.derive_key("pw", salt)[0] == key
+        shutdown_kdf_executor()
+
+    def test_cache_entries_expire(self):
+        """Test cached keys are dropped after their TTL"""
+        cache = DerivedKeyCache(ttl=10)
+        entry = cache.cache_key("pbkdf2", b"pw", b"salt", {"iterations": 1})
+        with mock.patch.object(key_derivation.time, "monotonic", return_value=100.0):
+            cache.put(entry, b"k" * 32)
+            assert cache.get(entry) == b"k" * 32
+        with mock.patch.object(key_derivation.time, "monotonic", return_value=110.0):
+            assert cache.get(entry) is None
+        assert len(cache) == 0
+
+
+class TestEnvelopeEncryption:
+    """Test suite for data keys wrapped under a passphrase-derived master key"""
+
+    def test_payload_references_its_wrapped_key(self):
+        """Test a payload sealed with a data key opens after unlocking the wrapped key"""
+        encryption = encryption_for(KeyDerivationFunction.PBKDF2)
+        master_key, salt = encryption.derive_key("pw")
+        data_key = encryption.generate_data_key()
+        wrapped = encryption.wrap_key(data_key, master_key, salt)
+        sealed = encryption.encrypt(b"payload", data_key, key_id=wrapped.key_id)
+
+        restored = EncryptedData.from_dict(sealed.to_dict())
+        assert restored.key_id == wrapped.key_id
+        stored = WrappedKey.from_dict(wrapped.to_dict())
+        encryption.lock()
+        assert encryption.decrypt(restored, encryption.unlock_key(stored, "pw")) == b"payload"
+        with pytest.raises(ValueError):
+            encryption.unlock_key(stored, "not pw")
+
+    @pytest.mark.asyncio
+    async def test_passphrase_change_rewraps_keys_only(self):
+        """Test changing the passphrase leaves payloads untouched and the old passphrase useless"""
+        encryption = encryption_for(KeyDerivationFunction.SCRYPT)
+        master_key, salt = await encryption.derive_key_async("old")
+        data_keys = [encryption.generate_data_key() for _ in range(3)]
+        wrapped = [encryption.wrap_key(key, master_key, salt) for key in data_keys]
+        sealed = [
+            encryption.encrypt(f"record {i}".encode(), key, key_id=w.key_id)
+            for i, (key, w) in enumerate(zip(data_keys, wrapped))
+        ]
+
+        rewrapped = encryption.rewrap_keys(wrapped, master_key, "new")
+        assert [w.key_id for w in rewrapped] == [w.key_id for w in wrapped]
+        assert rewrapped[0].salt != salt
+        for i, (w, payload) in enumerate(zip(rewrapped, sealed)):
+            data_key = await encryption.unlock_key_async(w, "new")
+            assert encryption.decrypt(payload, data_key) == f"record {i}".encode()
+            with pytest.raises(ValueError):
+                encryption.unlock_key(w, "old")
+        assert encryption.change_passphrase(wrapped[0], master_key, "other").key_id == wrapped[0].key_id
+        with pytest.raises(ValueError):
+            encryption.change_passphrase(sealed[0], data_keys[0], "other")
+        shutdown_kdf_executor()
+
+    def test_change_passphrase_reencrypts_passphrase_sealed_data(self):
+        """Test data sealed directly with a passphrase key is re-encrypted under the new one"""
+        encryption = encryption_for(KeyDerivationFunction.PBKDF2)
+        key, _ = encryption.derive_key("old")
+        sealed = encryption.encrypt(b"payload", key, metadata={"kind": "note"})
+        changed = encryption.change_passphrase(sealed, key, "new")
+        new_key, _ = encryption.derive_key("new", changed.salt)
+        assert encryption.decrypt(changed, new_key) == b"payload"
+        assert changed.metadata == {"kind": "note"}
+        assert changed.kdf_params == CHEAP_PARAMS[KeyDerivationFunction.PBKDF2]
+
+
+async def pieces(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+class TestStreamingEncryption:
+    """Test suite for chunked stream encryption"""
+
+    @pytest.mark.parametrize("algorithm", list(EncryptionAlgorithm))
+    @pytest.mark.parametrize("size", [0, 1, 100, 1000, 1001])
+    def test_round_trip_across_chunk_boundaries(self, algorithm, size):
+        """Test empty, partial and exact-multiple inputs round trip, in parallel too"""
+        encryption = ZeroKnowledgeEncryption(algorithm=algorithm)
+        key = encryption.generate_data_key()
+        data = secrets.token_bytes(size)
+        sealed = io.BytesIO()
+        assert encryption.encrypt_stream(io.BytesIO(data), sealed, key, b"export", chunk_size=100, workers=4) == size
+        for workers in (1, 3):
+            opened = io.BytesIO()
+            encryption.decrypt_stream(io.BytesIO(sealed.getvalue()), opened, key, b"export", workers=workers)
+            assert opened.getvalue() == data
+
+    def test_tampering_is_detected(self):
+        """Test truncation, reordering, bit flips and wrong associated data all fail"""
+        encryption = ZeroKnowledgeEncryption()
+        key = encryption.generate_data_key()
+        sealed = io.BytesIO()
+        encryption.encrypt_stream(io.BytesIO(b"x" * 350), sealed, key, chunk_size=100)
+        stream = sealed.getvalue()
+        header, block = streaming.HEADER.size, 100 + streaming.TAG_SIZE
+        chunks = [stream[header + i * block:header + (i + 1) * block] for i in range(4)]
+
+        variants = [
+            stream[:header + 2 * block],  # cut at a chunk boundary
+            stream[:header],  # header only
+            stream[:-1],
+            stream[:header] + chunks[1] + chunks[0] + chunks[2] + chunks[3],
+            stream[:header] + chunks[0] + chunks[0] + chunks[2] + chunks[3],
+            stream[:header + 5] + bytes([stream[header + 5] ^ 1]) + stream[header + 6:],
+            b""
+        ]
+        for variant in variants:
+            with pytest.raises(ValueError):
+                encryption.decrypt_stream(io.BytesIO(variant), io.BytesIO(), key)
+        with pytest.raises(ValueError):
+            encryption.decrypt_stream(io.BytesIO(stream), io.BytesIO(), key, b"other")
+
+    @pytest.mark.asyncio
+    async def test_async_iterators_interoperate_with_files(self):
+        """Test async streams use the same format and rebuffer arbitrary piece sizes"""
+        encryption = ZeroKnowledgeEncryption(algorithm=EncryptionAlgorithm.CHACHA20_POLY1305)
+        key = encryption.generate_data_key()
+        data = secrets.token_bytes(10_000)
+        sealed = await collect(encryption.encrypt_stream_async(pieces(data, 777), key, chunk_size=1024))
+
+        opened = io.BytesIO()
+        encryption.decrypt_stream(io.BytesIO(sealed), opened, key)
+        assert opened.getvalue() == data
+        assert await collect(encryption.decrypt_stream_async(pieces(sealed, 333), key)) == data
+        with pytest.raises(ValueError):
+            await collect(encryption.decrypt_stream_async(pieces(sealed[:-1024], 333), key))
+
+
+class TestBatchEncryption:
+    """Test suite for encrypt_many and decrypt_many"""
+
+    @pytest.mark.parametrize("parallel_min_bytes", [0, 1 << 30])
+    def test_batches_round_trip_in_order(self, parallel_min_bytes):
+        """Test per-item keys and associated data, inline and fanned out across threads"""
+        encryption = ZeroKnowledgeEncryption(batch_workers=4, parallel_min_bytes=parallel_min_bytes)
+        keys = [encryption.generate_data_key() for _ in range(3)]
+        plaintexts = [f"record {i}".encode() * (i % 7) for i in range(101)]
+        item_keys = [keys[i % 3] for i in range(101)]
+        aads = [f"key/{i}".encode() for i in range(101)]
+
+        sealed = encryption.encrypt_many(plaintexts, item_keys, aads)
+        assert len({item.nonce for item in sealed}) == 101
+        assert encryption.decrypt_many(sealed, item_keys, aads) == plaintexts
+        assert encryption.decrypt(sealed[50], item_keys[50], aads[50]) == plaintexts[50]
+
+        shared = bytearray(keys[0])
+        sealed = encryption.encrypt_many(plaintexts, shared)
+        assert encryption.decrypt_many(sealed, shared) == plaintexts
+        assert encryption.decrypt_many(sealed, [bytearray(keys[0])] * 101) == plaintexts
+        encryption.close()
+
+    def test_failure_names_the_item(self):
+        """Test a bad item fails the batch with its index"""
+        encryption = ZeroKnowledgeEncryption(parallel_min_bytes=0)
+        key = encryption.generate_data_key()
+        sealed = encryption.encrypt_many([b"a", b"b", b"c"], key)
+        assert encryption.decrypt_many(sealed, key) == [b"a", b"b", b"c"]
+        sealed[1].ciphertext = bytes([sealed[1].ciphertext[0] ^ 1]) + sealed[1].ciphertext[1:]
+        with pytest.raises(ValueError, match="item 1"):
+            encryption.decrypt_many(sealed, key)
+        with pytest.raises(ValueError):
+            encryption.encrypt_many([b"a", b"b"], [key])
+        encryption.close()